@@ -0,0 +1,91 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""Evaluate independent work on a model in a pool of forked processes.
+
+The workers are forked from the parent process so that they share a
+copy of the model (and of any other state, such as compiled functions)
+without it having to be pickled. Workers must only read the model, as
+any changes they make are lost with the worker, and must return plain
+(picklable) data: results that refer to model components should do so
+by their position in a deterministic iteration or by id() (which, as
+the workers are forked, is the id of the component in the parent).
+"""
+
+import logging
+import multiprocessing
+import os
+
+logger = logging.getLogger('pyomo.common')
+
+# The (items, func) being evaluated. This is set in the parent
+# immediately before the worker processes are forked.
+_task = None
+
+
+def fork_available():
+    """Return True if worker processes can be forked on this platform"""
+    if not hasattr(os, 'fork'):
+        return False
+    get_all_start_methods = getattr(
+        multiprocessing, 'get_all_start_methods', None)
+    if get_all_start_methods is None:
+        # Python 2: multiprocessing always forks on POSIX
+        return True
+    return 'fork' in get_all_start_methods()
+
+
+def _evaluate_chunk(bounds):
+    items, func = _task
+    return [func(items[i]) for i in range(*bounds)]
+
+
+def parallel_map(func, items, num_workers, chunks_per_worker=4):
+    """Return [func(item) for item in items], evaluated in a pool of
+    num_workers forked worker processes
+
+    The items are split into contiguous chunks that are dispatched to
+    the workers; the results are returned in the order of items. func
+    must only read the model (any changes it makes are lost with the
+    worker) and must return picklable data.
+
+    If num_workers is less than 2, there are too few items, or worker
+    processes cannot be forked on this platform, func is evaluated
+    serially in this process.
+    """
+    global _task
+    items = list(items)
+    n = len(items)
+    if num_workers < 2 or n < 2:
+        return [func(item) for item in items]
+    if not fork_available():
+        logger.warning(
+            "Parallel evaluation requires forking worker processes, which "
+            "is not supported on this platform. Evaluating serially.")
+        return [func(item) for item in items]
+
+    num_chunks = min(n, num_workers * chunks_per_worker)
+    chunks = [(n * k // num_chunks, n * (k + 1) // num_chunks)
+              for k in range(num_chunks)]
+    if hasattr(multiprocessing, 'get_context'):
+        context = multiprocessing.get_context('fork')
+    else:
+        context = multiprocessing
+    _task = (items, func)
+    try:
+        pool = context.Pool(min(num_workers, num_chunks))
+        try:
+            chunk_results = pool.map(_evaluate_chunk, chunks)
+        finally:
+            pool.terminate()
+            pool.join()
+    finally:
+        _task = None
+    return [result for chunk in chunk_results for result in chunk]
@@ -0,0 +1,163 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""
+A cache of interval bounds on expressions.
+
+Computing bounds on an expression (e.g., with compute_bounds_on_expr)
+requires a walk of the entire expression tree. Transformations such as
+gdp.bigm compute bounds on the same expressions many times, usually
+without the bounds on the variables having changed in between. A
+BoundsCache stores the bounds computed for an expression together with
+a "version stamp": the bounds (or fixed values) of the variables and
+the values of the mutable parameters appearing in the expression. A
+cached entry is only returned while the stamp is unchanged, so
+tightening (or relaxing) the bounds of any variable in an expression
+transparently invalidates the bounds cached for it.
+
+Expressions are cached by identity. Pyomo expressions are immutable,
+but the expression held by a named Expression component is not: the
+cache should be cleared if named Expressions are modified while it is
+in use.
+"""
+
+from pyomo.core.expr.numvalue import nonpyomo_leaf_types, value
+from pyomo.core.expr.visitor import (
+    identify_variables, identify_mutable_parameters)
+
+
+class BoundsCache(object):
+    """Cache of interval bounds on expressions keyed by expression
+    identity and a version stamp of the bounds of the variables in the
+    expression.
+
+    A single BoundsCache may be passed to fbbt, compute_bounds_on_expr,
+    and the GDP transformations (with the bounds_cache option) so that
+    bounds computed by one are reused by the others. Keeping the same
+    BoundsCache across repeated transformations of a model reuses the
+    bounds of all expressions whose variable bounds have not changed.
+
+    Attributes
+    ----------
+    hits: int
+        The number of lookups answered from the cache
+    misses: int
+        The number of lookups that were not in the cache (or were stale)
+    """
+
+    def __init__(self):
+        # id(expr) -> (expr, vars, params)
+        self._leaves = {}
+        # id(expr) -> (stamp, feasibility_tol, lb, ub)
+        self._bounds = {}
+        # id(con) -> (con, key); see is_fixpoint()
+        # (the expressions / constraints are held so that ids are not
+        # reused while they are in the cache)
+        self._fixpoints = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._bounds)
+
+    def clear(self):
+        """Remove all entries from the cache"""
+        self._leaves.clear()
+        self._bounds.clear()
+        self._fixpoints.clear()
+
+    def _get_leaves(self, expr):
+        leaves = self._leaves.get(id(expr), None)
+        if leaves is None:
+            # Note: we hold on to expr so that its id is not reused
+            # while it is in the cache
+            leaves = self._leaves[id(expr)] = (
+                expr,
+                tuple(identify_variables(expr, include_fixed=True)),
+                tuple(identify_mutable_parameters(expr)),
+            )
+        return leaves
+
+    def stamp(self, expr):
+        """Return the version stamp for expr: the bounds (or values, if
+        fixed) of the variables and the values of the mutable
+        parameters in expr
+
+        """
+        _, _vars, params = self._get_leaves(expr)
+        return (
+            tuple((v.value, None) if v.fixed else (v.lb, v.ub)
+                  for v in _vars),
+            tuple(value(p) for p in params),
+        )
+
+    def vars(self, expr):
+        """Return the variables (including fixed variables) in expr"""
+        return self._get_leaves(expr)[1]
+
+    def get_bounds(self, expr, feasibility_tol=1e-8, stamp=None):
+        """Return the cached (lb, ub) for expr, or None if bounds on
+        expr have not been cached or the bounds of its variables
+        changed since they were
+
+        Parameters
+        ----------
+        expr: pyomo.core.expr.numeric_expr.ExpressionBase
+        feasibility_tol: float
+            The feasibility_tol used to compute the bounds (see fbbt)
+        stamp: tuple
+            The current stamp of expr, if it is already known
+        """
+        if expr.__class__ in nonpyomo_leaf_types:
+            return expr, expr
+        entry = self._bounds.get(id(expr), None)
+        if entry is not None and entry[1] == feasibility_tol:
+            if stamp is None:
+                stamp = self.stamp(expr)
+            if entry[0] == stamp:
+                self.hits += 1
+                return entry[2], entry[3]
+        self.misses += 1
+        return None
+
+    def set_bounds(self, expr, lb, ub, feasibility_tol=1e-8, stamp=None):
+        """Cache the bounds (lb, ub) computed for expr
+
+        Parameters
+        ----------
+        expr: pyomo.core.expr.numeric_expr.ExpressionBase
+        lb: float
+        ub: float
+        feasibility_tol: float
+            The feasibility_tol used to compute the bounds (see fbbt)
+        stamp: tuple
+            The stamp of expr at the time the bounds were computed. If
+            None, the current stamp is used.
+        """
+        if expr.__class__ in nonpyomo_leaf_types:
+            return
+        if stamp is None:
+            stamp = self.stamp(expr)
+        self._bounds[id(expr)] = (stamp, feasibility_tol, lb, ub)
+
+    def is_fixpoint(self, con, key):
+        """Return True if FBBT on con has been recorded (with
+        set_fixpoint) to not change any variable bounds in the state
+        described by key
+
+        """
+        entry = self._fixpoints.get(id(con), None)
+        if entry is not None and entry[1] == key:
+            self.hits += 1
+            return True
+        return False
+
+    def set_fixpoint(self, con, key):
+        self._fixpoints[id(con)] = (con, key)
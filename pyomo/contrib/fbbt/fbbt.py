@@ -14,7 +14,10 @@ from pyomo.core.expr.visitor import ExpressionValueVisitor, identify_variables
 from pyomo.core.expr.numvalue import nonpyomo_leaf_types, value
 from pyomo.core.expr.numvalue import is_fixed
 import pyomo.contrib.fbbt.interval as interval
+import heapq
+import itertools
 import math
+import time
 from pyomo.core.base.block import Block
 from pyomo.core.base.constraint import Constraint
 from pyomo.core.base.var import Var
@@ -23,6 +26,7 @@ from pyomo.core.base.expression import _GeneralExpressionData, SimpleExpression
 import logging
 from pyomo.common.errors import InfeasibleConstraintException, PyomoException
 from pyomo.common.config import ConfigBlock, ConfigValue, In, NonNegativeFloat, NonNegativeInt
+from pyomo.common.dependencies import numpy_available
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +69,76 @@ class FBBTException(PyomoException):
     pass
 
 
+class FBBTPhaseStatistics(object):
+    """
+    Statistics for one phase of FBBT on a Block
+
+    Attributes
+    ----------
+    name: str
+    constraints_processed: int
+        The number of times FBBT was performed on a constraint
+    bounds_tightened: int
+        The number of variable bounds that improved by more than improvement_tol
+    time: float
+        Wall-clock time spent in the phase (seconds)
+    """
+    __slots__ = ('name', 'constraints_processed', 'bounds_tightened', 'time')
+
+    def __init__(self, name):
+        self.name = name
+        self.constraints_processed = 0
+        self.bounds_tightened = 0
+        self.time = 0.0
+
+
+class FBBTStatistics(object):
+    """
+    Statistics collected when performing FBBT on a Block. Pass an
+    instance to fbbt() with the stats argument:
+
+    >>> stats = FBBTStatistics()
+    >>> fbbt(m, stats=stats)
+    >>> print(stats)
+
+    Attributes
+    ----------
+    phases: list of FBBTPhaseStatistics
+    termination: str
+        Why propagation stopped: 'converged' (no pending constraints),
+        'iteration limit' (see max_iter) or 'time limit'
+    """
+    def __init__(self):
+        self.phases = list()
+        self.termination = None
+
+    def new_phase(self, name):
+        phase = FBBTPhaseStatistics(name)
+        self.phases.append(phase)
+        return phase
+
+    @property
+    def constraints_processed(self):
+        return sum(p.constraints_processed for p in self.phases)
+
+    @property
+    def bounds_tightened(self):
+        return sum(p.bounds_tightened for p in self.phases)
+
+    @property
+    def time(self):
+        return sum(p.time for p in self.phases)
+
+    def __str__(self):
+        lines = ['%-16s %12s %12s %10s' % ('Phase', 'Constraints', 'Tightened', 'Time [s]')]
+        for p in self.phases + [self]:
+            name = p.name if p is not self else 'Total'
+            lines.append('%-16s %12d %12d %10.3f' % (
+                name, p.constraints_processed, p.bounds_tightened, p.time))
+        lines.append('Termination: %s' % (self.termination,))
+        return '\n'.join(lines)
+
+
 def _prop_bnds_leaf_to_root_ProductExpression(node, bnds_dict, feasibility_tol):
     """
 
@@ -1246,11 +1320,33 @@ def _fbbt_con(con, config):
     if not con.active:
         return ComponentMap()
 
+    cache = config.bounds_cache
+    if cache is not None and con.body.__class__ in nonpyomo_leaf_types:
+        cache = None
+    if cache is not None:
+        # If FBBT on this constraint did not change any bounds the last
+        # time it was performed with the same variable bounds, it will
+        # not change them now either.
+        stamp = cache.stamp(con.body)
+        fixpoint_key = (stamp, value(con.lower), value(con.upper),
+                        config.integer_tol, config.feasibility_tol)
+        if not config.deactivate_satisfied_constraints and cache.is_fixpoint(con, fixpoint_key):
+            new_var_bounds = ComponentMap()
+            for v in cache.vars(con.body):
+                if v.is_fixed():
+                    new_var_bounds[v] = (value(v.value), value(v.value))
+                else:
+                    new_var_bounds[v] = (value(v.lb), value(v.ub))
+            return new_var_bounds
+
     bnds_dict = ComponentMap()  # a dictionary to store the bounds of every node in the tree
 
     # a walker to propagate bounds from the variables to the root
     visitorA = _FBBTVisitorLeafToRoot(bnds_dict, feasibility_tol=config.feasibility_tol)
     visitorA.dfs_postorder_stack(con.body)
+    if cache is not None:
+        lb, ub = bnds_dict[con.body]
+        cache.set_bounds(con.body, lb, ub, config.feasibility_tol, stamp)
 
     # Now we need to replace the bounds in bnds_dict for the root
     # node with the bounds on the constraint (if those bounds are
@@ -1294,9 +1390,19 @@ def _fbbt_con(con, config):
             if ub == interval.inf:
                 ub = None
             new_var_bounds[_node] = (lb, ub)
+    if cache is not None and cache.stamp(con.body) == stamp:
+        cache.set_fixpoint(con, fixpoint_key)
     return new_var_bounds
 
 
+def _relative_improvement(old, new):
+    """The improvement of a bound from old to new relative to the magnitude
+    of old (replacing an infinite bound is an infinite improvement)"""
+    if old == -interval.inf or old == interval.inf:
+        return interval.inf
+    return abs(new - old) / max(1.0, abs(old))
+
+
 def _fbbt_block(m, config):
     """
     Feasibility based bounds tightening (FBBT) for a block or model. This
@@ -1308,6 +1414,14 @@ def _fbbt_block(m, config):
     This process is continued until no variable bounds are improved
     by more than tol.
 
+    Constraints waiting to be processed again are kept in a priority
+    queue keyed by the largest relative improvement of the bounds of
+    their variables since they were queued, so that the most
+    promising propagations are performed first. Every constraint
+    appears in the queue at most once. Propagation stops when the queue
+    is empty, after FBBT has been performed max_iter times the number
+    of constraints in the Block, or when time_limit is exceeded.
+
     Parameters
     ----------
     m: pyomo.core.base.block.Block or pyomo.core.base.PyomoModel.ConcreteModel
@@ -1320,6 +1434,15 @@ def _fbbt_block(m, config):
         A ComponentMap mapping from variables a tuple containing the lower and upper bounds, respectively, computed
         from FBBT.
     """
+    stats = config.stats
+    if stats is None:
+        stats = FBBTStatistics()
+    start_time = time.time()
+    if config.time_limit is None:
+        deadline = None
+    else:
+        deadline = start_time + config.time_limit
+
     new_var_bounds = ComponentMap()
     var_to_con_map = ComponentMap()
     var_lbs = ComponentMap()
@@ -1347,49 +1470,69 @@ def _fbbt_block(m, config):
             _v.setub(_v.value)
             new_var_bounds[_v] = (_v.value, _v.value)
 
-    n_fbbt = 0
+    # The priority queue holds (-improvement, counter, constraint). The
+    # improvement with which a constraint is currently queued is stored
+    # in pending; queue entries that do not match are stale and skipped.
+    queue = list()
+    pending = ComponentMap()
+    counter = itertools.count()
 
-    improved_vars = ComponentSet()
-    for c in m.component_data_objects(ctype=Constraint, active=True,
-                                      descend_into=True, sort=True):
+    def _process(c, phase):
         _new_var_bounds = _fbbt_con(c, config)
-        n_fbbt += 1
+        phase.constraints_processed += 1
         new_var_bounds.update(_new_var_bounds)
         for v, bnds in _new_var_bounds.items():
             vlb, vub = bnds
+            improvement = 0
             if vlb is not None:
                 if vlb > var_lbs[v] + config.improvement_tol:
-                    improved_vars.add(v)
+                    improvement = _relative_improvement(var_lbs[v], vlb)
+                    phase.bounds_tightened += 1
                     var_lbs[v] = vlb
             if vub is not None:
                 if vub < var_ubs[v] - config.improvement_tol:
-                    improved_vars.add(v)
+                    improvement = max(improvement, _relative_improvement(var_ubs[v], vub))
+                    phase.bounds_tightened += 1
                     var_ubs[v] = vub
-
-    while len(improved_vars) > 0:
+            if not improvement:
+                continue
+            for _c in var_to_con_map[v]:
+                if pending.get(_c, 0) < improvement:
+                    pending[_c] = improvement
+                    heapq.heappush(queue, (-improvement, next(counter), _c))
+
+    phase = stats.new_phase('initial')
+    for c in m.component_data_objects(ctype=Constraint, active=True,
+                                      descend_into=True, sort=True):
+        _process(c, phase)
+    n_fbbt = phase.constraints_processed
+    phase.time = time.time() - start_time
+
+    phase = stats.new_phase('propagation')
+    phase_start = time.time()
+    stats.termination = 'converged'
+    while queue:
         if n_fbbt >= n_cons * config.max_iter:
+            stats.termination = 'iteration limit'
             break
-        v = improved_vars.pop()
-        for c in var_to_con_map[v]:
-            _new_var_bounds = _fbbt_con(c, config)
-            n_fbbt += 1
-            new_var_bounds.update(_new_var_bounds)
-            for _v, bnds in _new_var_bounds.items():
-                _vlb, _vub = bnds
-                if _vlb is not None:
-                    if _vlb > var_lbs[_v] + config.improvement_tol:
-                        improved_vars.add(_v)
-                        var_lbs[_v] = _vlb
-                if _vub is not None:
-                    if _vub < var_ubs[_v] - config.improvement_tol:
-                        improved_vars.add(_v)
-                        var_ubs[_v] = _vub
+        if deadline is not None and time.time() >= deadline:
+            stats.termination = 'time limit'
+            break
+        neg_improvement, _, c = heapq.heappop(queue)
+        if pending.get(c, None) != -neg_improvement:
+            continue
+        del pending[c]
+        _process(c, phase)
+        n_fbbt += 1
+    phase.time = time.time() - phase_start
 
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug('FBBT statistics for %s:\n%s' % (m.name, stats))
     return new_var_bounds
 
 
 def fbbt(comp, deactivate_satisfied_constraints=False, integer_tol=1e-5, feasibility_tol=1e-8, max_iter=10,
-         improvement_tol=1e-4):
+         improvement_tol=1e-4, vectorized=False, time_limit=None, stats=None, bounds_cache=None):
     """
     Perform FBBT on a constraint, block, or model. For more control,
     use _fbbt_con and _fbbt_block. For detailed documentation, see
@@ -1423,7 +1566,26 @@ def fbbt(comp, deactivate_satisfied_constraints=False, integer_tol=1e-5, feasibi
         Used for Blocks only (i.e., comp.ctype == Block). When performing FBBT on a Block, we first perform FBBT on
         every constraint in the Block. We then attempt to identify which constraints to repeat FBBT on based on the
         improvement in variable bounds. If the bounds on a variable improve by more than improvement_tol, then FBBT
-        is performed on the constraints using that Var.
+        is performed on the constraints using that Var. Constraints whose variables improved the most (relative
+        to the magnitude of the previous bound) are processed first.
+    vectorized: bool
+        Used for Blocks only (i.e., comp.ctype == Block). If True, the linear and bilinear constraints in the
+        Block are propagated simultaneously using vectorized (numpy) operations on a sparse representation of
+        the constraints, and only the remaining nonlinear constraints are processed one at a time (see
+        pyomo.contrib.fbbt.vectorized). Every vectorized sweep processes all linear and bilinear constraints,
+        so max_iter limits the number of sweeps. Requires numpy.
+    time_limit: float
+        Used for Blocks only (i.e., comp.ctype == Block). Stop propagating bounds after time_limit seconds (the
+        bounds computed so far are valid). The default is no time limit.
+    stats: FBBTStatistics
+        Used for Blocks only (i.e., comp.ctype == Block). If provided, statistics for each phase of FBBT (the
+        number of constraints processed, the number of bounds tightened, and the time) are recorded in this
+        object.
+    bounds_cache: BoundsCache
+        If provided, the bounds computed on the body of each constraint are stored in this cache (see
+        pyomo.contrib.fbbt.bounds_cache), where they can be reused by compute_bounds_on_expr and the GDP
+        transformations. Constraints on which FBBT was performed with the same cache and did not change any
+        variable bounds are skipped as long as the bounds on their variables are unchanged.
 
     Returns
     -------
@@ -1442,6 +1604,10 @@ def fbbt(comp, deactivate_satisfied_constraints=False, integer_tol=1e-5, feasibi
     config.declare('feasibility_tol', ft_config)
     config.declare('max_iter', mi_config)
     config.declare('improvement_tol', improvement_tol_config)
+    config.declare('vectorized', ConfigValue(default=vectorized, domain=In({True, False})))
+    config.declare('time_limit', ConfigValue(default=time_limit, domain=NonNegativeFloat))
+    config.declare('stats', ConfigValue(default=stats))
+    config.declare('bounds_cache', ConfigValue(default=bounds_cache))
 
     new_var_bounds = ComponentMap()
     if comp.ctype == Constraint:
@@ -1453,7 +1619,13 @@ def fbbt(comp, deactivate_satisfied_constraints=False, integer_tol=1e-5, feasibi
             _new_var_bounds = _fbbt_con(comp, config)
             new_var_bounds.update(_new_var_bounds)
     elif comp.ctype in {Block, Disjunct}:
-        _new_var_bounds = _fbbt_block(comp, config)
+        if config.vectorized:
+            if not numpy_available:
+                raise FBBTException('Vectorized FBBT requires numpy, which is not available')
+            from pyomo.contrib.fbbt.vectorized import _fbbt_block_vectorized
+            _new_var_bounds = _fbbt_block_vectorized(comp, config)
+        else:
+            _new_var_bounds = _fbbt_block(comp, config)
         new_var_bounds.update(_new_var_bounds)
     else:
         raise FBBTException('Cannot perform FBBT on objects of type {0}'.format(type(comp)))
@@ -1461,23 +1633,33 @@ def fbbt(comp, deactivate_satisfied_constraints=False, integer_tol=1e-5, feasibi
     return new_var_bounds
 
 
-def compute_bounds_on_expr(expr):
+def compute_bounds_on_expr(expr, bounds_cache=None):
     """
     Compute bounds on an expression based on the bounds on the variables in the expression.
 
     Parameters
     ----------
     expr: pyomo.core.expr.numeric_expr.ExpressionBase
+    bounds_cache: BoundsCache
+        If provided, bounds are looked up in (and added to) this cache
+        (see pyomo.contrib.fbbt.bounds_cache)
 
     Returns
     -------
     lb: float
     ub: float
     """
-    bnds_dict = ComponentMap()
-    visitor = _FBBTVisitorLeafToRoot(bnds_dict)
-    visitor.dfs_postorder_stack(expr)
-    lb, ub = bnds_dict[expr]
+    bnds = None
+    if bounds_cache is not None:
+        bnds = bounds_cache.get_bounds(expr)
+    if bnds is None:
+        bnds_dict = ComponentMap()
+        visitor = _FBBTVisitorLeafToRoot(bnds_dict)
+        visitor.dfs_postorder_stack(expr)
+        bnds = bnds_dict[expr]
+        if bounds_cache is not None:
+            bounds_cache.set_bounds(expr, *bnds)
+    lb, ub = bnds
     if lb == -interval.inf:
         lb = None
     if ub == interval.inf:
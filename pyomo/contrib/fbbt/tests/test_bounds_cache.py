@@ -0,0 +1,92 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+import pyutilib.th as unittest
+import pyomo.environ as pe
+from pyomo.contrib.fbbt.fbbt import fbbt, compute_bounds_on_expr
+from pyomo.contrib.fbbt.bounds_cache import BoundsCache
+
+
+class TestBoundsCache(unittest.TestCase):
+    def test_compute_bounds_on_expr(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(-1, 2))
+        m.y = pe.Var(bounds=(0, 3))
+        m.p = pe.Param(initialize=2, mutable=True)
+        e = m.x**2 + m.p*m.y
+        cache = BoundsCache()
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, 10))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, 10))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+        # changing the bounds of a variable invalidates the entry
+        m.y.setub(1)
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, 6))
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+        # ... as do fixing variables and changing mutable parameters
+        m.x.fix(1)
+        self.assertEqual(compute_bounds_on_expr(e, cache), (1, 3))
+        m.p = 3
+        self.assertEqual(compute_bounds_on_expr(e, cache), (1, 4))
+        m.x.unfix()
+        m.y.setub(None)
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, None))
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, None))
+        self.assertEqual((cache.hits, cache.misses), (2, 5))
+        self.assertEqual(compute_bounds_on_expr(e), (0, None))
+
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(compute_bounds_on_expr(e, cache), (0, None))
+        self.assertEqual(cache.misses, 6)
+
+    def test_fbbt(self):
+        m = pe.ConcreteModel()
+        m.x = pe.Var(bounds=(-1, 1))
+        m.y = pe.Var()
+        m.z = pe.Var()
+        m.c1 = pe.Constraint(expr=m.y == m.x**2)
+        m.c2 = pe.Constraint(expr=m.z == pe.exp(m.y))
+        cache = BoundsCache()
+        new_bounds = fbbt(m, bounds_cache=cache)
+        self.assertEqual(m.y.bounds, (0, 1))
+        self.assertAlmostEqual(m.z.ub, pe.exp(1))
+        z_bounds = m.z.bounds
+
+        # The bounds on the constraint bodies were cached
+        self.assertEqual(compute_bounds_on_expr(m.c1.body, cache), (-1, 1))
+        self.assertEqual(cache.hits, 1)
+
+        # Neither constraint changes the bounds any more, so FBBT with
+        # the same cache skips both of them.
+        hits = cache.hits
+        new_bounds2 = fbbt(m, bounds_cache=cache)
+        self.assertEqual(cache.hits, hits + 2)
+        self.assertEqual(m.z.bounds, z_bounds)
+        self.assertEqual(set(id(v) for v in new_bounds2),
+                         set(id(v) for v in new_bounds))
+        for v in new_bounds2:
+            self.assertEqual(new_bounds2[v], v.bounds)
+
+        # Tightening x makes the constraints "dirty" again
+        m.x.setub(0.5)
+        fbbt(m, bounds_cache=cache)
+        self.assertEqual(m.y.bounds, (0, 1))
+        m.x.setlb(-0.5)
+        fbbt(m, bounds_cache=cache)
+        self.assertEqual(m.y.lb, 0)
+        self.assertAlmostEqual(m.y.ub, 0.25)
+        self.assertAlmostEqual(m.z.ub, pe.exp(0.25))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,7 +10,8 @@
 
 import pyutilib.th as unittest
 import pyomo.environ as pyo
-from pyomo.contrib.fbbt.fbbt import fbbt, compute_bounds_on_expr
+import pyomo.contrib.fbbt.fbbt as fbbt_module
+from pyomo.contrib.fbbt.fbbt import fbbt, compute_bounds_on_expr, FBBTStatistics
 from pyomo.common.dependencies import numpy as np, numpy_available
 from pyomo.common.log import LoggingIntercept
 from pyomo.common.errors import InfeasibleConstraintException
@@ -719,6 +720,69 @@ class TestFBBT(unittest.TestCase):
         self.assertEqual(m.x[0].lb, None)
         self.assertEqual(m.x[0].ub, None)
 
+    def test_stats(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(range(5))
+        m.c = pyo.Constraint(range(4), rule=lambda m, i: m.x[i] == m.x[i+1])
+        m.x[4].setlb(-1)
+        m.x[4].setub(1)
+        stats = FBBTStatistics()
+        fbbt(m, stats=stats)
+        for i in range(5):
+            self.assertEqual(m.x[i].bounds, (-1, 1))
+        self.assertEqual([p.name for p in stats.phases],
+                         ['initial', 'propagation'])
+        self.assertEqual(stats.phases[0].constraints_processed, 4)
+        self.assertEqual(stats.phases[0].bounds_tightened, 2)
+        # every constraint is queued at most once at a time
+        self.assertEqual(stats.phases[1].constraints_processed, 7)
+        self.assertEqual(stats.bounds_tightened, 8)
+        self.assertEqual(stats.termination, 'converged')
+        self.assertIn('propagation', str(stats))
+
+        m.x[4].setub(0.5)
+        stats = FBBTStatistics()
+        fbbt(m, max_iter=1, stats=stats)
+        self.assertEqual(stats.termination, 'iteration limit')
+        self.assertEqual(m.x[0].ub, 1)
+
+        stats = FBBTStatistics()
+        fbbt(m, time_limit=0, stats=stats)
+        self.assertEqual(stats.termination, 'time limit')
+        self.assertEqual(stats.phases[1].constraints_processed, 0)
+        self.assertEqual(m.x[3].ub, 0.5)
+        self.assertEqual(m.x[0].ub, 1)
+
+    def test_priority(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(0, 100))
+        m.y = pyo.Var(bounds=(0, 100))
+        m.a = pyo.Var()
+        m.b = pyo.Var()
+        m.c1 = pyo.Constraint(expr=m.x <= 99)
+        m.c2 = pyo.Constraint(expr=m.y <= 1)
+        m.c3 = pyo.Constraint(expr=m.a == m.x)
+        m.c4 = pyo.Constraint(expr=m.b == m.y)
+
+        processed = []
+        orig_fbbt_con = fbbt_module._fbbt_con
+        def _fbbt_con(con, config):
+            processed.append(con.name)
+            return orig_fbbt_con(con, config)
+        fbbt_module._fbbt_con = _fbbt_con
+        try:
+            fbbt(m)
+        finally:
+            fbbt_module._fbbt_con = orig_fbbt_con
+
+        self.assertEqual(processed[:4], ['c1', 'c2', 'c3', 'c4'])
+        # a and b went from unbounded to bounded (infinite improvement),
+        # then y improved by 99% and x by 1%; c3 was queued for both x
+        # and a, but is only processed once.
+        self.assertEqual(processed[4:], ['c3', 'c4', 'c2', 'c1'])
+        self.assertEqual(m.a.bounds, (0, 99))
+        self.assertEqual(m.b.bounds, (0, 1))
+
     def test_inf_bounds_on_expr(self):
         m = pyo.ConcreteModel()
         m.x = pyo.Var(bounds=(-1, 1))
@@ -0,0 +1,196 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+import random
+
+import pyutilib.th as unittest
+import pyomo.environ as pyo
+from pyomo.contrib.fbbt.fbbt import fbbt, FBBTStatistics
+from pyomo.common.dependencies import numpy_available
+from pyomo.common.errors import InfeasibleConstraintException
+
+
+def _random_model(seed, bilinear):
+    rnd = random.Random(seed)
+    m = pyo.ConcreteModel()
+    m.x = pyo.Var(range(30))
+    for v in m.x.values():
+        if rnd.random() < 0.6:
+            v.setlb(rnd.uniform(-10, 0))
+        if rnd.random() < 0.6:
+            v.setub(rnd.uniform(0, 10))
+    m.b = pyo.Var(range(5), domain=pyo.Binary)
+    m.c = pyo.ConstraintList()
+    for k in range(40):
+        idx = rnd.sample(range(30), 3)
+        e = sum(rnd.choice([-3, -1, 1, 2]) * m.x[i] for i in idx) \
+            + rnd.choice([0, 1]) * m.b[rnd.randrange(5)]
+        if bilinear and rnd.random() < 0.3:
+            e += m.x[idx[0]] * m.x[idx[1]]
+        m.c.add(pyo.inequality(-20, e, 20))
+    return m
+
+
+@unittest.skipIf(not numpy_available, 'Numpy is not available.')
+class TestVectorizedFBBT(unittest.TestCase):
+
+    def _compare(self, m1, m2, places=6):
+        for v1, v2 in zip(m1.component_data_objects(pyo.Var),
+                          m2.component_data_objects(pyo.Var)):
+            for b1, b2 in zip(v1.bounds, v2.bounds):
+                if b1 is None:
+                    self.assertIsNone(b2)
+                else:
+                    self.assertAlmostEqual(b1, b2, places)
+
+    def test_matches_fbbt(self):
+        for seed in range(5):
+            for bilinear in (False, True):
+                m1 = _random_model(seed, bilinear)
+                m2 = _random_model(seed, bilinear)
+                new1 = fbbt(m1, max_iter=100, improvement_tol=1e-8)
+                new2 = fbbt(m2, max_iter=100, improvement_tol=1e-8,
+                            vectorized=True)
+                self._compare(m1, m2)
+                self.assertEqual(
+                    sorted(v.name for v in new1),
+                    sorted(v.name for v in new2))
+                for v in new2:
+                    self.assertEqual(new2[v], v.bounds)
+
+    def test_multiple_constraints(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(-3, 3))
+        m.y = pyo.Var(bounds=(0, None))
+        m.z = pyo.Var()
+        m.c = pyo.ConstraintList()
+        m.c.add(m.x + m.y >= -1)
+        m.c.add(m.x + m.y <= -1)
+        m.c.add(m.y - m.x*m.z <= 2)
+        m.c.add(m.y - m.x*m.z >= -2)
+        m.c.add(m.x + m.z == 1)
+        fbbt(m, vectorized=True)
+        self.assertAlmostEqual(pyo.value(m.x.lb), -1, 8)
+        self.assertAlmostEqual(pyo.value(m.x.ub), -1, 8)
+        self.assertAlmostEqual(pyo.value(m.y.lb), 0, 8)
+        self.assertAlmostEqual(pyo.value(m.y.ub), 0, 8)
+        self.assertAlmostEqual(pyo.value(m.z.lb), 2, 8)
+        self.assertAlmostEqual(pyo.value(m.z.ub), 2, 8)
+
+    def test_bilinear_and_square(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(1, 4))
+        m.y = pyo.Var()
+        m.z = pyo.Var(bounds=(-5, 5))
+        m.c1 = pyo.Constraint(expr=m.x*m.y == 8)
+        m.c2 = pyo.Constraint(expr=m.z**2 <= 4)
+        m.c3 = pyo.Constraint(expr=m.z**2 >= 1)
+        m.c4 = pyo.Constraint(expr=m.z >= -0.5)
+        fbbt(m, vectorized=True)
+        self.assertAlmostEqual(m.y.lb, 2)
+        self.assertAlmostEqual(m.y.ub, 8)
+        self.assertAlmostEqual(m.z.lb, 1)
+        self.assertAlmostEqual(m.z.ub, 2)
+
+    def test_nonlinear_fallback(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(0, None))
+        m.y = pyo.Var()
+        m.z = pyo.Var()
+        m.c1 = pyo.Constraint(expr=pyo.exp(m.x) <= 2)
+        m.c2 = pyo.Constraint(expr=m.y == m.x + 1)
+        m.c3 = pyo.Constraint(expr=m.z == pyo.log(m.y))
+        new_bounds = fbbt(m, vectorized=True)
+        self.assertAlmostEqual(m.x.ub, pyo.log(2))
+        self.assertAlmostEqual(m.y.lb, 1)
+        self.assertAlmostEqual(m.y.ub, 1 + pyo.log(2))
+        self.assertAlmostEqual(m.z.lb, 0)
+        self.assertAlmostEqual(m.z.ub, pyo.log(1 + pyo.log(2)))
+        self.assertEqual(set(id(v) for v in new_bounds),
+                         set(id(v) for v in (m.x, m.y, m.z)))
+
+    def test_binary(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(domain=pyo.Binary)
+        m.y = pyo.Var(domain=pyo.Binary)
+        m.c = pyo.Constraint(expr=m.x + m.y >= 1.5)
+        fbbt(m, vectorized=True)
+        self.assertEqual(m.x.bounds, (1, 1))
+        self.assertEqual(m.y.bounds, (1, 1))
+
+    def test_fixed(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var()
+        m.y = pyo.Var()
+        m.y.fix(2)
+        m.c = pyo.Constraint(expr=m.x + 3*m.y <= 10)
+        new_bounds = fbbt(m, vectorized=True)
+        self.assertEqual(m.x.bounds, (None, 4))
+        self.assertEqual(new_bounds[m.y], (2, 2))
+
+    def test_infeasible(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(0, 1))
+        m.y = pyo.Var(bounds=(0, 1))
+        m.c = pyo.Constraint(expr=m.x + m.y >= 3)
+        with self.assertRaisesRegexp(InfeasibleConstraintException,
+                                     'infeasible constraint.*c'):
+            fbbt(m, vectorized=True)
+
+    def test_always_feasible(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(bounds=(1,2))
+        m.y = pyo.Var(bounds=(1,2))
+        m.c = pyo.Constraint(expr=m.x + m.y >= 0)
+        m.d = pyo.Constraint(expr=m.x + m.y >= 3)
+        fbbt(m, vectorized=True)
+        self.assertTrue(m.c.active)
+        fbbt(m, deactivate_satisfied_constraints=True, vectorized=True)
+        self.assertFalse(m.c.active)
+        self.assertTrue(m.d.active)
+
+    def test_iteration_limit(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var([0, 1, 2])
+        m.c = pyo.Constraint([0, 1])
+        m.c[0] = m.x[0] == m.x[1]
+        m.c[1] = m.x[1] == m.x[2]
+        m.x[2].setlb(-1)
+        m.x[2].setub(1)
+        fbbt(m, max_iter=1, vectorized=True)
+        self.assertEqual(m.x[1].bounds, (-1, 1))
+        self.assertEqual(m.x[0].bounds, (None, None))
+        fbbt(m, vectorized=True)
+        self.assertEqual(m.x[0].bounds, (-1, 1))
+
+    def test_stats(self):
+        m = pyo.ConcreteModel()
+        m.x = pyo.Var(range(4))
+        m.c = pyo.Constraint(range(3), rule=lambda m, i: m.x[i] == m.x[i+1])
+        m.d = pyo.Constraint(expr=pyo.exp(m.x[3]) <= 1)
+        m.x[0].setlb(-1)
+        stats = FBBTStatistics()
+        fbbt(m, vectorized=True, stats=stats)
+        self.assertEqual([p.name for p in stats.phases],
+                         ['vectorized', 'nonlinear'])
+        self.assertEqual(stats.termination, 'converged')
+        self.assertEqual(stats.phases[1].bounds_tightened, 1)
+        self.assertEqual(m.x[0].bounds, (-1, 0))
+
+        stats = FBBTStatistics()
+        m.x[3].setlb(-0.5)
+        fbbt(m, vectorized=True, time_limit=0, stats=stats)
+        self.assertEqual(stats.termination, 'time limit')
+        self.assertEqual(stats.constraints_processed, 0)
+        self.assertEqual(m.x[0].lb, -1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,510 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""
+Vectorized feasibility based bounds tightening for linear and bilinear
+constraints.
+
+_fbbt_block propagates bounds through the expression tree of one
+constraint at a time. For large (MI)LPs, the cost is dominated by the
+expression walkers and the ComponentMaps storing the bounds on every
+node. This module extracts all linear and bilinear constraints of a
+block into coordinate (COO) arrays
+
+    row_lb[i] <= sum_j coef[k] * x[col[k]] for k in row i <= row_ub[i]
+
+where bilinear terms x[i]*x[j] (and squares x[i]**2) are represented by
+auxiliary columns, and performs activity-based bound propagation with
+NumPy operations over all rows at once. Each sweep computes, for every
+row, the minimum and maximum activity (tracking infinite contributions
+separately so that the residual activity excluding any single term can
+be computed in constant time), derives implied bounds for every entry,
+and reduces them by column. Constraints that are neither linear nor
+bilinear are handled with the tree-based visitors used by fbbt.
+
+This is used by fbbt(comp, vectorized=True).
+"""
+
+import logging
+import time
+
+from pyomo.common.collections import ComponentMap
+from pyomo.common.dependencies import numpy as np
+from pyomo.common.errors import InfeasibleConstraintException
+from pyomo.core.base.constraint import Constraint
+from pyomo.core.base.var import Var
+from pyomo.core.expr.numvalue import value
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.repn.standard_repn import generate_standard_repn
+import pyomo.contrib.fbbt.interval as interval
+from pyomo.contrib.fbbt.fbbt import _fbbt_con, FBBTStatistics
+
+logger = logging.getLogger(__name__)
+inf = interval.inf
+
+
+class _SparseRows(object):
+    """
+    Linear and bilinear constraints in coordinate form.
+
+    Columns 0, ..., n_vars-1 correspond to the variables in `variables`;
+    column n_vars + k corresponds to the product of the factor columns
+    prod_i[k] and prod_j[k] (prod_i[k] == prod_j[k] for squares).
+    """
+    def __init__(self):
+        self.constraints = list()
+        self.nonlinear = list()
+        self.variables = list()
+        self.var_index = ComponentMap()
+        self.products = dict()
+        self.row_lb = list()
+        self.row_ub = list()
+        self.row = list()
+        self.col = list()
+        self.coef = list()
+
+    def _var_col(self, v):
+        ndx = self.var_index.get(v, None)
+        if ndx is None:
+            ndx = self.var_index[v] = len(self.variables)
+            self.variables.append(v)
+        return ndx
+
+    def add_constraint(self, con):
+        repn = generate_standard_repn(con.body, quadratic=True)
+        if repn.nonlinear_expr is not None:
+            self.nonlinear.append(con)
+            return
+        row = len(self.constraints)
+        self.constraints.append(con)
+        _lb = value(con.lower)
+        _ub = value(con.upper)
+        const = value(repn.constant)
+        self.row_lb.append(-inf if _lb is None else _lb - const)
+        self.row_ub.append(inf if _ub is None else _ub - const)
+        for v, c in zip(repn.linear_vars, repn.linear_coefs):
+            c = value(c)
+            if c:
+                self.row.append(row)
+                self.col.append(self._var_col(v))
+                self.coef.append(c)
+        for (v1, v2), c in zip(repn.quadratic_vars, repn.quadratic_coefs):
+            c = value(c)
+            if c:
+                i = self._var_col(v1)
+                j = self._var_col(v2)
+                key = (i, j) if i <= j else (j, i)
+                # Product columns are numbered after all variables are
+                # known; store them as negative indices for now
+                k = self.products.setdefault(key, len(self.products))
+                self.row.append(row)
+                self.col.append(-1 - k)
+                self.coef.append(c)
+
+    def finalize(self):
+        """Convert the row data to numpy arrays"""
+        self.n_vars = n_vars = len(self.variables)
+        self.n_cols = n_vars + len(self.products)
+        self.n_rows = len(self.constraints)
+        self.row_lb = np.array(self.row_lb, dtype=float)
+        self.row_ub = np.array(self.row_ub, dtype=float)
+        self.row = np.array(self.row, dtype=int)
+        col = np.array(self.col, dtype=int)
+        self.col = np.where(col < 0, n_vars - 1 - col, col)
+        self.coef = np.array(self.coef, dtype=float)
+        prods = sorted(self.products.items(), key=lambda x: x[1])
+        self.prod_i = np.array([p[0][0] for p in prods], dtype=int)
+        self.prod_j = np.array([p[0][1] for p in prods], dtype=int)
+        self.is_square = self.prod_i == self.prod_j
+        self.is_integer = np.zeros(self.n_cols, dtype=bool)
+        self.is_integer[:n_vars] = [
+            v.is_binary() or v.is_integer() for v in self.variables]
+        # Sort the entries by column so that per-column reductions can
+        # use reduceat()
+        self.col_order = np.argsort(self.col, kind='mergesort')
+        sorted_cols = self.col[self.col_order]
+        if sorted_cols.size:
+            starts = np.flatnonzero(np.diff(sorted_cols)) + 1
+            self.col_starts = np.concatenate(([0], starts))
+            self.col_of_start = sorted_cols[self.col_starts]
+        else:
+            self.col_starts = np.zeros(0, dtype=int)
+            self.col_of_start = np.zeros(0, dtype=int)
+
+    def var_bounds(self):
+        lb = np.empty(self.n_cols)
+        ub = np.empty(self.n_cols)
+        for ndx, v in enumerate(self.variables):
+            if v.is_fixed():
+                lb[ndx] = ub[ndx] = value(v.value)
+                continue
+            _lb = value(v.lb)
+            _ub = value(v.ub)
+            lb[ndx] = -inf if _lb is None else _lb
+            ub[ndx] = inf if _ub is None else _ub
+        lb[self.n_vars:] = -inf
+        ub[self.n_vars:] = inf
+        return lb, ub
+
+
+def _mul(xl, xu, yl, yu):
+    """Vectorized interval multiplication.
+
+    Products of 0 and +/-inf are taken to be 0 (the unbounded direction
+    is always captured by another corner of the box)."""
+    with np.errstate(invalid='ignore'):
+        corners = np.vstack((xl*yl, xl*yu, xu*yl, xu*yu))
+    corners[np.isnan(corners)] = 0
+    return corners.min(axis=0), corners.max(axis=0)
+
+
+def _product_bounds(rows, lb, ub):
+    """Bounds on the product columns implied by the bounds on the factors"""
+    pi = rows.prod_i
+    pj = rows.prod_j
+    plb, pub = _mul(lb[pi], ub[pi], lb[pj], ub[pj])
+    sq = rows.is_square
+    if sq.any():
+        xl = lb[pi[sq]]
+        xu = ub[pi[sq]]
+        sq_lb = np.where(xl >= 0, xl*xl, np.where(xu <= 0, xu*xu, 0))
+        plb[sq] = sq_lb
+        pub[sq] = np.maximum(xl*xl, xu*xu)
+    return plb, pub
+
+
+def _factor_bounds(rows, lb, ub, feasibility_tol):
+    """Bounds on the factors of the product columns implied by the bounds
+    on the products. Returns (columns, lower bounds, upper bounds)."""
+    n = rows.n_vars
+    plb = lb[n:]
+    pub = ub[n:]
+    sq = rows.is_square
+    cols = list()
+    lbs = list()
+    ubs = list()
+
+    # x[i] in [plb, pub] / x[j] (and vice versa) if x[j] excludes 0
+    for f, g in ((rows.prod_i, rows.prod_j), (rows.prod_j, rows.prod_i)):
+        gl = lb[g]
+        gu = ub[g]
+        ok = ~sq & ((gl > feasibility_tol) | (gu < -feasibility_tol))
+        if not ok.any():
+            continue
+        with np.errstate(divide='ignore'):
+            inv_l = 1.0 / gu[ok]
+            inv_u = 1.0 / gl[ok]
+        _lb, _ub = _mul(plb[ok], pub[ok], inv_l, inv_u)
+        cols.append(f[ok])
+        lbs.append(_lb)
+        ubs.append(_ub)
+
+    # x**2 in [plb, pub]  =>  x in [-sqrt(pub), -sqrt(plb)] U [sqrt(plb), sqrt(pub)]
+    if sq.any():
+        f = rows.prod_i[sq]
+        if (pub[sq] < -feasibility_tol).any():
+            raise InfeasibleConstraintException(
+                'Detected a square with a negative upper bound during FBBT')
+        r = np.sqrt(np.maximum(pub[sq], 0))
+        s = np.sqrt(np.maximum(plb[sq], 0))
+        xl = lb[f]
+        xu = ub[f]
+        _lb = np.where(xl > -s, s, -r)
+        _ub = np.where(xu < s, -s, r)
+        cols.append(f)
+        lbs.append(_lb)
+        ubs.append(_ub)
+
+    if not cols:
+        return None
+    return np.concatenate(cols), np.concatenate(lbs), np.concatenate(ubs)
+
+
+def _row_activity(rows, lb, ub):
+    """Returns the per-entry activity terms and the per-row finite
+    activity sums and counts of infinite terms"""
+    coef = rows.coef
+    clb = lb[rows.col]
+    cub = ub[rows.col]
+    pos = coef > 0
+    tmin = np.where(pos, coef*clb, coef*cub)
+    tmax = np.where(pos, coef*cub, coef*clb)
+    min_inf = np.isinf(tmin)
+    max_inf = np.isinf(tmax)
+    n = rows.n_rows
+    min_fin = np.bincount(rows.row, weights=np.where(min_inf, 0, tmin),
+                          minlength=n)
+    max_fin = np.bincount(rows.row, weights=np.where(max_inf, 0, tmax),
+                          minlength=n)
+    min_ninf = np.bincount(rows.row, weights=min_inf, minlength=n)
+    max_ninf = np.bincount(rows.row, weights=max_inf, minlength=n)
+    return tmin, tmax, min_inf, max_inf, min_fin, max_fin, min_ninf, max_ninf
+
+
+def _check_rows(rows, act_min, act_max, feasibility_tol):
+    bad = (act_min > rows.row_ub + feasibility_tol) \
+        | (act_max < rows.row_lb - feasibility_tol)
+    if bad.any():
+        con = rows.constraints[int(np.flatnonzero(bad)[0])]
+        raise InfeasibleConstraintException(
+            'Detected an infeasible constraint during FBBT: {0}'.format(
+                str(con)))
+
+
+def _sweep(rows, lb, ub, config):
+    """
+    Perform one round of bound propagation over all rows. The arrays lb
+    and ub are updated in place. Returns the number of variable bounds
+    that improved by more than config.improvement_tol.
+    """
+    n = rows.n_vars
+    feasibility_tol = config.feasibility_tol
+    orig_lb = lb.copy()
+    orig_ub = ub.copy()
+
+    if rows.prod_i.size:
+        plb, pub = _product_bounds(rows, lb, ub)
+        np.maximum(lb[n:], plb, out=lb[n:])
+        np.minimum(ub[n:], pub, out=ub[n:])
+
+    (tmin, tmax, min_inf, max_inf,
+     min_fin, max_fin, min_ninf, max_ninf) = _row_activity(rows, lb, ub)
+    act_min = np.where(min_ninf > 0, -inf, min_fin)
+    act_max = np.where(max_ninf > 0, inf, max_fin)
+    _check_rows(rows, act_min, act_max, feasibility_tol)
+
+    # The activity of each row excluding each of its entries
+    row = rows.row
+    with np.errstate(invalid='ignore'):
+        res_min = np.where(
+            min_inf,
+            np.where(min_ninf[row] == 1, min_fin[row], -inf),
+            np.where(min_ninf[row] == 0, min_fin[row] - tmin, -inf))
+        res_max = np.where(
+            max_inf,
+            np.where(max_ninf[row] == 1, max_fin[row], inf),
+            np.where(max_ninf[row] == 0, max_fin[row] - tmax, inf))
+        # bounds on coef*x
+        term_lb = rows.row_lb[row] - res_max
+        term_ub = rows.row_ub[row] - res_min
+    coef = rows.coef
+    pos = coef > 0
+    new_lb = np.where(pos, term_lb, term_ub) / coef
+    new_ub = np.where(pos, term_ub, term_lb) / coef
+
+    if rows.col_starts.size:
+        order = rows.col_order
+        cols = rows.col_of_start
+        lb[cols] = np.maximum(lb[cols], np.maximum.reduceat(
+            new_lb[order], rows.col_starts))
+        ub[cols] = np.minimum(ub[cols], np.minimum.reduceat(
+            new_ub[order], rows.col_starts))
+
+    if rows.prod_i.size:
+        res = _factor_bounds(rows, lb, ub, feasibility_tol)
+        if res is not None:
+            fcols, flb, fub = res
+            np.maximum.at(lb, fcols, flb)
+            np.minimum.at(ub, fcols, fub)
+
+    # Round the bounds on integer variables
+    intmask = rows.is_integer
+    if intmask.any():
+        ilb = lb[intmask]
+        iub = ub[intmask]
+        with np.errstate(invalid='ignore'):
+            ilb = np.where(
+                np.isfinite(ilb),
+                np.maximum(np.floor(ilb),
+                           np.ceil(ilb - config.integer_tol)), ilb)
+            iub = np.where(
+                np.isfinite(iub),
+                np.minimum(np.ceil(iub),
+                           np.floor(iub + config.integer_tol)), iub)
+        lb[intmask] = np.maximum(ilb, orig_lb[intmask])
+        ub[intmask] = np.minimum(iub, orig_ub[intmask])
+
+    crossed = lb > ub
+    if crossed.any():
+        if (lb[crossed] - feasibility_tol > ub[crossed]).any():
+            ndx = int(np.flatnonzero(lb - feasibility_tol > ub)[0])
+            if ndx < n:
+                name = rows.variables[ndx].name
+            else:
+                name = 'a bilinear term'
+            raise InfeasibleConstraintException(
+                'Lower bound ({1}) computed for variable {0} is larger '
+                'than the computed upper bound ({2}).'.format(
+                    name, lb[ndx], ub[ndx]))
+        # Within tolerance: relax slightly without leaving the previous
+        # bounds (see _check_and_reset_bounds)
+        lb[crossed] = np.maximum(lb[crossed] - feasibility_tol,
+                                 orig_lb[crossed])
+        ub[crossed] = np.minimum(ub[crossed] + feasibility_tol,
+                                 orig_ub[crossed])
+    if (lb[:n] == inf).any() or (ub[:n] == -inf).any():
+        raise InfeasibleConstraintException(
+            'Computed an infinite lower bound or negative infinite upper '
+            'bound for a variable during FBBT')
+
+    with np.errstate(invalid='ignore'):
+        n_improved = np.count_nonzero(
+            lb[:n] - orig_lb[:n] > config.improvement_tol) \
+            + np.count_nonzero(orig_ub[:n] - ub[:n] > config.improvement_tol)
+    return int(n_improved)
+
+
+def _store_bounds(rows, lb, ub, cols=None):
+    """Update the bounds of the Pyomo variables from the arrays"""
+    variables = rows.variables
+    if cols is None:
+        cols = range(rows.n_vars)
+    for ndx in cols:
+        v = variables[ndx]
+        if v.is_fixed():
+            continue
+        _lb = lb[ndx]
+        _ub = ub[ndx]
+        if _lb != -inf:
+            v.setlb(float(_lb))
+        if _ub != inf:
+            v.setub(float(_ub))
+
+
+def _load_bounds(rows, lb, ub, cols, improvement_tol):
+    """Update the arrays from the bounds of the Pyomo variables. Returns
+    the number of bounds that improved by more than improvement_tol."""
+    n_improved = 0
+    variables = rows.variables
+    for ndx in cols:
+        v = variables[ndx]
+        _lb = value(v.lb)
+        _ub = value(v.ub)
+        if _lb is not None and _lb > lb[ndx]:
+            if _lb > lb[ndx] + improvement_tol:
+                n_improved += 1
+            lb[ndx] = _lb
+        if _ub is not None and _ub < ub[ndx]:
+            if _ub < ub[ndx] - improvement_tol:
+                n_improved += 1
+            ub[ndx] = _ub
+    return n_improved
+
+
+def _fbbt_block_vectorized(m, config):
+    """
+    Feasibility based bounds tightening for a block or model using
+    vectorized propagation for the linear and bilinear constraints (see
+    the module documentation). Other constraints are handled with
+    _fbbt_con, alternating with the vectorized sweeps until the bounds
+    no longer improve by more than config.improvement_tol.
+
+    Every sweep processes all linear and bilinear rows, so the number of
+    sweeps is limited to config.max_iter (corresponding to the limit of
+    max_iter times the number of constraints used by _fbbt_block).
+    Propagation also stops after config.time_limit seconds. Statistics
+    are recorded in config.stats (if provided) in the 'vectorized' and
+    'nonlinear' phases.
+
+    Parameters
+    ----------
+    m: pyomo.core.base.block.Block or pyomo.core.base.PyomoModel.ConcreteModel
+    config: ConfigBlock
+        See the docs for fbbt
+
+    Returns
+    -------
+    new_var_bounds: ComponentMap
+        A ComponentMap mapping from variables a tuple containing the lower and upper bounds, respectively, computed
+        from FBBT.
+    """
+    stats = config.stats
+    if stats is None:
+        stats = FBBTStatistics()
+    start_time = time.time()
+    if config.time_limit is None:
+        deadline = None
+    else:
+        deadline = start_time + config.time_limit
+
+    new_var_bounds = ComponentMap()
+    for _v in m.component_data_objects(ctype=Var, active=True, descend_into=True, sort=True):
+        if _v.is_fixed():
+            _v.setlb(_v.value)
+            _v.setub(_v.value)
+            new_var_bounds[_v] = (_v.value, _v.value)
+
+    rows = _SparseRows()
+    for c in m.component_data_objects(ctype=Constraint, active=True,
+                                      descend_into=True, sort=True):
+        rows.add_constraint(c)
+    rows.finalize()
+
+    lb, ub = rows.var_bounds()
+    # The columns of variables that also appear in nonlinear constraints
+    shared = set()
+    for c in rows.nonlinear:
+        for v in identify_variables(c.body):
+            ndx = rows.var_index.get(v, None)
+            if ndx is not None:
+                shared.add(ndx)
+    shared = sorted(shared)
+
+    vec_phase = stats.new_phase('vectorized')
+    vec_phase.time = time.time() - start_time
+    if rows.nonlinear:
+        nl_phase = stats.new_phase('nonlinear')
+    max_iter = max(config.max_iter, 1)
+    n_sweeps = 0
+    stats.termination = 'converged'
+    while True:
+        phase_start = time.time()
+        n_improved = 1
+        while n_improved:
+            if n_sweeps >= max_iter:
+                stats.termination = 'iteration limit'
+                break
+            if deadline is not None and time.time() >= deadline:
+                stats.termination = 'time limit'
+                break
+            n_improved = _sweep(rows, lb, ub, config)
+            n_sweeps += 1
+            vec_phase.constraints_processed += rows.n_rows
+            vec_phase.bounds_tightened += n_improved
+        vec_phase.time += time.time() - phase_start
+        if not rows.nonlinear or stats.termination == 'time limit':
+            break
+        phase_start = time.time()
+        _store_bounds(rows, lb, ub, shared)
+        for c in rows.nonlinear:
+            new_var_bounds.update(_fbbt_con(c, config))
+        nl_phase.constraints_processed += len(rows.nonlinear)
+        n_improved = _load_bounds(rows, lb, ub, shared, config.improvement_tol)
+        nl_phase.bounds_tightened += n_improved
+        nl_phase.time += time.time() - phase_start
+        if not n_improved or stats.termination != 'converged':
+            break
+
+    if config.deactivate_satisfied_constraints and rows.n_rows:
+        (tmin, tmax, min_inf, max_inf, min_fin, max_fin,
+         min_ninf, max_ninf) = _row_activity(rows, lb, ub)
+        act_min = np.where(min_ninf > 0, -inf, min_fin)
+        act_max = np.where(max_ninf > 0, inf, max_fin)
+        satisfied = (act_min >= rows.row_lb - config.feasibility_tol) \
+            & (act_max <= rows.row_ub + config.feasibility_tol)
+        for ndx in np.flatnonzero(satisfied):
+            rows.constraints[ndx].deactivate()
+
+    _store_bounds(rows, lb, ub)
+    for ndx, v in enumerate(rows.variables):
+        _lb = value(v.lb)
+        _ub = value(v.ub)
+        new_var_bounds[v] = (_lb, _ub)
+    return new_var_bounds
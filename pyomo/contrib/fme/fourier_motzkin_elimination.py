@@ -13,12 +13,14 @@ from pyomo.core import (Var, Block, Constraint, Param, Set, SetOf, Suffix,
                         ConstraintList)
 from pyomo.core.base import TransformationFactory, _VarData
 from pyomo.core.plugins.transform.hierarchy import Transformation
-from pyomo.common.config import ConfigBlock, ConfigValue, NonNegativeFloat
+from pyomo.common.config import (ConfigBlock, ConfigValue, NonNegativeFloat,
+                                 In)
 from pyomo.common.modeling import unique_component_name
-from pyomo.repn.standard_repn import generate_standard_repn
+from pyomo.repn.standard_repn import generate_standard_repn, StandardRepn
 from pyomo.common.collections import ComponentMap, ComponentSet
 from pyomo.opt import TerminationCondition
 
+from fractions import Fraction
 import logging
 
 from six import iteritems
@@ -75,6 +77,27 @@ def lcm(ints):
         a = abs(a*b) // gcd(a,b)
     return a
 
+def _popcount(x):
+    return bin(x).count('1')
+
+class _SparseRow(object):
+    """A >= constraint in the sparse elimination engine:
+
+        sum(coefs[j]*x_j) + sum(m*expr for (m, expr) in nonlinear) >= lower
+
+    where j are column indices. history is a bitmask of the original
+    constraints this row is a nonnegative combination of, and vars_seen is a
+    bitmask of the columns appearing in those original constraints.
+    """
+    __slots__ = ('coefs', 'lower', 'nonlinear', 'history', 'vars_seen')
+
+    def __init__(self, coefs, lower, nonlinear, history, vars_seen):
+        self.coefs = coefs
+        self.lower = lower
+        self.nonlinear = nonlinear
+        self.history = history
+        self.vars_seen = vars_seen
+
 @TransformationFactory.register('contrib.fourier_motzkin_elimination',
                                 doc="Project out specified (continuous) "
                                 "variables from a linear model.")
@@ -167,6 +190,36 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
         abs(int(x) - x) <= integer_tolerance.
         """
     ))
+    CONFIG.declare('engine', ConfigValue(
+        default='standard_repn',
+        domain=In(['standard_repn', 'sparse']),
+        description="Elimination engine: 'standard_repn' or 'sparse'",
+        doc="""
+        The 'standard_repn' engine combines constraints represented as
+        StandardRepn objects and keeps every combination it generates.
+
+        The 'sparse' engine stores the constraints as sparse rows of a
+        coefficient matrix and prunes redundant rows during the elimination,
+        which keeps the number of rows (and the time) manageable when
+        eliminating many variables from large systems:
+
+        - Chernikov's and Imbert's rules discard combinations which are
+          implied by others, based on the set of original constraints each
+          row is a combination of,
+        - rows with identical coefficients (up to a positive scaling) are
+          detected by hashing, and only the tightest one is kept, and
+        - combinations that are trivially satisfied (0 >= negative number)
+          are dropped.
+
+        The variables are eliminated in the order that minimizes the number
+        of new rows at each step. With do_integer_arithmetic, the rows are
+        combined using their least common multiple and divided by their
+        greatest common divisor, so all arithmetic is exact.
+
+        The projected constraints describe the same polyhedron with either
+        engine, but the 'sparse' engine will usually return fewer of them.
+        """
+    ))
     CONFIG.declare('projected_constraints_name', ConfigValue(
         default=None,
         domain=str,
@@ -216,6 +269,7 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
         self.do_integer_arithmetic = config.do_integer_arithmetic
         self.integer_tolerance = config.integer_tolerance
         self.zero_tolerance = config.zero_tolerance
+        self.engine = config.engine
         if vars_to_eliminate is None:
             raise RuntimeError("The Fourier-Motzkin Elimination transformation "
                                "requires the argument vars_to_eliminate, a "
@@ -275,8 +329,12 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
                                     'lower': -value(obj.ub),
                                     'map': ComponentMap([(obj, -1)])})
         
-        new_constraints = self._fourier_motzkin_elimination( constraints,
-                                                             vars_to_eliminate)
+        if self.engine == 'sparse':
+            new_constraints = self._sparse_fourier_motzkin_elimination(
+                constraints, vars_to_eliminate)
+        else:
+            new_constraints = self._fourier_motzkin_elimination(
+                constraints, vars_to_eliminate)
 
         # put the new constraints on the transformation block
         for cons in new_constraints:
@@ -359,14 +417,9 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
                                             [value(coef) for coef in
                                              body.linear_coefs]))
 
-    def _fourier_motzkin_elimination(self, constraints, vars_to_eliminate):
-        """Performs FME on the constraint list in the argument
-        (which is assumed to be all >= constraints and stored in the
-        dictionary representation), projecting out each of the variables in
-        vars_to_eliminate"""
-
-        # We only need to eliminate variables that actually appear in
-        # this set of constraints... Revise our list.
+    def _vars_that_appear(self, constraints, vars_to_eliminate):
+        """Returns the list of variables in vars_to_eliminate which appear in
+        constraints, and checks that they only appear linearly"""
         vars_that_appear = []
         vars_that_appear_set = ComponentSet()
         for cons in constraints:
@@ -391,6 +444,18 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
                     if not var in vars_that_appear_set:
                         vars_that_appear.append(var)
                         vars_that_appear_set.add(var)
+        return vars_that_appear
+
+    def _fourier_motzkin_elimination(self, constraints, vars_to_eliminate):
+        """Performs FME on the constraint list in the argument
+        (which is assumed to be all >= constraints and stored in the
+        dictionary representation), projecting out each of the variables in
+        vars_to_eliminate"""
+
+        # We only need to eliminate variables that actually appear in
+        # this set of constraints... Revise our list.
+        vars_that_appear = self._vars_that_appear(constraints,
+                                                  vars_to_eliminate)
 
         # we actually begin the recursion here
         total = len(vars_that_appear)
@@ -473,6 +538,250 @@ class Fourier_Motzkin_Elimination_Transformation(Transformation):
 
         return constraints
 
+    def _sparse_fourier_motzkin_elimination(self, constraints,
+                                            vars_to_eliminate):
+        """Performs FME on the constraint list in the argument (which is
+        assumed to be all >= constraints and stored in the dictionary
+        representation) using sparse rows, projecting out each of the
+        variables in vars_to_eliminate. Returns the projected constraints in
+        the dictionary representation.
+        """
+        vars_that_appear = self._vars_that_appear(constraints,
+                                                  vars_to_eliminate)
+
+        # Constraints that do not contain any of the variables we are
+        # eliminating are never combined with anything, so we pass them
+        # through as they are.
+        untouched = []
+        # number the variables (columns) in order of appearance
+        columns = []
+        column_index = ComponentMap()
+        rows = []
+        for i, cons in enumerate(constraints):
+            body = cons['body']
+            if not any(v in vars_to_eliminate for v in body.linear_vars):
+                untouched.append(cons)
+                continue
+            coefs = {}
+            vars_seen = 0
+            for v in body.linear_vars:
+                j = column_index.get(v)
+                if j is None:
+                    j = column_index[v] = len(columns)
+                    columns.append(v)
+                coef = cons['map'][v]
+                if self.do_integer_arithmetic:
+                    coef = self._as_integer(
+                        coef, self._get_noninteger_coef_error_message,
+                        (v.name, coef))
+                if coef != 0:
+                    coefs[j] = coefs.get(j, 0) + coef
+                vars_seen |= 1 << j
+            lower = cons['lower']
+            if self.do_integer_arithmetic:
+                lower = self._as_integer(
+                    lower,
+                    self._nonneg_scalar_multiply_linear_constraint_error_msg,
+                    (cons, lower))
+            nonlinear = []
+            if body.quadratic_vars:
+                nonlinear.append((1, sum(
+                    coef*v1*v2 for (coef, (v1, v2)) in
+                    zip(body.quadratic_coefs, body.quadratic_vars))))
+            if body.nonlinear_expr is not None:
+                nonlinear.append((1, body.nonlinear_expr))
+            rows.append(self._normalize_row(_SparseRow(
+                coefs, lower, tuple(nonlinear), 1 << i, vars_seen)))
+        rows = self._prune_rows(rows)
+
+        to_eliminate = set(column_index[v] for v in vars_that_appear)
+        total = len(to_eliminate)
+        num_eliminated = 0
+        while to_eliminate:
+            # Choose the variable that creates the fewest new rows
+            num_pos = dict((j, 0) for j in to_eliminate)
+            num_neg = dict((j, 0) for j in to_eliminate)
+            for row in rows:
+                for j, coef in iteritems(row.coefs):
+                    if j in to_eliminate:
+                        if coef > 0:
+                            num_pos[j] += 1
+                        else:
+                            num_neg[j] += 1
+            j = min(to_eliminate,
+                    key=lambda j: (num_pos[j]*num_neg[j] - num_pos[j] -
+                                   num_neg[j], j))
+            to_eliminate.remove(j)
+            num_eliminated += 1
+            logger.warning("Projecting out var %s of %s" % (num_eliminated,
+                                                            total))
+            if self.verbose:
+                logger.info("Projecting out %s: combining %s rows with a "
+                            "positive and %s rows with a negative coefficient "
+                            "(%s rows total)" % (
+                                columns[j].getname(fully_qualified=True,
+                                                   name_buffer=NAME_BUFFER),
+                                num_pos[j], num_neg[j], len(rows)))
+
+            waiting_list = []
+            geq_list = []
+            leq_list = []
+            for row in rows:
+                coef = row.coefs.get(j, 0)
+                if coef > 0:
+                    geq_list.append(row)
+                elif coef < 0:
+                    leq_list.append(row)
+                else:
+                    waiting_list.append(row)
+
+            new_rows = []
+            num_chernikov = num_imbert = 0
+            for leq in leq_list:
+                for geq in geq_list:
+                    history = leq.history | geq.history
+                    num_ancestors = _popcount(history)
+                    # Chernikov: after eliminating k variables, a combination
+                    # of more than k+1 of the original constraints is
+                    # implied by the others
+                    if num_ancestors > num_eliminated + 1:
+                        num_chernikov += 1
+                        continue
+                    row = self._combine_rows(leq, geq, j)
+                    # Imbert: ... or a combination of more than 1 + the number
+                    # of variables (explicitly or implicitly) eliminated from
+                    # its original constraints
+                    row_vars = 0
+                    for col in row.coefs:
+                        row_vars |= 1 << col
+                    if num_ancestors > 1 + _popcount(row.vars_seen &
+                                                     ~row_vars):
+                        num_imbert += 1
+                        continue
+                    new_rows.append(row)
+            rows = self._prune_rows(waiting_list + new_rows)
+            if self.verbose:
+                logger.info("\tDiscarded %s combinations by Chernikov's rule "
+                            "and %s by Imbert's rule. %s rows remain." % (
+                                num_chernikov, num_imbert, len(rows)))
+
+        # convert the rows back to the dictionary representation
+        new_constraints = untouched
+        for row in rows:
+            cols = sorted(row.coefs)
+            linear_vars = [columns[col] for col in cols]
+            linear_coefs = [row.coefs[col] for col in cols]
+            if row.nonlinear:
+                body = generate_standard_repn(
+                    sum(coef*v for coef, v in zip(linear_coefs, linear_vars))
+                    + sum(m*expr for m, expr in row.nonlinear))
+            else:
+                body = StandardRepn()
+                body.linear_vars = tuple(linear_vars)
+                body.linear_coefs = tuple(linear_coefs)
+            new_constraints.append({
+                'lower': row.lower,
+                'body': body,
+                'map': ComponentMap(zip(linear_vars, linear_coefs))})
+        return new_constraints
+
+    def _combine_rows(self, leq, geq, j):
+        """Returns the nonnegative combination of the rows leq and geq (with
+        negative and positive coefficients for column j, respectively) which
+        eliminates column j"""
+        a = -leq.coefs[j]
+        b = geq.coefs[j]
+        if self.do_integer_arithmetic:
+            least_common_mult = lcm([a, b])
+            leq_mult = least_common_mult // a
+            geq_mult = least_common_mult // b
+        else:
+            leq_mult = 1.0/a
+            geq_mult = 1.0/b
+        coefs = {}
+        for col, coef in iteritems(leq.coefs):
+            if col != j:
+                coefs[col] = leq_mult*coef
+        for col, coef in iteritems(geq.coefs):
+            if col != j:
+                coefs[col] = coefs.get(col, 0) + geq_mult*coef
+        if not self.do_integer_arithmetic:
+            for col in [col for col, coef in iteritems(coefs)
+                        if abs(coef) <= self.zero_tolerance]:
+                del coefs[col]
+        else:
+            for col in [col for col, coef in iteritems(coefs) if coef == 0]:
+                del coefs[col]
+        lower = leq_mult*leq.lower + geq_mult*geq.lower
+        if not self.do_integer_arithmetic and abs(lower) <= self.zero_tolerance:
+            lower = 0
+        nonlinear = tuple((leq_mult*m, expr) for m, expr in leq.nonlinear) + \
+                    tuple((geq_mult*m, expr) for m, expr in geq.nonlinear)
+        return self._normalize_row(_SparseRow(
+            coefs, lower, nonlinear, leq.history | geq.history,
+            leq.vars_seen | geq.vars_seen))
+
+    def _normalize_row(self, row):
+        """With integer arithmetic, divides the row by the greatest common
+        divisor of its data"""
+        if not self.do_integer_arithmetic:
+            return row
+        divisor = 0
+        for coef in row.coefs.values():
+            divisor = gcd(divisor, coef)
+        for m, expr in row.nonlinear:
+            divisor = gcd(divisor, m)
+        divisor = gcd(divisor, row.lower)
+        if divisor > 1:
+            for col in row.coefs:
+                row.coefs[col] //= divisor
+            row.lower //= divisor
+            row.nonlinear = tuple((m // divisor, expr)
+                                  for m, expr in row.nonlinear)
+        return row
+
+    def _prune_rows(self, rows):
+        """Removes rows which are trivially satisfied, and, of the rows whose
+        coefficients are equal up to a positive scaling, keeps only the one
+        with the tightest lower bound"""
+        ans = []
+        # key -> (position in ans, scaled lower bound)
+        seen = {}
+        for row in rows:
+            if row.nonlinear:
+                # we don't compare nonlinear expressions
+                ans.append(row)
+                continue
+            if row.coefs:
+                if self.do_integer_arithmetic:
+                    scale = 0
+                    for coef in row.coefs.values():
+                        scale = gcd(scale, coef)
+                    lower = Fraction(row.lower, scale)
+                    key = tuple(sorted((col, coef // scale) for col, coef in
+                                       iteritems(row.coefs)))
+                else:
+                    scale = max(abs(coef) for coef in row.coefs.values())
+                    lower = row.lower/scale
+                    key = tuple(sorted((col, coef/scale) for col, coef in
+                                       iteritems(row.coefs)))
+            else:
+                if row.lower <= 0:
+                    # 0 >= lower is always satisfied
+                    continue
+                # (we keep one infeasible row so that it is reported)
+                key = ()
+                lower = row.lower
+            prev = seen.get(key)
+            if prev is None:
+                seen[key] = (len(ans), lower)
+                ans.append(row)
+            elif lower > prev[1]:
+                # this row dominates the one we kept
+                seen[key] = (prev[0], lower)
+                ans[prev[0]] = row
+        return ans
+
     def _get_noninteger_coef_error_message(self, varname, coef):
         return ("The do_integer_arithmetic flag was "
                 "set to True, but the coefficient of "
@@ -29,6 +29,7 @@ import pyomo.contrib.fme.fourier_motzkin_elimination
 
 from six import StringIO
 import logging
+import itertools
 import random
 
 solvers = check_available_solvers('glpk')
@@ -946,3 +947,179 @@ class TestFourierMotzkinElimination(unittest.TestCase):
         self.assertIs(repn.linear_vars[1], m.y)
         self.assertEqual(repn.linear_coefs[1], -2)
         self.assertTrue(repn.is_linear())
+
+    def test_sparse_engine_transformed_constraints(self):
+        m = self.makeModel()
+        TransformationFactory('contrib.fourier_motzkin_elimination').apply_to(
+            m,
+            vars_to_eliminate=m.lamb,
+            engine='sparse')
+        constraints = m._pyomo_contrib_fme_transformation.projected_constraints
+        self.assertEqual(len(constraints), 4)
+        self.assertFalse(m.dual1.active)
+        self.assertFalse(m.bound_lambdas[1].active)
+
+        # The constraints are the same as those of the standard engine, up to
+        # scaling.
+        m_standard = self.makeModel()
+        TransformationFactory('contrib.fourier_motzkin_elimination').apply_to(
+            m_standard,
+            vars_to_eliminate=m_standard.lamb)
+        self.check_same_projection(
+            m_standard, m,
+            lambda m: [m.x, m.y, m.u[1], m.u[2]],
+            [(0, 0.5, 1, 2), (0, 500, 1000), (0, 1), (0, 1)])
+
+        # u_2 + 100u_1 >= 1 (scaled by 100)
+        cons = constraints[4]
+        self.assertEqual(value(cons.lower), 100)
+        repn = generate_standard_repn(cons.body)
+        self.assertTrue(repn.is_linear())
+        self.assertEqual(len(repn.linear_vars), 2)
+        self.assertIs(repn.linear_vars[0], m.u[1])
+        self.assertEqual(repn.linear_coefs[0], 10000)
+        self.assertIs(repn.linear_vars[1], m.u[2])
+        self.assertEqual(repn.linear_coefs[1], 100)
+
+    def test_sparse_engine_combine_three_inequalities(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.y = Var()
+        m.b = Block()
+        m.b.c = Constraint(expr=m.x >= 2)
+        m.c = Constraint(expr=m.y <= m.x)
+        m.b.b2 = Block()
+        m.b.b2.c = Constraint(expr=m.y >= 4)
+        m.b.b2.d = Constraint(expr=2*m.y >= 6)
+        TransformationFactory('contrib.fourier_motzkin_elimination').apply_to(
+            m, vars_to_eliminate=m.y, do_integer_arithmetic=True,
+            engine='sparse')
+
+        constraints = m._pyomo_contrib_fme_transformation.projected_constraints
+        # x >= 2 does not contain y, so it is passed through. x >= 3 is
+        # dominated by x >= 4, so it is pruned.
+        self.assertEqual(len(constraints), 2)
+        cons = constraints[1]
+        self.assertEqual(value(cons.lower), 2)
+        self.assertIsNone(cons.upper)
+        self.assertIs(cons.body, m.x)
+
+        cons = constraints[2]
+        self.assertEqual(value(cons.lower), 4)
+        self.assertIsNone(cons.upper)
+        self.assertIs(cons.body, m.x)
+
+    def test_sparse_engine_integer_arithmetic_normalized(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0,9))
+        m.y = Var(bounds=(-5, 5))
+        m.c1 = Constraint(expr=4*m.x + m.y >= 4)
+        m.c2 = Constraint(expr=m.y >= 2*m.x)
+
+        fme = TransformationFactory('contrib.fourier_motzkin_elimination')
+        fme.apply_to(m, vars_to_eliminate=m.x,
+                     constraint_filtering_callback=None,
+                     do_integer_arithmetic=True, engine='sparse')
+        constraints = m._pyomo_contrib_fme_transformation.projected_constraints
+
+        # The combinations are 3y >= 4, 2y >= 0, and y >= -32, but the last
+        # two are dominated by the first.
+        self.assertEqual(len(constraints), 1)
+        cons = constraints[1]
+        self.assertEqual(value(cons.lower), 4)
+        self.assertIsNone(cons.upper)
+        repn = generate_standard_repn(cons.body)
+        self.assertTrue(repn.is_linear())
+        self.assertEqual(len(repn.linear_vars), 1)
+        self.assertIs(repn.linear_vars[0], m.y)
+        self.assertIs(type(repn.linear_coefs[0]), int)
+        self.assertEqual(repn.linear_coefs[0], 3)
+
+    def test_sparse_engine_infeasible_model(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 10))
+        m.cons1 = Constraint(expr=m.x >= 6)
+        m.cons2 = Constraint(expr=m.x <= 2)
+
+        self.assertRaisesRegexp(
+            RuntimeError,
+            "Fourier-Motzkin found the model is infeasible!",
+            TransformationFactory('contrib.fourier_motzkin_elimination').\
+            apply_to,
+            m,
+            vars_to_eliminate=m.x,
+            engine='sparse')
+
+    def test_sparse_engine_nonlinear_unrelated_expression(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 3))
+        m.y = Var()
+        m.c1 = Constraint(expr=m.x <= m.y**2)
+        m.c2 = Constraint(expr=m.x >= m.y - 2)
+        TransformationFactory('contrib.fourier_motzkin_elimination').apply_to(
+            m, vars_to_eliminate=m.x, engine='sparse',
+            constraint_filtering_callback=None)
+        constraints = m._pyomo_contrib_fme_transformation.projected_constraints
+        quadratic = [constraints[i] for i in constraints
+                     if generate_standard_repn(
+                             constraints[i].body).is_quadratic()]
+        self.assertEqual(len(quadratic), 2)
+        for y in (-3, -1, 0, 1.5, 4):
+            m.y.fix(y)
+            for cons in quadratic:
+                self.assertLessEqual(value(cons.lower), value(cons.body))
+
+    @staticmethod
+    def make_random_model(seed, do_integer_arithmetic):
+        rnd = random.Random(seed)
+        m = ConcreteModel()
+        m.x = Var(range(3))
+        m.z = Var(range(3), bounds=(-5, 5))
+        m.c = pyo.ConstraintList()
+        for k in range(8):
+            if do_integer_arithmetic:
+                coef = lambda: rnd.choice([-3, -2, -1, 1, 2, 3])
+            else:
+                coef = lambda: rnd.choice([-1.5, -1, -0.5, 0.5, 1, 2])
+            e = sum(coef()*m.x[i] for i in rnd.sample(range(3), 2)) + \
+                sum(coef()*m.z[i] for i in rnd.sample(range(3), 2))
+            m.c.add(e <= rnd.randint(1, 12))
+        return m
+
+    def check_same_projection(self, m1, m2, get_vars, values):
+        cons1 = m1._pyomo_contrib_fme_transformation.projected_constraints
+        cons2 = m2._pyomo_contrib_fme_transformation.projected_constraints
+        for pt in itertools.product(*values):
+            for v1, v2, val in zip(get_vars(m1), get_vars(m2), pt):
+                v1.fix(val)
+                v2.fix(val)
+            feasible1 = all(value(cons1[i].body) >= value(cons1[i].lower)
+                            - 1e-8 for i in cons1)
+            feasible2 = all(value(cons2[i].body) >= value(cons2[i].lower)
+                            - 1e-8 for i in cons2)
+            self.assertEqual(feasible1, feasible2)
+        for v in get_vars(m1) + get_vars(m2):
+            v.unfix()
+        return len(cons1), len(cons2)
+
+    def test_sparse_engine_matches_standard_engine(self):
+        pruned = False
+        for seed in range(4):
+            for do_integer_arithmetic in (True, False):
+                m1 = self.make_random_model(seed, do_integer_arithmetic)
+                m2 = self.make_random_model(seed, do_integer_arithmetic)
+                fme = TransformationFactory(
+                    'contrib.fourier_motzkin_elimination')
+                fme.apply_to(m1, vars_to_eliminate=m1.x,
+                             do_integer_arithmetic=do_integer_arithmetic,
+                             constraint_filtering_callback=None)
+                fme.apply_to(m2, vars_to_eliminate=m2.x,
+                             do_integer_arithmetic=do_integer_arithmetic,
+                             constraint_filtering_callback=None,
+                             engine='sparse')
+                n1, n2 = self.check_same_projection(
+                    m1, m2, lambda m: list(m.z.values()),
+                    [range(-5, 6, 2)]*3)
+                self.assertLessEqual(n2, n1)
+                pruned |= n2 < n1
+        self.assertTrue(pruned)
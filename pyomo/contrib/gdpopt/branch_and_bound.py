@@ -10,6 +10,7 @@
 
 import traceback
 from collections import namedtuple
+from contextlib import contextmanager
 from heapq import heappush, heappop
 
 from pyomo.common.collections import ComponentMap
@@ -17,7 +18,8 @@ from pyomo.common.errors import InfeasibleConstraintException
 from pyomo.contrib.fbbt.fbbt import fbbt
 from pyomo.contrib.gdpopt.util import copy_var_list_values, SuppressInfeasibleWarning, get_main_elapsed_time
 from pyomo.contrib.satsolver.satsolver import satisfiable
-from pyomo.core import minimize, Suffix, Constraint, TransformationFactory
+from pyomo.core import minimize, Constraint, Var
+from pyomo.gdp.incremental import IncrementalBigMRelaxation
 from pyomo.opt import SolverFactory, SolverStatus
 from pyomo.opt import TerminationCondition as tc
 
@@ -36,6 +38,25 @@ BBNodeData = namedtuple('BBNodeData', [
 ])
 
 
+class BBNode(object):
+    """A node of the branch and bound tree.
+
+    Nodes do not hold a copy of the model. Instead, the Big-M relaxation
+    of the working model is created once (see IncrementalBigMRelaxation)
+    and each node records the disjuncts that were fixed by branching, which
+    are applied to the relaxation (or the working model) when the node is
+    processed.
+    """
+    __slots__ = ('branch_decisions', 'var_values')
+
+    def __init__(self, branch_decisions=(), var_values=None):
+        # tuple of (disjunction index, index of the unfixed disjunct fixed
+        # to True)
+        self.branch_decisions = branch_decisions
+        # values of GDPopt_utils.variable_list when the node was last solved
+        self.var_values = var_values
+
+
 def _perform_branch_and_bound(solve_data):
     solve_data.explored_nodes = 0
     root_node = solve_data.working_model
@@ -99,10 +120,21 @@ def _perform_branch_and_bound(solve_data):
         root_util_blk.disjunction_to_unfixed_disjuncts[disjunction] = unfixed_disjuncts
         pass
 
-    # Add the BigM suffix if it does not already exist. Used later during nonlinear constraint activation.
-    # TODO is this still necessary?
-    if not hasattr(root_node, 'BigM'):
-        root_node.BigM = Suffix()
+    # Create the Big-M relaxation used to solve every node. The nonlinear
+    # constraints of unfixed disjuncts are only activated when their
+    # disjunct is fixed to True by branching.
+    relaxed_model = root_node.clone()
+    deferred_constraints = []
+    for constraints in relaxed_model.GDPopt_utils.disjunct_to_nonlinear_constraints.values():
+        for constraint in constraints:
+            constraint.activate()
+            deferred_constraints.append(constraint)
+    solve_data.bb_relaxation = IncrementalBigMRelaxation(
+        relaxed_model,
+        disjunctions=[disjunction for disjunction in relaxed_model.GDPopt_utils.disjunction_list
+                      if disjunction.active],
+        deferred_constraints=deferred_constraints)
+    solve_data.bb_relaxation_vars = list(relaxed_model.component_data_objects(Var, descend_into=True))
 
     # Set up the priority queue
     queue = solve_data.bb_queue = []
@@ -118,7 +150,7 @@ def _perform_branch_and_bound(solve_data):
         node_count=0,
         unbranched_disjunction_indices=unbranched_disjunction_indices,
     )
-    heappush(queue, (sort_tuple, root_node))
+    heappush(queue, (sort_tuple, BBNode()))
 
     # Do the branch and bound
     while len(queue) > 0:
@@ -127,7 +159,7 @@ def _perform_branch_and_bound(solve_data):
         # pprint([(
         #     x[0].node_count, x[0].obj_lb, x[0].obj_ub, x[0].num_unbranched_disjunctions
         # ) for x in sorted(queue)])
-        node_data, node_model = heappop(queue)
+        node_data, node = heappop(queue)
         config.logger.info("Nodes: %s LB %.10g Unbranched %s" % (
             solve_data.explored_nodes, node_data.obj_lb, node_data.num_unbranched_disjunctions))
 
@@ -152,18 +184,19 @@ def _perform_branch_and_bound(solve_data):
         if not node_data.is_screened:
             # Node has not been evaluated.
             solve_data.explored_nodes += 1
-            new_node_data = _prescreen_node(node_data, node_model, solve_data)
-            heappush(queue, (new_node_data, node_model))  # replace with updated node data
+            new_node_data = _prescreen_node(node_data, node, solve_data)
+            heappush(queue, (new_node_data, node))  # replace with updated node data
         elif node_data.obj_lb < node_data.obj_ub - config.bound_tolerance and not node_data.is_evaluated:
             # Node has not been fully evaluated.
             # Note: infeasible and unbounded nodes will skip this condition, because of strict inequality
-            new_node_data = _evaluate_node(node_data, node_model, solve_data)
-            heappush(queue, (new_node_data, node_model))  # replace with updated node data
+            new_node_data = _evaluate_node(node_data, node, solve_data)
+            heappush(queue, (new_node_data, node))  # replace with updated node data
         elif node_data.num_unbranched_disjunctions == 0 or node_data.obj_lb == float('inf'):
             # We have reached a leaf node, or the best available node is infeasible.
             original_model = solve_data.original_model
+            _load_node(node, solve_data)
             copy_var_list_values(
-                from_list=node_model.GDPopt_utils.variable_list,
+                from_list=solve_data.bb_relaxation.model.GDPopt_utils.variable_list,
                 to_list=original_model.GDPopt_utils.variable_list,
                 config=config,
             )
@@ -179,41 +212,28 @@ def _perform_branch_and_bound(solve_data):
                 solve_data.results.solver.termination_condition = tc.optimal
             return
         else:
-            _branch_on_node(node_data, node_model, solve_data)
+            _branch_on_node(node_data, node, solve_data)
 
 
-def _branch_on_node(node_data, node_model, solve_data):
+def _branch_on_node(node_data, node, solve_data):
     # Keeping the naive branch selection
     config = solve_data.config
+    root_util_blk = solve_data.working_model.GDPopt_utils
     disjunction_to_branch_idx = node_data.unbranched_disjunction_indices[0]
-    disjunction_to_branch = node_model.GDPopt_utils.disjunction_list[disjunction_to_branch_idx]
-    num_unfixed_disjuncts = len(node_model.GDPopt_utils.disjunction_to_unfixed_disjuncts[disjunction_to_branch])
+    disjunction_to_branch = root_util_blk.disjunction_list[disjunction_to_branch_idx]
+    num_unfixed_disjuncts = len(root_util_blk.disjunction_to_unfixed_disjuncts[disjunction_to_branch])
     config.logger.info("Branching on disjunction %s" % disjunction_to_branch.name)
+    if not disjunction_to_branch.xor:
+        raise NotImplementedError("We still need to add support for non-XOR disjunctions.")
+        # This requires adding all combinations of activation status among unfixed_disjuncts
     node_count = solve_data.created_nodes
     newly_created_nodes = 0
 
     for disjunct_index_to_fix_True in range(num_unfixed_disjuncts):
         # Create a new branch for each unfixed disjunct
-        child_model = node_model.clone()
-        child_disjunction_to_branch = child_model.GDPopt_utils.disjunction_list[disjunction_to_branch_idx]
-        child_unfixed_disjuncts = child_model.GDPopt_utils.disjunction_to_unfixed_disjuncts[child_disjunction_to_branch]
-        for idx, child_disjunct in enumerate(child_unfixed_disjuncts):
-            if idx == disjunct_index_to_fix_True:
-                child_disjunct.indicator_var.fix(1)
-            else:
-                child_disjunct.deactivate()
-        if not child_disjunction_to_branch.xor:
-            raise NotImplementedError("We still need to add support for non-XOR disjunctions.")
-            # This requires adding all combinations of activation status among unfixed_disjuncts
-        # Reactivate nonlinear constraints in the newly-fixed child disjunct
-        fixed_True_disjunct = child_unfixed_disjuncts[disjunct_index_to_fix_True]
-        for constr in child_model.GDPopt_utils.disjunct_to_nonlinear_constraints.get(fixed_True_disjunct, ()):
-            constr.activate()
-            child_model.BigM[constr] = 1  # set arbitrary BigM (ok, because we fix corresponding Y=True)
-
-        del child_model.GDPopt_utils.disjunction_to_unfixed_disjuncts[child_disjunction_to_branch]
-        for child_disjunct in child_unfixed_disjuncts:
-            child_model.GDPopt_utils.disjunct_to_nonlinear_constraints.pop(child_disjunct, None)
+        child_node = BBNode(
+            branch_decisions=node.branch_decisions + ((disjunction_to_branch_idx, disjunct_index_to_fix_True),),
+            var_values=node.var_values)
 
         newly_created_nodes += 1
         child_node_data = node_data._replace(
@@ -224,7 +244,7 @@ def _branch_on_node(node_data, node_model, solve_data):
             unbranched_disjunction_indices=node_data.unbranched_disjunction_indices[1:],
             obj_ub=float('inf'),
         )
-        heappush(solve_data.bb_queue, (child_node_data, child_model))
+        heappush(solve_data.bb_queue, (child_node_data, child_node))
 
     solve_data.created_nodes += newly_created_nodes
 
@@ -232,10 +252,77 @@ def _branch_on_node(node_data, node_model, solve_data):
         num_unfixed_disjuncts, node_data.num_unbranched_disjunctions - 1, len(solve_data.bb_queue)))
 
 
-def _prescreen_node(node_data, node_model, solve_data):
+def _branch_decisions(node, util_blk):
+    """Yield (disjunct, True/False) for the disjuncts fixed by branching at node"""
+    for disjunction_idx, disjunct_index_to_fix_True in node.branch_decisions:
+        disjunction = util_blk.disjunction_list[disjunction_idx]
+        for idx, disjunct in enumerate(util_blk.disjunction_to_unfixed_disjuncts[disjunction]):
+            yield disjunct, idx == disjunct_index_to_fix_True
+
+
+def _load_node(node, solve_data):
+    """Apply the branching decisions of node to the Big-M relaxation and load
+    the variable values last found for the node"""
+    relaxation = solve_data.bb_relaxation
+    util_blk = relaxation.model.GDPopt_utils
+    relaxation.set_state(ComponentMap(_branch_decisions(node, util_blk)))
+    if node.var_values is not None:
+        for v, val in zip(util_blk.variable_list, node.var_values):
+            if not v.is_fixed():
+                v.value = val
+    return relaxation.model
+
+
+def _store_node_values(node, solve_data):
+    node.var_values = [v.value for v in solve_data.bb_relaxation.model.GDPopt_utils.variable_list]
+
+
+@contextmanager
+def _restore_bounds(solve_data):
+    """Restore the variable bounds of the relaxation (which are tightened by
+    FBBT for a single node) on exit"""
+    bounds = [(v, v.lb, v.ub) for v in solve_data.bb_relaxation_vars]
+    try:
+        yield
+    finally:
+        for v, lb, ub in bounds:
+            v.setlb(lb)
+            v.setub(ub)
+
+
+@contextmanager
+def _gdp_node(node, solve_data):
+    """Temporarily apply the branching decisions of node to the (GDP) working model"""
+    util_blk = solve_data.working_model.GDPopt_utils
+    decisions = list(_branch_decisions(node, util_blk))
+    for disjunct, fix_True in decisions:
+        if fix_True:
+            disjunct.indicator_var.fix(1)
+            for constr in util_blk.disjunct_to_nonlinear_constraints.get(disjunct, ()):
+                constr.activate()
+        else:
+            disjunct.deactivate()
+    try:
+        yield solve_data.working_model
+    finally:
+        for disjunct, fix_True in decisions:
+            if fix_True:
+                disjunct.indicator_var.unfix()
+                for constr in util_blk.disjunct_to_nonlinear_constraints.get(disjunct, ()):
+                    constr.deactivate()
+            else:
+                disjunct.activate()
+
+
+def _check_sat(node, solve_data):
+    with _gdp_node(node, solve_data) as node_model:
+        return satisfiable(node_model, solve_data.config.logger)
+
+
+def _prescreen_node(node_data, node, solve_data):
     config = solve_data.config
     # Check node for satisfiability if sat-solver is enabled
-    if config.check_sat and satisfiable(node_model, config.logger) is False:
+    if config.check_sat and _check_sat(node, solve_data) is False:
         if node_data.node_count == 0:
             config.logger.info("Root node is not satisfiable. Problem is infeasible.")
         else:
@@ -248,7 +335,7 @@ def _prescreen_node(node_data, node_model, solve_data):
                 "Screening node %s with LB %.10g and %s inactive disjunctions." % (
                     node_data.node_count, node_data.obj_lb, node_data.num_unbranched_disjunctions
                 ))
-            new_lb, new_ub = _solve_local_rnGDP_subproblem(node_model, solve_data)
+            new_lb, new_ub = _solve_local_rnGDP_subproblem(node, solve_data)
         else:
             new_lb, new_ub = float('-inf'), float('inf')
         new_lb = max(node_data.obj_lb, new_lb)
@@ -257,33 +344,29 @@ def _prescreen_node(node_data, node_model, solve_data):
     return new_node_data
 
 
-def _evaluate_node(node_data, node_model, solve_data):
+def _evaluate_node(node_data, node, solve_data):
     config = solve_data.config
     # Solve model subproblem
     solve_data.config.logger.info(
         "Exploring node %s with LB %.10g UB %.10g and %s inactive disjunctions." % (
             node_data.node_count, node_data.obj_lb, node_data.obj_ub, node_data.num_unbranched_disjunctions
         ))
-    new_lb, new_ub = _solve_rnGDP_subproblem(node_model, solve_data)
+    new_lb, new_ub = _solve_rnGDP_subproblem(node, solve_data)
     new_node_data = node_data._replace(obj_lb=new_lb, obj_ub=new_ub, is_evaluated=True)
     return new_node_data
 
 
-def _solve_rnGDP_subproblem(model, solve_data):
+def _solve_rnGDP_subproblem(node, solve_data):
     config = solve_data.config
-    subproblem = TransformationFactory('gdp.bigm').create_using(model)
+    subproblem = _load_node(node, solve_data)
     obj_sense_correction = solve_data.objective_sense != minimize
 
     try:
-        with SuppressInfeasibleWarning():
+        with SuppressInfeasibleWarning(), _restore_bounds(solve_data):
             try:
                 fbbt(subproblem, integer_tol=config.integer_tolerance)
             except InfeasibleConstraintException:
-                copy_var_list_values(  # copy variable values, even if errored
-                    from_list=subproblem.GDPopt_utils.variable_list,
-                    to_list=model.GDPopt_utils.variable_list,
-                    config=config, ignore_integrality=True
-                )
+                _store_node_values(node, solve_data)  # store variable values, even if errored
                 return float('inf'), float('inf')
             minlp_args = dict(config.minlp_solver_args)
             if config.minlp_solver == 'gams':
@@ -296,11 +379,7 @@ def _solve_rnGDP_subproblem(model, solve_data):
         config.logger.warning(
             "Solver encountered RuntimeError. Treating as infeasible. "
             "Msg: %s\n%s" % (str(e), traceback.format_exc()))
-        copy_var_list_values(  # copy variable values, even if errored
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)  # store variable values, even if errored
         return float('inf'), float('inf')
 
     term_cond = result.solver.termination_condition
@@ -308,51 +387,31 @@ def _solve_rnGDP_subproblem(model, solve_data):
         assert result.solver.status is SolverStatus.ok
         lb = result.problem.lower_bound if not obj_sense_correction else -result.problem.upper_bound
         ub = result.problem.upper_bound if not obj_sense_correction else -result.problem.lower_bound
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config,
-        )
+        _store_node_values(node, solve_data)
         return lb, ub
     elif term_cond == tc.locallyOptimal or term_cond == tc.feasible:
         assert result.solver.status is SolverStatus.ok
         lb = result.problem.lower_bound if not obj_sense_correction else -result.problem.upper_bound
         ub = result.problem.upper_bound if not obj_sense_correction else -result.problem.lower_bound
         # TODO handle LB absent
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config,
-        )
+        _store_node_values(node, solve_data)
         return lb, ub
     elif term_cond == tc.unbounded:
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), float('-inf')
     elif term_cond == tc.infeasible:
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('inf'), float('inf')
     else:
         config.logger.warning("Unknown termination condition of %s. Treating as infeasible." % term_cond)
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('inf'), float('inf')
 
 
-def _solve_local_rnGDP_subproblem(model, solve_data):
+def _solve_local_rnGDP_subproblem(node, solve_data):
     # TODO for now, return (LB, UB) = (-inf, inf) (for minimize)
     config = solve_data.config
-    subproblem = TransformationFactory('gdp.bigm').create_using(model)
+    subproblem = _load_node(node, solve_data)
     obj_sense_correction = solve_data.objective_sense != minimize
 
     try:
@@ -362,11 +421,7 @@ def _solve_local_rnGDP_subproblem(model, solve_data):
         config.logger.warning(
             "Solver encountered RuntimeError. Treating as infeasible. "
             "Msg: %s\n%s" % (str(e), traceback.format_exc()))
-        copy_var_list_values(  # copy variable values, even if errored
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)  # store variable values, even if errored
         return float('-inf'), float('inf')
 
     term_cond = result.solver.termination_condition
@@ -374,42 +429,22 @@ def _solve_local_rnGDP_subproblem(model, solve_data):
         assert result.solver.status is SolverStatus.ok
         lb = result.problem.lower_bound if not obj_sense_correction else -result.problem.upper_bound
         ub = result.problem.upper_bound if not obj_sense_correction else -result.problem.lower_bound
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config,
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), ub
     elif term_cond == tc.locallyOptimal or term_cond == tc.feasible:
         assert result.solver.status is SolverStatus.ok
         lb = result.problem.lower_bound if not obj_sense_correction else -result.problem.upper_bound
         ub = result.problem.upper_bound if not obj_sense_correction else -result.problem.lower_bound
         # TODO handle LB absent
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config,
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), ub
     elif term_cond == tc.unbounded:
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), float('-inf')
     elif term_cond == tc.infeasible:
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), float('inf')
     else:
         config.logger.warning("Unknown termination condition of %s. Treating as infeasible." % term_cond)
-        copy_var_list_values(
-            from_list=subproblem.GDPopt_utils.variable_list,
-            to_list=model.GDPopt_utils.variable_list,
-            config=config, ignore_integrality=True
-        )
+        _store_node_values(node, solve_data)
         return float('-inf'), float('inf')
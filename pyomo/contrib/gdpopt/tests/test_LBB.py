@@ -1,15 +1,17 @@
 """Tests for the Logic-based Branch and Bound solver plugin."""
 
+import time
 from math import fabs
 from os.path import abspath, dirname, join, normpath
 
 import pyutilib.th as unittest
 from pyutilib.misc import import_file
 
+from pyomo.common.collections import Options
 from pyomo.contrib.satsolver.satsolver import z3_available
 from pyomo.environ import SolverFactory, value, ConcreteModel, Var, Objective, maximize
 from pyomo.gdp import Disjunction
-from pyomo.opt import TerminationCondition
+from pyomo.opt import SolverResults, SolverStatus, TerminationCondition
 
 currdir = dirname(abspath(__file__))
 exdir = normpath(join(currdir, '..', '..', '..', '..', 'examples', 'gdp'))
@@ -20,6 +22,167 @@ solver_available = SolverFactory(minlp_solver).available()
 license_available = SolverFactory(minlp_solver).license_is_valid() if solver_available else False
 
 
+@SolverFactory.register('_lbb_test_solver', doc='LBB test subproblem solver')
+class LBBTestSolver(object):
+    """Solves the Big-M relaxation of a branch and bound node by looking up
+    the node in a table.
+
+    A node is identified by the (disjunction index, disjunct index) pairs of
+    the disjuncts fixed to True. The table maps nodes to the objective value
+    of their relaxation (None for an infeasible relaxation). The value is
+    also assigned to the variable x, so that the solution loaded into the
+    original model identifies the node it came from.
+    """
+    bounds = {}
+    solved = []
+    delay = 0
+
+    def __init__(self, **kwds):
+        self.options = Options()
+
+    def available(self, exception_flag=True):
+        return True
+
+    def solve(self, model, **kwds):
+        disjunctions = model.GDPopt_utils.disjunction_list
+        node = tuple(
+            (i, j) for i, disjunction in enumerate(disjunctions)
+            for j, disjunct in enumerate(disjunction.disjuncts)
+            if disjunct.indicator_var.fixed and disjunct.indicator_var.value == 1)
+        self.solved.append(node)
+        time.sleep(self.delay)
+        results = SolverResults()
+        results.solver.status = SolverStatus.ok
+        obj = self.bounds[node]
+        if obj is None:
+            results.solver.termination_condition = TerminationCondition.infeasible
+        else:
+            results.solver.termination_condition = TerminationCondition.optimal
+            results.problem.lower_bound = results.problem.upper_bound = obj
+            model.x.value = obj
+        return results
+
+
+class TestGDPopt_LBB_Queue(unittest.TestCase):
+    """Tests of the node queue, bounding and pruning of logic-based branch
+    and bound, with the node subproblems solved by LBBTestSolver."""
+
+    def setUp(self):
+        LBBTestSolver.solved = []
+        LBBTestSolver.delay = 0
+
+    def make_model(self, sense=1):
+        m = ConcreteModel()
+        m.x = Var(bounds=(-10, 10))
+        m.y = Var(bounds=(-10, 10))
+        m.d1 = Disjunction(expr=[[m.y <= 1], [m.y >= 2]])
+        m.d2 = Disjunction(expr=[[m.x <= m.y], [m.x >= m.y + 1]])
+        m.o = Objective(expr=m.x, sense=sense)
+        return m
+
+    def solve(self, m, bounds):
+        LBBTestSolver.bounds = bounds
+        return SolverFactory('gdpopt').solve(
+            m, strategy='LBB', minlp_solver='_lbb_test_solver')
+
+    def test_best_first_search(self):
+        m = self.make_model()
+        results = self.solve(m, {
+            (): 1,
+            ((0, 0),): 2, ((0, 1),): 5,
+            ((0, 0), (1, 0)): None, ((0, 0), (1, 1)): 6,
+            ((0, 1), (1, 0)): 7, ((0, 1), (1, 1)): 5.5,
+        })
+        # The node with the lowest bound is always processed next: the
+        # children of d1[0] (bound 2) are solved before d1[1] (bound 5) is
+        # branched on, and the leaf with value 5.5 is optimal
+        self.assertEqual(LBBTestSolver.solved, [
+            (), ((0, 0),), ((0, 1),),
+            ((0, 0), (1, 0)), ((0, 0), (1, 1)),
+            ((0, 1), (1, 0)), ((0, 1), (1, 1)),
+        ])
+        self.assertEqual(results.solver.termination_condition,
+                         TerminationCondition.optimal)
+        self.assertEqual(results.problem.lower_bound, 5.5)
+        self.assertEqual(results.problem.upper_bound, 5.5)
+        # The solution of the optimal leaf is loaded into the model
+        self.assertEqual(m.x.value, 5.5)
+        self.assertEqual(
+            [value(d.indicator_var) for d in m.d1.disjuncts + m.d2.disjuncts],
+            [0, 1, 0, 1])
+
+    def test_prune_by_bound(self):
+        m = self.make_model()
+        results = self.solve(m, {
+            (): 1,
+            ((0, 0),): 2, ((0, 1),): 5,
+            ((0, 0), (1, 0)): 3, ((0, 0), (1, 1)): 4,
+        })
+        # The leaf with value 3 is optimal before the subtree of d1[1]
+        # (bound 5) is explored, so it is never branched on
+        self.assertEqual(LBBTestSolver.solved, [
+            (), ((0, 0),), ((0, 1),),
+            ((0, 0), (1, 0)), ((0, 0), (1, 1)),
+        ])
+        self.assertEqual(results.solver.termination_condition,
+                         TerminationCondition.optimal)
+        self.assertEqual(results.problem.upper_bound, 3)
+        self.assertEqual(m.x.value, 3)
+
+    def test_prune_infeasible(self):
+        m = self.make_model()
+        results = self.solve(m, {
+            (): 1,
+            ((0, 0),): None, ((0, 1),): 5,
+            ((0, 1), (1, 0)): None, ((0, 1), (1, 1)): 8,
+        })
+        # The infeasible node d1[0] is not branched on
+        self.assertEqual(LBBTestSolver.solved, [
+            (), ((0, 0),), ((0, 1),),
+            ((0, 1), (1, 0)), ((0, 1), (1, 1)),
+        ])
+        self.assertEqual(results.problem.lower_bound, 8)
+        self.assertEqual(m.x.value, 8)
+
+    def test_infeasible(self):
+        m = self.make_model()
+        results = self.solve(m, {(): None})
+        self.assertEqual(LBBTestSolver.solved, [()])
+        self.assertEqual(results.solver.termination_condition,
+                         TerminationCondition.infeasible)
+
+    def test_time_limit(self):
+        m = self.make_model()
+        LBBTestSolver.bounds = {(): 1}
+        LBBTestSolver.delay = 1.1
+        results = SolverFactory('gdpopt').solve(
+            m, strategy='LBB', minlp_solver='_lbb_test_solver', time_limit=1)
+        # The search stops before the root node is branched on, with the
+        # bound of the best node in the queue
+        self.assertEqual(LBBTestSolver.solved, [()])
+        self.assertEqual(results.solver.termination_condition,
+                         TerminationCondition.maxTimeLimit)
+        self.assertEqual(results.problem.lower_bound, 1)
+        self.assertEqual(results.problem.upper_bound, float('inf'))
+
+    def test_maximize(self):
+        # The bounds are reported in the sense of the objective, and the
+        # queue orders the nodes by the sign corrected bounds
+        m = self.make_model(sense=maximize)
+        results = self.solve(m, {
+            (): -1,
+            ((0, 0),): -2, ((0, 1),): -5,
+            ((0, 0), (1, 0)): -3, ((0, 0), (1, 1)): -4,
+        })
+        self.assertEqual(LBBTestSolver.solved, [
+            (), ((0, 0),), ((0, 1),),
+            ((0, 0), (1, 0)), ((0, 0), (1, 1)),
+        ])
+        self.assertEqual(results.problem.lower_bound, -3)
+        self.assertEqual(results.problem.upper_bound, -3)
+        self.assertEqual(m.x.value, -3)
+
+
 @unittest.skipUnless(solver_available, "Required subsolver %s is not available" % (minlp_solver,))
 class TestGDPopt_LBB(unittest.TestCase):
     """Tests for logic-based branch and bound."""
@@ -11,3 +11,4 @@ def load():
     import pyomo.contrib.preprocessing.plugins.induced_linearity
     import pyomo.contrib.preprocessing.plugins.constraint_tightener
     import pyomo.contrib.preprocessing.plugins.int_to_binary
+    import pyomo.contrib.preprocessing.plugins.presolve
@@ -24,7 +24,7 @@ from math import fabs
 
 from pyomo.common.collections import ComponentMap, ComponentSet
 from pyomo.common.config import (ConfigBlock, ConfigValue, NonNegativeFloat,
-                                 add_docstring_list)
+                                 PositiveInt, add_docstring_list)
 from pyomo.common.modeling import unique_component_name
 from pyomo.contrib.preprocessing.util import SuppressConstantObjectiveWarning
 from pyomo.core import (Binary, Block, Constraint, Objective, Set,
@@ -72,7 +72,27 @@ class InducedLinearity(IsomorphicTransformation):
     ))
     CONFIG.declare('pruning_solver', ConfigValue(
         default='glpk',
-        description="Solver to use when pruning possible values."
+        description="Solver to use when pruning possible values.",
+        doc="Solver to use when pruning possible values. If None, the "
+        "possible values are only pruned using variable bounds."
+    ))
+    CONFIG.declare('enumeration_limit', ConfigValue(
+        default=10000,
+        domain=PositiveInt,
+        description="Maximum number of candidate values to enumerate.",
+        doc="Maximum number of candidate values to enumerate for an "
+        "effectively discrete variable from one of its inducing "
+        "constraints. Constraints that would imply more values are not "
+        "used to determine the possible values, and variables without any "
+        "usable inducing constraint are not reformulated."
+    ))
+    CONFIG.declare('prune_with_bounds', ConfigValue(
+        default=True,
+        domain=bool,
+        description="Prune candidate values using variable bounds.",
+        doc="Discard partial sums during the enumeration of candidate "
+        "values that cannot reach the bounds of the effectively discrete "
+        "variable, before any feasibility problems are solved."
     ))
 
     __doc__ = add_docstring_list(__doc__, CONFIG)
@@ -81,49 +101,115 @@ class InducedLinearity(IsomorphicTransformation):
         """Apply the transformation to the given model."""
         config = self.CONFIG(kwds.pop('options', {}))
         config.set_value(kwds)
-        _process_container(model, config)
-        _process_subcontainers(model, config)
+        # The standard repns of the constraints and the incidence of the
+        # bilinear terms are shared by the model and all of its Disjuncts.
+        index = _ConstraintIndex(model)
+        _process_container(model, config, index)
+        _process_subcontainers(model, config, index)
+
+
+class _ConstraintIndex(object):
+    """Standard repns of the active constraints of a model and the
+    constraints in which each pair of variables appears bilinearly.
 
+    The index is built in a single pass over the model and is kept up to
+    date as constraints are reformulated, so that the repn of each
+    constraint is generated once, rather than once for each (nested)
+    Disjunct that is processed.
 
-def _process_subcontainers(blk, config):
+    """
+
+    def __init__(self, model):
+        self._repns = ComponentMap()
+        # var --> (var --> [constraints with the bilinear term])
+        self._bilinear = ComponentMap()
+        for constr in model.component_data_objects(
+                Constraint, active=True, descend_into=(Block, Disjunct)):
+            self.repn(constr)
+
+    def repn(self, constr):
+        """Return the (cached) standard repn of the constraint body"""
+        repn = self._repns.get(constr, None)
+        if repn is None:
+            repn = self._repns[constr] = generate_standard_repn(constr.body)
+            for v1, v2 in repn.quadratic_vars:
+                self._bilinear_constraints(v1, v2).add(constr)
+        return repn
+
+    def update(self, constr):
+        """Regenerate the repn of a constraint whose body has changed"""
+        repn = self._repns.pop(constr, None)
+        if repn is not None:
+            for v1, v2 in repn.quadratic_vars:
+                self._bilinear_constraints(v1, v2).discard(constr)
+        return self.repn(constr)
+
+    def constraints(self, blk):
+        """Active constraints on blk and on its (nested) Disjuncts"""
+        for constr in blk.component_data_objects(
+                Constraint, active=True, descend_into=(Block, Disjunct)):
+            self.repn(constr)
+            yield constr
+
+    def bilinear_partners(self, var):
+        """Map of the variables multiplying var to the constraints in which
+        the products appear"""
+        return self._bilinear.get(var, ComponentMap())
+
+    def _bilinear_constraints(self, v1, v2):
+        v1_pairs = self._bilinear.get(v1, None)
+        if v1_pairs is None:
+            v1_pairs = self._bilinear[v1] = ComponentMap()
+        constrs = v1_pairs.get(v2, None)
+        if constrs is None:
+            constrs = v1_pairs[v2] = ComponentSet()
+            v2_pairs = self._bilinear.get(v2, None)
+            if v2_pairs is None:
+                v2_pairs = self._bilinear[v2] = ComponentMap()
+            v2_pairs[v1] = constrs
+        return constrs
+
+
+def _process_subcontainers(blk, config, index):
     for disj in blk.component_data_objects(
             Disjunct, active=True, descend_into=True):
-        _process_container(disj, config)
-        _process_subcontainers(disj, config)
+        _process_container(disj, config, index)
+        _process_subcontainers(disj, config, index)
 
 
-def _process_container(blk, config):
+def _process_container(blk, config, index):
     if not hasattr(blk, '_induced_linearity_info'):
         blk._induced_linearity_info = Block()
     else:
         assert blk._induced_linearity_info.ctype == Block
     eff_discr_vars = detect_effectively_discrete_vars(
-        blk, config.equality_tolerance)
+        blk, config.equality_tolerance, index)
     # TODO will need to go through this for each disjunct, since it does
     # not (should not) descend into Disjuncts.
 
     # Determine the valid values for the effectively discrete variables
-    possible_var_values = determine_valid_values(blk, eff_discr_vars, config)
-
-    # Collect find bilinear expressions that can be reformulated using
-    # knowledge of effectively discrete variables
-    bilinear_map = _bilinear_expressions(blk)
-
-    # Relevant constraints are those with bilinear terms that involve
-    # effectively_discrete_vars
-    processed_pairs = ComponentSet()
+    possible_var_values = determine_valid_values(
+        blk, eff_discr_vars, config, index)
+    if not possible_var_values:
+        return
+
+    # Relevant constraints are those in the scope of blk with bilinear
+    # terms that involve effectively_discrete_vars
+    in_scope = ComponentSet(index.constraints(blk))
     for v1, var_values in possible_var_values.items():
-        v1_pairs = bilinear_map.get(v1, ())
-        for v2, bilinear_constrs in v1_pairs.items():
-            if (v1, v2) in processed_pairs:
+        for v2, constrs in list(index.bilinear_partners(v1).items()):
+            # Constraints are removed from the index as they are
+            # reformulated, so a bilinear term between two effectively
+            # discrete variables is only reformulated once.
+            bilinear_constrs = [c for c in constrs if c in in_scope]
+            if not bilinear_constrs:
                 continue
             _process_bilinear_constraints(
-                blk, v1, v2, var_values, bilinear_constrs)
-            processed_pairs.add((v2, v1))
-            # processed_pairs.add((v1, v2))  # TODO is this necessary?
+                blk, v1, v2, var_values, bilinear_constrs, index)
 
 
-def determine_valid_values(block, discr_var_to_constrs_map, config):
+def determine_valid_values(block, discr_var_to_constrs_map, config,
+                           index=None):
     """Calculate valid values for each effectively discrete variable.
 
     We need the set of possible values for the effectively discrete variable in
@@ -134,35 +220,35 @@ def determine_valid_values(block, discr_var_to_constrs_map, config):
     things are stil feasible. Based on their coefficient values, we can infer a
     set of allowable values for the effectively discrete variable.
 
+    The enumeration is limited to ``config.enumeration_limit`` candidate
+    values per inducing constraint, and (if ``config.prune_with_bounds``)
+    partial sums that cannot reach the bounds of the effectively discrete
+    variable (within ``config.equality_tolerance``) are discarded as soon
+    as they are generated.
+
     Args:
         block: The model or a disjunct on the model.
+        discr_var_to_constrs_map: effectively discrete variables mapped to
+            their inducing constraints
+        config: the transformation options
+        index: a _ConstraintIndex holding the repns of the constraints
 
     """
+    limit = getattr(config, 'enumeration_limit', None)
+    prune_with_bounds = getattr(config, 'prune_with_bounds', True)
+    tol = getattr(config, 'equality_tolerance', 0)
     possible_values = ComponentMap()
 
     for eff_discr_var, constrs in discr_var_to_constrs_map.items():
         # get the superset of possible values by looking through the
         # constraints
         for constr in constrs:
-            repn = generate_standard_repn(constr.body)
-            var_coef = sum(coef for i, coef in enumerate(repn.linear_coefs)
-                           if repn.linear_vars[i] is eff_discr_var)
-            const = -(repn.constant - constr.upper) / var_coef
-            possible_vals = set((const,))
-            for i, var in enumerate(repn.linear_vars):
-                if var is eff_discr_var:
-                    continue
-                coef = -repn.linear_coefs[i] / var_coef
-                if var.is_binary():
-                    var_values = (0, coef)
-                elif var.is_integer():
-                    var_values = [v * coef for v in range(var.lb, var.ub + 1)]
-                else:
-                    raise ValueError(
-                        '%s has unacceptable variable domain: %s' %
-                        (var.name, var.domain))
-                possible_vals = set(
-                    (v1 + v2 for v1 in possible_vals for v2 in var_values))
+            repn = (index.repn(constr) if index is not None
+                    else generate_standard_repn(constr.body))
+            possible_vals = _enumerate_values(
+                eff_discr_var, constr, repn, limit, prune_with_bounds, tol)
+            if possible_vals is None:
+                continue
             old_possible_vals = possible_values.get(eff_discr_var, None)
             if old_possible_vals is not None:
                 possible_values[eff_discr_var] = old_possible_vals & possible_vals
@@ -174,9 +260,90 @@ def determine_valid_values(block, discr_var_to_constrs_map, config):
     return possible_values
 
 
+def _enumerate_values(eff_discr_var, constr, repn, limit, prune_with_bounds,
+                      tol=0):
+    """Enumerate the values of eff_discr_var implied by an inducing constraint
+
+    Returns None if more than limit values would have to be enumerated, or
+    if a discrete variable in the constraint is unbounded. With
+    prune_with_bounds, values more than tol outside of the bounds of
+    eff_discr_var are discarded.
+
+    """
+    var_coef = sum(coef for i, coef in enumerate(repn.linear_coefs)
+                   if repn.linear_vars[i] is eff_discr_var)
+    const = -(repn.constant - value(constr.upper)) / var_coef
+    terms = []
+    for i, var in enumerate(repn.linear_vars):
+        if var is eff_discr_var:
+            continue
+        coef = -repn.linear_coefs[i] / var_coef
+        if var.is_binary():
+            terms.append((0, coef))
+            continue
+        elif not var.is_integer():
+            raise ValueError(
+                '%s has unacceptable variable domain: %s' %
+                (var.name, var.domain))
+        if not (var.has_lb() and var.has_ub()):
+            logger.warning(
+                "Not using constraint %s to determine the possible values of "
+                "%s: integer variable %s is unbounded."
+                % (constr.name, eff_discr_var.name, var.name))
+            return None
+        lb, ub = int(value(var.lb)), int(value(var.ub))
+        if limit is not None and ub - lb >= limit:
+            return _enumeration_limit_exceeded(eff_discr_var, constr, limit)
+        terms.append([v * coef for v in range(lb, ub + 1)])
+
+    lb = ub = None
+    if prune_with_bounds:
+        lb, ub = eff_discr_var.bounds
+        # The sums are inexact for non-integer coefficients, so only
+        # discard values that are outside of the bounds by more than tol.
+        if lb is not None:
+            lb -= tol
+        if ub is not None:
+            ub += tol
+    # Suffix sums of the smallest and largest contributions of the
+    # remaining terms bound the values that a partial sum can still reach.
+    min_rest = [0] * (len(terms) + 1)
+    max_rest = [0] * (len(terms) + 1)
+    for k in range(len(terms) - 1, -1, -1):
+        min_rest[k] = min_rest[k + 1] + min(terms[k])
+        max_rest[k] = max_rest[k + 1] + max(terms[k])
+
+    possible_vals = set((const,))
+    for k, term_values in enumerate(terms):
+        new_vals = set()
+        for v1 in possible_vals:
+            for v2 in term_values:
+                v = v1 + v2
+                if lb is not None and v + max_rest[k + 1] < lb:
+                    continue
+                if ub is not None and v + min_rest[k + 1] > ub:
+                    continue
+                new_vals.add(v)
+            if limit is not None and len(new_vals) > limit:
+                return _enumeration_limit_exceeded(
+                    eff_discr_var, constr, limit)
+        possible_vals = new_vals
+    return possible_vals
+
+
+def _enumeration_limit_exceeded(eff_discr_var, constr, limit):
+    logger.warning(
+        "Not using constraint %s to determine the possible values of %s: "
+        "more than %s candidate values." % (
+            constr.name, eff_discr_var.name, limit))
+    return None
+
+
 def prune_possible_values(block_scope, possible_values, config):
     # Prune the set of possible values by solving a series of feasibility
     # problems
+    if not possible_values or config.pruning_solver is None:
+        return possible_values
     top_level_scope = block_scope.model()
     tmp_name = unique_component_name(
         top_level_scope, '_induced_linearity_prune_data')
@@ -217,7 +384,8 @@ def prune_possible_values(block_scope, possible_values, config):
     return possible_values
 
 
-def _process_bilinear_constraints(block, v1, v2, var_values, bilinear_constrs):
+def _process_bilinear_constraints(block, v1, v2, var_values, bilinear_constrs,
+                                  index=None):
     # TODO check that the appropriate variable bounds exist.
     if not (v2.has_lb() and v2.has_ub()):
         logger.warning(textwrap.dedent("""\
@@ -263,12 +431,13 @@ def _process_bilinear_constraints(block, v1, v2, var_values, bilinear_constrs):
         # Case 2: this is everything else, but do we want to have a special
         # case if there are nonlinear expressions involved with the constraint?
         pass
-        _reformulate_case_2(blk, v1, v2, bilinear_constr)
+        _reformulate_case_2(blk, v1, v2, bilinear_constr, index)
     pass
 
 
-def _reformulate_case_2(blk, v1, v2, bilinear_constr):
-    repn = generate_standard_repn(bilinear_constr.body)
+def _reformulate_case_2(blk, v1, v2, bilinear_constr, index=None):
+    repn = (index.repn(bilinear_constr) if index is not None
+            else generate_standard_repn(bilinear_constr.body))
     replace_index = next(
         i for i, var_tup in enumerate(repn.quadratic_vars)
         if (var_tup[0] is v1 and var_tup[1] is v2) or
@@ -286,13 +455,15 @@ def _reformulate_case_2(blk, v1, v2, bilinear_constr):
         zero_if_None(repn.nonlinear_expr),
         bilinear_constr.upper
     ))
+    if index is not None:
+        index.update(bilinear_constr)
 
 
 def zero_if_None(val):
     return 0 if val is None else val
 
 
-def _bilinear_expressions(model):
+def _bilinear_expressions(model, index=None):
     # TODO for now, we look for only expressions where the bilinearities are
     # exposed on the root level SumExpression, and thus accessible via
     # generate_standard_repn. This will not detect exp(x*y). We require a
@@ -304,9 +475,12 @@ def _bilinear_expressions(model):
     bilinear_map = ComponentMap()
     for constr in model.component_data_objects(
             Constraint, active=True, descend_into=(Block, Disjunct)):
-        if constr.body.polynomial_degree() in (1, 0):
+        if index is not None:
+            repn = index.repn(constr)
+        elif constr.body.polynomial_degree() in (1, 0):
             continue  # Skip trivial and linear constraints
-        repn = generate_standard_repn(constr.body)
+        else:
+            repn = generate_standard_repn(constr.body)
         for pair in repn.quadratic_vars:
             v1, v2 = pair
             v1_pairs = bilinear_map.get(v1, ComponentMap())
@@ -324,7 +498,7 @@ def _bilinear_expressions(model):
     return bilinear_map
 
 
-def detect_effectively_discrete_vars(block, equality_tolerance):
+def detect_effectively_discrete_vars(block, equality_tolerance, index=None):
     """Detect effectively discrete variables.
 
     These continuous variables are the sum of discrete variables.
@@ -339,9 +513,14 @@ def detect_effectively_discrete_vars(block, equality_tolerance):
         if fabs(value(constr.lower) - value(constr.upper)
                 ) > equality_tolerance:
             continue  # not equality constriant. Skip.
-        if constr.body.polynomial_degree() not in (1, 0):
+        if index is not None:
+            repn = index.repn(constr)
+            if not repn.is_linear():
+                continue  # skip nonlinear expressions
+        elif constr.body.polynomial_degree() not in (1, 0):
             continue  # skip nonlinear expressions
-        repn = generate_standard_repn(constr.body)
+        else:
+            repn = generate_standard_repn(constr.body)
         if len(repn.linear_vars) < 2:
             # TODO should this be < 2 or < 1?
             # TODO we should make sure that trivial equality relations are
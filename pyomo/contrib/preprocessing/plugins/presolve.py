@@ -0,0 +1,583 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""Transformation performing the preprocessing reductions in a single pass."""
+
+from __future__ import division
+
+from collections import deque
+import math
+import time
+
+from six import iteritems
+
+from pyomo.common.collections import ComponentMap
+from pyomo.common.config import (ConfigBlock, ConfigValue, NonNegativeFloat,
+                                 add_docstring_list)
+from pyomo.core import quicksum
+from pyomo.core.base import (Block, Constraint, Objective, SortComponents,
+                             TransformationFactory, Var)
+from pyomo.core.expr.current import ExpressionReplacementVisitor
+from pyomo.core.expr.numvalue import value
+from pyomo.core.expr.visitor import identify_variables
+from pyomo.core.plugins.transform.hierarchy import IsomorphicTransformation
+from pyomo.repn import generate_standard_repn
+
+_inf = float('inf')
+
+#: The reductions performed by contrib.presolve, named after the
+#: transformations performing them individually.
+REDUCTIONS = (
+    'detect_fixed_vars',
+    'propagate_fixed_vars',
+    'remove_zero_terms',
+    'deactivate_trivial_constraints',
+    'constraints_to_var_bounds',
+    'propagate_eq_var_bounds',
+    'propagate_zero_sum',
+    'aggregate_vars',
+)
+
+
+class PresolveStatistics(object):
+    """
+    Statistics collected by the presolve transformation. Pass an instance
+    to the transformation with the stats argument:
+
+    >>> stats = PresolveStatistics()
+    >>> TransformationFactory('contrib.presolve').apply_to(m, stats=stats)
+    >>> print(stats)
+
+    Attributes
+    ----------
+    counts: dict
+        The number of reductions of each kind (see REDUCTIONS): variables
+        fixed, terms removed, constraints deactivated or moved to variable
+        bounds, bounds tightened, and variables aggregated
+    times: dict
+        Wall-clock time (seconds) spent in each kind of reduction
+    rows_processed: int
+        The number of times a constraint was examined
+    build_time: float
+        Time spent building the internal representation of the model
+    write_time: float
+        Time spent writing the result back to the model
+    """
+    def __init__(self):
+        self.counts = dict((name, 0) for name in REDUCTIONS)
+        self.times = dict((name, 0.0) for name in REDUCTIONS)
+        self.rows_processed = 0
+        self.build_time = 0.0
+        self.write_time = 0.0
+
+    @property
+    def time(self):
+        return self.build_time + self.write_time + sum(self.times.values())
+
+    def __str__(self):
+        lines = ['%-32s %10s %10s' % ('Reduction', 'Count', 'Time [s]')]
+        for name in REDUCTIONS:
+            lines.append('%-32s %10d %10.3f' % (
+                name, self.counts[name], self.times[name]))
+        lines.append('Constraints processed: %d' % (self.rows_processed,))
+        lines.append('Total time: %.3f s (build %.3f s, write %.3f s)' % (
+            self.time, self.build_time, self.write_time))
+        return '\n'.join(lines)
+
+
+class _PresolveRow(object):
+    """A linear constraint lo <= sum(coefs[j]*x_j) <= up in the internal
+    representation, where j are column indices"""
+    __slots__ = ('con', 'coefs', 'lo', 'up', 'equality', 'active', 'changed')
+
+    def __init__(self, con, coefs, lo, up, equality):
+        self.con = con
+        self.coefs = coefs
+        self.lo = lo
+        self.up = up
+        self.equality = equality
+        self.active = True
+        self.changed = False
+
+
+@TransformationFactory.register(
+        'contrib.presolve',
+        doc="Apply the contrib.preprocessing reductions to a fixpoint in a "
+        "single pass.")
+class Presolver(IsomorphicTransformation):
+    """Apply the contrib.preprocessing reductions to a fixpoint in a single
+    pass over the model.
+
+    Running the preprocessing transformations one after the other walks the
+    model (and generates the standard representation of every constraint)
+    once per transformation, and again every time the sequence is repeated
+    because one reduction enabled another. This transformation instead
+    builds a sparse representation of the linear constraints once, applies
+    the reductions of
+
+    - contrib.detect_fixed_vars,
+    - contrib.propagate_fixed_vars,
+    - contrib.remove_zero_terms,
+    - contrib.deactivate_trivial_constraints,
+    - contrib.constraints_to_var_bounds,
+    - contrib.propagate_eq_var_bounds,
+    - contrib.propagate_zero_sum (generalized to all constraints forcing
+      their variables to a bound), and
+    - contrib.aggregate_vars
+
+    to it until none of them applies, and writes the result back to the
+    model once: variables are fixed, variable bounds are tightened,
+    constraints that are no longer needed are deactivated, and the
+    constraints that changed are rebuilt. Only constraints whose
+    representation changed are modified.
+
+    Variables linked by an equality :math:`x = y` are aggregated by
+    substituting :math:`x` for :math:`y` (rather than adding a new
+    variable). The eliminated variables are recorded in a postsolve map;
+    call :meth:`postsolve` after solving the model to recover their values.
+
+    Keyword arguments below are specified for the ``apply_to`` and
+    ``create_using`` functions.
+
+    """
+
+    CONFIG = ConfigBlock("Presolver")
+    CONFIG.declare("tolerance", ConfigValue(
+        default=1E-13, domain=NonNegativeFloat,
+        description="tolerance on bound equality (LB == UB) and on "
+        "constraint violations"
+    ))
+    CONFIG.declare("aggregate_vars", ConfigValue(
+        default=True, domain=bool,
+        description="True to aggregate variables linked by equality "
+        "constraints; otherwise, their bounds are propagated"
+    ))
+    CONFIG.declare("stats", ConfigValue(
+        default=None,
+        description="A PresolveStatistics object to fill with the number and "
+        "time of the reductions performed"
+    ))
+
+    __doc__ = add_docstring_list(__doc__, CONFIG)
+
+    def _apply_to(self, instance, **kwds):
+        config = self.CONFIG(kwds)
+        self.tolerance = config.tolerance
+        self.aggregate = config.aggregate_vars
+        stats = self.stats = config.stats
+        if stats is None:
+            stats = self.stats = PresolveStatistics()
+        try:
+            t0 = time.time()
+            self._build(instance)
+            stats.build_time += time.time() - t0
+            self._presolve()
+            t0 = time.time()
+            info = self._write_back(instance)
+            stats.write_time += time.time() - t0
+            info.stats = stats
+        finally:
+            for attr in ('cols', 'col_index', 'lb', 'ub', 'col_rows', 'rows',
+                         'fixed', 'aggregated', 'nonlinear', 'stats'):
+                if hasattr(self, attr):
+                    delattr(self, attr)
+
+    def postsolve(self, instance):
+        """Set the values of the variables eliminated by aggregation from the
+        values of the variables that replaced them."""
+        info = instance._presolve_info
+        for var, rep in iteritems(info.postsolve_map):
+            if not rep.stale or rep.fixed:
+                var.set_value(value(rep))
+                var.stale = False
+
+    #
+    # Building the internal representation
+    #
+
+    def _col(self, var):
+        j = self.col_index.get(var)
+        if j is None:
+            j = self.col_index[var] = len(self.cols)
+            self.cols.append(var)
+            self.lb.append(-_inf if var.lb is None else value(var.lb))
+            self.ub.append(_inf if var.ub is None else value(var.ub))
+            self.col_rows.append(set())
+        return j
+
+    def _build(self, instance):
+        self.cols = []
+        self.col_index = ComponentMap()
+        self.lb = []
+        self.ub = []
+        self.col_rows = []
+        self.rows = []
+        # column -> value for the variables fixed by presolve
+        self.fixed = {}
+        # column -> column of the variable replacing it
+        self.aggregated = {}
+        # nonlinear constraints and the columns appearing in them
+        self.nonlinear = []
+
+        for var in instance.component_data_objects(
+                Var, descend_into=True, sort=SortComponents.deterministic):
+            if not var.fixed:
+                self._col(var)
+
+        for con in instance.component_data_objects(
+                Constraint, active=True, descend_into=True,
+                sort=SortComponents.deterministic):
+            repn = generate_standard_repn(con.body, quadratic=False)
+            if not repn.is_linear():
+                self.nonlinear.append((con, [self._col(v) for v in
+                                             identify_variables(
+                                                 con.body,
+                                                 include_fixed=False)]))
+                continue
+            coefs = {}
+            for v, coef in zip(repn.linear_vars, repn.linear_coefs):
+                j = self._col(v)
+                coefs[j] = coefs.get(j, 0) + coef
+            const = value(repn.constant)
+            lo = value(con.lower) - const if con.has_lb() else -_inf
+            up = value(con.upper) - const if con.has_ub() else _inf
+            i = len(self.rows)
+            self.rows.append(_PresolveRow(con, coefs, lo, up, con.equality))
+            for j in coefs:
+                self.col_rows[j].add(i)
+
+    #
+    # The reductions
+    #
+
+    def _presolve(self):
+        self.row_queue = deque(range(len(self.rows)))
+        self.in_row_queue = [True]*len(self.rows)
+        self.col_queue = deque(range(len(self.cols)))
+        self.in_col_queue = [True]*len(self.cols)
+        stats = self.stats
+        try:
+            while self.row_queue or self.col_queue:
+                while self.col_queue:
+                    j = self.col_queue.popleft()
+                    self.in_col_queue[j] = False
+                    self._process_col(j)
+                if self.row_queue:
+                    i = self.row_queue.popleft()
+                    self.in_row_queue[i] = False
+                    if self.rows[i].active:
+                        stats.rows_processed += 1
+                        self._process_row(self.rows[i])
+        finally:
+            del self.row_queue, self.in_row_queue
+            del self.col_queue, self.in_col_queue
+
+    def _timed(self, name, func, *args):
+        t0 = time.time()
+        try:
+            return func(*args)
+        finally:
+            self.stats.times[name] += time.time() - t0
+
+    def _enqueue_row(self, i):
+        if not self.in_row_queue[i]:
+            self.in_row_queue[i] = True
+            self.row_queue.append(i)
+
+    def _enqueue_col(self, j):
+        if not self.in_col_queue[j]:
+            self.in_col_queue[j] = True
+            self.col_queue.append(j)
+
+    def _is_free(self, j):
+        return j not in self.fixed and j not in self.aggregated
+
+    def _process_col(self, j):
+        if not self._is_free(j):
+            return
+        lb, ub = self.lb[j], self.ub[j]
+        if lb > -_inf and ub < _inf and math.fabs(lb - ub) <= self.tolerance:
+            self._timed('detect_fixed_vars', self._fix, j, lb,
+                        'detect_fixed_vars')
+
+    def _process_row(self, row):
+        self._timed('remove_zero_terms', self._remove_zero_terms, row)
+        n = len(row.coefs)
+        if n == 0:
+            self._timed('deactivate_trivial_constraints',
+                        self._deactivate_trivial, row)
+        elif n == 1:
+            if row.equality:
+                self._timed('propagate_fixed_vars', self._fix_by_equality,
+                            row)
+            else:
+                self._timed('constraints_to_var_bounds',
+                            self._move_to_var_bounds, row)
+        else:
+            if n == 2 and row.equality and row.lo == 0:
+                (i, a), (j, b) = sorted(iteritems(row.coefs))
+                if a == -b:
+                    if self.aggregate and (self.cols[i].is_integer() ==
+                                           self.cols[j].is_integer()):
+                        self._timed('aggregate_vars', self._aggregate, row,
+                                    i, j)
+                    else:
+                        self._timed('propagate_eq_var_bounds',
+                                    self._propagate_eq_bounds, i, j)
+                    return
+            self._timed('propagate_zero_sum', self._propagate_forcing, row)
+
+    def _remove_zero_terms(self, row):
+        zeros = [j for j, coef in iteritems(row.coefs) if coef == 0]
+        for j in zeros:
+            del row.coefs[j]
+        if zeros:
+            row.changed = True
+            self.stats.counts['remove_zero_terms'] += len(zeros)
+
+    def _deactivate_trivial(self, row):
+        tol = self.tolerance
+        if row.lo >= tol:
+            raise ValueError(
+                'Trivial constraint {} violates LB {} ≤ BODY {} after '
+                'presolve.'.format(row.con.name, row.lo, 0))
+        if row.up <= -tol:
+            raise ValueError(
+                'Trivial constraint {} violates BODY {} ≤ UB {} after '
+                'presolve.'.format(row.con.name, 0, row.up))
+        row.active = False
+        self.stats.counts['deactivate_trivial_constraints'] += 1
+
+    def _fix(self, j, val, reason):
+        """Fix column j to val, substituting it out of all constraints"""
+        var = self.cols[j]
+        tol = self.tolerance
+        if var.is_integer():
+            if math.fabs(val - round(val)) > tol:
+                raise ValueError(
+                    "Presolve fixed integer variable {} to the fractional "
+                    "value {}.".format(var.name, val))
+            val = int(round(val))
+        if val < self.lb[j] - tol or val > self.ub[j] + tol:
+            raise ValueError(
+                "Presolve fixed variable {} to {}, which is outside of its "
+                "bounds [{}, {}].".format(var.name, val, self.lb[j],
+                                          self.ub[j]))
+        self.fixed[j] = val
+        self.stats.counts[reason] += 1
+        for i in self.col_rows[j]:
+            row = self.rows[i]
+            coef = row.coefs.pop(j, None)
+            if coef is None or not row.active:
+                continue
+            row.lo -= coef*val
+            row.up -= coef*val
+            row.changed = True
+            self.stats.counts['remove_zero_terms'] += 1
+            self._enqueue_row(i)
+        self.col_rows[j] = set()
+
+    def _fix_by_equality(self, row):
+        (j, coef), = iteritems(row.coefs)
+        row.active = False
+        self._fix(j, row.lo/coef, 'propagate_fixed_vars')
+
+    def _set_bounds(self, j, lb, ub):
+        """Tighten the bounds of column j to [lb, ub]; return True if
+        they changed"""
+        var = self.cols[j]
+        if var.is_integer():
+            tol = self.tolerance
+            if lb > -_inf:
+                lb = min(math.ceil(lb - tol), math.ceil(lb))
+            if ub < _inf:
+                ub = max(math.floor(ub + tol), math.floor(ub))
+        changed = False
+        if lb > self.lb[j]:
+            self.lb[j] = lb
+            changed = True
+        if ub < self.ub[j]:
+            self.ub[j] = ub
+            changed = True
+        if self.lb[j] > self.ub[j] + self.tolerance:
+            raise ValueError(
+                "Presolve found that variable {} has a lower bound {} > "
+                "its upper bound {}.".format(var.name, self.lb[j],
+                                             self.ub[j]))
+        if changed:
+            self._enqueue_col(j)
+            for i in self.col_rows[j]:
+                self._enqueue_row(i)
+        return changed
+
+    def _move_to_var_bounds(self, row):
+        (j, coef), = iteritems(row.coefs)
+        if coef > 0:
+            lb, ub = row.lo/coef, row.up/coef
+        else:
+            lb, ub = row.up/coef, row.lo/coef
+        row.active = False
+        self._set_bounds(j, lb, ub)
+        self.stats.counts['constraints_to_var_bounds'] += 1
+
+    def _propagate_eq_bounds(self, i, j):
+        lb = max(self.lb[i], self.lb[j])
+        ub = min(self.ub[i], self.ub[j])
+        changed = self._set_bounds(i, lb, ub)
+        changed = self._set_bounds(j, lb, ub) or changed
+        if changed:
+            self.stats.counts['propagate_eq_var_bounds'] += 1
+
+    def _aggregate(self, row, i, j):
+        """Replace column j by column i (they are linked by row)"""
+        row.active = False
+        for k in self.col_rows[j]:
+            other = self.rows[k]
+            coef = other.coefs.pop(j, None)
+            if coef is None or not other.active:
+                continue
+            other.coefs[i] = other.coefs.get(i, 0) + coef
+            other.changed = True
+            self.col_rows[i].add(k)
+            self._enqueue_row(k)
+        self.col_rows[j] = set()
+        self.aggregated[j] = i
+        self.stats.counts['aggregate_vars'] += 1
+        lb, ub = self.lb[j], self.ub[j]
+        if lb > self.ub[i] + self.tolerance or ub < self.lb[i] - self.tolerance:
+            raise ValueError(
+                'Variable {} has bounds [{}, {}] disjoint from the bounds '
+                '[{}, {}] of variable {}, but they are linked by equality '
+                'constraints.'.format(self.cols[j].name, lb, ub,
+                                      self.cols[i].name, self.lb[i],
+                                      self.ub[i]))
+        self._set_bounds(i, lb, ub)
+
+    def _propagate_forcing(self, row):
+        # If the minimum (maximum) activity of the row equals its upper
+        # (lower) bound, the only feasible point has every variable at the
+        # bound achieving it. This includes sums of nonnegative variables
+        # that are <= 0.
+        tol = self.tolerance
+        for bound, sign in ((row.up, 1), (row.lo, -1)):
+            if math.isinf(bound):
+                continue
+            activity = 0
+            at_bound = []
+            for j, coef in iteritems(row.coefs):
+                x = self.lb[j] if sign*coef > 0 else self.ub[j]
+                if math.isinf(x):
+                    break
+                activity += coef*x
+                at_bound.append((j, x))
+            else:
+                if math.fabs(activity - bound) <= tol:
+                    for j, x in at_bound:
+                        self._fix(j, x, 'propagate_zero_sum')
+                    return
+
+    #
+    # Writing the result back to the model
+    #
+
+    def _find(self, j):
+        aggregated = self.aggregated
+        root = j
+        while root in aggregated:
+            root = aggregated[root]
+        # compress the path so that later lookups take a single step
+        while j != root:
+            aggregated[j], j = root, aggregated[j]
+        return root
+
+    def _write_back(self, instance):
+        info = instance.component('_presolve_info')
+        if info is None:
+            info = instance._presolve_info = Block(
+                doc="Holds information for the presolve transformation.")
+            info.postsolve_map = ComponentMap()
+        postsolve_map = info.postsolve_map
+        cols = self.cols
+        # variables eliminated by an earlier presolve, by the variable
+        # that replaced them
+        replaced = ComponentMap()
+        for v, r in iteritems(postsolve_map):
+            replaced.setdefault(r, []).append(v)
+
+        for j, var in enumerate(cols):
+            if j in self.aggregated:
+                rep = cols[self._find(j)]
+                postsolve_map[var] = rep
+                for v in replaced.get(var, ()):
+                    postsolve_map[v] = rep
+                if rep.value is None and var.value is not None:
+                    rep.set_value(var.value)
+                continue
+            lb, ub = self.lb[j], self.ub[j]
+            if (var.lb is None and lb > -_inf) or (
+                    var.lb is not None and lb > value(var.lb)):
+                var.setlb(lb)
+            if (var.ub is None and ub < _inf) or (
+                    var.ub is not None and ub < value(var.ub)):
+                var.setub(ub)
+            if j in self.fixed:
+                var.fix(self.fixed[j])
+            elif var.value is not None:
+                # keep the value consistent with bounds that may only be
+                # implied by deactivated constraints
+                if var.has_lb() and var.value < value(var.lb):
+                    var.set_value(value(var.lb))
+                if var.has_ub() and var.value > value(var.ub):
+                    var.set_value(value(var.ub))
+
+        for row in self.rows:
+            con = row.con
+            if not row.active:
+                con.deactivate()
+                continue
+            if not row.changed:
+                continue
+            body = quicksum(row.coefs[j]*cols[j] for j in sorted(row.coefs))
+            if row.equality:
+                con.set_value(body == row.lo)
+            else:
+                con.set_value((None if row.lo == -_inf else row.lo, body,
+                               None if row.up == _inf else row.up))
+
+        if self.aggregated:
+            substitution_map = dict(
+                (id(cols[j]), cols[self._find(j)]) for j in self.aggregated)
+            for con, _ in self.nonlinear:
+                con.set_value((con.lower, ExpressionReplacementVisitor(
+                    substitute=substitution_map).dfs_postorder_stack(
+                        con.body), con.upper))
+            for obj in instance.component_data_objects(
+                    Objective, active=True, descend_into=True):
+                obj.set_value(ExpressionReplacementVisitor(
+                    substitute=substitution_map).dfs_postorder_stack(
+                        obj.expr))
+
+        # nonlinear constraints in which every variable was fixed
+        tol = self.tolerance
+        for con, con_cols in self.nonlinear:
+            if any(self._find(j) not in self.fixed for j in con_cols):
+                continue
+            body = value(con.body)
+            if con.has_lb() and body + tol <= value(con.lower):
+                raise ValueError(
+                    'Trivial constraint {} violates LB {} ≤ BODY {} after '
+                    'presolve.'.format(con.name, value(con.lower), body))
+            if con.has_ub() and body >= value(con.upper) + tol:
+                raise ValueError(
+                    'Trivial constraint {} violates BODY {} ≤ UB {} after '
+                    'presolve.'.format(con.name, body, value(con.upper)))
+            con.deactivate()
+            self.stats.counts['deactivate_trivial_constraints'] += 1
+        return info
@@ -13,8 +13,10 @@
 from __future__ import division
 
 from pyomo.common.collections import ComponentMap, ComponentSet
+from pyomo.common.dependencies import numpy as np, numpy_available
 from pyomo.core.base import (
-    Block, Constraint, VarList, Objective, TransformationFactory,
+    Block, Constraint, VarList, Objective, SortComponents,
+    TransformationFactory,
 )
 from pyomo.core.expr.current import ExpressionReplacementVisitor
 from pyomo.core.expr.numvalue import value
@@ -113,6 +115,91 @@ def _fix_equality_fixed_variables(model, scaling_tolerance=1E-10):
         constraint.deactivate()
 
 
+class _UnionFind(object):
+    """Disjoint sets of the integers 0, 1, ..., n-1.
+
+    Uses union by size and path halving, so that linking the variables of
+    long chains of equalities takes (nearly) linear time.
+
+    """
+    __slots__ = ('parent', 'size')
+
+    def __init__(self):
+        self.parent = []
+        self.size = []
+
+    def __len__(self):
+        return len(self.parent)
+
+    def add(self):
+        """Add a new singleton set and return its element."""
+        i = len(self.parent)
+        self.parent.append(i)
+        self.size.append(1)
+        return i
+
+    def find(self, i):
+        """Return the representative element of the set containing i."""
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, i, j):
+        """Merge the sets containing i and j."""
+        i = self.find(i)
+        j = self.find(j)
+        if i == j:
+            return
+        if self.size[i] < self.size[j]:
+            i, j = j, i
+        self.parent[j] = i
+        self.size[i] += self.size[j]
+
+
+def _build_equality_sets(model):
+    """Link the variables of all constraints of form x == y.
+
+    Returns the list of linked variables (in the order they are first
+    encountered) and a _UnionFind over their positions in that list.
+
+    """
+    linked_vars = []
+    var_index = ComponentMap()
+    union_find = _UnionFind()
+    for constraint in model.component_data_objects(
+            ctype=Constraint, active=True, descend_into=True,
+            sort=SortComponents.deterministic):
+        eq_linked_vars = _get_equality_linked_variables(constraint)
+        if not eq_linked_vars:
+            continue  # if we get an empty tuple, skip to next constraint.
+        indices = []
+        for v in eq_linked_vars:
+            i = var_index.get(v)
+            if i is None:
+                i = var_index[v] = union_find.add()
+                linked_vars.append(v)
+            indices.append(i)
+        union_find.union(*indices)
+    return linked_vars, union_find
+
+
+def _equality_groups(union_find):
+    """Return the sets of the union-find as lists of elements, ordered by
+    their smallest element."""
+    groups = []
+    group_of_root = {}
+    for i in range(len(union_find)):
+        root = union_find.find(i)
+        g = group_of_root.get(root)
+        if g is None:
+            g = group_of_root[root] = len(groups)
+            groups.append([])
+        groups[g].append(i)
+    return groups
+
+
 def _build_equality_set(model):
     """Construct an equality set map.
 
@@ -122,30 +209,71 @@ def _build_equality_set(model):
     y]) in the mapping.
 
     """
+    linked_vars, union_find = _build_equality_sets(model)
     # Map of variables to their equality set (ComponentSet)
     eq_var_map = ComponentMap()
+    for group in _equality_groups(union_find):
+        eq_set = ComponentSet(linked_vars[i] for i in group)
+        for v in eq_set:
+            eq_var_map[v] = eq_set
+    return eq_var_map
 
-    # Loop through all the active constraints in the model
-    for constraint in model.component_data_objects(
-            ctype=Constraint, active=True, descend_into=True):
-        eq_linked_vars = _get_equality_linked_variables(constraint)
-        if not eq_linked_vars:
-            continue  # if we get an empty tuple, skip to next constraint.
-        v1, v2 = eq_linked_vars
-        set1 = eq_var_map.get(v1, ComponentSet((v1, v2)))
-        set2 = eq_var_map.get(v2, (v2,))
 
-        # if set1 and set2 are equivalent, skip to next constraint.
-        if set1 is set2:
-            continue
+def _group_bounds_and_values(linked_vars, groups):
+    """Return the lists (lb, ub, value) for the aggregate variable of each
+    equality set.
 
-        # add all elements of set2 to set 1
-        set1.update(set2)
-        # Update all elements to point to set 1
-        for v in set1:
-            eq_var_map[v] = set1
+    The bounds of an aggregate variable are the intersection of the bounds of
+    the variables in its set (None if unbounded), and its value is the
+    average of the values of these variables that are within the bounds (None
+    if there are none).
 
-    return eq_var_map
+    """
+    n = len(groups)
+    if numpy_available:
+        group_of = np.empty(len(linked_vars), dtype=int)
+        for g, group in enumerate(groups):
+            group_of[group] = g
+        lbs = np.array([v.lb if v.has_lb() else -np.inf
+                        for v in linked_vars], dtype=float)
+        ubs = np.array([v.ub if v.has_ub() else np.inf
+                        for v in linked_vars], dtype=float)
+        vals = np.array([np.nan if v.value is None else v.value
+                         for v in linked_vars], dtype=float)
+        group_lb = np.full(n, -np.inf)
+        np.maximum.at(group_lb, group_of, lbs)
+        group_ub = np.full(n, np.inf)
+        np.minimum.at(group_ub, group_of, ubs)
+        with np.errstate(invalid='ignore'):
+            within = ~np.isnan(vals) & (vals >= group_lb[group_of]) & (
+                vals <= group_ub[group_of])
+        counts = np.bincount(group_of, weights=within, minlength=n)
+        sums = np.bincount(group_of, weights=np.where(within, vals, 0),
+                           minlength=n)
+        group_lb = [None if lb == -np.inf else float(lb) for lb in group_lb]
+        group_ub = [None if ub == np.inf else float(ub) for ub in group_ub]
+        group_val = [sums[g] / counts[g] if counts[g] else None
+                     for g in range(n)]
+        return group_lb, group_ub, group_val
+
+    group_lb = []
+    group_ub = []
+    group_val = []
+    for group in groups:
+        eq_set = [linked_vars[i] for i in group]
+        lb = max_if_not_None(v.lb for v in eq_set if v.has_lb())
+        ub = min_if_not_None(v.ub for v in eq_set if v.has_ub())
+        values_within_bounds = [
+            v.value for v in eq_set if (
+                v.value is not None and
+                (lb is None or v.value >= lb) and
+                (ub is None or v.value <= ub))]
+        group_lb.append(lb)
+        group_ub.append(ub)
+        group_val.append(
+            sum(values_within_bounds) / len(values_within_bounds)
+            if values_within_bounds else None)
+    return group_lb, group_ub, group_val
 
 
 # TODO: these two functions were copied from contrib.gdp_bounds.compute_bounds
@@ -198,7 +326,8 @@ class VariableAggregator(IsomorphicTransformation):
     def _apply_to(self, model, detect_fixed_vars=True):
         """Apply the transformation to the given model."""
         # Generate the equality sets
-        eq_var_map = _build_equality_set(model)
+        linked_vars, union_find = _build_equality_sets(model)
+        groups = _equality_groups(union_find)
 
         # Detect and process fixed variables.
         if detect_fixed_vars:
@@ -213,28 +342,23 @@ class VariableAggregator(IsomorphicTransformation):
         z_to_vars = model._var_aggregator_info.z_to_vars = ComponentMap()
         # Map of variables to their corresponding aggregate var
         var_to_z = model._var_aggregator_info.var_to_z = ComponentMap()
-        processed_vars = ComponentSet()
 
-        # TODO This iteritems is sorted by the variable name of the key in
-        # order to preserve determinism. Unfortunately, var.name() is an
-        # expensive operation right now.
-        for var, eq_set in sorted(eq_var_map.items(),
-                                  key=lambda tup: tup[0].name):
-            if var in processed_vars:
-                continue  # Skip already-process variables
-
-            # This would be weird. The variable hasn't been processed, but is
-            # in the map. Raise an exception.
-            assert var_to_z.get(var, None) is None
+        # The bounds of the aggregate variables are the intersection of the
+        # bounds of the variables in their equality sets.
+        group_lb, group_ub, group_val = _group_bounds_and_values(
+            linked_vars, groups)
 
+        # The equality sets are ordered by the first constraint linking
+        # their variables, which preserves determinism.
+        for g, group in enumerate(groups):
+            eq_set = ComponentSet(linked_vars[i] for i in group)
             z_agg = z.add()
             z_to_vars[z_agg] = eq_set
-            var_to_z.update(ComponentMap((v, z_agg) for v in eq_set))
+            for v in eq_set:
+                var_to_z[v] = z_agg
 
-            # Set the bounds of the aggregate variable based on the bounds of
-            # the variables in its equality set.
-            z_agg.setlb(max_if_not_None(v.lb for v in eq_set if v.has_lb()))
-            z_agg.setub(min_if_not_None(v.ub for v in eq_set if v.has_ub()))
+            z_agg.setlb(group_lb[g])
+            z_agg.setub(group_ub[g])
 
             # Set the fixed status of the aggregate var
             fixed_vars = [v for v in eq_set if v.fixed]
@@ -263,39 +387,26 @@ class VariableAggregator(IsomorphicTransformation):
             else:
                 # Set the value to be the average of the values within the
                 # bounds only if the value is not already fixed.
-                values_within_bounds = [
-                    v.value for v in eq_set if (
-                        v.value is not None and
-                        ((z_agg.has_lb() and v.value >= value(z_agg.lb))
-                         or not z_agg.has_lb()) and
-                        ((z_agg.has_ub() and v.value <= value(z_agg.ub))
-                         or not z_agg.has_ub())
-                    )]
-                num_vals = len(values_within_bounds)
-                z_agg.value = (
-                    sum(val for val in values_within_bounds) / num_vals) \
-                    if num_vals > 0 else None
-
-            processed_vars.update(eq_set)
-
-        # Do the substitution
+                z_agg.value = group_val[g]
+
+        # Do the substitution, with a single visitor for all the
+        # constraints and objectives
         substitution_map = {id(var): z_var
                             for var, z_var in var_to_z.items()}
+        visitor = ExpressionReplacementVisitor(substitute=substitution_map)
         for constr in model.component_data_objects(
             ctype=Constraint, active=True
         ):
-            new_body = ExpressionReplacementVisitor(
-                substitute=substitution_map
-            ).dfs_postorder_stack(constr.body)
-            constr.set_value((constr.lower, new_body, constr.upper))
+            new_body = visitor.dfs_postorder_stack(constr.body)
+            if new_body is not constr.body:
+                constr.set_value((constr.lower, new_body, constr.upper))
 
         for objective in model.component_data_objects(
             ctype=Objective, active=True
         ):
-            new_expr = ExpressionReplacementVisitor(
-                substitute=substitution_map
-            ).dfs_postorder_stack(objective.expr)
-            objective.set_value(new_expr)
+            new_expr = visitor.dfs_postorder_stack(objective.expr)
+            if new_expr is not objective.expr:
+                objective.set_value(new_expr)
 
     def update_variables(self, model):
         """Update the values of the variables that were replaced by aggregates.
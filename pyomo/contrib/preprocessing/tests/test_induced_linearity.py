@@ -11,7 +11,9 @@
 """Tests the induced linearity module."""
 import pyutilib.th as unittest
 from pyomo.contrib.preprocessing.plugins.induced_linearity import (
+    InducedLinearity,
     _bilinear_expressions,
+    _ConstraintIndex,
     detect_effectively_discrete_vars,
     determine_valid_values)
 from pyomo.common.collections import ComponentSet, Bunch
@@ -169,5 +171,111 @@ class TestInducedLinearity(unittest.TestCase):
             m.disjctn.disjuncts[1].constraint[1].body.polynomial_degree(), 2)
 
 
+    def test_prune_with_bounds(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(1, 3))
+        m.y = Var(RangeSet(4), domain=Binary)
+        m.z = Var(domain=Integers, bounds=(-1, 2))
+        m.constr = Constraint(
+            expr=m.x == m.y[1] + 2 * m.y[2] + m.y[3] + 2 * m.y[4] + m.z)
+        config = InducedLinearity.CONFIG(dict(pruning_solver=None))
+        eff_discr_vars = detect_effectively_discrete_vars(m, 1E-6)
+        var_to_values_map = determine_valid_values(m, eff_discr_vars, config)
+        self.assertEqual(set(var_to_values_map[m.x]), set([1, 2, 3]))
+        config.prune_with_bounds = False
+        var_to_values_map = determine_valid_values(m, eff_discr_vars, config)
+        self.assertEqual(set(var_to_values_map[m.x]), set(range(-1, 9)))
+
+    def test_prune_with_bounds_fractional(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 0.3))
+        m.y = Var(RangeSet(2), domain=Binary)
+        m.constr = Constraint(expr=m.x == 0.1 * m.y[1] + 0.2 * m.y[2])
+        config = InducedLinearity.CONFIG(dict(pruning_solver=None))
+        eff_discr_vars = detect_effectively_discrete_vars(m, 1E-6)
+        var_to_values_map = determine_valid_values(m, eff_discr_vars, config)
+        # 0.1 + 0.2 > 0.3 in floating point, but is within the tolerance
+        self.assertEqual(len(var_to_values_map[m.x]), 4)
+        self.assertAlmostEqual(max(var_to_values_map[m.x]), 0.3)
+        config.prune_with_bounds = False
+        self.assertEqual(
+            determine_valid_values(m, eff_discr_vars, config)[m.x],
+            var_to_values_map[m.x])
+        m.x.setub(0.25)
+        config.prune_with_bounds = True
+        var_to_values_map = determine_valid_values(m, eff_discr_vars, config)
+        self.assertEqual(len(var_to_values_map[m.x]), 3)
+
+    def test_enumeration_limit(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.y = Var(range(12), domain=Binary)
+        m.z = Var(domain=Integers, bounds=(0, 100))
+        m.wide = Constraint(expr=m.x == sum(2**i * m.y[i] for i in range(12)))
+        m.narrow = Constraint(expr=m.x == m.y[0] + m.y[1])
+        config = InducedLinearity.CONFIG(dict(
+            pruning_solver=None, enumeration_limit=100))
+        eff_discr_vars = detect_effectively_discrete_vars(m, 1E-6)
+        self.assertEqual(eff_discr_vars[m.x], [m.wide, m.narrow])
+        var_to_values_map = determine_valid_values(m, eff_discr_vars, config)
+        self.assertEqual(set(var_to_values_map[m.x]), set([0, 1, 2]))
+
+        m.narrow.deactivate()
+        m.range = Constraint(expr=m.x == m.z)
+        var_to_values_map = determine_valid_values(
+            m, detect_effectively_discrete_vars(m, 1E-6), config)
+        self.assertNotIn(m.x, var_to_values_map)
+        config.enumeration_limit = 5000
+        var_to_values_map = determine_valid_values(
+            m, detect_effectively_discrete_vars(m, 1E-6), config)
+        self.assertEqual(set(var_to_values_map[m.x]), set(range(101)))
+
+    def test_constraint_index(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.y = Var()
+        m.z = Var()
+        m.c = Constraint(expr=m.x * m.y + m.y * m.z <= 1)
+        m.d = Disjunct()
+        m.d.c = Constraint(expr=m.x * m.y >= 2)
+        index = _ConstraintIndex(m)
+        self.assertEqual(list(index.bilinear_partners(m.x)[m.y]),
+                         [m.c, m.d.c])
+        self.assertEqual(list(index.bilinear_partners(m.z)[m.y]), [m.c])
+        self.assertIs(index.repn(m.c), index.repn(m.c))
+        m.c.set_value(m.x * m.y <= 1)
+        index.update(m.c)
+        self.assertEqual(len(index.bilinear_partners(m.z)[m.y]), 0)
+        self.assertEqual(list(index.bilinear_partners(m.y)[m.x]),
+                         [m.d.c, m.c])
+        self.assertEqual(list(index.constraints(m.d)), [m.d.c])
+
+    def test_bilinear_in_disjuncts_without_pruning_solver(self):
+        m = ConcreteModel()
+        m.x = Var([0], bounds=(-3, 8))
+        m.y = Var(RangeSet(4), domain=Binary)
+        m.z = Var(domain=Integers, bounds=(-1, 2))
+        m.constr = Constraint(
+            expr=m.x[0] == m.y[1] + 2 * m.y[2] + m.y[3] + 2 * m.y[4] + m.z)
+        m.v = Var([1, 2])
+        m.v[1].setlb(-2)
+        m.v[1].setub(7)
+        m.v[2].setlb(-4)
+        m.v[2].setub(5)
+        m.disjctn = Disjunction(expr=[
+            [m.x[0] * m.v[1] <= 4],
+            [m.x[0] * m.v[2] >= 6]
+        ])
+        TransformationFactory('contrib.induced_linearity').apply_to(
+            m, pruning_solver=None)
+        self.assertEqual(
+            m.disjctn.disjuncts[0].constraint[1].body.polynomial_degree(), 1)
+        self.assertEqual(
+            m.disjctn.disjuncts[1].constraint[1].body.polynomial_degree(), 1)
+        xfrmed_blk = m._induced_linearity_info.x0_v1_bilinear
+        self.assertSetEqual(
+            set(xfrmed_blk.valid_values), set(range(-1, 9)))
+
+
 if __name__ == '__main__':
     unittest.main()
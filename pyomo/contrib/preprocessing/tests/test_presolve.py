@@ -0,0 +1,285 @@
+"""Tests the single-pass presolve transformation."""
+import pyutilib.th as unittest
+from pyomo.contrib.preprocessing.plugins.presolve import (
+    PresolveStatistics, REDUCTIONS)
+from pyomo.environ import (ConcreteModel, Constraint, ConstraintList,
+                           Integers, NonNegativeReals, Objective,
+                           TransformationFactory, Var, exp, value)
+from pyomo.repn import generate_standard_repn
+
+
+class TestPresolve(unittest.TestCase):
+    """Tests the presolve transformation."""
+
+    def test_fixed_var_chain(self):
+        m = ConcreteModel()
+        m.x = Var(range(4), bounds=(0, 10))
+        m.c1 = Constraint(expr=2*m.x[0] == 4)
+        m.c2 = Constraint(expr=m.x[0] + m.x[1] == 5)
+        m.c3 = Constraint(expr=m.x[1] - m.x[2] >= 1)
+        m.c4 = Constraint(expr=m.x[2] + m.x[3] <= 20)
+        stats = PresolveStatistics()
+        TransformationFactory('contrib.presolve').apply_to(m, stats=stats)
+        self.assertTrue(m.x[0].fixed)
+        self.assertEqual(value(m.x[0]), 2)
+        self.assertTrue(m.x[1].fixed)
+        self.assertEqual(value(m.x[1]), 3)
+        # x[1] - x[2] >= 1 becomes a bound on x[2]
+        self.assertFalse(m.x[2].fixed)
+        self.assertEqual(m.x[2].bounds, (0, 2))
+        for c in (m.c1, m.c2, m.c3):
+            self.assertFalse(c.active)
+        # x[2] + x[3] <= 20 is redundant, but is left alone
+        self.assertTrue(m.c4.active)
+        self.assertEqual(stats.counts['propagate_fixed_vars'], 2)
+        self.assertEqual(stats.counts['constraints_to_var_bounds'], 1)
+        # the fixed x[0] and x[1] were substituted out of c2 and c3
+        self.assertEqual(stats.counts['remove_zero_terms'], 2)
+
+    def test_detect_fixed_and_trivial(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(1, 1))
+        m.y = Var(bounds=(0, 5))
+        m.c1 = Constraint(expr=m.x + m.y <= 3)
+        m.c2 = Constraint(expr=m.x >= 0.5)
+        stats = PresolveStatistics()
+        TransformationFactory('contrib.presolve').apply_to(m, stats=stats)
+        self.assertTrue(m.x.fixed)
+        self.assertEqual(value(m.x), 1)
+        self.assertEqual(m.y.bounds, (0, 2))
+        self.assertFalse(m.c1.active)
+        self.assertFalse(m.c2.active)
+        self.assertEqual(stats.counts['detect_fixed_vars'], 1)
+        self.assertEqual(stats.counts['deactivate_trivial_constraints'], 1)
+
+    def test_infeasible_trivial_constraint(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.x.fix(1)
+        m.y = Var()
+        m.c = Constraint(expr=m.x + m.y == 3)
+        m.d = Constraint(expr=m.x + 2*m.y >= 10)
+        with self.assertRaisesRegexp(ValueError, 'Trivial constraint d'):
+            TransformationFactory('contrib.presolve').apply_to(m)
+
+    def test_integer_bounds(self):
+        m = ConcreteModel()
+        m.x = Var(domain=Integers)
+        m.c1 = Constraint(expr=2*m.x <= 5)
+        m.c2 = Constraint(expr=3*m.x >= -4)
+        TransformationFactory('contrib.presolve').apply_to(m)
+        self.assertEqual(m.x.bounds, (-1, 2))
+
+    def test_fractional_integer_fix(self):
+        m = ConcreteModel()
+        m.x = Var(domain=Integers, bounds=(0, 10))
+        m.c = Constraint(expr=2*m.x == 5)
+        with self.assertRaisesRegexp(
+                ValueError, 'fixed integer variable x to the fractional '
+                'value 2.5'):
+            TransformationFactory('contrib.presolve').apply_to(m)
+        self.assertFalse(m.x.fixed)
+        self.assertTrue(m.c.active)
+
+    def test_integer_fix_within_tolerance(self):
+        m = ConcreteModel()
+        m.x = Var(domain=Integers, bounds=(0, 10))
+        m.c = Constraint(expr=3*m.x == 6 + 1e-14)
+        TransformationFactory('contrib.presolve').apply_to(m)
+        self.assertTrue(m.x.fixed)
+        self.assertEqual(m.x.value, 2)
+        self.assertIs(type(m.x.value), int)
+
+    def test_zero_sum(self):
+        m = ConcreteModel()
+        m.v1 = Var(initialize=0)
+        m.v2 = Var(initialize=2, domain=NonNegativeReals)
+        m.v3 = Var(initialize=3, domain=NonNegativeReals)
+        m.v4 = Var(initialize=4, domain=NonNegativeReals)
+        m.c1 = Constraint(expr=m.v1 == m.v2 + m.v3 + m.v4)
+        m.v1.fix()
+        stats = PresolveStatistics()
+        TransformationFactory('contrib.presolve').apply_to(m, stats=stats)
+        for v in (m.v2, m.v3, m.v4):
+            self.assertTrue(v.fixed)
+            self.assertEqual(value(v), 0)
+        self.assertFalse(m.c1.active)
+        self.assertEqual(stats.counts['propagate_zero_sum'], 3)
+
+    def test_forcing_constraint(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 1))
+        m.y = Var(bounds=(-2, 3))
+        m.z = Var()
+        m.c1 = Constraint(expr=m.x - m.y >= 3)
+        m.c2 = Constraint(expr=m.z >= m.x)
+        TransformationFactory('contrib.presolve').apply_to(m)
+        self.assertEqual(value(m.x), 1)
+        self.assertEqual(value(m.y), -2)
+        self.assertTrue(m.x.fixed)
+        self.assertTrue(m.y.fixed)
+        self.assertEqual(m.z.bounds, (1, None))
+
+    def test_aggregate_vars(self):
+        m = ConcreteModel()
+        m.v = Var(range(4), bounds=(0, 10))
+        m.v[1].setlb(2)
+        m.v[2].setub(7)
+        m.w = Var(initialize=1)
+        m.c = ConstraintList()
+        m.c.add(m.v[0] == m.v[1])
+        m.c.add(2*m.v[1] - 2*m.v[2] == 0)
+        m.c.add(m.v[2] + m.v[3] + m.w <= 12)
+        m.nl = Constraint(expr=exp(m.v[1]) + m.w**2 <= 100)
+        m.o = Objective(expr=m.v[2] + m.w)
+        stats = PresolveStatistics()
+        xfrm = TransformationFactory('contrib.presolve')
+        xfrm.apply_to(m, stats=stats)
+        self.assertEqual(stats.counts['aggregate_vars'], 2)
+        self.assertFalse(m.c[1].active)
+        self.assertFalse(m.c[2].active)
+        self.assertEqual(m.v[0].bounds, (2, 7))
+
+        postsolve_map = m._presolve_info.postsolve_map
+        self.assertEqual(len(postsolve_map), 2)
+        self.assertIs(postsolve_map[m.v[1]], m.v[0])
+        self.assertIs(postsolve_map[m.v[2]], m.v[0])
+
+        repn = generate_standard_repn(m.c[3].body)
+        self.assertEqual(set(id(v) for v in repn.linear_vars),
+                         set(id(v) for v in (m.v[0], m.v[3], m.w)))
+        repn = generate_standard_repn(m.o.expr)
+        self.assertEqual(set(id(v) for v in repn.linear_vars),
+                         set(id(v) for v in (m.v[0], m.w)))
+        m.v[0].set_value(4)
+        m.v[0].stale = False
+        self.assertEqual(value(m.nl.body), value(exp(4) + 1))
+
+        xfrm.postsolve(m)
+        self.assertEqual(value(m.v[1]), 4)
+        self.assertEqual(value(m.v[2]), 4)
+
+    def test_aggregate_long_chain(self):
+        m = ConcreteModel()
+        n = 5000
+        m.x = Var(range(n + 1), bounds=(0, 10))
+        m.x[n].setub(3)
+        m.link = Constraint(range(n), rule=lambda m, i: m.x[i + 1] == m.x[i])
+        m.o = Objective(expr=m.x[n])
+        xfrm = TransformationFactory('contrib.presolve')
+        xfrm.apply_to(m)
+        self.assertFalse(any(c.active for c in m.link.values()))
+        postsolve_map = m._presolve_info.postsolve_map
+        self.assertEqual(len(postsolve_map), n)
+        reps = set(id(rep) for rep in postsolve_map.values())
+        self.assertEqual(len(reps), 1)
+        rep = next(iter(postsolve_map.values()))
+        self.assertNotIn(rep, postsolve_map)
+        self.assertEqual(rep.bounds, (0, 3))
+
+        # Variables aggregated by an earlier presolve follow their
+        # replacement when it is aggregated in turn
+        m.u = Var(bounds=(1, 5))
+        m.c = Constraint(expr=m.u == rep)
+        xfrm.apply_to(m)
+        self.assertEqual(len(postsolve_map), n + 1)
+        reps = set(id(r) for r in postsolve_map.values())
+        self.assertEqual(len(reps), 1)
+        rep = next(iter(postsolve_map.values()))
+        self.assertIn(id(rep), (id(m.u), id(m.x[0])))
+        self.assertNotIn(rep, postsolve_map)
+        self.assertEqual(rep.bounds, (1, 3))
+        rep.set_value(2)
+        rep.stale = False
+        xfrm.postsolve(m)
+        self.assertEqual(value(m.x[0]), 2)
+        self.assertEqual(value(m.x[n]), 2)
+        self.assertEqual(value(m.u), 2)
+
+    def test_aggregate_disjoint_bounds(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 1))
+        m.y = Var(bounds=(2, 3))
+        m.c = Constraint(expr=m.x == m.y)
+        with self.assertRaisesRegexp(ValueError,
+                                     'linked by equality constraints'):
+            TransformationFactory('contrib.presolve').apply_to(m)
+
+    def test_propagate_eq_var_bounds(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 5))
+        m.y = Var(bounds=(-1, 3))
+        m.z = Var(bounds=(1, None))
+        m.c1 = Constraint(expr=m.x == m.y)
+        m.c2 = Constraint(expr=m.y == m.z)
+        stats = PresolveStatistics()
+        TransformationFactory('contrib.presolve').apply_to(
+            m, aggregate_vars=False, stats=stats)
+        for v in (m.x, m.y, m.z):
+            self.assertEqual(v.bounds, (1, 3))
+        self.assertTrue(m.c1.active)
+        self.assertTrue(m.c2.active)
+        self.assertEqual(stats.counts['aggregate_vars'], 0)
+        self.assertGreater(stats.counts['propagate_eq_var_bounds'], 0)
+
+    def test_matches_sequential_transformations(self):
+        def build():
+            m = ConcreteModel()
+            m.x = Var(range(6), bounds=(0, 10))
+            m.c = ConstraintList()
+            m.c.add(m.x[0] == 3)
+            m.c.add(m.x[0] - m.x[1] == 0)
+            m.c.add(m.x[1] + m.x[2] + 0*m.x[5] <= 8)
+            m.c.add(m.x[3] + m.x[4] + m.x[5] <= 0)
+            m.c.add(m.x[2] + m.x[3] >= 1)
+            return m
+        m1 = build()
+        for xfrm in ('contrib.propagate_fixed_vars',
+                     'contrib.remove_zero_terms',
+                     'contrib.propagate_zero_sum',
+                     'contrib.deactivate_trivial_constraints',
+                     'contrib.constraints_to_var_bounds'):
+            TransformationFactory(xfrm).apply_to(m1)
+        m2 = build()
+        TransformationFactory('contrib.presolve').apply_to(m2)
+        for v1, v2 in zip(m1.x.values(), m2.x.values()):
+            self.assertEqual(v1.fixed, v2.fixed)
+            if v1.fixed:
+                self.assertEqual(value(v1), value(v2))
+            else:
+                self.assertEqual(v1.bounds, v2.bounds)
+
+    def test_nonlinear_constraint_all_fixed(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.y = Var()
+        m.c1 = Constraint(expr=m.x == 1)
+        m.c2 = Constraint(expr=m.y == m.x)
+        m.nl = Constraint(expr=m.x*m.y <= 2)
+        m.nl2 = Constraint(expr=m.x*m.y >= 2)
+        with self.assertRaisesRegexp(ValueError, 'Trivial constraint nl2'):
+            TransformationFactory('contrib.presolve').apply_to(m)
+
+        m.nl2.deactivate()
+        m.x.unfix()
+        m.c1.activate()
+        m.c2.activate()
+        del m._presolve_info
+        TransformationFactory('contrib.presolve').apply_to(m)
+        self.assertFalse(m.nl.active)
+
+    def test_stats_report(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 0))
+        m.c = Constraint(expr=m.x <= 1)
+        stats = PresolveStatistics()
+        TransformationFactory('contrib.presolve').apply_to(m, stats=stats)
+        self.assertIs(m._presolve_info.stats, stats)
+        report = str(stats).splitlines()
+        self.assertEqual(len(report), len(REDUCTIONS) + 3)
+        self.assertIn('detect_fixed_vars', report[1])
+        self.assertEqual(report[-2], 'Constraints processed: 1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,16 @@
 """Tests the variable aggregation module."""
 import pyutilib.th as unittest
 from pyomo.common.collections import ComponentSet
+import pyomo.contrib.preprocessing.plugins.var_aggregator as var_aggregator
 from pyomo.contrib.preprocessing.plugins.var_aggregator import (
     _build_equality_set,
     _get_equality_linked_variables,
+    _group_bounds_and_values,
+    _UnionFind,
     max_if_not_None,
     min_if_not_None
 )
+from pyomo.common.dependencies import numpy_available
 from pyomo.environ import (ConcreteModel, Constraint, ConstraintList,
                            Objective, RangeSet, SolverFactory,
                            TransformationFactory, Var)
@@ -174,6 +178,93 @@ class TestVarAggregate(unittest.TestCase):
         self.assertEqual(max_if_not_None([0]), 0)
         self.assertEqual(max_if_not_None([0, None]), 0)
 
+    def test_union_find(self):
+        uf = _UnionFind()
+        for i in range(6):
+            self.assertEqual(uf.add(), i)
+        uf.union(0, 1)
+        uf.union(2, 3)
+        uf.union(3, 1)
+        uf.union(4, 4)
+        self.assertEqual(len(uf), 6)
+        self.assertEqual(len(set(uf.find(i) for i in range(4))), 1)
+        self.assertEqual(uf.find(4), 4)
+        self.assertEqual(uf.find(5), 5)
+
+    def test_long_chain(self):
+        m = ConcreteModel()
+        m.x = Var(range(2001), bounds=(0, 10), initialize=1)
+        m.x[700].setlb(1)
+        m.x[1500].setub(5)
+        m.x[2000].value = 11
+        m.link = Constraint(
+            range(2000), rule=lambda m, i: m.x[i] == m.x[i + 1])
+        m.c = Constraint(expr=m.x[0] + m.x[2000] <= 8)
+        TransformationFactory('contrib.aggregate_vars').apply_to(m)
+        z = m._var_aggregator_info.z
+        self.assertEqual(len(z), 1)
+        self.assertEqual(z[1].bounds, (1, 5))
+        # x[2000] is out of bounds, so it is not part of the average
+        self.assertEqual(z[1].value, 1)
+        self.assertEqual(len(m._var_aggregator_info.z_to_vars[z[1]]), 2001)
+        self.assertEqual(str(m.c.body), '_var_aggregator_info.z[1] + '
+                         '_var_aggregator_info.z[1]')
+
+    def test_equality_set_order(self):
+        m = ConcreteModel()
+        m.x = Var(range(6))
+        m.c = ConstraintList()
+        m.c.add(m.x[4] == m.x[5])
+        m.c.add(m.x[0] == m.x[1])
+        m.c.add(m.x[1] == m.x[4])
+        m.c.add(m.x[2] == m.x[3])
+        TransformationFactory('contrib.aggregate_vars').apply_to(m)
+        z_to_vars = m._var_aggregator_info.z_to_vars
+        z = m._var_aggregator_info.z
+        # the sets are numbered in the order they are first linked
+        self.assertEqual(z_to_vars[z[1]],
+                         ComponentSet([m.x[4], m.x[5], m.x[0], m.x[1]]))
+        self.assertEqual(z_to_vars[z[2]], ComponentSet([m.x[2], m.x[3]]))
+
+    def test_unchanged_constraints_not_rebuilt(self):
+        m = ConcreteModel()
+        m.x = Var()
+        m.y = Var()
+        m.w = Var()
+        m.c1 = Constraint(expr=m.x == m.y)
+        m.c2 = Constraint(expr=m.x**2 + m.w <= 4)
+        m.c3 = Constraint(expr=m.w**2 >= 1)
+        m.o = Objective(expr=m.w)
+        c3_body = m.c3.body
+        o_expr = m.o.expr
+        TransformationFactory('contrib.aggregate_vars').apply_to(m)
+        z = m._var_aggregator_info.z
+        self.assertIs(m.c1.body.arg(0), z[1])
+        self.assertIs(m.c2.body.arg(0).arg(0), z[1])
+        self.assertIs(m.c3.body, c3_body)
+        self.assertIs(m.o.expr, o_expr)
+
+    @unittest.skipIf(not numpy_available, 'Numpy is not available.')
+    def test_group_bounds_without_numpy(self):
+        m = ConcreteModel()
+        m.x = Var(range(6), initialize=lambda m, i: i)
+        m.x[0].setlb(0.5)
+        m.x[1].setlb(1)
+        m.x[2].setub(4)
+        m.x[4].setub(3)
+        m.x[5].value = None
+        linked_vars = list(m.x.values())
+        groups = [[0, 1, 3], [2, 4], [5]]
+        ans = _group_bounds_and_values(linked_vars, groups)
+        self.assertEqual(ans, ([1, None, None], [None, 3, None],
+                               [2, 2, None]))
+        try:
+            var_aggregator.numpy_available = False
+            self.assertEqual(_group_bounds_and_values(linked_vars, groups),
+                             ans)
+        finally:
+            var_aggregator.numpy_available = True
+
     @unittest.skipIf(not SolverFactory('glpk').available(),
                      "GLPK solver is not available.")
     def test_var_update(self):
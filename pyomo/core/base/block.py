@@ -31,6 +31,7 @@ from pyomo.common.deprecation import deprecated, deprecation_warning
 from pyomo.common.log import is_debug_set
 from pyomo.common.timing import ConstructionTimer
 from pyomo.core.base.plugin import ModelComponentFactory
+import pyomo.core.base.component
 from pyomo.core.base.component import (
     Component, ActiveComponentData,
 )
@@ -450,6 +451,9 @@ class _BlockData(ActiveComponentData):
     This class holds the fundamental block data.
     """
     _Block_reserved_words = set()
+    # Map of id(component) -> (component, fully qualified name) for all
+    # components on this model (see enable_name_cache())
+    _name_cache = None
 
     def __init__(self, component):
         #
@@ -506,6 +510,11 @@ class _BlockData(ActiveComponentData):
         # Note sure why we are deleting these...
         if '_repn' in ans:
             del ans['_repn']
+        # The name cache is keyed by id() and is not copied (copies must
+        # re-enable it)
+        if '_name_cache' in ans:
+            del ans['_name_cache']
+            del ans['_name_cache_release']
         return ans
 
     #
@@ -725,6 +734,55 @@ class _BlockData(ActiveComponentData):
                 delattr(self, attr)
         self._compact_decl_storage()
 
+    def enable_name_cache(self):
+        """Cache the fully qualified names of the components on this model
+
+        Computing the name of a component data object walks the block
+        hierarchy and searches the owning component for the data's
+        index.  When names are requested repeatedly (e.g., by writers
+        using symbolic labels), enabling the cache on the top-level
+        block turns repeated lookups into dictionary hits.  Deleting a
+        component or component data object (including moving a
+        component to another block) drops the cached names of the object
+        and everything beneath it.  The cache lives until
+        disable_name_cache() is called or the block is garbage collected.
+        """
+        if self._name_cache is None:
+            super(_BlockData, self).__setattr__('_name_cache', {})
+            super(_BlockData, self).__setattr__(
+                '_name_cache_release', weakref.finalize(
+                    self, pyomo.core.base.component._release_name_cache))
+            pyomo.core.base.component._name_cache_users += 1
+
+    def disable_name_cache(self):
+        """Disable (and discard) the name cache on this model"""
+        if self._name_cache is not None:
+            self._name_cache_release()
+            super(_BlockData, self).__delattr__('_name_cache')
+            super(_BlockData, self).__delattr__('_name_cache_release')
+
+    def _invalidate_name_cache(self, obj):
+        """Drop the cached names of obj (a component or component data
+        being removed from this block) and of everything beneath it"""
+        model = self.model()
+        cache = model._name_cache if model is not None else None
+        # Names are cached top-down (naming an object names its parent
+        # component and block first), so if obj is not in the cache,
+        # nothing beneath it is either.
+        if not cache or id(obj) not in cache:
+            return
+        components = [obj]
+        while components:
+            c = components.pop()
+            cache.pop(id(c), None)
+            if c.is_indexed():
+                for data in itervalues(c):
+                    cache.pop(id(data), None)
+                    if isinstance(data, _BlockData):
+                        components.extend(itervalues(data.component_map()))
+            elif isinstance(c, _BlockData):
+                components.extend(itervalues(c.component_map()))
+
     def transfer_attributes_from(self, src):
         """Transfer user-defined attributes from src to this block
 
@@ -969,6 +1027,14 @@ component, use the block del_component() and add_component() methods.
                 "its children (%s): creates a circular hierarchy"
                 % (self,))
         #
+        # A model being attached as a sub-block no longer uses its own
+        # name cache (and the names in it would become stale).  Names
+        # already cached on this model do not change.
+        #
+        if pyomo.core.base.component._name_cache_users and \
+           isinstance(val, _BlockData) and val._name_cache is not None:
+            val._name_cache.clear()
+        #
         # Set the name and parent pointer of this component.
         #
         val._name = name
@@ -1119,6 +1185,9 @@ Components must now specify their rules explicitly using 'rule=' keywords.""" %
 
         name = obj.local_name
 
+        if pyomo.core.base.component._name_cache_users:
+            self._invalidate_name_cache(obj)
+
         # Replace the component in the master list with a None placeholder
         idx = self._decl[name]
         del self._decl[name]
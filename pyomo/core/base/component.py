@@ -54,6 +54,57 @@ def _name_index_generator(idx):
         return "[" + _escape(idx) + "]"
 
 
+# The number of blocks that have enabled a name cache (see
+# _BlockData.enable_name_cache()).  getname() only looks for a cache
+# when this is nonzero so that models that do not use the cache do not
+# pay for the lookup.  Every block with a cache holds a weakref.finalize
+# that calls _release_name_cache() when the cache is disabled or the
+# block is garbage collected, whichever happens first.
+_name_cache_users = 0
+
+def _release_name_cache():
+    global _name_cache_users
+    _name_cache_users -= 1
+
+def _cached_name(obj):
+    """Return the fully qualified name of obj from the name cache of its
+    model (populating the cache as necessary).
+
+    Returns None if the model does not have a name cache.  The cache
+    maps ``id(obj)`` to ``(obj, name)``; holding a reference to obj
+    guarantees that the id is not reused by another object.
+    """
+    model = obj.model()
+    if model is None or model is obj:
+        return None
+    cache = model._name_cache
+    if cache is None:
+        return None
+    entry = cache.get(id(obj))
+    if entry is not None:
+        return entry[1]
+    c = obj.parent_component()
+    if c is obj:
+        pb = obj.parent_block()
+        if pb is model:
+            ans = obj._name
+        else:
+            ans = pb.getname(fully_qualified=True) + "." + obj._name
+        cache[id(obj)] = (obj, ans)
+        return ans
+    elif c is None:
+        return None
+    # Name all the data in the parent component at once (this avoids
+    # repeatedly searching the component's _data dictionary)
+    base = c.getname(fully_qualified=True)
+    for idx, data in iteritems(c):
+        cache[id(data)] = (data, base + _name_index_generator(idx))
+    entry = cache.get(id(obj))
+    if entry is None:
+        return None
+    return entry[1]
+
+
 def name(component, index=None, fully_qualified=False, relative_to=None):
     """
     Return a string representation of component for a specific
@@ -566,6 +617,12 @@ class Component(_ComponentBase):
         relative_to: Block
             Generate fully_qualified names reletive to the specified block.
         """
+        if fully_qualified and relative_to is None and _name_cache_users:
+            ans = _cached_name(self)
+            if ans is not None:
+                if name_buffer is not None:
+                    name_buffer[id(self)] = ans
+                return ans
         if fully_qualified:
             pb = self.parent_block()
             if relative_to is None:
@@ -873,6 +930,13 @@ class ComponentData(_ComponentBase):
             # Return the name if it is in the buffer
             return name_buffer[id(self)]
 
+        if fully_qualified and relative_to is None and _name_cache_users:
+            ans = _cached_name(self)
+            if ans is not None:
+                if name_buffer is not None:
+                    name_buffer[id(self)] = ans
+                return ans
+
         c = self.parent_component()
         if c is self:
             #
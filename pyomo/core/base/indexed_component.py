@@ -15,6 +15,7 @@ import logging
 from pyomo.core.expr.expr_errors import TemplateExpressionError
 from pyomo.core.expr.numvalue import native_types
 from pyomo.core.base.indexed_component_slice import IndexedComponent_slice
+import pyomo.core.base.component
 from pyomo.core.base.component import Component, ActiveComponent
 from pyomo.core.base.config import PyomoOptions
 from pyomo.core.base.global_set import UnindexedComponent_set
@@ -507,6 +508,10 @@ You can silence this warning by one of three ways:
                 del self[idx]
         else:
             # Handle the normal deletion operation
+            if pyomo.core.base.component._name_cache_users:
+                parent = self.parent_block()
+                if parent is not None:
+                    parent._invalidate_name_cache(self._data[index])
             if self.is_indexed():
                 # Remove reference to this object
                 self._data[index]._component = None
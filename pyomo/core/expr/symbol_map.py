@@ -9,7 +9,9 @@
 #  ___________________________________________________________________________
 
 from weakref import ref as weakref_ref
-from six import iteritems
+from six import iteritems, itervalues
+
+from pyomo.common.collections import Mapping
 
 class SymbolMap(object):
     """
@@ -176,3 +178,210 @@ class SymbolMap(object):
     def removeSymbol(self, obj):
         symb = self.byObject.pop(id(obj))
         self.bySymbol.pop(symb)
+
+
+class _OrdinalBySymbol(Mapping):
+    """Read-only (string label) -> (object reference) view of an
+    OrdinalSymbolMap.  Labels are only formatted when iterating."""
+
+    __slots__ = ('_smap',)
+
+    def __init__(self, smap):
+        self._smap = smap
+
+    def __getitem__(self, symb):
+        ref = self._smap._lookup(symb)
+        if ref is None:
+            return self._smap._extra_bySymbol[symb]
+        return ref
+
+    def __contains__(self, symb):
+        return self._smap._lookup(symb) is not None \
+            or symb in self._smap._extra_bySymbol
+
+    def __iter__(self):
+        for prefix, refs in iteritems(self._smap._ordinal):
+            for i in range(len(refs)):
+                yield prefix + str(i)
+        for symb in self._smap._extra_bySymbol:
+            yield symb
+
+    def __len__(self):
+        return sum(len(refs) for refs in itervalues(self._smap._ordinal)) \
+            + len(self._smap._extra_bySymbol)
+
+
+class _OrdinalByObject(Mapping):
+    """Read-only (object id) -> (string label) view of an
+    OrdinalSymbolMap"""
+
+    __slots__ = ('_smap',)
+
+    def __init__(self, smap):
+        self._smap = smap
+
+    def __getitem__(self, obj_id):
+        pos = self._smap._positions().get(obj_id, None)
+        if pos is None:
+            return self._smap._extra_byObject[obj_id]
+        return pos[0] + str(pos[1])
+
+    def __contains__(self, obj_id):
+        return obj_id in self._smap._positions() \
+            or obj_id in self._smap._extra_byObject
+
+    def __iter__(self):
+        for obj_id in self._smap._positions():
+            yield obj_id
+        for obj_id in self._smap._extra_byObject:
+            yield obj_id
+
+    def __len__(self):
+        return len(self._smap._positions()) + len(self._smap._extra_byObject)
+
+
+class OrdinalSymbolMap(SymbolMap):
+    """
+    A symbol map for writers that label components by their ordinal
+    position in the problem file (e.g., 'v0', 'v1', ... and 'c0', 'c1',
+    ... in NL files).
+
+    Instead of two dictionaries of string labels, the map stores one
+    list of (weak references to) components per label prefix.  The
+    symbol for the i-th component in the list for prefix 'v' is
+    'v%d' % i.  Labels are only formatted when they are requested, and
+    looking up a symbol splits off its trailing digits to find the
+    prefix and indexes directly into the list.  The (object id) ->
+    position index needed by :meth:`getSymbol` and :attr:`byObject` is
+    built lazily on first use.
+
+    :attr:`bySymbol` and :attr:`byObject` are read-only mapping views
+    with the same semantics as the dictionaries of :class:`SymbolMap`.
+    Symbols added through the regular :class:`SymbolMap` API are stored
+    as usual.  Like :class:`SymbolMap`, the map only holds weak
+    references to the components, so it does not keep a model alive.
+    """
+
+    def __init__(self, labeler=None):
+        super(OrdinalSymbolMap, self).__init__(labeler)
+        self._ordinal = {}
+        self._position = None
+        self._extra_byObject = {}
+        self._extra_bySymbol = {}
+        self.byObject = _OrdinalByObject(self)
+        self.bySymbol = _OrdinalBySymbol(self)
+
+    def __getstate__(self):
+        return {
+            'ordinal': dict((prefix, [ref() for ref in refs])
+                            for prefix, refs in iteritems(self._ordinal)),
+            'bySymbol': tuple(
+                (key, obj()) for key, obj in iteritems(self._extra_bySymbol)),
+            'aliases': tuple(
+                (key, obj()) for key, obj in iteritems(self.aliases)),
+        }
+
+    def __setstate__(self, state):
+        self.__init__()
+        self._ordinal = dict(
+            (prefix, [weakref_ref(obj) for obj in objs])
+            for prefix, objs in iteritems(state['ordinal']))
+        for key, obj in state['bySymbol']:
+            self._extra_byObject[id(obj)] = key
+            self._extra_bySymbol[key] = weakref_ref(obj)
+        self.aliases = {key:weakref_ref(obj) for key, obj in state['aliases']}
+
+    def addOrdinalSymbols(self, prefix, objs):
+        """
+        Append objects to the list of components labeled by `prefix`.
+        The symbol of each object is the prefix followed by its
+        position in the list.
+        """
+        if not prefix or prefix[-1].isdigit():
+            raise ValueError(
+                "Invalid ordinal symbol prefix '%s': the prefix must be "
+                "nonempty and may not end with a digit" % (prefix,))
+        self._ordinal.setdefault(prefix, []).extend(
+            weakref_ref(obj) for obj in objs)
+        self._position = None
+
+    def getOrdinalObjects(self, prefix):
+        """
+        Return the list of objects labeled by `prefix` (in label order)
+        """
+        return [ref() for ref in self._ordinal.get(prefix, ())]
+
+    def _positions(self):
+        if self._position is None:
+            self._position = position = {}
+            for prefix, refs in iteritems(self._ordinal):
+                for i, ref in enumerate(refs):
+                    obj = ref()
+                    if obj is not None:
+                        position[id(obj)] = (prefix, i)
+        return self._position
+
+    def _lookup(self, symb):
+        # Resolve an ordinal symbol to the weak reference to its component
+        # (None if the symbol is not an ordinal symbol known to this
+        # map).  Prefixes cannot end with a digit, so the prefix is
+        # everything before the trailing digits.
+        prefix = symb.rstrip('0123456789')
+        idx = symb[len(prefix):]
+        if not idx or (idx[0] == '0' and len(idx) > 1):
+            return None
+        refs = self._ordinal.get(prefix, None)
+        if refs is None:
+            return None
+        idx = int(idx)
+        if idx < len(refs):
+            return refs[idx]
+        return None
+
+    def addSymbol(self, obj, symb):
+        self._extra_byObject[id(obj)] = symb
+        self._extra_bySymbol[symb] = weakref_ref(obj)
+
+    def addSymbols(self, obj_symbol_tuples):
+        for obj, symb in obj_symbol_tuples:
+            self.addSymbol(obj, symb)
+
+    def createSymbol(self, obj, labeler=None, *args):
+        if labeler:
+            symb = labeler(obj)
+        elif self.default_labeler:
+            symb = self.default_labeler(obj)
+        else:
+            symb = str(obj)
+        self.addSymbol(obj, symb)
+        return symb
+
+    def getSymbol(self, obj, labeler=None, *args):
+        obj_id = id(obj)
+        pos = self._positions().get(obj_id, None)
+        if pos is not None:
+            return pos[0] + str(pos[1])
+        if obj_id in self._extra_byObject:
+            return self._extra_byObject[obj_id]
+        if labeler:
+            symb = labeler(obj)
+        elif self.default_labeler:
+            symb = self.default_labeler(obj)
+        else:
+            symb = str(obj)
+        if symb in self.bySymbol:
+            if self.bySymbol[symb]() is not obj:
+                raise RuntimeError(
+                    "Duplicate symbol '%s' already associated with "
+                    "component '%s' (conflicting component: '%s')"
+                    % (symb, self.bySymbol[symb]().name, obj.name) )
+        self.addSymbol(obj, symb)
+        return symb
+
+    def removeSymbol(self, obj):
+        if id(obj) in self._positions():
+            raise ValueError(
+                "Cannot remove the ordinal symbol for component '%s' from "
+                "an OrdinalSymbolMap" % (obj.name,))
+        symb = self._extra_byObject.pop(id(obj))
+        self._extra_bySymbol.pop(symb)
@@ -10,11 +10,14 @@
 #
 # Unit Tests for components
 #
+import gc
+import weakref
 from six import StringIO
 import pyutilib.th as unittest
 
 from pyomo.common import DeveloperError
 import pyomo.core.base._pyomo
+import pyomo.core.base.component
 from pyomo.environ import (
     ConcreteModel, Component, Block, Var, Set, Param,
 )
@@ -84,6 +87,132 @@ class TestComponent(unittest.TestCase):
             m.b[2].c[1,3].getname(fully_qualified=True, name_buffer=cache),
             "b[2].c[1,3]")
 
+    def test_name_cache(self):
+        m = ConcreteModel()
+        m.b = Block([1,2])
+        m.b[2].c = Var([1,2],[3,4])
+        m.y = Var()
+        m.enable_name_cache()
+        try:
+            self.assertEqual(m.b[2].c[2,4].name, "b[2].c[2,4]")
+            # All the data of c and of the parent Block b were cached
+            self.assertEqual(len(m._name_cache), 8)
+            self.assertIn(id(m.b[2].c[1,3]), m._name_cache)
+            self.assertEqual(m.y.name, "y")
+            self.assertEqual(m.name, "unknown")
+            self.assertNotIn(id(m), m._name_cache)
+            cache = {}
+            self.assertEqual(
+                m.b[2].c[1,3].getname(fully_qualified=True,
+                                      name_buffer=cache), "b[2].c[1,3]")
+            self.assertEqual(cache, {id(m.b[2].c[1,3]): "b[2].c[1,3]"})
+            self.assertEqual(
+                m.b[2].c[1,3].getname(fully_qualified=True,
+                                      relative_to=m.b[2]), "c[1,3]")
+
+            # Moving components invalidates their part of the cache
+            c = m.b[2].c
+            m.b[2].del_component(c)
+            self.assertEqual(len(m._name_cache), 4)
+            self.assertNotIn(id(c[1,3]), m._name_cache)
+            m.b[1].d = c
+            self.assertEqual(c[2,4].name, "b[1].d[2,4]")
+            other = Block(concrete=True)
+            other.transfer_attributes_from(m.b[1])
+            self.assertEqual(c[2,4].name, "d[2,4]")
+            m.b[1].transfer_attributes_from(other)
+            self.assertEqual(c[2,4].name, "b[1].d[2,4]")
+
+            # Clones do not share (or enable) the cache
+            i = m.clone()
+            self.assertIsNone(i._name_cache)
+            self.assertEqual(i.b[1].d[1,3].name, "b[1].d[1,3]")
+        finally:
+            m.disable_name_cache()
+        self.assertIsNone(m._name_cache)
+        self.assertEqual(c[1,3].name, "b[1].d[1,3]")
+
+    def test_name_cache_subtree(self):
+        m = ConcreteModel()
+        m.a = Block()
+        m.a.b = Block([1,2])
+        m.a.b[1].x = Var([1,2])
+        m.a.b[2].y = Var()
+        m.z = Var([1,2])
+        m.enable_name_cache()
+        try:
+            names = sorted(v.name for v in m.component_data_objects(Var))
+            self.assertEqual(names, ['a.b[1].x[1]', 'a.b[1].x[2]',
+                                     'a.b[2].y', 'z[1]', 'z[2]'])
+            self.assertEqual(len(m._name_cache), 11)
+            # Adding components does not change any cached name
+            m.w = Var()
+            m.a.b[1].v = Var()
+            self.assertEqual(len(m._name_cache), 11)
+            # Moving a block only drops the names beneath it
+            b = m.a.b
+            m.a.del_component(b)
+            self.assertEqual(sorted(n for _, n in m._name_cache.values()),
+                             ['a', 'z', 'z[1]', 'z[2]'])
+            m.c = b
+            self.assertEqual(b[1].x[2].name, 'c[1].x[2]')
+            self.assertEqual(b[2].y.name, 'c[2].y')
+            self.assertEqual(m.z[1].name, 'z[1]')
+            # Deleting a component that was never named is a no-op
+            m.del_component(m.w)
+            self.assertEqual(len(m._name_cache), 11)
+        finally:
+            m.disable_name_cache()
+
+    def test_name_cache_delitem(self):
+        m = ConcreteModel()
+        m.x = Var([1,2])
+        m.b = Block([1,2])
+        m.b[2].y = Var()
+        m.enable_name_cache()
+        try:
+            names = sorted(v.name for v in m.component_data_objects(Var))
+            self.assertEqual(names, ['b[2].y', 'x[1]', 'x[2]'])
+            # Deleting component data drops its name (and everything
+            # beneath it) and does not keep the data alive
+            ref = weakref.ref(m.x[1])
+            del m.x[1]
+            gc.collect()
+            self.assertIsNone(ref())
+            y = m.b[2].y
+            del m.b[2]
+            self.assertEqual(sorted(n for _, n in m._name_cache.values()),
+                             ['b', 'b[1]', 'x', 'x[2]'])
+            self.assertEqual(y.name, 'y')
+        finally:
+            m.disable_name_cache()
+
+    def test_name_cache_released_with_model(self):
+        users = pyomo.core.base.component._name_cache_users
+        m = ConcreteModel()
+        m.x = Var([1,2])
+        m.enable_name_cache()
+        m.enable_name_cache()
+        self.assertEqual(m.x[1].name, 'x[1]')
+        self.assertEqual(pyomo.core.base.component._name_cache_users,
+                         users + 1)
+        # The cache refers back to the model, so the model is only
+        # freed by the garbage collector
+        ref = weakref.ref(m)
+        del m
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(pyomo.core.base.component._name_cache_users, users)
+
+        m = ConcreteModel()
+        m.enable_name_cache()
+        m.disable_name_cache()
+        m.disable_name_cache()
+        self.assertEqual(pyomo.core.base.component._name_cache_users, users)
+        del m
+        gc.collect()
+        self.assertEqual(pyomo.core.base.component._name_cache_users, users)
+
     def test_component_data_pprint(self):
         m = ConcreteModel()
         m.a = Set(initialize=[1, 2, 3], ordered=True)
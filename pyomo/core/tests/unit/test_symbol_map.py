@@ -8,9 +8,14 @@
 #  This software is distributed under the 3-clause BSD License.
 #  ___________________________________________________________________________
 
+import gc
+import pickle
+import weakref
+
 import pyutilib.th as unittest
-from pyomo.core.expr.symbol_map import SymbolMap
+from pyomo.core.expr.symbol_map import SymbolMap, OrdinalSymbolMap
 from pyomo.core.kernel.variable import variable
+from pyomo.core.kernel.constraint import constraint
 
 class TestSymbolMap(unittest.TestCase):
 
@@ -34,5 +39,115 @@ class TestSymbolMap(unittest.TestCase):
         self.assertIs(s.aliases["v"](), v1)
         self.assertIs(s.aliases["A"](), v1)
 
+
+class TestOrdinalSymbolMap(unittest.TestCase):
+
+    def _build(self):
+        s = OrdinalSymbolMap()
+        self.v = [variable() for i in range(12)]
+        self.c = [constraint() for i in range(3)]
+        s.addOrdinalSymbols('v', self.v[:10])
+        s.addOrdinalSymbols('v', self.v[10:])
+        s.addOrdinalSymbols('c', self.c)
+        return s
+
+    def test_getSymbol(self):
+        s = self._build()
+        self.assertEqual(s.getSymbol(self.v[0]), 'v0')
+        self.assertEqual(s.getSymbol(self.v[11]), 'v11')
+        self.assertEqual(s.getSymbol(self.c[2]), 'c2')
+        self.assertEqual(s.byObject[id(self.v[3])], 'v3')
+        self.assertIn(id(self.c[1]), s.byObject)
+        self.assertNotIn(id(s), s.byObject)
+        self.assertIs(s.getOrdinalObjects('c')[1], self.c[1])
+        self.assertEqual(s.getOrdinalObjects('o'), [])
+
+    def test_bySymbol(self):
+        s = self._build()
+        self.assertIs(s.bySymbol['v11'](), self.v[11])
+        self.assertIs(s.bySymbol['c0'](), self.c[0])
+        self.assertIs(s.getObject('v5'), self.v[5])
+        for symb in ('v12', 'v01', 'v', 'x1', 'c-1', 'c1.0'):
+            self.assertNotIn(symb, s.bySymbol)
+            with self.assertRaises(KeyError):
+                s.bySymbol[symb]
+        self.assertIs(s.getObject('v12'), SymbolMap.UnknownSymbol)
+        self.assertEqual(len(s.bySymbol), 15)
+        self.assertEqual(len(s.byObject), 15)
+        self.assertEqual(sorted(s.bySymbol),
+                         sorted(['v%d' % i for i in range(12)]
+                                + ['c0', 'c1', 'c2']))
+        self.assertEqual(set(s.byObject),
+                         set(id(x) for x in self.v + self.c))
+
+    def test_regular_symbols(self):
+        s = self._build()
+        o = variable()
+        self.assertEqual(s.getSymbol(o, lambda x: 'obj'), 'obj')
+        self.assertEqual(s.getSymbol(o), 'obj')
+        self.assertIs(s.bySymbol['obj'](), o)
+        self.assertEqual(s.byObject[id(o)], 'obj')
+        self.assertEqual(len(s.bySymbol), 16)
+        with self.assertRaisesRegexp(RuntimeError, 'Duplicate symbol'):
+            s.getSymbol(variable(), lambda x: 'v3')
+        s.removeSymbol(o)
+        self.assertNotIn('obj', s.bySymbol)
+        with self.assertRaisesRegexp(ValueError, 'Cannot remove'):
+            s.removeSymbol(self.v[0])
+        s.alias(self.v[1], '__default__')
+        self.assertIs(s.getObject('__default__'), self.v[1])
+
+    def test_prefixes(self):
+        # Prefixes that are prefixes of each other are resolved by the
+        # trailing digits, not by the order in which they were added
+        s = OrdinalSymbolMap()
+        objs = {}
+        for prefix in ('v', 'vv', 'v_', 'c', 'cv'):
+            objs[prefix] = [variable() for i in range(11)]
+            s.addOrdinalSymbols(prefix, objs[prefix])
+        for prefix in objs:
+            for i in (0, 1, 10):
+                self.assertIs(s.getObject(prefix + str(i)), objs[prefix][i])
+                self.assertEqual(s.getSymbol(objs[prefix][i]),
+                                 prefix + str(i))
+        for symb in ('vv', 'v_01', 'vvv1', 'x1', 'v11', 'cv-1', 'v\u0663'):
+            self.assertNotIn(symb, s.bySymbol)
+
+    def test_weak_references(self):
+        # Like SymbolMap, the map does not keep the components alive
+        s = self._build()
+        o = variable()
+        s.addSymbol(o, 'obj')
+        refs = [weakref.ref(x) for x in self.v + self.c + [o]]
+        self.assertEqual(s.getSymbol(self.v[4]), 'v4')
+        del self.v, self.c, o
+        gc.collect()
+        self.assertEqual([r() for r in refs], [None]*16)
+        self.assertIsNone(s.getObject('v4'))
+        self.assertIsNone(s.getObject('obj'))
+        self.assertEqual(s.getOrdinalObjects('c'), [None]*3)
+        self.assertEqual(len(s.bySymbol), 16)
+
+    def test_invalid_prefix(self):
+        s = OrdinalSymbolMap()
+        with self.assertRaisesRegexp(ValueError, 'Invalid ordinal'):
+            s.addOrdinalSymbols('v1', [variable()])
+        with self.assertRaisesRegexp(ValueError, 'Invalid ordinal'):
+            s.addOrdinalSymbols('', [variable()])
+
+    def test_pickle(self):
+        s = self._build()
+        o = variable()
+        s.addSymbol(o, 'obj')
+        s.alias(o, 'alias')
+        data = pickle.loads(pickle.dumps((s, self.v, self.c, o)))
+        s2, v2, c2, o2 = data
+        self.assertIsInstance(s2, OrdinalSymbolMap)
+        self.assertIs(s2.bySymbol['v7'](), v2[7])
+        self.assertEqual(s2.getSymbol(c2[2]), 'c2')
+        self.assertIs(s2.bySymbol['obj'](), o2)
+        self.assertIs(s2.getObject('alias'), o2)
+
+
 if __name__ == "__main__":
     unittest.main()
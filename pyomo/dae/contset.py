@@ -159,18 +159,17 @@ class ContinuousSet(SortedSimpleSet):
         -------
         float
         """
-        if point in self._fe:
+        # This works because the list _fe is always sorted
+        idx = bisect.bisect_left(self._fe, point)
+        if idx < len(self._fe) and self._fe[idx] == point:
             return point
-        elif point > max(self._fe):
+        elif idx == len(self._fe):
             logger.warn("The point '%s' exceeds the upper bound "
                         "of the ContinuousSet '%s'. Returning the upper bound"
                         % (str(point), self.name))
-            return max(self._fe)
+            return self._fe[-1]
         else:
-            for i in self._fe:
-                # This works because the list _fe is always sorted
-                if i > point:
-                    return i
+            return self._fe[idx]
 
     def get_lower_element_boundary(self, point):
         """ Returns the first finite element point that is less than or
@@ -184,27 +183,24 @@ class ContinuousSet(SortedSimpleSet):
         -------
         float
         """
-        if point in self._fe:
+        # This works because the list _fe is always sorted
+        idx = bisect.bisect_left(self._fe, point)
+        if idx < len(self._fe) and self._fe[idx] == point:
             if 'scheme' in self._discretization_info:
                 if self._discretization_info['scheme'] == 'LAGRANGE-RADAU':
                     # Because Radau Collocation has a collocation point on the
                     # upper finite element bound this if statement ensures that
                     # the desired finite element bound is returned
-                    tmp = self._fe.index(point)
-                    if tmp != 0:
-                        return self._fe[tmp - 1]
+                    if idx != 0:
+                        return self._fe[idx - 1]
             return point
-        elif point < min(self._fe):
+        elif idx == 0:
             logger.warn("The point '%s' is less than the lower bound "
                         "of the ContinuousSet '%s'. Returning the lower bound "
                         % (str(point), self.name))
-            return min(self._fe)
+            return self._fe[0]
         else:
-            rev_fe = list(self._fe)
-            rev_fe.reverse()
-            for i in rev_fe:
-                if i < point:
-                    return i
+            return self._fe[idx - 1]
 
     def construct(self, values=None):
         """ Constructs a :py:class:`ContinuousSet` component
@@ -16,6 +16,7 @@ from pyomo.core.base.indexed_component import (
         normalize_index,
         )
 from pyomo.core.base.indexed_component_slice import IndexedComponent_slice
+from pyomo.common.dependencies import numpy
 from collections import OrderedDict
 
 
@@ -377,3 +378,147 @@ def flatten_dae_components(model, time, ctype, indices=None):
                 "indexed by time (explicitly or implicitly) multiple times."
                 )
     return scalar_comps, dae_comps
+
+
+class FlattenedDAEComponents(object):
+    """
+    The result of `flatten_dae_components`, along with the data objects of
+    each time-indexed component at every point in time.
+
+    Walking the model and building the slices is only done once, so an
+    instance can be kept and reused, e.g. at every step of a
+    moving-horizon controller. The data objects are stored in an array
+    with a row for each time-indexed component and a column for each
+    point in time, so the values of all of the time-indexed components at
+    a point in time can be read or written in bulk without going through
+    the slices of the References.
+
+    >>> from pyomo.environ import ConcreteModel, Var, Set
+    >>> from pyomo.dae import ContinuousSet
+    >>> m = ConcreteModel()
+    >>> m.time = ContinuousSet(initialize=[0, 1, 2])
+    >>> m.comp = Set(initialize=['A', 'B'])
+    >>> m.conc = Var(m.time, m.comp, initialize=1.0)
+    >>> m.flow = Var(m.time, initialize=2.0)
+    >>> m.volume = Var(initialize=3.0)
+    >>> flat = FlattenedDAEComponents(m, m.time, Var)
+    >>> [v.name for v in flat.scalar_comps]
+    ['volume']
+    >>> flat.get_values(0).tolist()
+    [1.0, 1.0, 2.0]
+    >>> flat.copy_values(0, 2)
+
+    Args:
+        model: Block whose components (and their sub-components) will be
+            partitioned
+        time: The ContinuousSet (or other ordered Set) to flatten along
+        ctype: Type of component to identify and partition
+        indices: indices of sets to use when descending into subblocks
+
+    Attributes:
+        scalar_comps (list): The components not indexed by time
+        dae_comps (list): References to the components indexed by time,
+            in the order of the rows of `data`
+
+    """
+    def __init__(self, model, time, ctype, indices=None):
+        self.model = model
+        self.time = time
+        self.ctype = ctype
+        self.indices = indices
+        self.refresh()
+
+    def refresh(self):
+        """
+        Flatten the model again. This only needs to be called if
+        components have been added to (or removed from) the model; the
+        data objects are updated automatically when points are added to
+        the time set.
+        """
+        self.scalar_comps, self.dae_comps = flatten_dae_components(
+            self.model, self.time, self.ctype, indices=self.indices)
+        self._data = None
+
+    @property
+    def data(self):
+        """
+        The array of data objects of the time-indexed components, with a
+        row for each component in `dae_comps` and a column for each point
+        in time. Entries are None for points at which a component was
+        skipped.
+        """
+        if self._data is None or self._data.shape[1] != len(self.time):
+            points = list(self.time)
+            data = numpy.empty((len(self.dae_comps), len(points)),
+                               dtype=object)
+            for i, comp in enumerate(self.dae_comps):
+                # Indexing a Reference with a missing index would add a
+                # new component to the model, so check first.
+                for k, t in enumerate(points):
+                    data[i, k] = comp[t] if t in comp else None
+            self._data = data
+        return self._data
+
+    def time_position(self, t):
+        """
+        Returns the column of `data` for the point t in time
+        """
+        return self.time.ord(t) - 1
+
+    def get_values(self, t):
+        """
+        Returns an array with the values of the time-indexed components at
+        the point t in time (nan for None)
+        """
+        column = self.data[:, self.time_position(t)]
+        return numpy.array([_get_value(d) for d in column], dtype=float)
+
+    def set_values(self, t, values):
+        """
+        Sets the values of the time-indexed components at the point t in
+        time from an array in the order of `dae_comps` (nan sets None)
+        """
+        column = self.data[:, self.time_position(t)]
+        values = numpy.asarray(values, dtype=float)
+        if values.shape != column.shape:
+            raise ValueError(
+                "Expected %s values for the time-indexed components but got "
+                "an array of shape %s" % (column.shape[0], values.shape))
+        for d, val in zip(column, values.tolist()):
+            if d is not None:
+                d.set_value(None if val != val else val)
+
+    def copy_values(self, t_from, t_to):
+        """
+        Copies the values of the time-indexed components at the point
+        t_from in time to the point t_to
+        """
+        self.set_values(t_to, self.get_values(t_from))
+
+    def get_value_matrix(self):
+        """
+        Returns an array with the values of the time-indexed components,
+        with a row for each component and a column for each point in time
+        """
+        data = self.data
+        return numpy.array([_get_value(d) for d in data.flat],
+                           dtype=float).reshape(data.shape)
+
+    def set_value_matrix(self, values):
+        """
+        Sets the values of the time-indexed components from an array with a
+        row for each component and a column for each point in time
+        """
+        data = self.data
+        values = numpy.asarray(values, dtype=float)
+        if values.shape != data.shape:
+            raise ValueError(
+                "Expected an array of shape %s but got an array of shape %s"
+                % (data.shape, values.shape))
+        for d, val in zip(data.flat, values.ravel().tolist()):
+            if d is not None:
+                d.set_value(None if val != val else val)
+
+
+def _get_value(data):
+    return None if data is None else data.value
@@ -0,0 +1,134 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+from pyomo.common.dependencies import numpy
+from pyomo.core.base import Var
+from pyomo.core.expr.numvalue import native_numeric_types
+
+
+def shift_time_horizon(flattened, sample_time, tail_values=None,
+        bounds=True, fixed=True, solver=None, tol=1e-8):
+    """Shifts the values of all time-indexed variables of a model back by
+    one sampling period, as is done between the solves of a moving-horizon
+    estimation or NMPC problem: the new value at time t is the old value
+    at time t + sample_time.
+
+    Points for which t + sample_time falls between two points of the time
+    set are interpolated linearly. Points for which it falls outside of
+    the horizon (the tail) are set to tail_values, or hold the value at
+    the final time point if tail_values is not given (the initial time
+    point if sample_time is negative).
+
+    Bounds and fixed flags are shifted along with the values, taking those
+    of the last point at or before t + sample_time. If a persistent solver
+    is given, the variables whose bounds or fixed flags (or values, if
+    fixed) changed are updated in the solver.
+
+    Args:
+        flattened: A FlattenedDAEComponents of the model's Vars along the
+            time set
+        sample_time: Length of the period to shift by
+        tail_values: Sequence with a value for each component in
+            flattened.dae_comps to initialize the tail with. nan entries
+            keep the value at the final time point.
+        bounds: Whether to shift the bounds of the variables
+        fixed: Whether to shift the fixed flags of the variables
+        solver: Persistent solver whose model should be kept in sync
+        tol: Tolerance within which t + sample_time is considered to
+            coincide with a point of the time set
+
+    Returns:
+        List of the points in the tail of the horizon.
+    """
+    if flattened.ctype is not Var:
+        raise ValueError(
+            "Can only shift the time horizon of flattened Vars, not %s"
+            % (flattened.ctype.__name__,))
+    time = flattened.time
+    data = flattened.data
+    points = numpy.array(list(time), dtype=float)
+    n = len(points)
+
+    # Locate t + sample_time between the points src and nxt of the
+    # time set, and the weight of nxt in the interpolation.
+    target = points + sample_time
+    src = numpy.searchsorted(points, target + tol, side='right') - 1
+    src = numpy.clip(src, 0, n - 1)
+    nxt = numpy.minimum(src + 1, n - 1)
+    gap = points[nxt] - points[src]
+    offset = target - points[src]
+    interpolate = (gap > 0) & (offset > tol)
+    weight = numpy.zeros(n)
+    weight[interpolate] = numpy.clip(
+        offset[interpolate] / gap[interpolate], 0.0, 1.0)
+    tail = (target > points[-1] + tol) | (target < points[0] - tol)
+
+    old_values = flattened.get_value_matrix()
+    new_values = old_values[:, src]
+    cols = numpy.nonzero(interpolate)[0]
+    w = weight[cols]
+    new_values[:, cols] = (old_values[:, src[cols]]*(1 - w)
+                           + old_values[:, nxt[cols]]*w)
+    if tail_values is not None:
+        tail_values = numpy.asarray(tail_values, dtype=float)
+        if tail_values.shape != (data.shape[0],):
+            raise ValueError(
+                "Expected %s tail values for the time-indexed components "
+                "but got an array of shape %s"
+                % (data.shape[0], tail_values.shape))
+        given = ~numpy.isnan(tail_values)
+        for k in numpy.nonzero(tail)[0]:
+            new_values[given, k] = tail_values[given]
+
+    # Record the bounds and fixed flags before any of them are changed
+    state = numpy.empty(data.shape, dtype=object)
+    for i, row in enumerate(data.tolist()):
+        for k, var in enumerate(row):
+            if var is not None:
+                state[i, k] = (var._lb, var._ub, var.fixed)
+    shifted = state[:, src].tolist()
+
+    updated = []
+    for row, vals, others in zip(data.tolist(), new_values.tolist(), shifted):
+        for var, val, other in zip(row, vals, others):
+            if var is None:
+                continue
+            if val != val:
+                val = None
+            changed = var.fixed and val != var.value
+            var.set_value(val)
+            if other is not None:
+                lb, ub, is_fixed = other
+                if bounds:
+                    if not _same_bound(lb, var._lb):
+                        var.setlb(lb)
+                        changed = True
+                    if not _same_bound(ub, var._ub):
+                        var.setub(ub)
+                        changed = True
+                if fixed and is_fixed != var.fixed:
+                    var.fixed = is_fixed
+                    changed = True
+            if changed:
+                updated.append(var)
+
+    if solver is not None:
+        solver_vars = solver._pyomo_var_to_solver_var_map
+        for var in updated:
+            if var in solver_vars:
+                solver.update_var(var)
+
+    return [t for t, in_tail in zip(time, tail) if in_tail]
+
+
+def _same_bound(a, b):
+    # Bounds may be expressions, which must not be compared with ==
+    return a is b or (a.__class__ in native_numeric_types
+                      and b.__class__ in native_numeric_types and a == b)
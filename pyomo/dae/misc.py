@@ -8,17 +8,20 @@
 #  This software is distributed under the 3-clause BSD License.
 #  ___________________________________________________________________________
 
+import bisect
+import heapq
 import logging
 
 from pyomo.common.collections import ComponentMap
 from pyomo.common.log import LoggingIntercept
 from pyomo.core import Suffix, Var, Constraint, Piecewise, Block
-from pyomo.core import Expression, Param
+from pyomo.core import Expression, Param, Objective
 from pyomo.core.base.misc import apply_indexed_rule
 from pyomo.core.base.block import IndexedBlock, SortComponents
+from pyomo.core.expr.numeric_expr import LinearExpression
 from pyomo.dae import ContinuousSet, DAE_Error
 
-from six import iterkeys, itervalues, StringIO
+from six import iterkeys, itervalues, iteritems, StringIO
 
 logger = logging.getLogger('pyomo.dae')
 
@@ -40,9 +43,12 @@ def generate_finite_elements(ds, nfe):
         # If only bounds have been specified on the differentialset we
         # generate the desired number of finite elements by
         # spreading them evenly over the interval
-        step = (max(ds) - min(ds)) / float(nfe)
-        tmp = min(ds) + step
-        while round(tmp, 6) <= round((max(ds) - step), 6):
+        # The bounds are computed once here since adding a point to the
+        # set invalidates its sorted order
+        lb, ub = min(ds), max(ds)
+        step = (ub - lb) / float(nfe)
+        tmp = lb + step
+        while round(tmp, 6) <= round((ub - step), 6):
             ds.add(round(tmp, 6))
             tmp += step
         ds.set_changed(True)
@@ -85,17 +91,55 @@ def generate_colloc_points(ds, tau):
     This function adds collocation points between the finite elements
     in the differential set
     """
-    fes = list(ds)
+    for pt in _colloc_points(list(ds), tau):
+        if pt not in ds:
+            ds.add(pt)
+            ds.set_changed(True)
+
+
+def _colloc_points(fes, tau):
+    """
+    Returns the collocation points between the finite element points fes
+    """
+    points = []
     for i in range(1, len(fes)):
         h = fes[i] - fes[i - 1]
         for j in range(len(tau)):
             if tau[j] == 1 or tau[j] == 0:
                 continue
             pt = fes[i - 1] + h * tau[j]
-            pt = round(pt, 6)
-            if pt not in ds:
-                ds.add(pt)
-                ds.set_changed(True)
+            points.append(round(pt, 6))
+    return points
+
+
+def refine_finite_elements(ds, nfe, points=None):
+    """
+    Returns the sorted list of finite element points of the discretized
+    ContinuousSet ds after adding the given points as finite element
+    boundaries or, if no points are given, after repeatedly splitting the
+    largest finite element (the first one if several are equally large) at
+    its midpoint until there are nfe finite elements. This is the same
+    placement generate_finite_elements uses when a ContinuousSet already
+    contains points inside its bounds.
+    """
+    fe = list(ds.get_finite_elements())
+    if points is not None:
+        for p in points:
+            if p < fe[0] or p > fe[-1]:
+                raise ValueError(
+                    "The finite element point '%s' is outside of the bounds "
+                    "of the ContinuousSet '%s'" % (p, ds.name))
+        return sorted(set(fe).union(points))
+    heap = [(fe[i] - fe[i + 1], fe[i], fe[i + 1])
+            for i in range(len(fe) - 1)]
+    heapq.heapify(heap)
+    for _ in range(nfe - (len(fe) - 1)):
+        negstep, lb, ub = heapq.heappop(heap)
+        mid = round(lb - negstep / 2.0, 6)
+        fe.append(mid)
+        heapq.heappush(heap, (lb - mid, lb, mid))
+        heapq.heappush(heap, (mid - ub, mid, ub))
+    return sorted(set(fe))
 
 
 def expand_components(block):
@@ -173,6 +217,152 @@ def expand_components(block):
         logger.error(buf.getvalue())
         raise
 
+def refine_discretization(block, ds, fe, points):
+    """
+    Refines the discretization of the ContinuousSet ds, which has already
+    been discretized, so that its finite element points are fe and its
+    discretization points are points (which must include fe). Points of
+    ds that are not in points (e.g. the collocation points of a finite
+    element that was split) are removed. Only the components indexed by
+    ds at the added or removed points are created or deleted, and the
+    discretization and continuity equations are only rebuilt at the
+    points where their stencil changed, so every other component and the
+    values of the variables at the points that are kept are left
+    untouched. Variables at the new points are initialized by linear
+    interpolation between their values at the neighbouring old points.
+    """
+    from pyomo.dae import DerivativeVar, Integral
+
+    old_points = list(ds)
+    keep = set(points)
+    removed = set(p for p in old_points if p not in keep)
+    added = sorted(p for p in keep if p not in ds)
+
+    # Find the old points on each side of every new point to interpolate
+    # the variable values at the new point
+    brackets = {}
+    for p in added:
+        k = bisect.bisect_left(old_points, p)
+        lb, ub = old_points[k - 1], old_points[k]
+        brackets.setdefault(lb, []).append((p, ub, (p - lb) / (ub - lb)))
+
+    components = []
+    for c in block.component_objects(descend_into=True,
+                                     sort=SortComponents.declOrder):
+        if c.ctype is Suffix or c.ctype is Param or isinstance(c, Integral):
+            continue
+        positions = _contset_positions(c, ds)
+        if not positions:
+            continue
+        if isinstance(c, Piecewise):
+            raise DAE_Error(
+                "Cannot refine the discretization of ContinuousSet '%s' "
+                "because the Piecewise component '%s' is indexed by it. "
+                "Try adding the component to the model after refining."
+                % (ds.name, c.name))
+        components.append((c, positions))
+
+    values = []
+    for c, positions in components:
+        if not isinstance(c, Var) or len(positions) != 1:
+            continue
+        getter, setter = _contset_index_functions(c, positions[0])
+        for idx, vardata in iteritems(c._data):
+            for p, ub, w in brackets.get(getter(idx), ()):
+                lbval = vardata.value
+                ubdata = c._data.get(setter(idx, ub), None)
+                if lbval is None or ubdata is None or ubdata.value is None \
+                        or not vardata.is_continuous():
+                    continue
+                values.append((c, setter(idx, p),
+                               lbval + w * (ubdata.value - lbval)))
+
+    # Update the ContinuousSet and the stencils of the discretization
+    # equations, recording the points whose equations have changed
+    ds.clear()
+    for p in sorted(keep):
+        ds.add(p)
+    ds._fe = sorted(fe)
+    info = ds.get_discretization_info()
+    info['nfe'] = len(ds._fe) - 1
+    changed = set()
+    for stencil_fn, stencil in iteritems(info.get('stencils', {})):
+        new_stencil = stencil_fn(ds)
+        for p in set(stencil) | set(new_stencil):
+            if p in keep and stencil.get(p) != new_stencil.get(p):
+                changed.add(p)
+        stencil.clear()
+        stencil.update(new_stencil)
+
+    equations = set()
+    for c, positions in components:
+        if isinstance(c, DerivativeVar) and ds in c.get_continuousset_list():
+            blk = c.parent_block()
+            svar = c.get_state_var()
+            for nme in (c.local_name + '_disc_eq',
+                        svar.local_name + '_' + ds.local_name + '_cont_eq'):
+                con = blk.find_component(nme)
+                if con is not None:
+                    equations.add(id(con))
+
+    for c, positions in components:
+        stale = changed | removed if id(c) in equations else removed
+        if not stale:
+            continue
+        getters = [_contset_index_functions(c, pos)[0] for pos in positions]
+        for idx in [idx for idx in c._data
+                    if any(getter(idx) in stale for getter in getters)]:
+            del c[idx]
+
+    ds.set_changed(True)
+    expand_components(block)
+
+    for c, idx, val in values:
+        c[idx].value = val
+
+    # Integrals over ds (and any objective they appear in) are rebuilt
+    # over the new discretization points
+    integrals = [i for i in block.component_objects(Expression,
+                                                     descend_into=True)
+                 if isinstance(i, Integral) and i.get_continuousset() is ds]
+    for i in integrals:
+        i.reconstruct()
+    if integrals:
+        for k in block.component_objects(Objective, descend_into=True):
+            k.reconstruct()
+
+
+def _contset_positions(comp, ds):
+    """
+    Returns the positions of the ContinuousSet ds in the indices of the
+    component comp
+    """
+    if not hasattr(comp, 'dim') or comp.dim() == 0:
+        return []
+    if comp.dim() == 1:
+        return [0] if comp.index_set() is ds else []
+    positions = []
+    offset = 0
+    for s in comp.index_set().subsets():
+        if s is ds:
+            positions.append(offset)
+        if s.dimen is None:
+            break
+        offset += s.dimen
+    return positions
+
+
+def _contset_index_functions(comp, pos):
+    """
+    Returns functions that get and replace the point of a ContinuousSet at
+    position pos in the indices of comp
+    """
+    if comp.dim() == 1:
+        return (lambda idx: idx), (lambda idx, p: p)
+    return (lambda idx: idx[pos]), \
+        (lambda idx, p: idx[:pos] + (p,) + idx[pos + 1:])
+
+
 def update_contset_indexed_component(comp, expansion_map):
     """
     Update any model components which are indexed by a ContinuousSet that
@@ -259,9 +449,11 @@ def _update_var(v):
     #       Var (which is now a IndexedComponent). However, it
     #       would be much slower to rely on that method to generate new
     #       _VarData for a large number of new indices.
-    new_indices = set(v._index) - set(iterkeys(v._data))
-    for index in new_indices:
-        v.add(index)
+    # The new indices come from the index set, so (as in Var.construct)
+    # they are not validated again
+    data = v._data
+    for index in [i for i in v._index if i not in data]:
+        v._getitem_when_not_present(index)
 
 
 def _update_constraint(con):
@@ -272,10 +464,12 @@ def _update_constraint(con):
 
     _rule = con.rule
     _parent = con._parent()
+    data = con._data
     for i in con.index_set():
-        if i not in con:
-            # Code taken from the construct() method of Constraint
-            con.add(i, _rule(_parent, i))
+        if i not in data:
+            # Code taken from the construct() method of Constraint, which
+            # bypasses the index validation
+            con._setitem_when_not_present(i, _rule(_parent, i))
 
 
 def _update_expression(expre):
@@ -371,23 +565,178 @@ def create_partial_expression(scheme, expr, ind, loc):
     return lambda *args: _fun(*args)(args[loc])
 
 
+def create_stencil_transform(stencil):
+    """
+    This method returns a discretization scheme which applies precomputed
+    stencil coefficients. The stencil maps each point of a ContinuousSet
+    at which the discretization equation applies to a tuple (scale, terms)
+    where terms is a sequence of (point, coefficient) pairs. The returned
+    scheme approximates the derivative at point i as
+    scale*sum(coefficient*v(point) for point, coefficient in terms), or
+    without the scale if it is None. Requesting a point that is not in the
+    stencil raises an IndexError so that add_discretization_equations
+    skips it.
+    """
+    def _transform(v, s):
+        def _fun(i):
+            try:
+                scale, terms = stencil[i]
+            except KeyError:
+                raise IndexError("list index out of range")
+            expr = 0
+            for pt, coef in terms:
+                expr += coef * v(pt)
+            if scale is None:
+                return expr
+            return scale * expr
+        return _fun
+    return _transform
+
+
+def get_stencil(s, stencil_fn):
+    """
+    Returns the stencil computed by the function stencil_fn for the
+    ContinuousSet s. Stencils are computed once and stored in the
+    discretization information of the ContinuousSet so that they are shared
+    by all of the discretization equations using them and can be updated
+    in place when the ContinuousSet is refined (see refine_discretization).
+    """
+    stencils = s.get_discretization_info().setdefault('stencils', {})
+    if stencil_fn not in stencils:
+        stencils[stencil_fn] = stencil_fn(s)
+    return stencils[stencil_fn]
+
+
+def add_derivative_stencil(d, s, stencil, loc):
+    """
+    Discretizes the DerivativeVar d with respect to the ContinuousSet s,
+    which is the loc-th indexing set of d, using stencil (see
+    create_stencil_transform). Besides updating the derivative expression
+    of d, the stencil is recorded on d so that add_discretization_equations
+    can generate the discretization equations as linear rows directly,
+    unless the derivative expression of d was set by other means.
+    """
+    if not hasattr(d, '_expr'):
+        stencils = []
+    elif getattr(d, '_stencil_expr', None) is d._expr:
+        stencils = d._stencils
+    else:
+        stencils = None
+    expr = create_partial_expression(create_stencil_transform(stencil),
+                                     d.get_derivative_expression(), s, loc)
+    d.set_derivative_expression(expr)
+    if stencils is not None:
+        d._stencils = stencils + [(stencil, loc)]
+        d._stencil_expr = expr
+
+
+def _stencil_coefficients(stencils, idx):
+    """
+    Returns a list of the (index, coefficient) pairs of the variable
+    indices in the approximation at index idx obtained by applying each of
+    the (stencil, loc) pairs in stencils along the loc-th position of the
+    index, or None if the approximation does not apply at idx.
+    """
+    coefs = None
+    for stencil, loc in stencils:
+        try:
+            scale, terms = stencil[idx[loc]]
+        except KeyError:
+            return None
+        if scale is None:
+            scale = 1.0
+        pre, post = idx[:loc], idx[loc + 1:]
+        if coefs is None:
+            # The first stencil only has distinct points
+            coefs = [(pre + (pt,) + post, coef * scale)
+                     for pt, coef in terms]
+            continue
+        new_coefs = {}
+        for j, c in coefs:
+            c *= scale
+            pre, post = j[:loc], j[loc + 1:]
+            for pt, coef in terms:
+                k = pre + (pt,) + post
+                new_coefs[k] = new_coefs.get(k, 0) + coef * c
+        coefs = list(iteritems(new_coefs))
+    return coefs
+
+
+def _stencil_row(v, svar, coefs, idx):
+    """
+    Returns the equation v[idx] == sum(c*svar[j] for j, c in coefs) as a
+    tuple (body, 0) with a LinearExpression body
+    """
+    # Index the _data dicts directly: every index here was generated
+    # from an index of the variables, so it does not need validating
+    data = svar._data
+    if len(idx) == 1:
+        linear_vars = [v._data[idx[0]]]
+        linear_vars.extend(data[j[0]] for j, c in coefs)
+    else:
+        linear_vars = [v._data[idx]]
+        linear_vars.extend(data[j] for j, c in coefs)
+    linear_coefs = [1]
+    linear_coefs.extend(-c for j, c in coefs)
+    return (LinearExpression(constant=0, linear_coefs=linear_coefs,
+                             linear_vars=linear_vars), 0)
+
+
 def add_discretization_equations(block, d):
     """
     Adds the discretization equations for DerivativeVar d to the Block block.
     Because certain indices will be valid for some discretization schemes and
     not others, we skip any constraints which raise an IndexError.
+
+    If d was discretized with add_derivative_stencil, each equation is
+    generated as a single linear row from the combined coefficients of the
+    stencils instead of by evaluating the derivative expression.
     """
+    stencils = None
+    if getattr(d, '_stencil_expr', None) is d.get_derivative_expression():
+        stencils = d._stencils
 
-    def _disc_eq(m, *args):
-        try:
-            return d[args] == d._expr(*args)
-        except IndexError:
-            return Constraint.Skip
+    if stencils is not None:
+        svar = d.get_state_var()
+
+        def _disc_eq(m, *args):
+            coefs = _stencil_coefficients(stencils, args)
+            if coefs is None:
+                return Constraint.Skip
+            return _stencil_row(d, svar, coefs, args)
+    else:
+        def _disc_eq(m, *args):
+            try:
+                return d[args] == d._expr(*args)
+            except IndexError:
+                return Constraint.Skip
 
     block.add_component(d.local_name + '_disc_eq',
                         Constraint(d.index_set(), rule=_disc_eq))
 
 
+def continuity_stencil(s):
+    """
+    Returns the stencil of the continuity equations for a ContinuousSet
+    discretized using a polynomial basis function that does not have a
+    root at the finite element boundary. The value of a variable at
+    each finite element point (other than the first) is given by the
+    polynomial of the previous finite element evaluated at its upper
+    boundary.
+    """
+    info = s.get_discretization_info()
+    ncp = info['ncp']
+    afinal = [float(a) for a in info['afinal']]
+    t = list(s)
+    fe = s.get_finite_elements()
+    stencil = {}
+    for k in range(1, len(fe)):
+        lo = s.ord(fe[k - 1]) - 1
+        stencil[fe[k]] = (None, tuple((t[lo + j], afinal[j])
+                                      for j in range(ncp + 1)))
+    return stencil
+
+
 def add_continuity_equations(block, d, i, loc):
     """
     Adds continuity equations in the case that the polynomial basis function
@@ -398,28 +747,13 @@ def add_continuity_equations(block, d, i, loc):
     if block.find_component(nme) is not None:
         return
 
-    def _cont_exp(v, s):
-        ncp = s.get_discretization_info()['ncp']
-        afinal = s.get_discretization_info()['afinal']
-
-        def _fun(i):
-            tmp = list(s)
-            idx = s.ord(i)-1
-            low = s.get_lower_element_boundary(i)
-            if i != low or idx == 0:
-                raise IndexError("list index out of range")
-            low = s.get_lower_element_boundary(tmp[idx - 1])
-            lowidx = s.ord(low)-1
-            return sum(v(tmp[lowidx + j]) * afinal[j] for j in range(ncp + 1))
-        return _fun
-    expr = create_partial_expression(_cont_exp, create_access_function(svar),
-                                     i, loc)
+    stencils = [(get_stencil(i, continuity_stencil), loc)]
 
     def _cont_eq(m, *args):
-        try:
-            return svar[args] == expr(*args)
-        except IndexError:
+        coefs = _stencil_coefficients(stencils, args)
+        if coefs is None:
             return Constraint.Skip
+        return _stencil_row(svar, svar, coefs, args)
 
     block.add_component(nme, Constraint(d.index_set(),
                                         rule=_cont_eq))
@@ -498,9 +832,7 @@ def _get_idx(l, ds, n, i, k):
     points and is not separated into finite elements and collocation
     points.
     """
-    t = list(ds)
-    tmp = ds.ord(ds._fe[i])-1
-    tik = t[tmp + k]
+    tik = ds[ds.ord(ds._fe[i]) + k]
     if n is None:
         return tik
     else:
@@ -27,11 +27,15 @@ from pyomo.dae import ContinuousSet, DerivativeVar, Integral
 from pyomo.dae.misc import generate_finite_elements
 from pyomo.dae.misc import generate_colloc_points
 from pyomo.dae.misc import expand_components
-from pyomo.dae.misc import create_partial_expression
+from pyomo.dae.misc import add_derivative_stencil
+from pyomo.dae.misc import get_stencil
 from pyomo.dae.misc import add_discretization_equations
 from pyomo.dae.misc import add_continuity_equations
 from pyomo.dae.misc import block_fully_discretized
 from pyomo.dae.misc import get_index_information
+from pyomo.dae.misc import refine_finite_elements
+from pyomo.dae.misc import refine_discretization
+from pyomo.dae.misc import _colloc_points
 from pyomo.dae.diffvar import DAE_Error
 
 from pyomo.common.config import ConfigBlock, ConfigValue, PositiveInt, In
@@ -39,80 +43,55 @@ from pyomo.common.config import ConfigBlock, ConfigValue, PositiveInt, In
 logger = logging.getLogger('pyomo.dae')
 
 
-def _lagrange_radau_transform(v, s):
-    ncp = s.get_discretization_info()['ncp']
-    adot = s.get_discretization_info()['adot']
-
-    def _fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Don't apply this equation at initial point
-            raise IndexError("list index out of range")
-        low = s.get_lower_element_boundary(i)
-        lowidx = s.ord(low)-1
-        return sum(v(tmp[lowidx + j]) * adot[j][idx - lowidx] *
-                   (1.0 / (tmp[lowidx + ncp] - tmp[lowidx]))
-                   for j in range(ncp + 1))
-    return _fun
-
-
-def _lagrange_radau_transform_order2(v, s):
-    ncp = s.get_discretization_info()['ncp']
-    adotdot = s.get_discretization_info()['adotdot']
-
-    def _fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Don't apply this equation at initial point
-            raise IndexError("list index out of range")
-        low = s.get_lower_element_boundary(i)
-        lowidx = s.ord(low)-1
-        return sum(v(tmp[lowidx + j]) * adotdot[j][idx - lowidx] *
-                   (1.0 / (tmp[lowidx + ncp] - tmp[lowidx]) ** 2)
-                   for j in range(ncp + 1))
-    return _fun
-
-
-def _lagrange_legendre_transform(v, s):
-    ncp = s.get_discretization_info()['ncp']
-    adot = s.get_discretization_info()['adot']
-
-    def _fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Don't apply this equation at initial point
-            raise IndexError("list index out of range")
-        elif i in s.get_finite_elements():  # Don't apply at finite element
-                                            # points continuity equations
-                                            # added later
-            raise IndexError("list index out of range")
-        low = s.get_lower_element_boundary(i)
-        lowidx = s.ord(low)-1
-        return sum(v(tmp[lowidx + j]) * adot[j][idx - lowidx] *
-                   (1.0 / (tmp[lowidx + ncp + 1] - tmp[lowidx]))
-                   for j in range(ncp + 1))
-    return _fun
-
-
-def _lagrange_legendre_transform_order2(v, s):
-    ncp = s.get_discretization_info()['ncp']
-    adotdot = s.get_discretization_info()['adotdot']
-
-    def _fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Don't apply this equation at initial point
-            raise IndexError("list index out of range")
-        elif i in s.get_finite_elements():  # Don't apply at finite element
-                                            # points continuity equations
-                                            # added later
-            raise IndexError("list index out of range")
-        low = s.get_lower_element_boundary(i)
-        lowidx = s.ord(low)-1
-        return sum(v(tmp[lowidx + j]) * adotdot[j][idx - lowidx] *
-                   (1.0 / (tmp[lowidx + ncp + 1] - tmp[lowidx]) ** 2) \
-                   for j in range(ncp + 1))
-    return _fun
+# The collocation equations are written as functions returning their
+# stencil on a ContinuousSet (see create_stencil_transform in
+# pyomo.dae.misc). The stencil for every point is computed in a single pass
+# over the finite elements in the ContinuousSet.
+
+def _lagrange_radau_transform(s):
+    info = s.get_discretization_info()
+    return _lagrange_stencil(s, info['ncp'], info['adot'], 1, True)
+
+
+def _lagrange_radau_transform_order2(s):
+    info = s.get_discretization_info()
+    return _lagrange_stencil(s, info['ncp'], info['adotdot'], 2, True)
+
+
+def _lagrange_legendre_transform(s):
+    info = s.get_discretization_info()
+    return _lagrange_stencil(s, info['ncp'], info['adot'], 1, False)
+
+
+def _lagrange_legendre_transform_order2(s):
+    info = s.get_discretization_info()
+    return _lagrange_stencil(s, info['ncp'], info['adotdot'], 2, False)
+
+
+def _lagrange_stencil(s, ncp, a, order, radau):
+    """
+    Returns the stencil of the collocation equations for the derivative of
+    the given order at every collocation point in s. The equations are not
+    applied at the initial point or, for Legendre collocation (which does
+    not have a collocation point at the finite element boundary), at the
+    finite element points where continuity equations are added instead.
+    """
+    t = list(s)
+    fe = s.get_finite_elements()
+    # Radau collocation has ncp+1 points in each finite element including
+    # its boundaries, Legendre collocation has ncp+2
+    width = ncp if radau else ncp + 1
+    stencil = {}
+    for e in range(len(fe) - 1):
+        lo = s.ord(fe[e]) - 1
+        hi = s.ord(fe[e + 1]) - 1
+        scale = 1.0 / (t[lo + width] - t[lo]) ** order
+        last = hi + 1 if radau else hi
+        for k in range(lo + 1, last):
+            stencil[t[k]] = (None, tuple(
+                (t[lo + j], float(a[j][k - lo]) * scale)
+                for j in range(ncp + 1)))
+    return stencil
 
 
 def conv(a, b):
@@ -268,6 +247,28 @@ class Collocation_Discretization_Transformation(Transformation):
             "The default scheme is Lagrange polynomials with Radau roots"
     ))
 
+    CONFIG.declare('refine', ConfigValue(
+        default=False,
+        domain=bool,
+        description="Refine ContinuousSets that have already been "
+                    "discretized",
+        doc="If True, ContinuousSets that have already been discretized by "
+            "this transformation are refined by adding finite elements "
+            "instead of raising an error. The ContinuousSet keeps the "
+            "scheme it was discretized with and finite elements are added "
+            "until there are 'nfe' of them, or at the points given by "
+            "'finite_elements'. Only the components at the new "
+            "discretization points and the discretization equations "
+            "affected by them are created; all other components, and the "
+            "values of the existing variables, are kept."
+    ))
+    CONFIG.declare('finite_elements', ConfigValue(
+        default=None,
+        description="The finite element points to add when refining",
+        doc="A list of points at which to add finite element boundaries "
+            "when 'refine' is True. If specified, 'nfe' is ignored."
+    ))
+
     def __init__(self):
         super(Collocation_Discretization_Transformation, self).__init__()
         self._ncp = {}
@@ -366,10 +367,18 @@ class Collocation_Discretization_Transformation(Transformation):
                       Options are 'LAGRANGE-RADAU' and 'LAGRANGE-LEGENDRE'. 
                       The default scheme is Lagrange polynomials with Radau
                       roots.
+        refine        Refine ContinuousSets that have already been
+                      discretized instead of raising an error
+        finite_elements
+                      The finite element points to add when refining
         """
 
         config = self.CONFIG(kwds)
 
+        if config.refine:
+            self._refineBlock(instance, config)
+            return instance
+
         tmpnfe = config.nfe
         tmpncp = config.ncp
         tmpds = config.wrt
@@ -453,7 +462,6 @@ class Collocation_Discretization_Transformation(Transformation):
             dsets = d.get_continuousset_list()
             for i in ComponentSet(dsets):
                 if currentds is None or i.name == currentds:
-                    oldexpr = d.get_derivative_expression()
                     loc = d.get_state_var()._contset[i]
                     count = dsets.count(i)
                     if count >= 3:
@@ -462,11 +470,8 @@ class Collocation_Discretization_Transformation(Transformation):
                             "Current implementation only allows for taking the"
                             " first or second derivative with respect to a "
                             "particular ContinuousSet" % (d.name, i.name))
-                    scheme = self._scheme[count - 1]
-
-                    newexpr = create_partial_expression(scheme, oldexpr, i,
-                                                        loc)
-                    d.set_derivative_expression(newexpr)
+                    add_derivative_stencil(
+                        d, i, get_stencil(i, self._scheme[count - 1]), loc)
                     if self._scheme_name == 'LAGRANGE-LEGENDRE':
                         # Add continuity equations to DerivativeVar's parent
                         #  block
@@ -510,6 +515,32 @@ class Collocation_Discretization_Transformation(Transformation):
                     # TODO: check this, reconstruct might not work
                     k.reconstruct()
 
+    def _refineBlock(self, block, config):
+        wrt = config.wrt
+        if wrt is not None and wrt.ctype is not ContinuousSet:
+            raise TypeError("The component specified using the 'wrt' "
+                            "keyword must be a continuous set")
+        for ds in block.component_objects(ContinuousSet, descend_into=True):
+            if wrt is not None and ds is not wrt:
+                continue
+            disc_info = ds.get_discretization_info()
+            if disc_info.get('scheme', None) not in self.all_schemes:
+                raise DAE_Error("Cannot refine ContinuousSet '%s' because it "
+                                "has not been discretized using a collocation "
+                                "scheme" % ds.name)
+            # Recorded on the set rather than on this transformation, so
+            # that a new transformation object cannot bypass the check
+            if disc_info.get('reduced_cp'):
+                raise DAE_Error("Cannot refine ContinuousSet '%s' after "
+                                "reducing the number of collocation points "
+                                "of a variable over it" % ds.name)
+            fe = refine_finite_elements(ds, config.nfe,
+                                        config.finite_elements)
+            points = set(fe)
+            points.update(_colloc_points(fe, disc_info['tau_points']))
+            refine_discretization(block, ds, fe, points)
+            self._nfe[ds.name] = len(fe) - 1
+
     def reduce_collocation_points(self, instance, var=None, ncp=None,
                                   contset=None):
         """
@@ -601,6 +632,9 @@ class Collocation_Discretization_Transformation(Transformation):
                 temp[ds.name] = ncp
         else:
             self._reduced_cp[var.name] = {ds.name: ncp}
+        # The interpolation constraints go stale if ds is refined
+        ds.get_discretization_info().setdefault(
+            'reduced_cp', {})[var.name] = ncp
 
         # TODO: Use unique_component_name for this
         list_name = var.local_name + "_interpolation_constraints"
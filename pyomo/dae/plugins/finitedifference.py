@@ -17,9 +17,12 @@ from pyomo.dae import ContinuousSet, DerivativeVar, Integral
 
 from pyomo.dae.misc import generate_finite_elements
 from pyomo.dae.misc import expand_components
-from pyomo.dae.misc import create_partial_expression
+from pyomo.dae.misc import add_derivative_stencil
+from pyomo.dae.misc import get_stencil
 from pyomo.dae.misc import add_discretization_equations
 from pyomo.dae.misc import block_fully_discretized
+from pyomo.dae.misc import refine_finite_elements
+from pyomo.dae.misc import refine_discretization
 from pyomo.dae.diffvar import DAE_Error
 
 from pyomo.common.config import ConfigBlock, ConfigValue, PositiveInt, In
@@ -27,89 +30,78 @@ from pyomo.common.config import ConfigBlock, ConfigValue, PositiveInt, In
 logger = logging.getLogger('pyomo.dae')
 
 
-def _central_transform(v, s):
+# The finite difference schemes are written as functions returning the
+# stencil of the scheme on a ContinuousSet: a dict mapping each point at
+# which the discretization equation applies to a tuple (scale, terms), where
+# the derivative at the point is approximated by
+# scale*sum(coef*v(pt) for pt, coef in terms) (see create_stencil_transform).
+# The stencil for every point is computed in a single pass over the points
+# in the ContinuousSet.
+
+def _central_transform(s):
     """
-    Applies the Central Difference formula of order O(h^2) for first
-    derivatives
+    Returns the stencil of the Central Difference formula of order O(h^2)
+    for first derivatives
     """
-    def _ctr_fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Needed since '-1' is considered a valid index in Python
-            raise IndexError("list index out of range")
-        return 1 / (tmp[idx + 1] - tmp[idx - 1]) * \
-               (v(tmp[idx + 1]) - v(tmp[idx - 1]))
-    return _ctr_fun
+    t = list(s)
+    return {t[k]: (1.0 / (t[k + 1] - t[k - 1]),
+                   ((t[k + 1], 1), (t[k - 1], -1)))
+            for k in range(1, len(t) - 1)}
 
 
-def _central_transform_order2(v, s):
+def _central_transform_order2(s):
     """
-    Applies the Central Difference formula of order O(h^2) for second
-    derivatives
+    Returns the stencil of the Central Difference formula of order O(h^2)
+    for second derivatives
     """
-    def _ctr_fun2(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Needed since '-1' is considered a valid index in Python
-            raise IndexError("list index out of range")
-        return 1 / ((tmp[idx + 1] - tmp[idx]) * (tmp[idx] - tmp[idx - 1])) * \
-               (v(tmp[idx + 1]) - 2 * v(tmp[idx]) + v(tmp[idx - 1]))
-    return _ctr_fun2
+    t = list(s)
+    return {t[k]: (1.0 / ((t[k + 1] - t[k]) * (t[k] - t[k - 1])),
+                   ((t[k + 1], 1), (t[k], -2), (t[k - 1], 1)))
+            for k in range(1, len(t) - 1)}
 
 
-def _forward_transform(v, s):
+def _forward_transform(s):
     """
-    Applies the Forward Difference formula of order O(h) for first derivatives
+    Returns the stencil of the Forward Difference formula of order O(h) for
+    first derivatives
     """
-    def _fwd_fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        return 1 / (tmp[idx + 1] - tmp[idx]) * (v(tmp[idx + 1]) - v(tmp[idx]))
-    return _fwd_fun
+    t = list(s)
+    return {t[k]: (1.0 / (t[k + 1] - t[k]),
+                   ((t[k + 1], 1), (t[k], -1)))
+            for k in range(len(t) - 1)}
 
 
-def _forward_transform_order2(v, s):
+def _forward_transform_order2(s):
     """
-    Applies the Forward Difference formula of order O(h) for second derivatives
+    Returns the stencil of the Forward Difference formula of order O(h) for
+    second derivatives
     """
-    def _fwd_fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        return 1 / ((tmp[idx + 2] - tmp[idx + 1]) *
-                    (tmp[idx + 1] - tmp[idx])) *\
-               (v(tmp[idx + 2]) - 2 * v(tmp[idx + 1]) + v(tmp[idx]))
-    return _fwd_fun
+    t = list(s)
+    return {t[k]: (1.0 / ((t[k + 2] - t[k + 1]) * (t[k + 1] - t[k])),
+                   ((t[k + 2], 1), (t[k + 1], -2), (t[k], 1)))
+            for k in range(len(t) - 2)}
 
 
-def _backward_transform(v, s):
+def _backward_transform(s):
     """
-    Applies the Backward Difference formula of order O(h) for first derivatives
+    Returns the stencil of the Backward Difference formula of order O(h) for
+    first derivatives
     """
-    def _bwd_fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-        if idx == 0:  # Needed since '-1' is considered a valid index in Python
-            raise IndexError("list index out of range")
-        return 1 / (tmp[idx] - tmp[idx - 1]) * (v(tmp[idx]) - v(tmp[idx - 1]))
-    return _bwd_fun
+    t = list(s)
+    return {t[k]: (1.0 / (t[k] - t[k - 1]),
+                   ((t[k], 1), (t[k - 1], -1)))
+            for k in range(1, len(t))}
 
 
-def _backward_transform_order2(v, s):
+def _backward_transform_order2(s):
     """
-    Applies the Backward Difference formula of order O(h) for second
-    derivatives
+    Returns the stencil of the Backward Difference formula of order O(h) for
+    second derivatives
     """
-    def _bwd_fun(i):
-        tmp = list(s)
-        idx = s.ord(i)-1
-
-        # This check is needed since '-1' is considered a valid index in Python
-        if idx == 0 or idx == 1:
-            raise IndexError("list index out of range")
-        return 1 / ((tmp[idx - 1] - tmp[idx - 2]) *
-                    (tmp[idx] - tmp[idx - 1])) * \
-               (v(tmp[idx]) - 2 * v(tmp[idx - 1]) + v(tmp[idx - 2]))
-    return _bwd_fun
+    t = list(s)
+    return {t[k]: (1.0 / ((t[k - 1] - t[k - 2]) * (t[k] - t[k - 1])),
+                   ((t[k], 1), (t[k - 1], -2), (t[k - 2], 1)))
+            for k in range(2, len(t))}
 
 
 @TransformationFactory.register('dae.finite_difference', doc="Discretizes a DAE model using "
@@ -142,6 +134,28 @@ class Finite_Difference_Transformation(Transformation):
             "the backward difference method"
     ))
 
+    CONFIG.declare('refine', ConfigValue(
+        default=False,
+        domain=bool,
+        description="Refine ContinuousSets that have already been "
+                    "discretized",
+        doc="If True, ContinuousSets that have already been discretized by "
+            "this transformation are refined by adding finite elements "
+            "instead of raising an error. The ContinuousSet keeps the "
+            "scheme it was discretized with and finite elements are added "
+            "until there are 'nfe' of them, or at the points given by "
+            "'finite_elements'. Only the components at the new "
+            "discretization points and the discretization equations "
+            "affected by them are created; all other components, and the "
+            "values of the existing variables, are kept."
+    ))
+    CONFIG.declare('finite_elements', ConfigValue(
+        default=None,
+        description="The finite element points to add when refining",
+        doc="A list of points at which to add finite element boundaries "
+            "when 'refine' is True. If specified, 'nfe' is ignored."
+    ))
+
     def __init__(self):
         super(Finite_Difference_Transformation, self).__init__()
         self._nfe = {}
@@ -164,10 +178,18 @@ class Finite_Difference_Transformation(Transformation):
         scheme        Indicates which finite difference method to apply.
                       Options are BACKWARD, CENTRAL, or FORWARD. The default
                       scheme is the backward difference method
+        refine        Refine ContinuousSets that have already been
+                      discretized instead of raising an error
+        finite_elements
+                      The finite element points to add when refining
         """
 
         config = self.CONFIG(kwds)
 
+        if config.refine:
+            self._refineBlock(instance, config)
+            return instance
+
         tmpnfe = config.nfe
         tmpds = config.wrt
 
@@ -239,7 +261,6 @@ class Finite_Difference_Transformation(Transformation):
             dsets = d.get_continuousset_list()
             for i in ComponentSet(dsets):
                 if currentds is None or i.name == currentds:
-                    oldexpr = d.get_derivative_expression()
                     loc = d.get_state_var()._contset[i]
                     count = dsets.count(i)
                     if count >= 3:
@@ -248,10 +269,8 @@ class Finite_Difference_Transformation(Transformation):
                             "Current implementation only allows for taking the"
                             " first or second derivative with respect to "
                             "a particular ContinuousSet" % (d.name, i.name))
-                    scheme = self._scheme[count - 1]
-                    newexpr = create_partial_expression(scheme, oldexpr, i,
-                                                        loc)
-                    d.set_derivative_expression(newexpr)
+                    add_derivative_stencil(
+                        d, i, get_stencil(i, self._scheme[count - 1]), loc)
 
             # Reclassify DerivativeVar if all indexing ContinuousSets have
             # been discretized. Add discretization equations to the
@@ -290,3 +309,22 @@ class Finite_Difference_Transformation(Transformation):
                 for k in block.component_objects(Objective, descend_into=True):
                     # TODO: check this, reconstruct might not work
                     k.reconstruct()
+
+    def _refineBlock(self, block, config):
+        wrt = config.wrt
+        if wrt is not None and wrt.ctype is not ContinuousSet:
+            raise TypeError("The component specified using the 'wrt' "
+                            "keyword must be a continuous set")
+        for ds in block.component_objects(ContinuousSet, descend_into=True):
+            if wrt is not None and ds is not wrt:
+                continue
+            scheme = ds.get_discretization_info().get('scheme', '')
+            if not scheme.endswith(' Difference'):
+                raise DAE_Error("Cannot refine ContinuousSet '%s' because it "
+                                "has not been discretized using a finite "
+                                "difference scheme" % ds.name)
+            fe = refine_finite_elements(ds, config.nfe,
+                                        config.finite_elements)
+            # Every finite element point is a discretization point
+            refine_discretization(block, ds, fe, fe)
+            self._nfe[ds.name] = len(fe) - 1
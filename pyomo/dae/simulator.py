@@ -12,12 +12,17 @@ from pyomo.dae import ContinuousSet, DerivativeVar
 from pyomo.dae.diffvar import DAE_Error
 
 from pyomo.core.expr import current as EXPR
+from pyomo.core.expr.calculus.diff_with_pyomo import (
+    reverse_sd, DifferentiationException)
 from pyomo.core.expr.numvalue import native_numeric_types
 from pyomo.core.expr.template_expr import IndexTemplate, _GetItemIndexer
 
+from pyomo.common.parallel import parallel_map
+
 from six import iterkeys
 
 import logging
+import math
 
 __all__ = ('Simulator', )
 logger = logging.getLogger('pyomo.core')
@@ -40,6 +45,18 @@ import platform
 is_pypy = platform.python_implementation() == "PyPy"
 
 scipy, scipy_available = attempt_import('scipy.integrate', alt_names=['scipy'])
+scipy_sparse, _ = attempt_import('scipy.sparse')
+
+# Integrators that are called through scipy.integrate.ode and through
+# scipy.integrate.solve_ivp
+scipy_ode_integrators = ['vode', 'zvode', 'lsoda', 'dopri5', 'dop853']
+scipy_ivp_integrators = ['RK45', 'RK23', 'DOP853', 'Radau', 'BDF', 'LSODA']
+# Integrators that use the Jacobian of the RHS, and whether they accept it
+# as a sparse matrix
+scipy_jacobian_integrators = {
+    'vode': False, 'zvode': False, 'lsoda': False,
+    'Radau': True, 'BDF': True, 'LSODA': False,
+}
 
 casadi_intrinsic = {}
 def _finalize_casadi(casadi, available):
@@ -252,6 +269,150 @@ def convert_pyomo2scipy(expr, templatemap):
     return visitor.dfs_postorder_stack(expr)
 
 
+numpy_intrinsic = {
+    'log': 'log',
+    'log10': 'log10',
+    'sin': 'sin',
+    'cos': 'cos',
+    'tan': 'tan',
+    'cosh': 'cosh',
+    'sinh': 'sinh',
+    'tanh': 'tanh',
+    'asin': 'arcsin',
+    'acos': 'arccos',
+    'atan': 'arctan',
+    'exp': 'exp',
+    'sqrt': 'sqrt',
+    'asinh': 'arcsinh',
+    'acosh': 'arccosh',
+    'atanh': 'arctanh',
+    'ceil': 'ceil',
+    'floor': 'floor',
+}
+
+
+def _numpy_literal(val):
+    val = float(val)
+    if math.isinf(val):
+        return 'np.inf' if val > 0 else '(-np.inf)'
+    if math.isnan(val):
+        return 'np.nan'
+    if val < 0:
+        # e.g., (-3.0)**2
+        return '(%r)' % val
+    return repr(val)
+
+
+class Pyomo2Numpy_Visitor(EXPR.ExpressionValueVisitor):
+    """
+    Expression walker that generates the source code of a NumPy
+    expression equivalent to a Pyomo expression.
+
+    Leaves found in the symbol map are replaced by the corresponding
+    source (e.g., 'x[0]'), and all other leaves are replaced by their
+    current value.
+    """
+
+    def __init__(self, symbolmap):
+        super(Pyomo2Numpy_Visitor, self).__init__()
+        self.symbolmap = symbolmap
+
+    def visit(self, node, values):
+        if node.is_named_expression_type():
+            return values[0]
+        if isinstance(node, EXPR.SumExpressionBase):
+            return '(%s)' % ' + '.join(values)
+        if isinstance(node, EXPR.ProductExpression):
+            return '(%s*%s)' % tuple(values)
+        if isinstance(node, EXPR.DivisionExpression):
+            return '(%s/%s)' % tuple(values)
+        if isinstance(node, EXPR.ReciprocalExpression):
+            return '(1.0/%s)' % tuple(values)
+        if isinstance(node, EXPR.PowExpression):
+            return '(%s**%s)' % tuple(values)
+        if isinstance(node, EXPR.NegationExpression):
+            return '(-%s)' % tuple(values)
+        if isinstance(node, EXPR.AbsExpression):
+            return 'np.abs(%s)' % tuple(values)
+        if isinstance(node, EXPR.UnaryFunctionExpression):
+            if node.getname() not in numpy_intrinsic:
+                raise DAE_Error(
+                    "Cannot convert the function '%s' to NumPy"
+                    % node.getname())
+            return 'np.%s(%s)' % (numpy_intrinsic[node.getname()], values[0])
+        if isinstance(node, EXPR.Expr_ifExpression):
+            return 'np.where(%s, %s, %s)' % tuple(values)
+        if isinstance(node, EXPR.InequalityExpression):
+            return '(%s %s %s)' % (
+                values[0], '<' if node._strict else '<=', values[1])
+        if isinstance(node, EXPR.RangedExpression):
+            return '((%s %s %s) & (%s %s %s))' % (
+                values[0], '<' if node._strict[0] else '<=', values[1],
+                values[1], '<' if node._strict[1] else '<=', values[2])
+        if isinstance(node, EXPR.EqualityExpression):
+            return '(%s == %s)' % tuple(values)
+        raise DAE_Error(
+            "Cannot convert expressions of type %s to NumPy" % type(node))
+
+    def visiting_potential_leaf(self, node):
+        if type(node) in native_numeric_types:
+            return True, _numpy_literal(node)
+
+        symbol = self.symbolmap.get(id(node), None)
+        if symbol is not None:
+            return True, symbol
+
+        if type(node) is EXPR.LinearExpression:
+            terms = [_numpy_literal(value(node.constant))]
+            for coef, var in zip(node.linear_coefs, node.linear_vars):
+                terms.append('(%s*%s)' % (
+                    _numpy_literal(value(coef)),
+                    self.visiting_potential_leaf(var)[1]))
+            return True, '(%s)' % ' + '.join(terms)
+
+        if not node.is_expression_type():
+            return True, _numpy_literal(value(node))
+
+        return False, None
+
+
+def convert_pyomo2numpy(expr, symbolmap):
+    """Generate the source of a NumPy expression for a Pyomo expression.
+
+    Args:
+        symbolmap: dictionary mapping the id of leaf nodes (e.g., the
+            mutable params substituted by convert_pyomo2scipy) to the
+            source code that should replace them
+
+    Returns:
+        a string containing a Python expression that uses NumPy
+        (imported as np) for intrinsic functions
+    """
+    if not numpy_available:
+        raise DAE_Error("NumPy is not installed. Cannot convert an "
+                        "expression to NumPy.")
+    visitor = Pyomo2Numpy_Visitor(symbolmap)
+    return visitor.dfs_postorder_stack(expr)
+
+
+def _compile_numpy_function(name, exprs, symbolmap):
+    """Compile a function of (t, x, u) returning the values of the exprs
+
+    The i-th row of the returned array is the value of exprs[i]. If x and
+    u are 2D arrays, the function is evaluated for each column.
+    """
+    lines = ["def %s(t, x, u):" % name,
+             "    out = np.empty((%d,) + np.shape(x)[1:])" % len(exprs)]
+    for i, expr in enumerate(exprs):
+        lines.append("    out[%d] = %s" % (i, convert_pyomo2numpy(
+            expr, symbolmap)))
+    lines.append("    return out")
+    namespace = {'np': np}
+    exec(compile('\n'.join(lines), '<pyomo.dae.simulator>', 'exec'),
+         namespace)
+    return namespace[name]
+
+
 class Substitute_Pyomo2Casadi_Visitor(EXPR.ExpressionReplacementVisitor):
     """
     Expression walker that replaces
@@ -671,6 +832,11 @@ class Simulator:
         self._simalgvars = None
         # The time-varying inputs in the most recent simulation
         self._siminputvars = None
+        # The time points, profiles and (parameters, values) of the most
+        # recent ensemble simulation
+        self._ensemble_tsim = None
+        self._ensemble_solution = None
+        self._ensemble_parameters = None
 
     def get_variable_order(self, vartype=None):
         """
@@ -728,7 +894,13 @@ class Simulator:
 
         integrator : string
             The string name of the integrator to use for simulation. The
-            default is 'lsoda' when using Scipy and 'idas' when using CasADi
+            default is 'lsoda' when using Scipy and 'idas' when using CasADi.
+            When using Scipy, the integrators of ``scipy.integrate.ode``
+            ('vode', 'zvode', 'lsoda', 'dopri5', 'dop853') and of
+            ``scipy.integrate.solve_ivp`` ('RK45', 'RK23', 'DOP853',
+            'Radau', 'BDF', 'LSODA') may be used. The stiff integrators
+            are given the Jacobian of the RHS, which is sparse for 'Radau'
+            and 'BDF'.
 
         varying_inputs : ``pyomo.environ.Suffix``
             A :py:class:`Suffix<pyomo.environ.Suffix>` object containing the
@@ -761,9 +933,225 @@ class Simulator:
         if integrator_options is None:
             integrator_options = {}
 
+        integrator = self._check_integrator(integrator)
+        tsim, switchpts = self._simulation_times(numpoints, tstep,
+                                                 varying_inputs)
+
+        # Check if initial conditions were provided, otherwise obtain
+        # them from the current variable values
+        if initcon is not None:
+            if len(initcon) > len(self._diffvars):
+                raise ValueError(
+                    "Too many initial conditions were specified. The "
+                    "simulator was expecting a list with %i values."
+                    % len(self._diffvars))
+            if len(initcon) < len(self._diffvars):
+                raise ValueError(
+                    "Too few initial conditions were specified. The "
+                    "simulator was expecting a list with %i values."
+                    % len(self._diffvars))
+        else:
+            initcon = self._default_initial_conditions()
+
+        # Call the integrator
+        if self._intpackage == 'scipy':
+            if not scipy_available:
+                raise ValueError("The scipy module is not available. "
+                                 "Cannot simulate the model.")
+            if is_pypy:
+                raise ValueError("The scipy ODE integrators do not work "
+                                 "under pypy. Cannot simulate the model.")
+            tsim, profile = self._simulate_with_scipy(initcon, tsim, switchpts,
+                                                      varying_inputs,
+                                                      integrator,
+                                                      integrator_options)
+        else:
+
+            if len(switchpts) != 0:
+                tsim, profile = \
+                    self._simulate_with_casadi_with_inputs(initcon, tsim,
+                                                           varying_inputs,
+                                                           integrator,
+                                                           integrator_options)
+            else:
+                tsim, profile = \
+                    self._simulate_with_casadi_no_inputs(initcon, tsim,
+                                                         integrator,
+                                                         integrator_options)
+
+        self._tsim = tsim
+        self._simsolution = profile
+
+        return [tsim, profile]
+
+    def simulate_ensemble(self, initcons=None, parameters=None,
+                          numpoints=None, tstep=None, integrator=None,
+                          varying_inputs=None, integrator_options=None,
+                          batch_size=None, num_workers=1):
+        """
+        Simulate the model for many initial conditions and parameter
+        values. This is only supported when using Scipy.
+
+        The trajectories are split into batches, and each batch is
+        integrated as a single stacked system whose RHS (and Jacobian) is
+        evaluated for all of its trajectories at once. The batches may be
+        integrated in a pool of worker processes.
+
+        Parameters
+        ----------
+        initcons : 2D array-like
+            The initial conditions of the differential variables, one row
+            for each trajectory. If not specified, every trajectory starts
+            from the initial conditions that ``simulate`` would use.
+
+        parameters : ``ComponentMap``
+            Maps scalar Params or Vars that are not indexed by the
+            ContinuousSet (e.g., ``m.p`` or ``m.k[1]``) to a list with
+            their value in each trajectory. Other components keep their
+            current values.
+
+        numpoints, tstep, integrator, varying_inputs, integrator_options
+            As for ``simulate``. The time-varying inputs are the same for
+            all trajectories.
+
+        batch_size : int
+            The number of trajectories integrated together. The default is
+            to split the trajectories evenly between the workers.
+
+        num_workers : int
+            The number of worker processes used to integrate the batches.
+            The workers are forked from this process; if that is not
+            possible, the batches are integrated serially.
+
+        Returns
+        -------
+        numpy array, numpy array
+            The first return value is a 1D array of time points and the
+            second is a 3D array, where ``profiles[k, i, j]`` is the value
+            of the j-th differential variable at the i-th time point in
+            the k-th trajectory.
+        """
+        if self._intpackage != 'scipy':
+            raise DAE_Error("Ensemble simulations are only supported when "
+                            "using Scipy.")
+        if not numpy_available:
+            raise ValueError("The numpy module is not available. "
+                             "Cannot simulate the model.")
+        if not scipy_available or is_pypy:
+            raise ValueError("The scipy module is not available. "
+                             "Cannot simulate the model.")
+        if integrator_options is None:
+            integrator_options = {}
+
+        integrator = self._check_integrator(integrator)
+        tsim, switchpts = self._simulation_times(numpoints, tstep,
+                                                 varying_inputs)
+
+        params = []
+        paramvals = []
+        if parameters is not None:
+            rhs_leaves = set()
+            for d in self._derivlist:
+                rhs = self._rhsdict[d]
+                if type(rhs) in native_numeric_types:
+                    continue
+                rhs_leaves.update(id(v) for v in EXPR.identify_variables(
+                    rhs, include_fixed=True))
+                rhs_leaves.update(
+                    id(p) for p in EXPR.identify_mutable_parameters(rhs))
+            for p, vals in parameters.items():
+                if p.is_indexed() or not (p.is_parameter_type() or
+                                          p.is_variable_type()):
+                    raise TypeError(
+                        "The parameters of an ensemble simulation must be "
+                        "scalar Params or Vars (found %s)" % (p.name,))
+                if id(p) not in rhs_leaves:
+                    raise ValueError(
+                        "The parameter %s does not appear in the "
+                        "differential equations. Note that immutable Params "
+                        "are replaced by their values." % (p.name,))
+                params.append(p)
+                paramvals.append(vals)
+        if params:
+            paramvals = np.array(paramvals, dtype=float)
+            if paramvals.ndim != 2:
+                raise ValueError("The same number of values must be given "
+                                 "for every parameter.")
+
+        n = len(self._diffvars)
+        if initcons is None:
+            ntraj = paramvals.shape[1] if params else 1
+            initcons = np.tile(self._default_initial_conditions(), (ntraj, 1))
+        else:
+            initcons = np.array(initcons, dtype=float)
+            ntraj = initcons.shape[0]
+            if initcons.ndim != 2 or initcons.shape[1] != n:
+                raise ValueError(
+                    "The initial conditions must be given as a 2D array with "
+                    "one row of %i values for each trajectory." % n)
+        if params and paramvals.shape[1] != ntraj:
+            raise ValueError(
+                "Found values of the parameters for %i trajectories, but "
+                "initial conditions for %i trajectories."
+                % (paramvals.shape[1], ntraj))
+        if not params:
+            paramvals = np.empty((0, ntraj))
+
+        if batch_size is None:
+            batch_size = -(-ntraj // max(num_workers, 1))
+        batches = [(start, min(start + batch_size, ntraj))
+                   for start in range(0, ntraj, batch_size)]
+
+        # Compile the RHS once, in this process, so that forked workers
+        # inherit the compiled functions
+        rhs = self._compile_rhs(params)
+        if rhs is None:
+            raise DAE_Error("Ensemble simulations require the RHS of the "
+                            "differential equations to be compiled.")
+        jacobians = {}
+        if integrator in scipy_jacobian_integrators:
+            for size in set(end - start for start, end in batches):
+                jacobians[size] = self._compile_jacobian(
+                    scipy_jacobian_integrators[integrator], params, size)
+
+        inputs0 = self._current_inputs()
+
+        def _simulate_batch(batch):
+            start, end = batch
+            size = end - start
+            # The time-varying inputs are the same for all the trajectories
+            # in the batch; the parameters differ.
+            inputs = np.empty((len(inputs0) + len(params), size))
+            inputs[:len(inputs0)] = inputs0[:, None]
+            inputs[len(inputs0):] = paramvals[:, start:end]
+
+            def rhsfun(t, x):
+                return rhs(t, x.reshape(n, size), inputs).ravel()
+            jac = None
+            jacobian = jacobians.get(size, None)
+            if jacobian is not None:
+                def jac(t, x):
+                    return jacobian(t, x.reshape(n, size), inputs)
+
+            _, profile = self._integrate_with_scipy(
+                rhsfun, jac, initcons[start:end].T.ravel(), tsim, switchpts,
+                self._input_updater(inputs, varying_inputs), integrator,
+                integrator_options)
+            return profile.reshape(len(tsim), n, size).transpose(2, 0, 1)
+
+        profiles = parallel_map(_simulate_batch, batches, num_workers,
+                                chunks_per_worker=1)
+        profiles = np.concatenate(profiles, axis=0)
+
+        self._ensemble_tsim = tsim
+        self._ensemble_solution = profiles
+        self._ensemble_parameters = (params, paramvals)
+        return [tsim, profiles]
+
+    def _check_integrator(self, integrator):
         if self._intpackage == 'scipy':
             # Specify the scipy integrator to use for simulation
-            valid_integrators = ['vode', 'zvode', 'lsoda', 'dopri5', 'dop853']
+            valid_integrators = scipy_ode_integrators + scipy_ivp_integrators
             if integrator is None:
                 integrator = 'lsoda'
             elif integrator == 'odeint':
@@ -781,7 +1169,11 @@ class Simulator:
                             " an integrator from %s" % (self._intpackage,
                                                         integrator,
                                                         valid_integrators))
+        return integrator
 
+    def _simulation_times(self, numpoints, tstep, varying_inputs):
+        # Returns the time points of the profiles and the switching points
+        # of the time-varying inputs
         # Set the time step or the number of points for the lists
         # returned by the integrator
         if tstep is not None and \
@@ -856,91 +1248,251 @@ class Simulator:
             tsim = np.union1d(tsim, switchpts)
         else:
             self._simalgvars = self._algvars
+        return tsim, switchpts
+
+    def _default_initial_conditions(self):
+        # The current values of the differential variables at the lower
+        # bound of the ContinuousSet
+        initcon = []
+        for v in self._diffvars:
+            for idx, i in enumerate(v._args):
+                if type(i) is IndexTemplate:
+                    break
+            initpoint = self._contset.first()
+            vidx = tuple(v._args[0:idx]) + (initpoint,) + \
+                   tuple(v._args[idx + 1:])
+            # This line will raise an error if no value was set
+            initcon.append(value(v._base[vidx]))
+        return initcon
+
+    def _scipy_symbolmap(self, parameters=()):
+        # Map the mutable params substituted for the differential
+        # variables, the time-varying inputs and the ContinuousSet to the
+        # arguments (t, x, u) of the compiled functions. The parameters
+        # follow the time-varying inputs in u.
+        symbolmap = {id(self._cstemplate): 't'}
+        for idx, v in enumerate(self._diffvars):
+            if v in self._templatemap:
+                symbolmap[id(self._templatemap[v])] = 'x[%d]' % idx
+        for idx, v in enumerate(self._algvars):
+            symbolmap[id(self._templatemap[v])] = 'u[%d]' % idx
+        for idx, p in enumerate(parameters):
+            symbolmap[id(p)] = 'u[%d]' % (len(self._algvars) + idx)
+        return symbolmap
+
+    def _compile_rhs(self, parameters=()):
+        """
+        Compile the RHS of the differential equations into a NumPy
+        function of (t, x, u), where x are the values of the differential
+        variables and u the values of the time-varying inputs (in the
+        orders returned by get_variable_order() and
+        get_variable_order('time-varying')) followed by the values of the
+        given parameters. Other components that are not indexed by the
+        ContinuousSet are replaced by their current values.
+
+        Returns None if the RHS cannot be compiled.
+        """
+        try:
+            return _compile_numpy_function(
+                '_rhs', [self._rhsdict[d] for d in self._derivlist],
+                self._scipy_symbolmap(parameters))
+        except (DAE_Error, SyntaxError, MemoryError, RuntimeError) as err:
+            logger.warning(
+                "Could not compile the RHS of the differential equations "
+                "(%s). The Pyomo expressions will be evaluated instead, "
+                "which is much slower." % (err,))
+            return None
 
-        # Check if initial conditions were provided, otherwise obtain
-        # them from the current variable values
-        if initcon is not None:
-            if len(initcon) > len(self._diffvars):
-                raise ValueError(
-                    "Too many initial conditions were specified. The "
-                    "simulator was expecting a list with %i values."
-                    % len(self._diffvars))
-            if len(initcon) < len(self._diffvars):
-                raise ValueError(
-                    "Too few initial conditions were specified. The "
-                    "simulator was expecting a list with %i values."
-                    % len(self._diffvars))
-        else:
-            initcon = []
-            for v in self._diffvars:
-                for idx, i in enumerate(v._args):
-                    if type(i) is IndexTemplate:
-                        break
-                initpoint = self._contset.first()
-                vidx = tuple(v._args[0:idx]) + (initpoint,) + \
-                       tuple(v._args[idx + 1:])
-                # This line will raise an error if no value was set
-                initcon.append(value(v._base[vidx]))
-
-        # Call the integrator
-        if self._intpackage == 'scipy':
-            if not scipy_available:
-                raise ValueError("The scipy module is not available. "
-                                 "Cannot simulate the model.")
-            if is_pypy:
-                raise ValueError("The scipy ODE integrators do not work "
-                                 "under pypy. Cannot simulate the model.")
-            tsim, profile = self._simulate_with_scipy(initcon, tsim, switchpts,
-                                                      varying_inputs,
-                                                      integrator,
-                                                      integrator_options)
-        else:
+    def _compile_jacobian_entries(self, parameters=()):
+        # Returns a compiled function of (t, x, u) (see _compile_rhs) for
+        # the nonzeros of the Jacobian of the RHS with respect to the
+        # differential variables, and their rows and columns (sorted by
+        # column), or None if the RHS cannot be differentiated.
+        states = [(idx, self._templatemap[v])
+                  for idx, v in enumerate(self._diffvars)
+                  if v in self._templatemap]
+        entries = []
+        for row, d in enumerate(self._derivlist):
+            rhs = self._rhsdict[d]
+            if type(rhs) in native_numeric_types:
+                continue
+            try:
+                derivs = reverse_sd(rhs)
+            except DifferentiationException as err:
+                logger.warning(
+                    "Could not differentiate the RHS of the differential "
+                    "equations (%s). The integrator will approximate the "
+                    "Jacobian instead." % (err,))
+                return None
+            for col, p in states:
+                deriv = derivs.get(p, 0)
+                if type(deriv) in native_numeric_types and deriv == 0:
+                    continue
+                entries.append((col, row, deriv))
+        entries.sort(key=lambda entry: entry[:2])
+        try:
+            values = _compile_numpy_function(
+                '_jac', [entry[2] for entry in entries],
+                self._scipy_symbolmap(parameters))
+        except (DAE_Error, SyntaxError, MemoryError, RuntimeError) as err:
+            logger.warning(
+                "Could not compile the Jacobian of the differential "
+                "equations (%s). The integrator will approximate the "
+                "Jacobian instead." % (err,))
+            return None
+        rows = np.array([entry[1] for entry in entries], dtype=int)
+        cols = np.array([entry[0] for entry in entries], dtype=int)
+        return values, rows, cols
 
-            if len(switchpts) != 0:
-                tsim, profile = \
-                    self._simulate_with_casadi_with_inputs(initcon, tsim,
-                                                           varying_inputs,
-                                                           integrator,
-                                                           integrator_options)
-            else:
-                tsim, profile = \
-                    self._simulate_with_casadi_no_inputs(initcon, tsim,
-                                                         integrator,
-                                                         integrator_options)
+    def _compile_jacobian(self, sparse=True, parameters=(), batch_size=None):
+        """
+        Compile the Jacobian of the RHS with respect to the differential
+        variables into a function of (t, x, u) (see _compile_rhs) that
+        returns a scipy.sparse.csc_matrix, or a dense array if sparse is
+        False.
 
-        self._tsim = tsim
-        self._simsolution = profile
+        If batch_size is given, x and u hold one column for each of
+        batch_size trajectories, and the function returns the block
+        diagonal Jacobian of the stacked system x.ravel().
 
-        return [tsim, profile]
+        Returns None if the RHS cannot be differentiated.
+        """
+        jacobian = self._compile_jacobian_entries(parameters)
+        if jacobian is None:
+            return None
+        values, rows, cols = jacobian
+        n = len(self._diffvars)
+        if batch_size is None:
+            order = None
+            indices = rows
+            indptr = np.searchsorted(cols, np.arange(n + 1))
+        else:
+            # Entry (i, j) of trajectory b is entry (i*B + b, j*B + b) of
+            # the stacked system. The CSC structure of the stacked
+            # Jacobian (and the order of the values in it) is built once.
+            batch = np.arange(batch_size)
+            n *= batch_size
+            structure = scipy_sparse.coo_matrix(
+                (np.arange(1, len(rows) * batch_size + 1),
+                 ((rows[:, None] * batch_size + batch).ravel(),
+                  (cols[:, None] * batch_size + batch).ravel())),
+                shape=(n, n)).tocsc()
+            order = structure.data - 1
+            indices = structure.indices
+            indptr = structure.indptr
+
+        def _jac(t, x, u):
+            data = values(t, x, u)
+            if order is not None:
+                data = np.broadcast_to(
+                    data, (len(rows), batch_size)).ravel()[order]
+            jac = scipy_sparse.csc_matrix(
+                (data, indices, indptr), shape=(n, n))
+            if sparse:
+                return jac
+            return jac.toarray()
+        return _jac
+
+    def _input_updater(self, inputs, varying_inputs):
+        # Returns a function that sets the values of the time-varying inputs
+        # that switch at time t (in the model and in inputs)
+        inputidx = dict((v, idx) for idx, v in enumerate(self._algvars))
+
+        def _update_inputs(t):
+            for v, alg in self._siminputvars.items():
+                if t in varying_inputs[v]:
+                    val = varying_inputs[v][t]
+                    self._templatemap[alg].set_value(val)
+                    inputs[inputidx[alg]] = val
+        return _update_inputs
+
+    def _current_inputs(self):
+        return np.array([self._templatemap[v](exception=False)
+                         for v in self._algvars], dtype=float)
 
     def _simulate_with_scipy(self, initcon, tsim, switchpts,
                              varying_inputs, integrator,
                              integrator_options):
 
+        # Current values of the time-varying inputs, which are updated in
+        # place at the switching points
+        inputs = self._current_inputs()
+
+        rhs = self._compile_rhs()
+        jac = None
+        if rhs is None:
+            rhsfun = self._rhsfun
+        else:
+            def rhsfun(t, x):
+                return rhs(t, x, inputs)
+            if integrator in scipy_jacobian_integrators:
+                jacobian = self._compile_jacobian(
+                    scipy_jacobian_integrators[integrator])
+                if jacobian is not None:
+                    def jac(t, x):
+                        return jacobian(t, x, inputs)
+
+        return self._integrate_with_scipy(
+            rhsfun, jac, initcon, tsim, switchpts,
+            self._input_updater(inputs, varying_inputs),
+            integrator, integrator_options)
+
+    def _integrate_with_scipy(self, rhsfun, jac, initcon, tsim, switchpts,
+                              update_inputs, integrator, integrator_options):
+        if integrator in scipy_ivp_integrators:
+            return self._simulate_with_solve_ivp(
+                rhsfun, jac, initcon, tsim, switchpts, update_inputs,
+                integrator, integrator_options)
+
         scipyint = \
-            scipy.ode(self._rhsfun).set_integrator(integrator,
-                                                   **integrator_options)
+            scipy.ode(rhsfun, jac).set_integrator(integrator,
+                                                  **integrator_options)
         scipyint.set_initial_value(initcon, tsim[0])
 
-        profile = np.array(initcon)
+        profile = [np.array(initcon)]
         i = 1
         while scipyint.successful() and scipyint.t < tsim[-1]:
 
             # check if tsim[i-1] is a switching time and update value
             if tsim[i - 1] in switchpts:
-                for v in self._siminputvars.keys():
-                    if tsim[i - 1] in varying_inputs[v]:
-                        p = self._templatemap[self._siminputvars[v]]
-                        p.set_value(varying_inputs[v][tsim[i - 1]])
+                update_inputs(tsim[i - 1])
+                # Restart the integrator, which may already have stepped
+                # past the discontinuity in the RHS
+                scipyint.set_initial_value(scipyint.y, scipyint.t)
 
             profilestep = scipyint.integrate(tsim[i])
-            profile = np.vstack([profile, profilestep])
+            profile.append(profilestep)
             i += 1
 
         if not scipyint.successful():
             raise DAE_Error("The Scipy integrator %s did not terminate "
                             "successfully." % integrator)
-        return [tsim, profile]
+        return [tsim, np.vstack(profile)]
+
+    def _simulate_with_solve_ivp(self, rhsfun, jac, initcon, tsim, switchpts,
+                                 update_inputs, integrator,
+                                 integrator_options):
+        if jac is not None:
+            integrator_options = dict(integrator_options, jac=jac)
+
+        # The switching points of the inputs are discontinuities of the
+        # RHS, so the integration is restarted at each of them
+        segments = [0] + [i for i in range(1, len(tsim) - 1)
+                          if tsim[i] in switchpts] + [len(tsim) - 1]
+        x = np.array(initcon, dtype=float)
+        profile = [x.reshape(1, -1)]
+        for start, end in zip(segments[:-1], segments[1:]):
+            update_inputs(tsim[start])
+            sol = scipy.solve_ivp(
+                rhsfun, (tsim[start], tsim[end]), x, method=integrator,
+                t_eval=tsim[start + 1:end + 1], **integrator_options)
+            if not sol.success:
+                raise DAE_Error("The Scipy integrator %s did not terminate "
+                                "successfully: %s" % (integrator,
+                                                      sol.message))
+            profile.append(sol.y.T)
+            x = sol.y[:, -1]
+        return [tsim, np.vstack(profile)]
 
     def _simulate_with_casadi_no_inputs(self, initcon, tsim, integrator,
                                         integrator_options):
@@ -1039,27 +1591,49 @@ class Simulator:
 
         return [tsim, profile]
 
-    def initialize_model(self):
+    def initialize_model(self, trajectory=None):
         """
         This function will initialize the model using the profile obtained
         from simulating the dynamic model.
+
+        Parameters
+        ----------
+        trajectory : int
+            Initialize the model using this trajectory of the most recent
+            ensemble simulation instead, including the values of its
+            parameters.
         """
+        if trajectory is not None:
+            if self._ensemble_solution is None:
+                raise DAE_Error(
+                    "Tried to initialize the model from an ensemble "
+                    "trajectory without simulating an ensemble first")
+            params, paramvals = self._ensemble_parameters
+            for p, val in zip(params, paramvals[:, trajectory]):
+                p.set_value(float(val))
+            self._initialize_from_profile(
+                self._ensemble_tsim, self._diffvars,
+                self._ensemble_solution[trajectory])
+            return
+
         if self._tsim is None:
             raise DAE_Error(
                 "Tried to initialize the model without simulating it first")
 
-        tvals = list(self._contset)
-
         # Build list of state and algebraic variables
         # that can be initialized
         initvars = self._diffvars + self._simalgvars
+        self._initialize_from_profile(self._tsim, initvars,
+                                      self._simsolution)
+
+    def _initialize_from_profile(self, tsim, initvars, profile):
+        tvals = list(self._contset)
 
         for idx, v in enumerate(initvars):
             for idx2, i in enumerate(v._args):
                     if type(i) is IndexTemplate:
                         break
-            valinit = np.interp(tvals, self._tsim,
-                                self._simsolution[:, idx])
+            valinit = np.interp(tvals, tsim, profile[:, idx])
             for i, t in enumerate(tvals):
                 vidx = tuple(v._args[0:idx2]) + (t,) + \
                        tuple(v._args[idx2 + 1:])
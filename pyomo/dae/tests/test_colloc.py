@@ -11,7 +11,7 @@
 from __future__ import print_function
 import pyutilib.th as unittest
 
-from pyomo.environ import (Var, Set, ConcreteModel, 
+from pyomo.environ import (Var, Set, ConcreteModel, Constraint,
                            TransformationFactory, pyomo)
 from pyomo.dae import ContinuousSet, DerivativeVar
 from pyomo.dae.diffvar import DAE_Error
@@ -34,6 +34,15 @@ def repn_to_rounded_dict(repn, digits):
     return temp
 
 
+def constraints_by_name(con, digits):
+    temp = dict()
+    for idx, c in con.items():
+        repn = generate_standard_repn(c.body)
+        temp[idx] = {v.name: round(coef, digits) for v, coef in
+                     zip(repn.linear_vars, repn.linear_coefs)}
+    return temp
+
+
 class TestCollocation(unittest.TestCase):
     """
     Class for testing the pyomo.DAE collocation discretization
@@ -615,6 +624,104 @@ class TestCollocation(unittest.TestCase):
         self.assertTrue(hasattr(m3, 'u_interpolation_constraints'))
         self.assertEqual(len(m3.u_interpolation_constraints), 15)
 
+    def _refinement_model(self, points):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=points)
+        m.s = Set(initialize=[1, 2])
+        m.v1 = Var(m.t)
+        m.dv1 = DerivativeVar(m.v1)
+        m.v2 = Var(m.t, m.s)
+        m.dv2 = DerivativeVar(m.v2, wrt=m.t)
+        m.con = Constraint(m.t, m.s,
+                           rule=lambda m, t, s: m.dv2[t, s] == s * m.v1[t])
+        return m
+
+    # test refining a ContinuousSet discretized with radau points
+    def test_refine_radau(self):
+        m = self._refinement_model([0, 10])
+        disc = TransformationFactory('dae.collocation')
+        disc.apply_to(m, nfe=2, ncp=2)
+        for t in m.t:
+            m.v1[t] = 2 * t
+        kept = {t: m.v1[t] for t in (0, 5.0, 6.666667, 10)}
+        kept_eq = m.dv1_disc_eq[10]
+        kept_con = m.con[10, 1]
+
+        TransformationFactory('dae.collocation').apply_to(
+            m, refine=True, finite_elements=[2.5])
+
+        self.assertEqual(m.t.get_finite_elements(), [0, 2.5, 5.0, 10])
+        self.assertEqual(m.t.get_discretization_info()['nfe'], 3)
+        self.assertEqual(list(m.t), [0, 0.833333, 2.5, 3.333333, 5.0,
+                                     6.666667, 10])
+        self.assertNotIn(1.666667, m.v1)
+        for t, v in kept.items():
+            self.assertIs(m.v1[t], v)
+            self.assertEqual(m.v1[t].value, 2 * t)
+        # The new points are initialized by interpolating the old values
+        for t in (0.833333, 2.5, 3.333333):
+            self.assertAlmostEqual(m.v1[t].value, 2 * t)
+        self.assertIsNone(m.v2[2.5, 1].value)
+        # The equations in the finite element that was not split are
+        # not rebuilt
+        self.assertIs(m.dv1_disc_eq[10], kept_eq)
+        self.assertIs(m.con[10, 1], kept_con)
+
+        m2 = self._refinement_model([0, 2.5, 5.0, 10])
+        TransformationFactory('dae.collocation').apply_to(m2, nfe=3, ncp=2)
+        self.assertEqual(list(m.t), list(m2.t))
+        for c1, c2 in ((m.dv1_disc_eq, m2.dv1_disc_eq),
+                       (m.dv2_disc_eq, m2.dv2_disc_eq),
+                       (m.con, m2.con)):
+            self.assertEqual(constraints_by_name(c1, 5),
+                             constraints_by_name(c2, 5))
+
+    # test refining a ContinuousSet discretized with legendre points
+    def test_refine_legendre(self):
+        m = self._refinement_model([0, 10])
+        disc = TransformationFactory('dae.collocation')
+        disc.apply_to(m, nfe=2, ncp=2, scheme='LAGRANGE-LEGENDRE')
+        disc.apply_to(m, refine=True, nfe=4)
+
+        self.assertEqual(m.t.get_finite_elements(), [0, 2.5, 5.0, 7.5, 10])
+        self.assertEqual(len(m.v1_t_cont_eq), 4)
+
+        m2 = self._refinement_model([0, 10])
+        TransformationFactory('dae.collocation').apply_to(
+            m2, nfe=4, ncp=2, scheme='LAGRANGE-LEGENDRE')
+        self.assertEqual(list(m.t), list(m2.t))
+        for c1, c2 in ((m.dv1_disc_eq, m2.dv1_disc_eq),
+                       (m.dv2_disc_eq, m2.dv2_disc_eq),
+                       (m.v1_t_cont_eq, m2.v1_t_cont_eq),
+                       (m.v2_t_cont_eq, m2.v2_t_cont_eq)):
+            self.assertEqual(constraints_by_name(c1, 5),
+                             constraints_by_name(c2, 5))
+
+    # test invalid refinements
+    def test_refine_invalid(self):
+        m = self.m.clone()
+        disc = TransformationFactory('dae.collocation')
+        with self.assertRaisesRegexp(DAE_Error, 'has not been discretized'):
+            disc.apply_to(m, refine=True, nfe=3)
+
+        TransformationFactory('dae.finite_difference').apply_to(m, nfe=2)
+        with self.assertRaisesRegexp(DAE_Error, 'collocation scheme'):
+            disc.apply_to(m, refine=True, nfe=3)
+
+        m = self.m.clone()
+        disc.apply_to(m, nfe=2, ncp=2)
+        with self.assertRaisesRegexp(ValueError, 'outside of the bounds'):
+            disc.apply_to(m, refine=True, finite_elements=[11])
+
+        disc.reduce_collocation_points(m, contset=m.t, var=m.v1, ncp=1)
+        with self.assertRaisesRegexp(DAE_Error, 'reducing the number'):
+            disc.apply_to(m, refine=True, nfe=3)
+        # also with a new transformation object
+        with self.assertRaisesRegexp(DAE_Error, 'reducing the number'):
+            TransformationFactory('dae.collocation').apply_to(
+                m, refine=True, nfe=3)
+        self.assertEqual(len(m.v1_interpolation_constraints), 2)
+
 
 if __name__ == '__main__':
     unittest.main()
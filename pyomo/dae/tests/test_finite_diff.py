@@ -11,9 +11,9 @@
 from __future__ import print_function
 import pyutilib.th as unittest
 
-from pyomo.environ import (Var, Set, ConcreteModel, 
-                           TransformationFactory)
-from pyomo.dae import ContinuousSet, DerivativeVar
+from pyomo.environ import (Var, Set, ConcreteModel, Objective,
+                           TransformationFactory, value)
+from pyomo.dae import ContinuousSet, DerivativeVar, Integral
 from pyomo.dae.diffvar import DAE_Error
 
 from six import StringIO
@@ -65,12 +65,12 @@ class TestFiniteDiff(unittest.TestCase):
         output = \
 """\
 dv1_disc_eq : Size=5, Index=t, Active=True
-    Key : Lower : Body                               : Upper : Active
-    2.0 :   0.0 :   dv1[2.0] - 0.5*(v1[2.0] - v1[0]) :   0.0 :   True
-    4.0 :   0.0 : dv1[4.0] - 0.5*(v1[4.0] - v1[2.0]) :   0.0 :   True
-    6.0 :   0.0 : dv1[6.0] - 0.5*(v1[6.0] - v1[4.0]) :   0.0 :   True
-    8.0 :   0.0 : dv1[8.0] - 0.5*(v1[8.0] - v1[6.0]) :   0.0 :   True
-     10 :   0.0 :   dv1[10] - 0.5*(v1[10] - v1[8.0]) :   0.0 :   True
+    Key : Lower : Body                                 : Upper : Active
+    2.0 :   0.0 :   dv1[2.0] - 0.5*v1[2.0] + 0.5*v1[0] :   0.0 :   True
+    4.0 :   0.0 : dv1[4.0] - 0.5*v1[4.0] + 0.5*v1[2.0] :   0.0 :   True
+    6.0 :   0.0 : dv1[6.0] - 0.5*v1[6.0] + 0.5*v1[4.0] :   0.0 :   True
+    8.0 :   0.0 : dv1[8.0] - 0.5*v1[8.0] + 0.5*v1[6.0] :   0.0 :   True
+     10 :   0.0 :   dv1[10] - 0.5*v1[10] + 0.5*v1[8.0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1_disc_eq.pprint(ostream=out)
@@ -95,8 +95,8 @@ dv1_disc_eq : Size=5, Index=t, Active=True
         output = \
 """\
 dv1dt2_disc_eq : Size=1, Index=t, Active=True
-    Key : Lower : Body                                           : Upper : Active
-     10 :   0.0 : dv1dt2[10] - 0.04*(v1[10] - 2*v1[5.0] + v1[0]) :   0.0 :   True
+    Key : Lower : Body                                                 : Upper : Active
+     10 :   0.0 : dv1dt2[10] - 0.04*v1[10] + 0.08*v1[5.0] - 0.04*v1[0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1dt2_disc_eq.pprint(ostream=out)
@@ -127,12 +127,12 @@ dv1dt2_disc_eq : Size=1, Index=t, Active=True
         output = \
 """\
 dv1_disc_eq : Size=5, Index=t, Active=True
-    Key : Lower : Body                               : Upper : Active
-      0 :   0.0 :     dv1[0] - 0.5*(v1[2.0] - v1[0]) :   0.0 :   True
-    2.0 :   0.0 : dv1[2.0] - 0.5*(v1[4.0] - v1[2.0]) :   0.0 :   True
-    4.0 :   0.0 : dv1[4.0] - 0.5*(v1[6.0] - v1[4.0]) :   0.0 :   True
-    6.0 :   0.0 : dv1[6.0] - 0.5*(v1[8.0] - v1[6.0]) :   0.0 :   True
-    8.0 :   0.0 :  dv1[8.0] - 0.5*(v1[10] - v1[8.0]) :   0.0 :   True
+    Key : Lower : Body                                 : Upper : Active
+      0 :   0.0 :     dv1[0] - 0.5*v1[2.0] + 0.5*v1[0] :   0.0 :   True
+    2.0 :   0.0 : dv1[2.0] - 0.5*v1[4.0] + 0.5*v1[2.0] :   0.0 :   True
+    4.0 :   0.0 : dv1[4.0] - 0.5*v1[6.0] + 0.5*v1[4.0] :   0.0 :   True
+    6.0 :   0.0 : dv1[6.0] - 0.5*v1[8.0] + 0.5*v1[6.0] :   0.0 :   True
+    8.0 :   0.0 :  dv1[8.0] - 0.5*v1[10] + 0.5*v1[8.0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1_disc_eq.pprint(ostream=out)
@@ -157,8 +157,8 @@ dv1_disc_eq : Size=5, Index=t, Active=True
         output = \
 """\
 dv1dt2_disc_eq : Size=1, Index=t, Active=True
-    Key : Lower : Body                                          : Upper : Active
-      0 :   0.0 : dv1dt2[0] - 0.04*(v1[10] - 2*v1[5.0] + v1[0]) :   0.0 :   True
+    Key : Lower : Body                                                : Upper : Active
+      0 :   0.0 : dv1dt2[0] - 0.04*v1[10] + 0.08*v1[5.0] - 0.04*v1[0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1dt2_disc_eq.pprint(ostream=out)
@@ -186,11 +186,11 @@ dv1dt2_disc_eq : Size=1, Index=t, Active=True
         output = \
 """\
 dv1_disc_eq : Size=4, Index=t, Active=True
-    Key : Lower : Body                                : Upper : Active
-    2.0 :   0.0 :   dv1[2.0] - 0.25*(v1[4.0] - v1[0]) :   0.0 :   True
-    4.0 :   0.0 : dv1[4.0] - 0.25*(v1[6.0] - v1[2.0]) :   0.0 :   True
-    6.0 :   0.0 : dv1[6.0] - 0.25*(v1[8.0] - v1[4.0]) :   0.0 :   True
-    8.0 :   0.0 :  dv1[8.0] - 0.25*(v1[10] - v1[6.0]) :   0.0 :   True
+    Key : Lower : Body                                   : Upper : Active
+    2.0 :   0.0 :   dv1[2.0] - 0.25*v1[4.0] + 0.25*v1[0] :   0.0 :   True
+    4.0 :   0.0 : dv1[4.0] - 0.25*v1[6.0] + 0.25*v1[2.0] :   0.0 :   True
+    6.0 :   0.0 : dv1[6.0] - 0.25*v1[8.0] + 0.25*v1[4.0] :   0.0 :   True
+    8.0 :   0.0 :  dv1[8.0] - 0.25*v1[10] + 0.25*v1[6.0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1_disc_eq.pprint(ostream=out)
@@ -211,8 +211,8 @@ dv1_disc_eq : Size=4, Index=t, Active=True
         output = \
 """\
 dv1dt2_disc_eq : Size=1, Index=t, Active=True
-    Key : Lower : Body                                            : Upper : Active
-    5.0 :   0.0 : dv1dt2[5.0] - 0.04*(v1[10] - 2*v1[5.0] + v1[0]) :   0.0 :   True
+    Key : Lower : Body                                                  : Upper : Active
+    5.0 :   0.0 : dv1dt2[5.0] - 0.04*v1[10] + 0.08*v1[5.0] - 0.04*v1[0] :   0.0 :   True
 """
         out = StringIO()
         m.dv1dt2_disc_eq.pprint(ostream=out)
@@ -358,6 +358,67 @@ dv1dt2_disc_eq : Size=1, Index=t, Active=True
         with self.assertRaises(DAE_Error):
             disc2.apply_to(m, nfe=5)
 
+    # test the stencils of the finite difference schemes on a nonuniform
+    # ContinuousSet
+    def test_scheme_stencils(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=[0, 1, 3, 4])
+        disc = TransformationFactory('dae.finite_difference')
+
+        bwd, bwd2 = disc.all_schemes['BACKWARD']
+        self.assertEqual(bwd(m.t), {1: (1.0, ((1, 1), (0, -1))),
+                                    3: (0.5, ((3, 1), (1, -1))),
+                                    4: (1.0, ((4, 1), (3, -1)))})
+        self.assertEqual(sorted(bwd2(m.t)), [3, 4])
+        self.assertEqual(bwd2(m.t)[3], (0.5, ((3, 1), (1, -2), (0, 1))))
+
+        ctr, ctr2 = disc.all_schemes['CENTRAL']
+        self.assertEqual(ctr(m.t), {1: (1/3.0, ((3, 1), (0, -1))),
+                                    3: (1/3.0, ((4, 1), (1, -1)))})
+        self.assertEqual(ctr2(m.t)[3], (0.5, ((4, 1), (3, -2), (1, 1))))
+
+        fwd, fwd2 = disc.all_schemes['FORWARD']
+        self.assertEqual(sorted(fwd(m.t)), [0, 1, 3])
+        self.assertEqual(fwd(m.t)[1], (0.5, ((3, 1), (1, -1))))
+        self.assertEqual(sorted(fwd2(m.t)), [0, 1])
+        self.assertEqual(fwd2(m.t)[1], (0.5, ((4, 1), (3, -2), (1, 1))))
+
+    # test refining a ContinuousSet discretized using finite differences
+    def test_refine(self):
+        m = self.m.clone()
+        m.dv1dt2 = DerivativeVar(m.v1, wrt=(m.t, m.t))
+        m.int = Integral(m.t, wrt=m.t, rule=lambda m, t: m.v1[t])
+        m.obj = Objective(expr=m.int)
+        disc = TransformationFactory('dae.finite_difference')
+        disc.apply_to(m, nfe=2, scheme='CENTRAL')
+        for t in m.t:
+            m.v1[t] = t
+        kept = m.v1[10]
+
+        disc.apply_to(m, refine=True, finite_elements=[2.5])
+
+        self.assertEqual(list(m.t), [0, 2.5, 5.0, 10])
+        self.assertEqual(m.t.get_discretization_info()['nfe'], 3)
+        self.assertIs(m.v1[10], kept)
+        self.assertEqual(m.v1[2.5].value, 2.5)
+        self.assertEqual(len(m.dv1_disc_eq), 2)
+        self.assertEqual(len(m.dv1dt2_disc_eq), 2)
+        self.assertEqual(
+            str(m.dv1_disc_eq[2.5].body),
+            'dv1[2.5] - 0.2*v1[5.0] + 0.2*v1[0]')
+        self.assertEqual(
+            str(m.dv1_disc_eq[5.0].body),
+            'dv1[5.0] - 0.13333333333333333*v1[10] '
+            '+ 0.13333333333333333*v1[2.5]')
+        # The integral is rebuilt over the new points
+        self.assertEqual(value(m.int), 50)
+        self.assertEqual(value(m.obj), 50)
+
+        m = self.m.clone()
+        TransformationFactory('dae.collocation').apply_to(m, nfe=2)
+        with self.assertRaisesRegexp(DAE_Error, 'finite difference scheme'):
+            disc.apply_to(m, refine=True)
+
 
 if __name__ == "__main__":
     unittest.main()
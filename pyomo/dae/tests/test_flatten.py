@@ -19,7 +19,9 @@ from pyomo.core.base.indexed_component import (
 from pyomo.dae.flatten import (
         flatten_dae_components,
         flatten_components_along_sets,
+        FlattenedDAEComponents,
         )
+from pyomo.common.dependencies import numpy as np, numpy_available
 
 class TestAssumedBehavior(unittest.TestCase):
     """
@@ -1289,5 +1291,104 @@ class TestExceptional(unittest.TestCase):
         # with blocks.
 
 
+@unittest.skipIf(not numpy_available, "numpy is not available")
+class TestFlattenedDAEComponents(unittest.TestCase):
+
+    def _model(self):
+        m = ConcreteModel()
+        m.time = ContinuousSet(initialize=[0, 1, 2])
+        m.comp = Set(initialize=['A', 'B'])
+        m.conc = Var(m.time, m.comp, initialize=1.0)
+        m.volume = Var(initialize=3.0)
+        def b_rule(b, t):
+            # b[1].v is deliberately missing
+            if t != 1:
+                b.v = Var(initialize=t)
+            b.w = Var(initialize=5.0)
+        m.b = Block(m.time, rule=b_rule)
+        return m
+
+    def test_groupings(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        scalar, dae = flatten_dae_components(m, m.time, Var)
+        self.assertEqual([v.name for v in flat.scalar_comps],
+                         [v.name for v in scalar])
+        self.assertEqual(len(flat.dae_comps), 4)
+
+        data = flat.data
+        self.assertEqual(data.shape, (4, 3))
+        for i, ref in enumerate(flat.dae_comps):
+            for k, t in enumerate(m.time):
+                if t in ref:
+                    self.assertIs(data[i, k], ref[t])
+                else:
+                    self.assertIsNone(data[i, k])
+        # Building the table must not add b[1].v to the model
+        self.assertFalse(hasattr(m.b[1], 'v'))
+        self.assertEqual(flat.time_position(2), 2)
+
+    def test_get_set_values(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        v_row = [i for i, ref in enumerate(flat.dae_comps)
+                 if ref[0] is m.b[0].v][0]
+
+        values = flat.get_values(1)
+        self.assertTrue(np.isnan(values[v_row]))
+        values = flat.get_values(2)
+        self.assertEqual(values[v_row], 2.0)
+
+        flat.set_values(0, np.arange(4.0))
+        np.testing.assert_allclose(flat.get_values(0), np.arange(4.0))
+        flat.copy_values(0, 1)
+        for i, ref in enumerate(flat.dae_comps):
+            if i != v_row:
+                self.assertEqual(ref[1].value, float(i))
+        self.assertFalse(hasattr(m.b[1], 'v'))
+
+        values = np.full(4, np.nan)
+        flat.set_values(2, values)
+        self.assertIsNone(m.b[2].v.value)
+        self.assertIsNone(m.conc[2, 'A'].value)
+
+        with self.assertRaisesRegexp(ValueError, "Expected 4 values"):
+            flat.set_values(0, [1.0, 2.0])
+
+    def test_value_matrix(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        matrix = flat.get_value_matrix()
+        self.assertEqual(matrix.shape, (4, 3))
+        matrix = np.arange(12.0).reshape(4, 3)
+        flat.set_value_matrix(matrix)
+        for i, ref in enumerate(flat.dae_comps):
+            for k, t in enumerate(m.time):
+                if t in ref:
+                    self.assertEqual(ref[t].value, matrix[i, k])
+        with self.assertRaisesRegexp(ValueError, "array of shape"):
+            flat.set_value_matrix(matrix.T)
+
+    def test_new_time_points(self):
+        m = self._model()
+        m.time2 = ContinuousSet(initialize=[0, 2])
+        m.y = Var(m.time2, initialize=1.0)
+        flat = FlattenedDAEComponents(m, m.time2, Var)
+        self.assertEqual(flat.data.shape, (1, 2))
+        m.time2.add(1)
+        m.y[1] = 4.0
+        self.assertEqual(flat.data.shape, (1, 3))
+        np.testing.assert_allclose(flat.get_value_matrix(), [[1.0, 4.0, 1.0]])
+
+    def test_refresh(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        m.flow = Var(m.time, initialize=2.0)
+        self.assertEqual(len(flat.dae_comps), 4)
+        flat.refresh()
+        self.assertEqual(len(flat.dae_comps), 5)
+        self.assertEqual(flat.data.shape, (5, 3))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,143 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+import pyutilib.th as unittest
+
+from pyomo.environ import (ConcreteModel, Block, Var, Set, Param,
+                           Constraint, TransformationFactory)
+from pyomo.dae import ContinuousSet, DerivativeVar
+from pyomo.common.collections import ComponentSet
+from pyomo.common.dependencies import numpy as np, numpy_available
+
+if numpy_available:
+    from pyomo.dae.flatten import FlattenedDAEComponents
+    from pyomo.dae.horizon import shift_time_horizon
+
+
+class _MockPersistentSolver(object):
+    def __init__(self, variables):
+        self._pyomo_var_to_solver_var_map = ComponentSet(variables)
+        self.updated = []
+
+    def update_var(self, var):
+        self.updated.append(var)
+
+
+@unittest.skipIf(not numpy_available, "numpy is not available")
+class TestShiftTimeHorizon(unittest.TestCase):
+
+    def _model(self):
+        m = ConcreteModel()
+        m.time = ContinuousSet(initialize=[0, 1, 2, 3, 4])
+        m.comp = Set(initialize=['A', 'B'])
+        m.x = Var(m.time, m.comp, initialize=lambda m, t, j:
+                  t + (10 if j == 'B' else 0))
+        m.u = Var(m.time, initialize=lambda m, t: -t, bounds=(-10, 10))
+        m.p = Var(initialize=7.0)
+        return m
+
+    def test_shift_on_grid(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        tail = shift_time_horizon(flat, 1)
+        self.assertEqual(tail, [4])
+        for t in m.time:
+            self.assertEqual(m.x[t, 'A'].value, min(t + 1, 4))
+            self.assertEqual(m.x[t, 'B'].value, min(t + 1, 4) + 10)
+            self.assertEqual(m.u[t].value, -min(t + 1, 4))
+        self.assertEqual(m.p.value, 7.0)
+
+    def test_shift_backward(self):
+        m = self._model()
+        m.u[1].setlb(-2)
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        tail = shift_time_horizon(flat, -1)
+        self.assertEqual(tail, [0])
+        self.assertEqual([m.u[t].value for t in m.time], [0, 0, -1, -2, -3])
+        self.assertEqual([m.u[t].lb for t in m.time],
+                         [-10, -10, -2, -10, -10])
+
+    def test_shift_interpolate(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        tail = shift_time_horizon(flat, 1.5)
+        self.assertEqual(tail, [3, 4])
+        np.testing.assert_allclose(
+            [m.x[t, 'A'].value for t in m.time], [1.5, 2.5, 3.5, 4, 4])
+
+    def test_tail_values(self):
+        m = self._model()
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        tail_values = [0.5 if ref[0] is m.u[0] else np.nan
+                       for ref in flat.dae_comps]
+        shift_time_horizon(flat, 2, tail_values=tail_values)
+        self.assertEqual([m.u[t].value for t in m.time],
+                         [-2, -3, -4, 0.5, 0.5])
+        self.assertEqual([m.x[t, 'A'].value for t in m.time],
+                         [2, 3, 4, 4, 4])
+        with self.assertRaisesRegexp(ValueError, "Expected 3 tail values"):
+            shift_time_horizon(flat, 2, tail_values=[1.0])
+
+    def test_bounds_and_fixed(self):
+        m = self._model()
+        m.ub = Param(initialize=5.0, mutable=True)
+        m.u[2].setlb(-1)
+        m.u[3].setub(m.ub)
+        m.u[3].fix(-3)
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        solver = _MockPersistentSolver(
+            [m.u[t] for t in m.time if t != 0])
+        shift_time_horizon(flat, 1, solver=solver)
+
+        self.assertEqual([m.u[t].lb for t in m.time], [-10, -1, -10, -10, -10])
+        self.assertIs(m.u[2]._ub, m.ub)
+        self.assertEqual(m.u[3]._ub, 10)
+        self.assertEqual([m.u[t].fixed for t in m.time],
+                         [False, False, True, False, False])
+        self.assertEqual(m.u[2].value, -3)
+        # Vars with changed bounds or fixed flags that are in the solver
+        self.assertEqual([v.name for v in solver.updated],
+                         ['u[1]', 'u[2]', 'u[3]'])
+
+        m.u[4].fix()
+        shift_time_horizon(flat, 1, bounds=False, fixed=False)
+        self.assertEqual([m.u[t].lb for t in m.time], [-10, -1, -10, -10, -10])
+        self.assertEqual([m.u[t].fixed for t in m.time],
+                         [False, False, True, False, True])
+
+    def test_discretized_model(self):
+        m = ConcreteModel()
+        m.time = ContinuousSet(bounds=(0, 4))
+        m.x = Var(m.time)
+        m.dx = DerivativeVar(m.x, wrt=m.time)
+        def b_rule(b, t):
+            b.y = Var()
+        m.b = Block(m.time, rule=b_rule)
+        m.ode = Constraint(m.time, rule=lambda m, t: m.dx[t] == -m.x[t])
+        TransformationFactory('dae.collocation').apply_to(
+            m, nfe=4, ncp=3, wrt=m.time)
+        for t in m.time:
+            m.x[t] = t
+            m.b[t].y = 2*t
+        flat = FlattenedDAEComponents(m, m.time, Var)
+        shift_time_horizon(flat, 1)
+        for t in m.time:
+            self.assertAlmostEqual(m.x[t].value, min(t + 1, 4))
+            self.assertAlmostEqual(m.b[t].y.value, 2*min(t + 1, 4))
+
+    def test_not_var(self):
+        m = self._model()
+        m.con = Constraint(m.time, rule=lambda m, t: m.u[t] == 0)
+        flat = FlattenedDAEComponents(m, m.time, Constraint)
+        with self.assertRaisesRegexp(ValueError, "flattened Vars"):
+            shift_time_horizon(flat, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
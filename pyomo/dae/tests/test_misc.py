@@ -29,8 +29,11 @@ from pyomo.dae import ContinuousSet, DerivativeVar
 from pyomo.dae.misc import (
     generate_finite_elements, generate_colloc_points,
     update_contset_indexed_component, expand_components,
-    get_index_information,
+    get_index_information, create_stencil_transform, continuity_stencil,
+    refine_finite_elements, create_access_function,
 )
+from pyomo.core.expr.numeric_expr import LinearExpression
+from pyomo.repn import generate_standard_repn
 
 currdir = dirname(abspath(__file__)) + os.sep
 
@@ -1014,6 +1017,111 @@ class TestDaeMisc(unittest.TestCase):
         self.assertTrue(m.s is nts)
         self.assertEqual(index_getter('a',1,0),(2.0,'a'))
 
+    def test_refine_finite_elements(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=[0, 1, 3])
+        self.assertEqual(refine_finite_elements(m.t, 2), [0, 1, 3])
+        self.assertEqual(refine_finite_elements(m.t, 3), [0, 1, 2.0, 3])
+        self.assertEqual(refine_finite_elements(m.t, 4),
+                         [0, 0.5, 1, 2.0, 3])
+        self.assertEqual(refine_finite_elements(m.t, 10, [0.25, 3]),
+                         [0, 0.25, 1, 3])
+        with self.assertRaisesRegexp(ValueError, 'outside of the bounds'):
+            refine_finite_elements(m.t, 2, [-1])
+
+        # Same placement of the finite elements as generate_finite_elements
+        generate_finite_elements(m.t, 7)
+        m.t2 = ContinuousSet(initialize=[0, 1, 3])
+        self.assertEqual(refine_finite_elements(m.t2, 7), list(m.t))
+
+    def test_create_stencil_transform(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(initialize=[0, 1, 3])
+        m.v = Var(m.t)
+        stencil = {1: (0.5, ((3, 1), (0, -1))),
+                   3: (None, ((0, 1.5), (1, -2), (3, 0.5)))}
+        fun = create_stencil_transform(stencil)(lambda i: m.v[i], m.t)
+        self.assertEqual(str(fun(1)), '0.5*(v[3] - v[0])')
+        self.assertEqual(str(fun(3)), '1.5*v[0] - 2*v[1] + 0.5*v[3]')
+        # Points without a stencil raise an IndexError so that no
+        # discretization equation is added for them
+        with self.assertRaises(IndexError):
+            fun(0)
+
+    def test_continuity_stencil(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 10))
+        m.v = Var(m.t)
+        m.dv = DerivativeVar(m.v)
+        TransformationFactory('dae.collocation').apply_to(
+            m, nfe=2, ncp=2, scheme='LAGRANGE-LEGENDRE')
+        afinal = m.t.get_discretization_info()['afinal']
+        t = list(m.t)
+        stencil = continuity_stencil(m.t)
+        self.assertEqual(sorted(stencil), [5.0, 10])
+        for pt, lo in ((5.0, 0), (10, 3)):
+            scale, terms = stencil[pt]
+            self.assertIsNone(scale)
+            self.assertEqual([p for p, c in terms], t[lo:lo + 3])
+            for (p, c), a in zip(terms, afinal):
+                self.assertAlmostEqual(c, a)
+        self.assertEqual(len(m.v_t_cont_eq), 2)
+
+    def _check_rows(self, con, d):
+        # The linear rows match the derivative expression they replace
+        for idx, condata in con.items():
+            self.assertTrue(condata.equality)
+            self.assertIs(type(condata.body), LinearExpression)
+            args = idx if type(idx) is tuple else (idx,)
+            row = generate_standard_repn(condata.body)
+            expected = generate_standard_repn(
+                d[idx] - d.get_derivative_expression()(*args))
+            self.assertEqual(
+                sorted(v.name for v in row.linear_vars),
+                sorted(v.name for v in expected.linear_vars))
+            coefs = dict((v.name, c) for v, c in
+                         zip(row.linear_vars, row.linear_coefs))
+            for v, c in zip(expected.linear_vars, expected.linear_coefs):
+                self.assertAlmostEqual(coefs[v.name], c)
+
+    def test_discretization_rows(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 1))
+        m.x = ContinuousSet(bounds=(0, 2))
+        m.s = Set(initialize=['a', 'b'])
+        m.v = Var(m.s, m.t, m.x)
+        m.dvdt = DerivativeVar(m.v, wrt=m.t)
+        m.dvdtdx = DerivativeVar(m.v, wrt=(m.t, m.x))
+        m.dvdx2 = DerivativeVar(m.v, wrt=(m.x, m.x))
+        TransformationFactory('dae.finite_difference').apply_to(
+            m, wrt=m.x, nfe=4, scheme='CENTRAL')
+        TransformationFactory('dae.collocation').apply_to(
+            m, wrt=m.t, nfe=2, ncp=3, scheme='LAGRANGE-LEGENDRE')
+        self.assertEqual(len(m.dvdt_disc_eq), 2 * 6 * 5)
+        self.assertEqual(len(m.dvdtdx_disc_eq), 2 * 6 * 3)
+        self.assertEqual(len(m.dvdx2_disc_eq), 2 * 9 * 3)
+        self._check_rows(m.dvdt_disc_eq, m.dvdt)
+        self._check_rows(m.dvdtdx_disc_eq, m.dvdtdx)
+        self._check_rows(m.dvdx2_disc_eq, m.dvdx2)
+
+        for idx, condata in m.v_t_cont_eq.items():
+            self.assertTrue(condata.equality)
+            self.assertIs(type(condata.body), LinearExpression)
+        self.assertEqual(len(m.v_t_cont_eq), 2 * 2 * 5)
+
+    def test_discretization_custom_expression(self):
+        # Derivative expressions that were not built from stencils are
+        # still used to generate the discretization equations
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 1))
+        m.v = Var(m.t)
+        m.dv = DerivativeVar(m.v)
+        v = create_access_function(m.v)
+        m.dv.set_derivative_expression(lambda t: 2 * v(t))
+        TransformationFactory('dae.finite_difference').apply_to(m, nfe=2)
+        self.assertEqual(str(m.dv_disc_eq[1].body),
+                         'dv[1] - 2.0*(2*v[1] - 2*v[0.5])')
+
 
 
 if __name__ == "__main__":
@@ -13,8 +13,8 @@ import pyutilib.th as unittest
 
 from pyomo.core.expr import current as EXPR
 from pyomo.environ import (
-    ConcreteModel, Param, Var, Set, Constraint, 
-    sin, log, sqrt, TransformationFactory)
+    ConcreteModel, Param, Var, Set, Constraint, Suffix,
+    sin, log, sqrt, exp, TransformationFactory)
 from pyomo.dae import ContinuousSet, DerivativeVar
 from pyomo.dae.diffvar import DAE_Error
 from pyomo.dae.simulator import (
@@ -28,12 +28,16 @@ from pyomo.dae.simulator import (
     _check_negationexpression,
     _check_viewsumexpression, 
     substitute_pyomo2casadi,
+    convert_pyomo2numpy,
 )
 from pyomo.core.expr.template_expr import (
     IndexTemplate, 
     _GetItemIndexer,
 )
 
+from pyomo.common.collections import ComponentMap
+from pyomo.common.dependencies import numpy as np
+
 import os
 from pyutilib.misc import setup_redirect, reset_redirect
 from pyutilib.misc import import_file
@@ -899,6 +903,226 @@ class TestSimulator(unittest.TestCase):
         self.assertEqual(mysim._diffvars[0], _GetItemIndexer(m.v2[t]))
         m.del_component('con')
 
+@unittest.skipIf(not scipy_available, "Scipy is not available")
+class TestCompiledRHS(unittest.TestCase):
+    """
+    Class for testing the NumPy functions compiled for the scipy integrators
+    """
+
+    def _model(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 10))
+        m.x = Var(m.t)
+        m.y = Var(m.t)
+        m.u = Var(m.t)
+        m.dx = DerivativeVar(m.x)
+        m.dy = DerivativeVar(m.y)
+        m.p = Param(initialize=2, mutable=True)
+
+        def _diffeq1(m, t):
+            return m.dx[t] == -m.p * m.x[t] + sin(m.y[t]) + m.u[t]
+        m.diffeq1 = Constraint(m.t, rule=_diffeq1)
+
+        def _diffeq2(m, t):
+            return m.dy[t] == m.x[t] * m.y[t] - exp(m.y[t] / 10) + 0.1 * t
+        m.diffeq2 = Constraint(m.t, rule=_diffeq2)
+        return m
+
+    def test_convert_pyomo2numpy(self):
+        m = self._model()
+        m.a = Var([1, 2, 3], initialize=0)
+        t = IndexTemplate(m.t)
+        e = sqrt(m.p) * log(m.a[1]) ** 2 - abs(m.a[2]) / m.a[3]
+        self.assertEqual(
+            convert_pyomo2numpy(e, {id(m.a[1]): 'x[0]', id(m.a[3]): 'x[1]'}),
+            "((np.sqrt(2.0)*(np.log(x[0])**2.0)) + "
+            "(-(np.abs(0.0)/x[1])))")
+        m.a[2] = -3
+        self.assertEqual(convert_pyomo2numpy(m.a[2] ** t, {id(t): 't'}),
+                         "((-3.0)**t)")
+
+    def test_compiled_rhs(self):
+        m = self._model()
+        sim = Simulator(m)
+        self.assertEqual(sim.get_variable_order('time-varying'),
+                         [_GetItemIndexer(m.u[IndexTemplate(m.t)])])
+        rhs = sim._compile_rhs()
+        p_u = sim._templatemap[sim._algvars[0]]
+        for t, x, u in [(0, [1, 2], 0.5), (3.5, [-1, 0.25], -2)]:
+            p_u.set_value(u)
+            np.testing.assert_allclose(
+                rhs(t, np.array(x), np.array([u])),
+                sim._rhsfun(t, x), atol=1e-12)
+
+        # The compiled function is vectorized over the columns of x and u
+        X = np.array([[1, -1, 0.5], [2, 0.25, 3]])
+        U = np.array([[0.5, -2, 0]])
+        ans = rhs(1, X, U)
+        self.assertEqual(ans.shape, (2, 3))
+        for k in range(3):
+            np.testing.assert_allclose(
+                ans[:, k], rhs(1, X[:, k], U[:, k]), atol=1e-12)
+
+    def test_compiled_jacobian(self):
+        m = self._model()
+        sim = Simulator(m)
+        jac = sim._compile_jacobian()
+        x = np.array([0.3, -1.2])
+        u = np.array([0.7])
+        J = jac(2, x, u)
+        self.assertEqual(J.format, 'csc')
+        self.assertEqual(J.nnz, 4)
+        y = x[1]
+        np.testing.assert_allclose(
+            J.toarray(),
+            [[-2, np.cos(y)], [y, x[0] - np.exp(y / 10) / 10]], atol=1e-12)
+        dense = sim._compile_jacobian(sparse=False)
+        np.testing.assert_allclose(
+            dense(2, x, u), J.toarray(), atol=1e-12)
+
+    def test_solve_ivp_integrators(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 2))
+        m.x = Var(m.t)
+        m.dx = DerivativeVar(m.x)
+        m.x[0] = 1
+
+        def _diffeq(m, t):
+            return m.dx[t] == -m.x[t]
+        m.diffeq = Constraint(m.t, rule=_diffeq)
+        sim = Simulator(m)
+        for integrator in ('vode', 'lsoda', 'RK45', 'BDF', 'Radau',
+                           'LSODA'):
+            tsim, profile = sim.simulate(
+                numpoints=11, integrator=integrator,
+                integrator_options={'rtol': 1e-8, 'atol': 1e-10})
+            self.assertEqual(profile.shape, (11, 1))
+            np.testing.assert_allclose(
+                profile[:, 0], np.exp(-tsim), atol=1e-5)
+
+    def test_solve_ivp_varying_inputs(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 10))
+        m.x = Var(m.t)
+        m.dx = DerivativeVar(m.x)
+        m.u = Var(m.t)
+        m.x[0] = 0
+
+        def _diffeq(m, t):
+            return m.dx[t] == m.u[t]
+        m.diffeq = Constraint(m.t, rule=_diffeq)
+        m.var_input = Suffix(direction=Suffix.LOCAL)
+        m.var_input[m.u] = {0: 1, 4: -1}
+        sim = Simulator(m)
+        for integrator in ('lsoda', 'RK45', 'BDF'):
+            tsim, profile = sim.simulate(
+                numpoints=11, integrator=integrator,
+                varying_inputs=m.var_input)
+            np.testing.assert_allclose(
+                profile[:, 0],
+                [t if t <= 4 else 8 - t for t in tsim], atol=1e-5)
+
+
+@unittest.skipIf(not scipy_available, "Scipy is not available")
+class TestEnsembleSimulation(unittest.TestCase):
+    """
+    Class for testing ensemble simulations
+    """
+
+    def _model(self):
+        m = ConcreteModel()
+        m.t = ContinuousSet(bounds=(0, 2))
+        m.x = Var(m.t)
+        m.y = Var(m.t)
+        m.dx = DerivativeVar(m.x)
+        m.dy = DerivativeVar(m.y)
+        m.k = Param(initialize=1, mutable=True)
+        m.c = Var(initialize=0.5)
+        m.c.fix()
+        m.x[0] = 1
+        m.y[0] = 0
+
+        def _diffeq1(m, t):
+            return m.dx[t] == -m.k * m.x[t] + m.c * m.y[t]
+        m.diffeq1 = Constraint(m.t, rule=_diffeq1)
+
+        def _diffeq2(m, t):
+            return m.dy[t] == m.x[t] - m.y[t] ** 2
+        m.diffeq2 = Constraint(m.t, rule=_diffeq2)
+        return m
+
+    def _check_ensemble(self, integrator, **kwds):
+        m = self._model()
+        sim = Simulator(m)
+        ks = [0.5, 1, 1.5, 2, 0.75, 1.25, 1.75]
+        cs = [0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6]
+        initcons = [[1 - 0.1 * i, 0.1 * i] for i in range(7)]
+        options = {'rtol': 1e-8, 'atol': 1e-10}
+        tsim, profiles = sim.simulate_ensemble(
+            initcons=initcons, parameters=ComponentMap([(m.k, ks),
+                                                        (m.c, cs)]),
+            numpoints=11, integrator=integrator, integrator_options=options,
+            **kwds)
+        self.assertEqual(profiles.shape, (7, 11, 2))
+        for j in range(7):
+            m.k = ks[j]
+            m.c.fix(cs[j])
+            t, profile = sim.simulate(
+                initcon=initcons[j], numpoints=11, integrator=integrator,
+                integrator_options=options)
+            np.testing.assert_allclose(t, tsim)
+            np.testing.assert_allclose(profiles[j], profile, atol=1e-6)
+        return m, sim, profiles
+
+    def test_ensemble_bdf(self):
+        self._check_ensemble('BDF', batch_size=3)
+
+    def test_ensemble_lsoda(self):
+        self._check_ensemble('lsoda')
+
+    def test_ensemble_workers(self):
+        self._check_ensemble('RK45', num_workers=2)
+
+    def test_initialize_from_trajectory(self):
+        m, sim, profiles = self._check_ensemble('RK45')
+        sim.initialize_model(trajectory=2)
+        self.assertEqual(m.k.value, 1.5)
+        self.assertEqual(m.c.value, 0.2)
+        self.assertAlmostEqual(m.x[2].value, profiles[2, -1, 0])
+        self.assertAlmostEqual(m.y[2].value, profiles[2, -1, 1])
+
+    def test_default_initial_conditions(self):
+        m = self._model()
+        sim = Simulator(m)
+        tsim, profiles = sim.simulate_ensemble(
+            parameters=ComponentMap([(m.k, [1, 2])]), numpoints=5)
+        self.assertEqual(profiles.shape, (2, 5, 2))
+        np.testing.assert_allclose(profiles[:, 0, :], [[1, 0], [1, 0]])
+        self.assertGreater(profiles[0, -1, 0], profiles[1, -1, 0])
+
+    def test_ensemble_errors(self):
+        m = self._model()
+        m.p = Param(initialize=3)
+        m.q = Param([1, 2], initialize=1, mutable=True)
+        sim = Simulator(m)
+        self.assertRaisesRegexp(
+            ValueError, "does not appear in the differential equations",
+            sim.simulate_ensemble, parameters=ComponentMap([(m.p, [1])]))
+        self.assertRaisesRegexp(
+            TypeError, "must be scalar Params or Vars",
+            sim.simulate_ensemble, parameters=ComponentMap([(m.q, [1])]))
+        self.assertRaisesRegexp(
+            ValueError, "one row of 2 values",
+            sim.simulate_ensemble, initcons=[[1, 2, 3]])
+        self.assertRaisesRegexp(
+            ValueError, "for 2 trajectories, but initial conditions for 1",
+            sim.simulate_ensemble, initcons=[[1, 2]],
+            parameters=ComponentMap([(m.k, [1, 2])]))
+        self.assertRaisesRegexp(
+            DAE_Error, "without simulating an ensemble",
+            sim.initialize_model, trajectory=0)
+
+
 class TestExpressionCheckers(unittest.TestCase):
     """
     Class for testing the pyomo.DAE simulator expression checkers.
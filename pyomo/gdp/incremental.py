@@ -0,0 +1,227 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""A Big-M relaxation that is updated in place as disjuncts are fixed.
+
+Branch and bound algorithms for GDP solve a relaxation at every node of
+the tree, where the nodes differ only in which disjuncts are fixed to
+True or False. Rather than cloning the GDP and applying gdp.bigm at
+every node, IncrementalBigMRelaxation applies gdp.bigm once and moves
+between nodes by fixing and unfixing indicator variables and activating
+and deactivating the transformed constraints of each disjunct::
+
+    relaxation = IncrementalBigMRelaxation(model)
+    relaxation.set_state({m.d[1]: True, m.d[2]: False})
+    SolverFactory('gurobi').solve(model)
+
+If a persistent solver is given, each change is also passed to the
+solver, so that every node becomes a warm-started re-solve of the same
+solver instance.
+"""
+
+from pyomo.common.collections import ComponentMap, ComponentSet
+from pyomo.core import Block, Constraint, SortComponents, TransformationFactory
+from pyomo.gdp import Disjunct, Disjunction, GDP_Error
+
+from six import iteritems
+
+
+def _parent_disjunct(component):
+    block = component.parent_block()
+    while block is not None and block.ctype is not Disjunct:
+        block = block.parent_block()
+    return block
+
+
+class IncrementalBigMRelaxation(object):
+    """Big-M relaxation of a GDP that is transformed once and then updated
+    in place for each node of a branch and bound tree
+
+    The state of every disjunct is True (its indicator_var is fixed to 1),
+    False (fixed to 0), or None (unfixed). The transformed constraints of
+    disjuncts that are False are deactivated. The initial state of each
+    disjunct is given by its indicator_var when the relaxation is created.
+
+    Parameters
+    ----------
+    model: Block
+        The GDP model, which is transformed in place with gdp.bigm
+    disjunctions: list of Disjunctions
+        The disjunctions to relax (default: all active disjunctions on the
+        model)
+    bigM:
+        The bigM argument passed to gdp.bigm
+    deferred_constraints: iterable of Constraints
+        Constraints on Disjuncts (e.g., nonlinear constraints) whose
+        relaxation is only activated while their Disjunct is True. As
+        their relaxations are never active while the Disjunct may be
+        False, no M value is needed for them.
+    solver: persistent solver
+        If provided, solver.set_instance(model) is called once the model is
+        transformed and all later changes are passed to the solver.
+    """
+
+    def __init__(self, model, disjunctions=None, bigM=None,
+                 deferred_constraints=(), solver=None):
+        self.model = model
+        if disjunctions is None:
+            disjunctions = list(model.component_data_objects(
+                Disjunction, active=True, descend_into=(Block, Disjunct),
+                sort=SortComponents.deterministic))
+        self.disjunctions = list(disjunctions)
+        self.disjuncts = [disjunct for disjunction in self.disjunctions
+                          for disjunct in disjunction.disjuncts]
+
+        args = ComponentMap()
+        if bigM is not None:
+            if isinstance(bigM, (dict, ComponentMap)):
+                args.update(iteritems(bigM))
+            else:
+                args[None] = bigM
+        deferred = ComponentSet()
+        for c in deferred_constraints:
+            disjunct = _parent_disjunct(c)
+            if disjunct is None:
+                raise GDP_Error("Deferred constraint '%s' is not on a "
+                                "Disjunct." % c.name)
+            if not (c.active and disjunct.active):
+                continue
+            deferred.add(c)
+            if c not in args:
+                # The relaxation is only active when the Disjunct is
+                # True, so any M value will do.
+                args[c] = 1
+
+        bigm = TransformationFactory('gdp.bigm')
+        bigm.apply_to(model, targets=self.disjunctions, bigM=args)
+
+        relaxation_blocks = ComponentMap()
+        for disjunct in self.disjuncts:
+            # Disjuncts that were deactivated were not transformed
+            if disjunct.transformation_block is not None:
+                relaxation_blocks[disjunct] = disjunct.transformation_block()
+        all_relaxation_blocks = ComponentSet(relaxation_blocks.values())
+        self._constraints = ComponentMap()
+        self._deferred = ComponentMap()
+        self._state = ComponentMap()
+        for disjunct in self.disjuncts:
+            self._deferred[disjunct] = ComponentSet()
+            if disjunct in relaxation_blocks:
+                self._constraints[disjunct] = list(self._relaxed_constraints(
+                    relaxation_blocks[disjunct], all_relaxation_blocks))
+            else:
+                self._constraints[disjunct] = None
+            if disjunct.indicator_var.fixed:
+                self._state[disjunct] = bool(disjunct.indicator_var.value)
+            else:
+                self._state[disjunct] = None
+        for c in deferred:
+            self._deferred[_parent_disjunct(c)].update(
+                bigm.get_transformed_constraints(c))
+        self._initial_state = ComponentMap(iteritems(self._state))
+
+        self.solver = None
+        for disjunct in self.disjuncts:
+            self._update_constraints(disjunct)
+        if solver is not None:
+            solver.set_instance(model)
+            self.solver = solver
+
+    def _relaxed_constraints(self, block, relaxation_blocks):
+        # The constraints on the relaxation block of a Disjunct, excluding
+        # the relaxations of nested Disjuncts
+        for c in block.component_data_objects(
+                Constraint, descend_into=False, active=None,
+                sort=SortComponents.deterministic):
+            yield c
+        for b in block.component_data_objects(
+                Block, descend_into=False, active=None,
+                sort=SortComponents.deterministic):
+            if b not in relaxation_blocks:
+                for c in self._relaxed_constraints(b, relaxation_blocks):
+                    yield c
+
+    def state(self, disjunct):
+        """Return the state (True, False, or None) of disjunct"""
+        return self._state[disjunct]
+
+    def fix_disjunct(self, disjunct, value=True):
+        """Fix disjunct to True or False"""
+        self._set_disjunct_state(disjunct, bool(value))
+
+    def unfix_disjunct(self, disjunct):
+        """Unfix the indicator_var of disjunct and activate its relaxation"""
+        self._set_disjunct_state(disjunct, None)
+
+    def set_state(self, fixed):
+        """Move to the node where the disjuncts in fixed have the given
+        states and all other disjuncts are in their initial state
+
+        Only the disjuncts whose state changes are updated.
+
+        Parameters
+        ----------
+        fixed: dict or ComponentMap
+            Map from disjunct to True or False (or None to unfix it)
+        """
+        for disjunct in self.disjuncts:
+            if disjunct in fixed:
+                state = fixed[disjunct]
+                if state is not None:
+                    state = bool(state)
+            else:
+                state = self._initial_state[disjunct]
+            self._set_disjunct_state(disjunct, state)
+
+    def reset(self):
+        """Return all disjuncts to their initial state"""
+        self.set_state({})
+
+    def _set_disjunct_state(self, disjunct, state):
+        if self._state[disjunct] is state:
+            return
+        if state is not False and self._constraints[disjunct] is None:
+            raise GDP_Error(
+                "Disjunct '%s' was not relaxed (it was deactivated when the "
+                "relaxation was created), so it cannot be fixed to True or "
+                "unfixed." % disjunct.name)
+        indicator_var = disjunct.indicator_var
+        if state is None:
+            indicator_var.unfix()
+        else:
+            indicator_var.fix(1 if state else 0)
+        if self.solver is not None:
+            self.solver.update_var(indicator_var)
+        self._state[disjunct] = state
+        self._update_constraints(disjunct)
+
+    def _update_constraints(self, disjunct):
+        constraints = self._constraints[disjunct]
+        if constraints is None:
+            return
+        state = self._state[disjunct]
+        deferred = self._deferred[disjunct]
+        for c in constraints:
+            if state is False:
+                active = False
+            elif c in deferred:
+                active = state is True
+            else:
+                active = True
+            if c.active == active:
+                continue
+            if active:
+                c.activate()
+                if self.solver is not None:
+                    self.solver.add_constraint(c)
+            else:
+                if self.solver is not None:
+                    self.solver.remove_constraint(c)
+                c.deactivate()
@@ -18,6 +18,8 @@ from pyomo.common.log import is_debug_set
 from pyomo.common.modeling import unique_component_name
 from pyomo.common.deprecation import deprecated, deprecation_warning
 from pyomo.contrib.fbbt.fbbt import compute_bounds_on_expr
+from pyomo.contrib.fbbt.bounds_cache import BoundsCache
+from pyomo.contrib.fbbt.interval import inf
 from pyomo.core import (
     Block, BooleanVar, Connector, Constraint, Param, Set, SetOf, Suffix, Var,
     Expression, SortComponents, TraversalStrategy, value,
@@ -137,6 +139,22 @@ class BigM_Transformation(Transformation):
         while the variables remain fixed.
         """
     ))
+    CONFIG.declare('bounds_cache', ConfigValue(
+        default=None,
+        domain=None,
+        description="BoundsCache used to store the bounds computed when "
+        "estimating M values",
+        doc="""
+        The bounds computed on constraint bodies when estimating M values
+        are stored in a pyomo.contrib.fbbt.bounds_cache.BoundsCache, so
+        that the bounds on an expression are only computed once per
+        transformation. By default a new cache is created for each
+        transformation. Passing the same BoundsCache (which may also have
+        been passed to fbbt) to repeated transformations of the same model
+        reuses the bounds of every expression whose variable bounds have
+        not changed in between.
+        """
+    ))
 
     def __init__(self):
         """Initialize transformation object."""
@@ -212,6 +230,7 @@ class BigM_Transformation(Transformation):
             NAME_BUFFER.clear()
             # same for our bookkeeping about what we used from bigM arg dict
             self.used_args.clear()
+            self._bounds_cache = None
 
     def _apply_to_impl(self, instance, **kwds):
         config = self.CONFIG(kwds.pop('options', {}))
@@ -228,6 +247,9 @@ class BigM_Transformation(Transformation):
         config.set_value(kwds)
         bigM = config.bigM
         self.assume_fixed_vars_permanent = config.assume_fixed_vars_permanent
+        self._bounds_cache = config.bounds_cache
+        if self._bounds_cache is None:
+            self._bounds_cache = BoundsCache()
 
         targets = config.targets
         if targets is None:
@@ -869,6 +891,15 @@ class BigM_Transformation(Transformation):
                     fixed_vars[v] = value(v)
                     v.fixed = False
 
+        # The body of a constraint is usually relaxed twice (for its lower
+        # and upper bound), so start by checking whether the bounds on expr
+        # were already computed.
+        M = self._bounds_cache.get_bounds(expr)
+        if M is not None and -inf < M[0] and M[1] < inf:
+            for v, val in iteritems(fixed_vars):
+                v.fix(val)
+            return M
+
         # Calculate a best guess at M
         repn = generate_standard_repn(expr, quadratic=False)
         M = [0, 0]
@@ -897,6 +928,7 @@ class BigM_Transformation(Transformation):
                             "expressions with unbounded variables."
                             "\n\t(found unbounded var '%s' while processing "
                             "constraint '%s')" % (var.name, name))
+            self._bounds_cache.set_bounds(expr, M[0], M[1])
         else:
             # expression is nonlinear. Try using `contrib.fbbt` to estimate.
             expr_lb, expr_ub = compute_bounds_on_expr(expr)
@@ -906,6 +938,7 @@ class BigM_Transformation(Transformation):
                                 "constraint '%s')" % name)
             else:
                 M = (expr_lb, expr_ub)
+                self._bounds_cache.set_bounds(expr, expr_lb, expr_ub)
 
         # clean up if we unfixed things (fixed_vars is empty if we were assuming
         # fixed vars are fixed for life)
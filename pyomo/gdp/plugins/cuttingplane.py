@@ -27,8 +27,10 @@ from pyomo.core.expr import differentiate
 from pyomo.common.collections import ComponentSet
 from pyomo.opt import SolverFactory
 from pyomo.repn import generate_standard_repn
+from pyomo.solvers.plugins.solvers.persistent_solver import PersistentSolver
 
 from pyomo.gdp import Disjunct, Disjunction, GDP_Error
+from pyomo.common.parallel import parallel_map
 from pyomo.gdp.util import ( verify_successful_solve, NORMAL,
                              clone_without_expression_components )
 
@@ -38,11 +40,111 @@ from pyomo.contrib.fme.fourier_motzkin_elimination import \
 from six import iteritems
 
 import logging
+import time
 
 logger = logging.getLogger('pyomo.gdp.cuttingplane')
 
 NAME_BUFFER = {}
 
+class CuttingPlaneRound(object):
+    """
+    Statistics for one round of cut generation
+
+    Attributes
+    ----------
+    rBigM_objective: float
+        Objective value of the relaxed BigM problem (at x*)
+    separation_objective: float
+        Objective value of the separation problem (distance from x* to the
+        relaxed hull)
+    cuts_generated: int
+        The number of cuts returned by the create_cuts callback
+    cuts_added: int
+        The number of cuts added to the model (at most cuts_per_round when
+        using create_cuts_fme)
+    max_cut_violation: float
+        The largest amount by which an added cut removes x* (before
+        post-processing)
+    rBigM_time: float
+    separation_time: float
+    cut_generation_time: float
+    post_processing_time: float
+        Wall-clock time (seconds) spent solving the relaxed BigM problem,
+        solving the separation problem, creating the cuts, and
+        post-processing the added cuts
+    """
+    __slots__ = ('rBigM_objective', 'separation_objective', 'cuts_generated',
+                 'cuts_added', 'max_cut_violation', 'rBigM_time',
+                 'separation_time', 'cut_generation_time',
+                 'post_processing_time')
+
+    def __init__(self):
+        self.rBigM_objective = None
+        self.separation_objective = None
+        self.cuts_generated = 0
+        self.cuts_added = 0
+        self.max_cut_violation = 0.0
+        self.rBigM_time = 0.0
+        self.separation_time = 0.0
+        self.cut_generation_time = 0.0
+        self.post_processing_time = 0.0
+
+    @property
+    def time(self):
+        return (self.rBigM_time + self.separation_time +
+                self.cut_generation_time + self.post_processing_time)
+
+
+class CuttingPlaneStatistics(object):
+    """
+    Per-round report of the cutting plane transformation. Pass an instance
+    to the transformation with the report argument:
+
+    >>> report = CuttingPlaneStatistics()
+    >>> TransformationFactory('gdp.cuttingplane').apply_to(m, report=report)
+    >>> print(report)
+
+    Attributes
+    ----------
+    rounds: list of CuttingPlaneRound
+    termination: str
+        Why cut generation stopped
+    """
+    def __init__(self):
+        self.rounds = list()
+        self.termination = None
+
+    def new_round(self):
+        cp_round = CuttingPlaneRound()
+        self.rounds.append(cp_round)
+        return cp_round
+
+    @property
+    def cuts_added(self):
+        return sum(r.cuts_added for r in self.rounds)
+
+    @property
+    def time(self):
+        return sum(r.time for r in self.rounds)
+
+    def __str__(self):
+        def _fmt(val):
+            return '%12s' % ('-',) if val is None else '%12.6g' % (val,)
+        lines = ['%5s %12s %12s %9s %6s %12s %9s %9s %9s %9s' % (
+            'Round', 'rBigM obj', 'Sep. obj', 'Generated', 'Added',
+            'Violation', 'rBigM [s]', 'Sep. [s]', 'Cuts [s]', 'Post [s]')]
+        for i, r in enumerate(self.rounds):
+            lines.append('%5d %s %s %9d %6d %s %9.3f %9.3f %9.3f %9.3f' % (
+                i, _fmt(r.rBigM_objective), _fmt(r.separation_objective),
+                r.cuts_generated, r.cuts_added, _fmt(r.max_cut_violation),
+                r.rBigM_time, r.separation_time, r.cut_generation_time,
+                r.post_processing_time))
+        lines.append('Total: %d cuts in %d rounds, %.3f s' % (
+            self.cuts_added, len(self.rounds), self.time))
+        lines.append('Termination: %s' % (self.termination,))
+        return '\n'.join(lines)
+
+
 def do_not_tighten(m):
     return m
 
@@ -77,6 +179,17 @@ def _constraint_tight(model, constraint, TOL):
 
     return ans
 
+def _cut_violation(cut):
+    """Returns the amount by which the current variable values violate cut
+    (0 if it is satisfied)"""
+    val = value(cut.body)
+    violation = 0
+    if cut.lower is not None:
+        violation = max(violation, value(cut.lower) - val)
+    if cut.upper is not None:
+        violation = max(violation, val - value(cut.upper))
+    return violation
+
 def _get_linear_approximation_expr(normal_vec, point):
     """Returns constraint linearly approximating constraint normal to normal_vec
     at point"""
@@ -115,10 +228,10 @@ def create_cuts_fme(transBlock_rHull, var_info, hull_to_bigm_map,
     vector by summing the vectors normal to each of these constraints. Then
     Fourier-Motzkin elimination is used to project the disaggregated variables
     out of the polyhedron formed by the composite normal and the collection 
-    of tight constraints. This results in multiple cuts, of which we select
-    one that cuts of x* by the greatest margin, as long as that margin is
-    more than cut_threshold. If no cut satisfies the margin specified by 
-    cut_threshold, we return None.
+    of tight constraints. This results in multiple cuts, of which we return
+    those that cut off x* by more than cut_threshold, ordered from the one
+    that cuts off x* by the greatest margin to the least. If no cut satisfies
+    the margin specified by cut_threshold, we return None.
 
     Parameters
     -----------
@@ -202,11 +315,11 @@ def create_cuts_fme(transBlock_rHull, var_info, hull_to_bigm_map,
     # We likely have some cuts that duplicate other constraints now. We will
     # filter them to make sure that they do in fact cut off x*. If that's the
     # case, we know they are not already in the BigM relaxation. Because they
-    # came from FME, they are very likely redundant, so we'll keep the best one
-    # we find
-    best = 0
-    best_cut = None
+    # came from FME, they are very likely redundant, so we return them sorted
+    # from the one that cuts off x* by the most to the least: the
+    # transformation only keeps the first cuts_per_round of them.
     cuts_to_keep = []
+    seen = set()
     for i, cut in enumerate(cuts):
         # x* is still in rBigM, so we can just remove this constraint if it
         # is satisfied at x*
@@ -214,24 +327,26 @@ def create_cuts_fme(transBlock_rHull, var_info, hull_to_bigm_map,
         if value(cut):
             logger.info("FME:\t Doesn't cut off x*")
             continue
-        # we have found a constraint which cuts of x* by some convincing amount
-        # and is not already in rBigM. 
-        cuts_to_keep.append(i)
         # We know cut is lb <= expr and that it's violated
         assert len(cut.args) == 2
         cut_off = value(cut.args[0]) - value(cut.args[1])
-        if cut_off > cut_threshold and cut_off > best:
-            best = cut_off
-            best_cut = cut
-            logger.info("FME:\t New best cut: Cuts off x* by %s." % best)
-
-    # NOTE: this is not used right now, but it's not hard to imagine a world in
-    # which we would want to keep multiple cuts from FME, so leaving it in for
-    # now.
-    cuts = [cuts[i] for i in cuts_to_keep]
+        if cut_off > cut_threshold:
+            # FME can project several constraints to the same cut
+            repn = generate_standard_repn(cut.args[1] - cut.args[0])
+            key = (tuple(sorted(zip(map(id, repn.linear_vars),
+                                    repn.linear_coefs))), repn.constant)
+            if key in seen:
+                logger.info("FME:\t Duplicate of a previous cut")
+                continue
+            seen.add(key)
+            # we have found a constraint which cuts of x* by some convincing
+            # amount and is not already in rBigM.
+            logger.info("FME:\t Cuts off x* by %s." % cut_off)
+            cuts_to_keep.append((-cut_off, i))
 
-    if best_cut is not None:
-        return [best_cut]
+    if cuts_to_keep:
+        # (sorting on the index as well keeps ties in FME order)
+        return [cuts[i] for _, i in sorted(cuts_to_keep)]
 
     return None
 
@@ -302,6 +417,51 @@ def create_cuts_normal_vector(transBlock_rHull, var_info, hull_to_bigm_map,
                    "generation." % cut_threshold)
     return None
 
+def _calculate_cut_violation(cut, transBlock_rHull, bigm_to_hull_map, opt,
+                             stream_solver):
+    """Returns the minimum of the body of cut (a lb <= body constraint)
+    subject to the relaxed hull constraints, or None if the problem did not
+    solve normally.
+
+    If opt is a persistent solver, its instance must be the relaxed hull
+    instance: the objective is switched in the solver and restored
+    afterwards.
+    """
+    instance_rHull = transBlock_rHull.model()
+    transBlock_rHull.separation_objective.deactivate()
+
+    transBlock_rHull.infeasibility_objective = Objective(
+        expr=clone_without_expression_components(cut.body,
+                                                 substitute=bigm_to_hull_map))
+    persistent = isinstance(opt, PersistentSolver)
+    try:
+        if persistent:
+            opt.set_objective(transBlock_rHull.infeasibility_objective)
+        results = opt.solve(instance_rHull, tee=stream_solver,
+                            load_solutions=False)
+        if verify_successful_solve(results) is not NORMAL:
+            logger.warning("Problem to determine how much to "
+                           "back off the new cut "
+                           "did not solve normally. Leaving the constraint as "
+                           "is, which could lead to numerical trouble%s" %
+                           (results,))
+            return None
+        instance_rHull.solutions.load_from(results)
+        return value(transBlock_rHull.infeasibility_objective)
+    finally:
+        # restore the objective
+        transBlock_rHull.del_component(transBlock_rHull.infeasibility_objective)
+        transBlock_rHull.separation_objective.activate()
+        if persistent:
+            opt.set_objective(transBlock_rHull.separation_objective)
+
+def _back_off_cut_by_violation(cut, violation, TOL):
+    # we're minimizing, val is <= 0
+    val = violation - TOL
+    if val <= 0:
+        logger.info("\tBacking off cut by %s" % val)
+        cut._body += abs(val)
+
 def back_off_constraint_with_calculated_cut_violation(cut, transBlock_rHull,
                                                       bigm_to_hull_map, opt,
                                                       stream_solver, TOL):
@@ -323,37 +483,14 @@ def back_off_constraint_with_calculated_cut_violation(cut, transBlock_rHull,
          to account for optimality tolerance in the maximum violation problem
          solve.
     """
-    instance_rHull = transBlock_rHull.model()
     logger.info("Post-processing cut: %s" % cut.expr)
     # Take a constraint. We will solve a problem maximizing its violation
     # subject to rHull. We will add some user-specified tolerance to that
     # violation, and then add that much padding to it if it can be violated.
-    transBlock_rHull.separation_objective.deactivate()
-
-    transBlock_rHull.infeasibility_objective = Objective(
-        expr=clone_without_expression_components(cut.body,
-                                                 substitute=bigm_to_hull_map))
-
-    results = opt.solve(instance_rHull, tee=stream_solver, load_solutions=False)
-    if verify_successful_solve(results) is not NORMAL:
-        logger.warning("Problem to determine how much to "
-                       "back off the new cut "
-                       "did not solve normally. Leaving the constraint as is, "
-                       "which could lead to numerical trouble%s" % (results,))
-        # restore the objective
-        transBlock_rHull.del_component(transBlock_rHull.infeasibility_objective)
-        transBlock_rHull.separation_objective.activate()
-        return
-    instance_rHull.solutions.load_from(results)
-
-    # we're minimizing, val is <= 0
-    val = value(transBlock_rHull.infeasibility_objective) - TOL
-    if val <= 0:
-        logger.info("\tBacking off cut by %s" % val)
-        cut._body += abs(val)
-    # else there is nothing to do: restore the objective
-    transBlock_rHull.del_component(transBlock_rHull.infeasibility_objective)
-    transBlock_rHull.separation_objective.activate()
+    violation = _calculate_cut_violation(cut, transBlock_rHull,
+                                         bigm_to_hull_map, opt, stream_solver)
+    if violation is not None:
+        _back_off_cut_by_violation(cut, violation, TOL)
 
 def back_off_constraint_by_fixed_tolerance(cut, transBlock_rHull,
                                            bigm_to_hull_map, opt, stream_solver,
@@ -375,6 +512,62 @@ def back_off_constraint_by_fixed_tolerance(cut, transBlock_rHull,
     """
     cut._body += TOL
 
+class _SubproblemSolver(object):
+    """Solves one of the subproblems (the relaxed BigM or the separation
+    problem) of the cutting plane algorithm.
+
+    With a persistent solver, the instance is set before the first solve
+    and afterwards only updated with the changes made between rounds.
+    """
+    def __init__(self, config, model):
+        self.model = model
+        self.opt = SolverFactory(config.solver)
+        self.opt.options = dict(config.solver_options)
+        self.tee = config.stream_solver
+        self.persistent = isinstance(self.opt, PersistentSolver)
+        self._instance_set = False
+
+    def solve(self):
+        if self.persistent and not self._instance_set:
+            self.opt.set_instance(self.model)
+            self._instance_set = True
+        return self.opt.solve(self.model, tee=self.tee, load_solutions=False)
+
+    def set_objective(self, obj):
+        if self._instance_set:
+            self.opt.set_objective(obj)
+
+    def add_constraint(self, con):
+        if self._instance_set:
+            self.opt.add_constraint(con)
+
+    def update_constraint(self, con):
+        # (persistent solvers take the values of mutable Params when the
+        # constraint is added)
+        if self._instance_set:
+            self.opt.remove_constraint(con)
+            self.opt.add_constraint(con)
+
+# The subproblem solved in the worker processes of the parallel
+# post-processing: (config, transBlock_rHull, bigm_to_hull_map), and the
+# solver of the current worker process.
+_post_process_task = None
+_worker_solver = None
+
+def _calculate_cut_violation_in_worker(cut):
+    global _worker_solver
+    config, transBlock_rHull, bigm_to_hull_map = _post_process_task
+    # Each worker needs a solver instance of its own. It is created for the
+    # first cut the worker gets and reused for the rest, so that a persistent
+    # solver only sets the instance once per worker (the maximum violation
+    # problems only differ in their objective).
+    if _worker_solver is None:
+        _worker_solver = _SubproblemSolver(config, transBlock_rHull.model())
+        if _worker_solver.persistent:
+            _worker_solver.opt.set_instance(_worker_solver.model)
+    return _calculate_cut_violation(cut, transBlock_rHull, bigm_to_hull_map,
+                                    _worker_solver.opt, config.stream_solver)
+
 @TransformationFactory.register('gdp.cuttingplane',
                                 doc="Relaxes a linear disjunctive model by "
                                 "adding cuts from convex hull to Big-M "
@@ -428,6 +621,17 @@ class CuttingPlane_Transformation(Transformation):
     tight_constraint_tolerance : Tolerance at which a constraint is considered
                                  tight for the Fourier-Motzkin cut generation
                                  procedure
+    cuts_per_round : The maximum number of the cuts returned by
+                     create_cuts_fme to add to the big-M model in each round
+    num_workers : Number of worker processes used to post-process the cuts
+                  added in a round
+    report : CuttingPlaneStatistics in which to record per-round objective
+             values, cut counts and violations, and timing
+
+    If the solver is a persistent solver (e.g., 'gurobi_persistent'), one
+    instance is kept for the relaxed BigM problem and one for the separation
+    problem, and they are updated with the new cuts and separation
+    objectives in every round instead of being rebuilt.
 
     By default, the callbacks will be set such that the algorithm performed is
     as presented in [1], but with an additional post-processing procedure to
@@ -685,6 +889,66 @@ class CuttingPlane_Transformation(Transformation):
         the solver being used.
         """
     ))
+    CONFIG.declare('bounds_cache', ConfigValue(
+        default=None,
+        description="BoundsCache passed to the BigM transformation of the "
+        "instance",
+        doc="""
+        Optional pyomo.contrib.fbbt.bounds_cache.BoundsCache in which the
+        BigM transformation stores the bounds it computes when estimating M
+        values (see the bounds_cache option of gdp.bigm). Passing the same
+        cache to repeated transformations of the same model avoids
+        recomputing bounds on expressions whose variable bounds have not
+        changed.
+        """
+    ))
+    CONFIG.declare('cuts_per_round', ConfigValue(
+        default=1,
+        domain=PositiveInt,
+        description="The maximum number of the cuts returned by "
+        "create_cuts_fme to add to the big-M model in each round of cut "
+        "generation.",
+        doc="""
+        create_cuts_fme returns all cuts from the projection that cut off
+        the relaxed BigM solution by more than cut_filtering_threshold, most
+        violated first. Up to this many of them are added in each round,
+        before the relaxed BigM problem is solved again. Every cut returned
+        by any other create_cuts callback is added (subject to
+        max_number_of_cuts).
+        """
+    ))
+    CONFIG.declare('num_workers', ConfigValue(
+        default=1,
+        domain=PositiveInt,
+        description="Number of worker processes used to post-process the "
+        "cuts of each round",
+        doc="""
+        When more than one cut is added per round (see cuts_per_round) and
+        post_process_cut is back_off_constraint_with_calculated_cut_violation,
+        the problems maximizing the violation of each cut over the relaxed
+        hull are independent. If num_workers is greater than 1, they are
+        solved concurrently in a pool of worker processes. Each worker gets a
+        contiguous block of the cuts and one solver instance of its own,
+        which (for a persistent solver) is set once and reused for all of
+        its cuts. The cuts are then backed off in the parent process in
+        order, so the result is the same as when solving serially. With one
+        cut per round there is nothing to distribute, so this option has no
+        effect unless cuts_per_round is greater than 1. Worker processes are
+        only used on platforms that support fork(); other post_process_cut
+        callbacks are always run serially.
+        """
+    ))
+    CONFIG.declare('report', ConfigValue(
+        default=None,
+        description="CuttingPlaneStatistics in which to record a per-round "
+        "report",
+        doc="""
+        Optional CuttingPlaneStatistics which is filled in with the objective
+        values, the number and violation of the generated and added cuts,
+        and the time spent in each phase of every round of cut generation.
+        The report is also logged when verbose is True.
+        """
+    ))
     def __init__(self):
         super(CuttingPlane_Transformation, self).__init__()
 
@@ -767,7 +1031,8 @@ class CuttingPlane_Transformation(Transformation):
         # Reformulate the instance using the BigM relaxation (this will
         # be the final instance returned to the user)
         #
-        bigMRelaxation.apply_to(instance, bigM=bigM)
+        bigMRelaxation.apply_to(instance, bigM=bigM,
+                                bounds_cache=self._config.bounds_cache)
 
         #
         # Generate the continuous relaxation of the BigM transformation. We'll
@@ -878,9 +1143,15 @@ class CuttingPlane_Transformation(Transformation):
     def _generate_cuttingplanes( self, instance_rBigM, cuts_obj, instance_rHull,
                                  var_info, transBlockName):
 
-        opt = SolverFactory(self._config.solver)
+        # Separate solvers for the relaxed BigM and separation problems, so
+        # that persistent solvers keep an instance of each.
+        rBigM_solver = _SubproblemSolver(self._config, instance_rBigM)
+        rHull_solver = _SubproblemSolver(self._config, instance_rHull)
         stream_solver = self._config.stream_solver
-        opt.options = dict(self._config.solver_options)
+
+        report = self._config.report
+        if report is None:
+            report = CuttingPlaneStatistics()
 
         improving = True
         prev_obj = None
@@ -907,129 +1178,214 @@ class CuttingPlane_Transformation(Transformation):
         bigm_to_hull_map = self._create_bigm_to_hull_substition_map(var_info)
         xhat = ComponentMap()
 
-        while (improving):
-            # solve rBigM, solution is xstar
-            results = opt.solve(instance_rBigM, tee=stream_solver,
-                                load_solutions=False)
-            if verify_successful_solve(results) is not NORMAL:
-                logger.warning("Relaxed BigM subproblem "
-                               "did not solve normally. Stopping cutting "
-                               "plane generation.\n\n%s" % (results,))
-                return
-            instance_rBigM.solutions.load_from(results)
-
-            rBigM_objVal = value(rBigM_obj)
-            logger.warning("rBigM objective = %s" % (rBigM_objVal,))
-
-            #
-            # Add the separation objective to the hull subproblem if it's not
-            # there already (so in the first iteration). We're waiting until now
-            # to avoid it including variables that came back stale from the
-            # rbigm solve.
-            #
-            if transBlock_rHull.component("separation_objective") is None:
-                self._add_separation_objective(var_info, transBlock_rHull)
-            
-            # copy over xstar
-            logger.info("x* is:")
-            for x_rbigm, x_hull, x_star in var_info:
-                if not x_rbigm.stale:
-                    x_star.value = x_rbigm.value
-                    # initialize the X values
-                    x_hull.value = x_rbigm.value    
+        try:
+            while (improving):
+                cp_round = report.new_round()
+                # solve rBigM, solution is xstar
+                start = time.time()
+                results = rBigM_solver.solve()
+                cp_round.rBigM_time = time.time() - start
+                if verify_successful_solve(results) is not NORMAL:
+                    logger.warning("Relaxed BigM subproblem "
+                                   "did not solve normally. Stopping cutting "
+                                   "plane generation.\n\n%s" % (results,))
+                    report.termination = 'relaxed BigM solve failed'
+                    return
+                instance_rBigM.solutions.load_from(results)
+
+                rBigM_objVal = value(rBigM_obj)
+                cp_round.rBigM_objective = rBigM_objVal
+                logger.warning("rBigM objective = %s" % (rBigM_objVal,))
+
+                #
+                # Add the separation objective to the hull subproblem if it's
+                # not there already (so in the first iteration). We're waiting
+                # until now to avoid it including variables that came back
+                # stale from the rbigm solve.
+                #
+                if transBlock_rHull.component("separation_objective") is None:
+                    self._add_separation_objective(var_info, transBlock_rHull)
+
+                # copy over xstar
+                logger.info("x* is:")
+                for x_rbigm, x_hull, x_star in var_info:
+                    if not x_rbigm.stale:
+                        x_star.value = x_rbigm.value
+                        # initialize the X values
+                        x_hull.value = x_rbigm.value
+                    if self.verbose:
+                        logger.info("\t%s = %s" %
+                                    (x_rbigm.getname(fully_qualified=True,
+                                                     name_buffer=NAME_BUFFER),
+                                     x_rbigm.value))
+                # the separation problem depends on x*
+                self._update_separation_problem(transBlock_rHull,
+                                                rHull_solver)
+
+                # compare objectives: check absolute difference close to 0,
+                # relative difference further from 0.
+                if prev_obj is None:
+                    improving = True
+                else:
+                    obj_diff = prev_obj - rBigM_objVal
+                    improving = ( abs(obj_diff) > epsilon if
+                                  abs(rBigM_objVal) < 1 else
+                                  abs(obj_diff/prev_obj) > epsilon )
+
+                # solve separation problem to get xhat.
+                start = time.time()
+                results = rHull_solver.solve()
+                cp_round.separation_time = time.time() - start
+                if verify_successful_solve(results) is not NORMAL:
+                    logger.warning("Hull separation subproblem "
+                                   "did not solve normally. Stopping cutting "
+                                   "plane generation.\n\n%s" % (results,))
+                    report.termination = 'separation solve failed'
+                    return
+                instance_rHull.solutions.load_from(results)
+                cp_round.separation_objective = value(
+                    transBlock_rHull.separation_objective)
+                logger.warning("separation problem objective value: %s" %
+                               cp_round.separation_objective)
+
+                # save xhat to initialize rBigM with in the next iteration
                 if self.verbose:
-                    logger.info("\t%s = %s" % 
-                                (x_rbigm.getname(fully_qualified=True,
-                                                 name_buffer=NAME_BUFFER),
-                                 x_rbigm.value))
-
-            # compare objectives: check absolute difference close to 0, relative
-            # difference further from 0.
-            if prev_obj is None:
-                improving = True
-            else:
-                obj_diff = prev_obj - rBigM_objVal
-                improving = ( abs(obj_diff) > epsilon if abs(rBigM_objVal) < 1
-                             else abs(obj_diff/prev_obj) > epsilon )
-
-            # solve separation problem to get xhat.
-            results = opt.solve(instance_rHull, tee=stream_solver,
-                                load_solutions=False)
-            if verify_successful_solve(results) is not NORMAL:
-                logger.warning("Hull separation subproblem "
-                               "did not solve normally. Stopping cutting "
-                               "plane generation.\n\n%s" % (results,))
-                return
-            instance_rHull.solutions.load_from(results)
-            logger.warning("separation problem objective value: %s" %
-                           value(transBlock_rHull.separation_objective))
-
-            # save xhat to initialize rBigM with in the next iteration
+                    logger.info("xhat is: ")
+                for x_rbigm, x_hull, x_star in var_info:
+                    xhat[x_rbigm] = value(x_hull)
+                    if self.verbose:
+                        logger.info("\t%s = %s" %
+                                    (x_hull.getname(fully_qualified=True,
+                                                    name_buffer=NAME_BUFFER),
+                                     x_hull.value))
+
+                # [JDS 19 Dec 18] Note: we check that the separation objective
+                # was significantly nonzero.  If it is too close to zero,
+                # either the rBigM solution was in the convex hull, or the
+                # separation vector is so close to zero that the resulting cut
+                # is likely to have numerical issues.
+                if cp_round.separation_objective < \
+                   self._config.separation_objective_threshold:
+                    logger.warning("Separation problem objective below "
+                                   "threshold of %s: Stopping cut generation."
+                                   % self._config.
+                                   separation_objective_threshold)
+                    report.termination = 'separation objective threshold'
+                    break
+
+                start = time.time()
+                cuts = self._config.create_cuts(
+                    transBlock_rHull, var_info, hull_to_bigm_map,
+                    rBigM_linear_constraints, rHull_vars, disaggregated_vars,
+                    self._config.norm, self._config.cut_filtering_threshold,
+                    self._config.zero_tolerance,
+                    self._config.do_integer_arithmetic,
+                    self._config.tight_constraint_tolerance)
+                cp_round.cut_generation_time = time.time() - start
+
+                # We are done if the cut generator couldn't return a valid cut
+                if cuts is None:
+                    logger.warning("Did not generate a valid cut, stopping cut "
+                                   "generation.")
+                    report.termination = 'no valid cut'
+                    break
+                cp_round.cuts_generated = len(cuts)
+                if not improving:
+                    logger.warning("Difference in relaxed BigM problem "
+                                   "objective values from past two iterations "
+                                   "is below threshold of %s: Stopping cut "
+                                   "generation." % epsilon)
+                    report.termination = 'minimum improvement threshold'
+                    break
+
+                cuts = self._cuts_to_add(cuts, len(cuts_obj))
+                new_cuts = []
+                for cut in cuts:
+                    # we add the cut to the model and then post-process it in
+                    # place.
+                    cut_number = len(cuts_obj)
+                    logger.warning("Adding cut %s to BigM model." %
+                                   (cut_number,))
+                    cuts_obj.add(cut_number, cut)
+                    new_cuts.append(cuts_obj[cut_number])
+                    # (x* is still loaded in rBigM)
+                    cp_round.max_cut_violation = max(
+                        cp_round.max_cut_violation,
+                        _cut_violation(cuts_obj[cut_number]))
+                cp_round.cuts_added = len(new_cuts)
+
+                start = time.time()
+                self._post_process_cuts(new_cuts, transBlock_rHull,
+                                        bigm_to_hull_map, rHull_solver)
+                cp_round.post_processing_time = time.time() - start
+                for cut in new_cuts:
+                    rBigM_solver.add_constraint(cut)
+
+                if len(cuts_obj) >= self._config.max_number_of_cuts:
+                    logger.warning("Reached maximum number of cuts.")
+                    report.termination = 'maximum number of cuts'
+                    break
+
+                prev_obj = rBigM_objVal
+
+                # Initialize rbigm with xhat (for the next iteration)
+                for x_rbigm, x_hull, x_star in var_info:
+                    x_rbigm.value = xhat[x_rbigm]
+        finally:
             if self.verbose:
-                logger.info("xhat is: ")
-            for x_rbigm, x_hull, x_star in var_info:
-                xhat[x_rbigm] = value(x_hull)
-                if self.verbose:
-                    logger.info("\t%s = %s" % 
-                                (x_hull.getname(fully_qualified=True,
-                                                name_buffer=NAME_BUFFER), 
-                                 x_hull.value))
-
-            # [JDS 19 Dec 18] Note: we check that the separation objective was
-            # significantly nonzero.  If it is too close to zero, either the
-            # rBigM solution was in the convex hull, or the separation vector is
-            # so close to zero that the resulting cut is likely to have
-            # numerical issues.
-            if value(transBlock_rHull.separation_objective) < \
-               self._config.separation_objective_threshold:
-                logger.warning("Separation problem objective below threshold of"
-                               " %s: Stopping cut generation." %
-                               self._config.separation_objective_threshold)
-                break
-
-            cuts = self._config.create_cuts(transBlock_rHull, var_info,
-                                            hull_to_bigm_map,
-                                            rBigM_linear_constraints,
-                                            rHull_vars, disaggregated_vars,
-                                            self._config.norm,
-                                            self._config.cut_filtering_threshold,
-                                            self._config.zero_tolerance,
-                                            self._config.do_integer_arithmetic,
-                                            self._config.\
-                                            tight_constraint_tolerance)
-           
-            # We are done if the cut generator couldn't return a valid cut
-            if cuts is None:
-                logger.warning("Did not generate a valid cut, stopping cut "
-                               "generation.")
-                break
-            if not improving:
-                logger.warning("Difference in relaxed BigM problem objective "
-                               "values from past two iterations is below "
-                               "threshold of %s: Stopping cut generation." %
-                               epsilon)
-                break
-
-            for cut in cuts:
-                # we add the cut to the model and then post-process it in place.
-                cut_number = len(cuts_obj)
-                logger.warning("Adding cut %s to BigM model." % (cut_number,))
-                cuts_obj.add(cut_number, cut)
-                if self._config.post_process_cut is not None:
-                    self._config.post_process_cut(
-                        cuts_obj[cut_number], transBlock_rHull,
-                        bigm_to_hull_map, opt, stream_solver,
-                        self._config.back_off_problem_tolerance)
-
-            if cut_number + 1 == self._config.max_number_of_cuts:
-                logger.warning("Reached maximum number of cuts.")
-                break
-                
-            prev_obj = rBigM_objVal
-
-            # Initialize rbigm with xhat (for the next iteration)
-            for x_rbigm, x_hull, x_star in var_info:
-                x_rbigm.value = xhat[x_rbigm]
+                logger.info("Cutting plane report:\n%s" % (report,))
+
+    def _cuts_to_add(self, cuts, num_existing_cuts):
+        # create_cuts_fme returns its candidates sorted by how much they cut
+        # off x*, so only the best cuts_per_round are kept. The cuts of
+        # other callbacks are all added.
+        max_cuts = self._config.max_number_of_cuts - num_existing_cuts
+        if self._config.create_cuts is create_cuts_fme:
+            max_cuts = min(max_cuts, self._config.cuts_per_round)
+        return cuts[:max_cuts]
+
+    def _update_separation_problem(self, transBlock_rHull, rHull_solver):
+        # Pass the new x* to a persistent separation solver
+        if self._config.norm == float('inf'):
+            for cons in transBlock_rHull.inf_norm_linearization.values():
+                rHull_solver.update_constraint(cons)
+        rHull_solver.set_objective(transBlock_rHull.separation_objective)
+
+    def _post_process_cuts(self, cuts, transBlock_rHull, bigm_to_hull_map,
+                           rHull_solver):
+        post_process_cut = self._config.post_process_cut
+        if post_process_cut is None:
+            return
+        TOL = self._config.back_off_problem_tolerance
+        if post_process_cut is \
+           back_off_constraint_with_calculated_cut_violation and \
+           self._config.num_workers > 1 and len(cuts) > 1:
+            violations = self._calculate_cut_violations(
+                cuts, transBlock_rHull, bigm_to_hull_map)
+            for cut, violation in zip(cuts, violations):
+                logger.info("Post-processing cut: %s" % cut.expr)
+                if violation is not None:
+                    _back_off_cut_by_violation(cut, violation, TOL)
+            return
+        for cut in cuts:
+            post_process_cut(cut, transBlock_rHull, bigm_to_hull_map,
+                             rHull_solver.opt, self._config.stream_solver, TOL)
+
+    def _calculate_cut_violations(self, cuts, transBlock_rHull,
+                                  bigm_to_hull_map):
+        # The maximum violation problems only read the relaxed hull model, so
+        # we solve them concurrently and return the violations in the order
+        # of the cuts. Every worker gets one contiguous chunk of the cuts.
+        global _post_process_task, _worker_solver
+        _post_process_task = (self._config, transBlock_rHull, bigm_to_hull_map)
+        try:
+            return parallel_map(_calculate_cut_violation_in_worker, cuts,
+                                self._config.num_workers, chunks_per_worker=1)
+        finally:
+            # (parallel_map runs serially in this process when it cannot
+            # fork, and the solver must not outlive this round)
+            _post_process_task = None
+            _worker_solver = None
 
     def _add_transformation_block(self, instance):
         # creates transformation block with a unique name based on name, adds it
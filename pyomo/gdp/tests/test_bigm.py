@@ -10,7 +10,8 @@
 
 import pyutilib.th as unittest
 
-from pyomo.environ import TransformationFactory, Block, Set, Constraint, ComponentMap, Suffix, ConcreteModel, Var, Any, value
+from pyomo.environ import TransformationFactory, Block, Set, Constraint, ComponentMap, Suffix, ConcreteModel, Var, Any, value, Expression
+from pyomo.contrib.fbbt.bounds_cache import BoundsCache
 from pyomo.gdp import Disjunct, Disjunction, GDP_Error
 from pyomo.core.base import constraint, _ConstraintData
 from pyomo.repn import generate_standard_repn
@@ -542,6 +543,47 @@ class TwoTermDisjNonlinear(unittest.TestCase, CommonTests):
             TransformationFactory('gdp.bigm').apply_to,
             m)
 
+    def test_nonlinear_bigM_bounds_cache(self):
+        m = models.makeTwoTermDisj_Nonlinear()
+        cache = BoundsCache()
+        TransformationFactory('gdp.bigm').apply_to(m, bounds_cache=cache)
+        # Bounds are only computed once each for the bodies of d[0].c,
+        # d[1].c2 (relaxed on both sides) and x (the body of d[1].c1 and
+        # d[1].c3)
+        self.assertEqual(cache.misses, 3)
+        self.assertEqual(cache.hits, 3)
+        self.assertEqual(cache.get_bounds(m.d[0].c.body), (10, 108))
+
+    def test_bounds_cache_persists_across_transformations(self):
+        m = ConcreteModel()
+        m.x = Var(bounds=(1, 8))
+        m.y = Var(bounds=(-10, -3))
+        m.e = Expression(expr=m.x + m.y**2)
+        m.d1 = Disjunction(expr=[[m.e <= 14], [m.x >= 2]])
+        m.d2 = Disjunction(expr=[[m.e <= 20], [m.x <= 7]])
+        cache = BoundsCache()
+        bigm = TransformationFactory('gdp.bigm')
+        bigm.apply_to(m, targets=[m.d1], bounds_cache=cache)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 0)
+        bigm.apply_to(m, targets=[m.d2], bounds_cache=cache)
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(cache.hits, 2)
+        c = m.d2.disjuncts[0].transformation_block().component(
+            m.d2.disjuncts[0].constraint.name)
+        repn = generate_standard_repn(c[1, 'ub'].body)
+        ct.check_linear_coef(self, repn, m.d2.disjuncts[0].indicator_var, 88)
+
+        # Changing a bound invalidates the cached bounds
+        m.d3 = Disjunction(expr=[[m.e <= 20], [m.x <= 7]])
+        m.x.setub(4)
+        bigm.apply_to(m, targets=[m.d3], bounds_cache=cache)
+        self.assertEqual(cache.misses, 4)
+        c = m.d3.disjuncts[0].transformation_block().component(
+            m.d3.disjuncts[0].constraint.name)
+        repn = generate_standard_repn(c[1, 'ub'].body)
+        ct.check_linear_coef(self, repn, m.d3.disjuncts[0].indicator_var, 84)
+
     def test_nonlinear_disjoint(self):
         m = ConcreteModel()
         x = m.x = Var(bounds=(-4, 4))
@@ -13,7 +13,13 @@ import pyutilib.th as unittest
 from pyomo.environ import (ConcreteModel, Var, Constraint, Objective, Block,
                            TransformationFactory, value, maximize, Suffix)
 from pyomo.gdp import Disjunct, Disjunction, GDP_Error
-from pyomo.gdp.plugins.cuttingplane import create_cuts_fme 
+from pyomo.gdp.plugins.cuttingplane import (
+    create_cuts_fme, CuttingPlaneStatistics, CuttingPlaneRound)
+import pyomo.gdp.plugins.cuttingplane as cuttingplane
+from pyomo.common.parallel import fork_available
+
+import multiprocessing
+import os
 
 import pyomo.opt
 import pyomo.gdp.tests.models as models
@@ -557,6 +563,195 @@ class TwoTermDisj(unittest.TestCase):
         self.assertIs(repn.linear_vars[1], m.x)
         self.assertEqual(repn.linear_coefs[1], -1)
 
+    @unittest.skipIf('ipopt' not in solvers, "Ipopt solver not available")
+    def test_multiple_cuts_per_round_fme(self):
+        m = models.makeTwoTermDisj_boxes()
+        report = CuttingPlaneStatistics()
+        TransformationFactory('gdp.cuttingplane').apply_to(
+            m, create_cuts=create_cuts_fme, post_process_cut=None,
+            cuts_per_round=3, report=report)
+
+        cuts = m._pyomo_gdp_cuttingplane_transformation.cuts
+        # the first round adds both facets of the hull, each of which cuts
+        # off x*, so nothing is left to separate in the second
+        self.assertEqual(len(report.rounds), 2)
+        self.assertEqual(report.rounds[0].cuts_added, 2)
+        self.assertEqual(report.cuts_added, len(cuts))
+        self.assertGreater(report.rounds[0].max_cut_violation, 0.001)
+        self.assertEqual(report.termination, 'separation objective threshold')
+        self.check_cuts_valid_on_hull_vertices(m, TOL=0)
+
+    @unittest.skipIf('ipopt' not in solvers, "Ipopt solver not available")
+    def test_max_number_of_cuts_with_multiple_cuts_per_round(self):
+        m = models.makeTwoTermDisj_boxes()
+        report = CuttingPlaneStatistics()
+        TransformationFactory('gdp.cuttingplane').apply_to(
+            m, create_cuts=create_cuts_fme, cuts_per_round=3,
+            max_number_of_cuts=1, report=report)
+
+        self.assertEqual(len(m._pyomo_gdp_cuttingplane_transformation.cuts),
+                         1)
+        self.assertEqual(report.termination, 'maximum number of cuts')
+
+    @unittest.skipIf('ipopt' not in solvers, "Ipopt solver not available")
+    def test_parallel_post_processing(self):
+        m = models.makeTwoTermDisj_boxes()
+        TransformationFactory('gdp.cuttingplane').apply_to(
+            m, create_cuts=create_cuts_fme, cuts_per_round=3)
+        serial = m._pyomo_gdp_cuttingplane_transformation.cuts
+
+        m_parallel = models.makeTwoTermDisj_boxes()
+        TransformationFactory('gdp.cuttingplane').apply_to(
+            m_parallel, create_cuts=create_cuts_fme, cuts_per_round=3,
+            num_workers=2)
+        parallel = m_parallel._pyomo_gdp_cuttingplane_transformation.cuts
+
+        self.assertEqual(len(serial), len(parallel))
+        for i in serial:
+            self.assertEqual(str(serial[i].expr), str(parallel[i].expr))
+        self.check_cuts_valid_on_hull_vertices(m_parallel, TOL=1e-8)
+
+    def test_cuts_per_round_only_limits_fme(self):
+        def create_two_cuts(*args):
+            return ['cut0', 'cut1']
+        trans = TransformationFactory('gdp.cuttingplane')
+        cuts = ['cut%s' % i for i in range(5)]
+
+        # every cut of a custom callback is added, as they always were
+        trans._config = trans.CONFIG(dict(create_cuts=create_two_cuts))
+        self.assertEqual(trans._cuts_to_add(cuts, 0), cuts)
+        # create_cuts_fme returns sorted candidates: keep the best ones
+        trans._config = trans.CONFIG(dict(create_cuts=create_cuts_fme,
+                                          cuts_per_round=2))
+        self.assertEqual(trans._cuts_to_add(cuts, 0), ['cut0', 'cut1'])
+        trans._config = trans.CONFIG(dict(create_cuts=create_cuts_fme))
+        self.assertEqual(trans._cuts_to_add(cuts, 0), ['cut0'])
+        # max_number_of_cuts limits any callback
+        trans._config = trans.CONFIG(dict(create_cuts=create_two_cuts,
+                                          max_number_of_cuts=10))
+        self.assertEqual(trans._cuts_to_add(cuts, 7), cuts[:3])
+
+    def test_report(self):
+        report = CuttingPlaneStatistics()
+        cp_round = report.new_round()
+        self.assertIsInstance(cp_round, CuttingPlaneRound)
+        cp_round.rBigM_objective = 3.75
+        cp_round.separation_objective = 0.525
+        cp_round.cuts_generated = 2
+        cp_round.cuts_added = 2
+        cp_round.rBigM_time = 0.5
+        cp_round.post_processing_time = 0.25
+        cp_round = report.new_round()
+        cp_round.rBigM_objective = 5
+        cp_round.separation_time = 1
+        report.termination = 'separation objective threshold'
+
+        self.assertEqual(report.cuts_added, 2)
+        self.assertEqual(report.time, 1.75)
+        lines = str(report).splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(lines[1].split(), ['0', '3.75', '0.525', '2', '2',
+                                            '0', '0.500', '0.000', '0.000',
+                                            '0.250'])
+        self.assertEqual(lines[2].split()[:3], ['1', '5', '-'])
+        self.assertEqual(lines[3], 'Total: 2 cuts in 2 rounds, 1.750 s')
+        self.assertEqual(lines[4],
+                         'Termination: separation objective threshold')
+
+class ParallelPostProcessing(unittest.TestCase):
+    # Replaces the solver and the maximum violation problem so that the
+    # distribution of the cuts to the workers and the merge of the results
+    # can be tested without a solver. The counters are in shared memory so
+    # that the (forked) workers can update them.
+    def setUp(self):
+        self.solvers_created = multiprocessing.Value('i', 0)
+        self.instances_set = multiprocessing.Value('i', 0)
+        self.worker_of_cut = multiprocessing.Array('i', 6)
+        test = self
+
+        class FakeOpt(object):
+            def set_instance(self, model):
+                with test.instances_set.get_lock():
+                    test.instances_set.value += 1
+
+        class FakeSolver(object):
+            def __init__(self, config, model):
+                with test.solvers_created.get_lock():
+                    test.solvers_created.value += 1
+                self.model = model
+                self.opt = FakeOpt()
+                self.persistent = True
+
+        def fake_violation(cut, transBlock_rHull, bigm_to_hull_map, opt,
+                           stream_solver):
+            test.assertIsInstance(opt, FakeOpt)
+            i = cut.index()
+            test.worker_of_cut[i] = os.getpid()
+            # the problem of cut 3 has no solution
+            return None if i == 3 else -0.5*i
+
+        self.saved = (cuttingplane._SubproblemSolver,
+                      cuttingplane._calculate_cut_violation)
+        cuttingplane._SubproblemSolver = FakeSolver
+        cuttingplane._calculate_cut_violation = fake_violation
+
+    def tearDown(self):
+        (cuttingplane._SubproblemSolver,
+         cuttingplane._calculate_cut_violation) = self.saved
+
+    def post_process(self, num_workers):
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 10))
+        m.cuts = Constraint(range(6), rule=lambda m, i: m.x <= 10 - i)
+        m.b = Block()
+        trans = TransformationFactory('gdp.cuttingplane')
+        trans._config = trans.CONFIG(dict(num_workers=num_workers,
+                                          back_off_problem_tolerance=0.25))
+        trans._post_process_cuts(list(m.cuts.values()), m.b, {}, None)
+        self.assertIsNone(cuttingplane._post_process_task)
+        self.assertIsNone(cuttingplane._worker_solver)
+        return m
+
+    @unittest.skipUnless(fork_available(), "Cannot fork worker processes")
+    def test_one_persistent_instance_per_worker(self):
+        m = self.post_process(num_workers=2)
+
+        # every worker got one contiguous block of cuts, and solved all of
+        # them with a single solver instance
+        workers = list(self.worker_of_cut)
+        self.assertNotIn(os.getpid(), workers)
+        self.assertEqual(workers, [workers[0]]*3 + [workers[3]]*3)
+        self.assertNotEqual(workers[0], workers[3])
+        self.assertEqual(self.solvers_created.value, 2)
+        self.assertEqual(self.instances_set.value, 2)
+
+        # the violations are merged in the order of the cuts: every cut is
+        # backed off by its violation minus the tolerance, except cut 3
+        for i in m.cuts:
+            repn = generate_standard_repn(m.cuts[i].body)
+            backoff = 0 if i == 3 else 0.5*i + 0.25
+            self.assertAlmostEqual(repn.constant, backoff)
+            self.assertEqual(m.cuts[i].upper, 10 - i)
+
+    def test_serial_post_processing_unchanged(self):
+        # with a single worker, the cuts are post-processed by the callback
+        # with the solver of the separation problem
+        m = ConcreteModel()
+        m.x = Var(bounds=(0, 10))
+        m.cuts = Constraint(range(2), rule=lambda m, i: m.x <= 10 - i)
+        seen = []
+        trans = TransformationFactory('gdp.cuttingplane')
+        trans._config = trans.CONFIG(dict(
+            post_process_cut=lambda cut, *args: seen.append((cut, args[2]))))
+
+        class Solver(object):
+            opt = 'separation solver'
+
+        trans._post_process_cuts(list(m.cuts.values()), None, {}, Solver())
+        self.assertEqual(seen, [(m.cuts[0], 'separation solver'),
+                                (m.cuts[1], 'separation solver')])
+        self.assertEqual(self.solvers_created.value, 0)
+
 class Grossmann_TestCases(unittest.TestCase):
     def check_cuts_valid_at_extreme_pts(self, m):
         extreme_points = [
@@ -0,0 +1,201 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""Tests the incremental Big-M relaxation used by branch and bound."""
+import pyutilib.th as unittest
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           TransformationFactory)
+from pyomo.common.collections import ComponentMap
+from pyomo.gdp import Disjunct, Disjunction, GDP_Error
+from pyomo.gdp.incremental import IncrementalBigMRelaxation
+
+
+class FakePersistentSolver(object):
+    """Records the updates passed to a persistent solver"""
+
+    def __init__(self):
+        self.instance = None
+        self.calls = []
+
+    def set_instance(self, model):
+        self.instance = model
+
+    def update_var(self, var):
+        self.calls.append(('update_var', var.name, var.fixed, var.value))
+
+    def add_constraint(self, con):
+        self.calls.append(('add_constraint', con.name))
+
+    def remove_constraint(self, con):
+        self.calls.append(('remove_constraint', con.name))
+
+
+def makeModel():
+    m = ConcreteModel()
+    m.x = Var(bounds=(0, 10))
+    m.y = Var(bounds=(0, 10))
+    m.d1 = Disjunct()
+    m.d1.c = Constraint(expr=m.x >= 2)
+    m.d1.nl = Constraint(expr=m.x**2 >= 4)
+    m.d2 = Disjunct()
+    m.d2.c = Constraint(expr=m.x <= 1)
+    m.d3 = Disjunct()
+    m.d3.c = Constraint(expr=m.y >= 5)
+    m.d4 = Disjunct()
+    m.d4.c = Constraint(expr=m.y <= 3)
+    m.disj1 = Disjunction(expr=[m.d1, m.d2])
+    m.disj2 = Disjunction(expr=[m.d3, m.d4])
+    m.o = Objective(expr=m.x + m.y)
+    return m
+
+
+class TestIncrementalBigM(unittest.TestCase):
+
+    def relaxed(self, d):
+        relaxed = TransformationFactory(
+            'gdp.bigm').get_transformed_constraints(d.c)
+        self.assertEqual(len(relaxed), 1)
+        return relaxed[0]
+
+    def test_transform_once(self):
+        m = makeModel()
+        relaxation = IncrementalBigMRelaxation(m)
+        self.assertIs(relaxation.model, m)
+        for d in (m.d1, m.d2, m.d3, m.d4):
+            self.assertIsNotNone(d.transformation_block)
+            self.assertIsNone(relaxation.state(d))
+            self.assertFalse(d.indicator_var.fixed)
+            self.assertTrue(self.relaxed(d).active)
+        self.assertFalse(m.disj1.active)
+        self.assertFalse(m.disj2.active)
+
+    def test_fix_and_unfix(self):
+        m = makeModel()
+        relaxation = IncrementalBigMRelaxation(m)
+        relaxation.fix_disjunct(m.d2, False)
+        self.assertFalse(relaxation.state(m.d2))
+        self.assertTrue(m.d2.indicator_var.fixed)
+        self.assertEqual(m.d2.indicator_var.value, 0)
+        self.assertFalse(self.relaxed(m.d2).active)
+
+        relaxation.fix_disjunct(m.d1)
+        self.assertTrue(relaxation.state(m.d1))
+        self.assertEqual(m.d1.indicator_var.value, 1)
+        self.assertTrue(self.relaxed(m.d1).active)
+
+        relaxation.unfix_disjunct(m.d2)
+        self.assertIsNone(relaxation.state(m.d2))
+        self.assertFalse(m.d2.indicator_var.fixed)
+        self.assertTrue(self.relaxed(m.d2).active)
+
+    def test_set_state(self):
+        m = makeModel()
+        relaxation = IncrementalBigMRelaxation(m)
+        relaxation.set_state(ComponentMap([(m.d1, True), (m.d2, False)]))
+        self.assertTrue(relaxation.state(m.d1))
+        self.assertFalse(relaxation.state(m.d2))
+        self.assertIsNone(relaxation.state(m.d3))
+
+        # disjuncts that are not given return to their initial state
+        relaxation.set_state(ComponentMap([(m.d3, 1)]))
+        self.assertIsNone(relaxation.state(m.d1))
+        self.assertIsNone(relaxation.state(m.d2))
+        self.assertFalse(m.d1.indicator_var.fixed)
+        self.assertTrue(self.relaxed(m.d2).active)
+        self.assertTrue(relaxation.state(m.d3))
+
+        relaxation.reset()
+        for d in (m.d1, m.d2, m.d3, m.d4):
+            self.assertIsNone(relaxation.state(d))
+
+    def test_initial_state(self):
+        m = makeModel()
+        m.d3.indicator_var.fix(1)
+        m.d4.deactivate()
+        relaxation = IncrementalBigMRelaxation(m)
+        self.assertTrue(relaxation.state(m.d3))
+        self.assertFalse(relaxation.state(m.d4))
+        self.assertIsNone(m.d4.transformation_block)
+
+        relaxation.set_state({})
+        self.assertTrue(relaxation.state(m.d3))
+        self.assertEqual(m.d3.indicator_var.value, 1)
+
+        # d4 was not relaxed
+        self.assertRaisesRegexp(
+            GDP_Error, "Disjunct 'd4' was not relaxed", relaxation.fix_disjunct,
+            m.d4, True)
+        relaxation.fix_disjunct(m.d4, False)
+
+    def test_deferred_constraints(self):
+        m = makeModel()
+        relaxation = IncrementalBigMRelaxation(
+            m, deferred_constraints=[m.d1.nl])
+        nl = TransformationFactory('gdp.bigm').get_transformed_constraints(
+            m.d1.nl)
+        self.assertEqual(len(nl), 1)
+        nl = nl[0]
+        # no M was needed for the nonlinear constraint
+        self.assertEqual(nl.body.polynomial_degree(), 2)
+        self.assertFalse(nl.active)
+        self.assertTrue(self.relaxed(m.d1).active)
+
+        relaxation.fix_disjunct(m.d1)
+        self.assertTrue(nl.active)
+        relaxation.fix_disjunct(m.d1, False)
+        self.assertFalse(nl.active)
+        self.assertFalse(self.relaxed(m.d1).active)
+        relaxation.unfix_disjunct(m.d1)
+        self.assertFalse(nl.active)
+        self.assertTrue(self.relaxed(m.d1).active)
+
+    def test_deferred_constraint_not_on_disjunct(self):
+        m = makeModel()
+        m.c = Constraint(expr=m.x + m.y <= 12)
+        self.assertRaisesRegexp(
+            GDP_Error, "Deferred constraint 'c' is not on a Disjunct",
+            IncrementalBigMRelaxation, m, deferred_constraints=[m.c])
+
+    def test_disjunction_targets(self):
+        m = makeModel()
+        relaxation = IncrementalBigMRelaxation(m, disjunctions=[m.disj2])
+        self.assertTrue(m.disj1.active)
+        self.assertIsNone(m.d1.transformation_block)
+        self.assertEqual(relaxation.disjuncts, [m.d3, m.d4])
+
+    def test_persistent_solver(self):
+        m = makeModel()
+        solver = FakePersistentSolver()
+        relaxation = IncrementalBigMRelaxation(
+            m, deferred_constraints=[m.d1.nl], solver=solver)
+        self.assertIs(solver.instance, m)
+        self.assertEqual(solver.calls, [])
+
+        nl = TransformationFactory('gdp.bigm').get_transformed_constraints(
+            m.d1.nl)[0]
+        relaxation.set_state(ComponentMap([(m.d1, True), (m.d2, False)]))
+        self.assertEqual(solver.calls, [
+            ('update_var', m.d1.indicator_var.name, True, 1),
+            ('add_constraint', nl.name),
+            ('update_var', m.d2.indicator_var.name, True, 0),
+            ('remove_constraint', self.relaxed(m.d2).name),
+        ])
+
+        # only the disjuncts that change are updated
+        solver.calls = []
+        relaxation.set_state(ComponentMap([(m.d1, True), (m.d2, None)]))
+        self.assertEqual(solver.calls, [
+            ('update_var', m.d2.indicator_var.name, False, 0),
+            ('add_constraint', self.relaxed(m.d2).name),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -17,6 +17,8 @@ from pyomo.core import Constraint, value, Objective, Var, ConcreteModel, \
 from pyomo.common.collections import ComponentSet, ComponentMap, Options
 from pyomo.core.expr.current import identify_variables
 from pyomo.repn import generate_standard_repn
+from pyomo.common.parallel import parallel_map
+from multiprocessing.pool import ThreadPool
 import logging, time
 from six import iteritems
 
@@ -50,8 +52,8 @@ class SequentialDecomposition(FOQUSGraph):
             `default=None (will compute it)`
 
         select_tear_method: `str`
-            Which method to use to select a tear set, either "mip" or
-            "heuristic".
+            Which method to use to select a tear set, either "mip",
+            "heuristic", or "scc" (see select_tear_scc).
 
             `default="mip"`
 
@@ -90,8 +92,8 @@ class SequentialDecomposition(FOQUSGraph):
             `default=False`
 
         tear_method: `str`
-            Method to use for converging tear streams, either "Direct" or
-            "Wegstein".
+            Method to use for converging tear streams, either "Direct",
+            "Wegstein", "Broyden" or "Anderson".
 
             `default="Direct"`
 
@@ -127,6 +129,11 @@ class SequentialDecomposition(FOQUSGraph):
 
             `default=0`
 
+        anderson_depth: `int`
+            Number of previous iterations used by Anderson acceleration.
+
+            `default=5`
+
         tear_solver: `str`
             Name of solver to use for select_tear_mip.
 
@@ -141,11 +148,51 @@ class SequentialDecomposition(FOQUSGraph):
             Keyword options to pass to solve method.
 
             `default={}`
+
+        tear_refine_method: `str`
+            Method used by select_tear_scc to select the tears of small
+            strongly connected components exactly, either "heuristic",
+            "mip" (using the tear_solver options), or None to only use
+            the greedy approximation.
+
+            `default="heuristic"`
+
+        tear_refine_max_edges: `int`
+            Largest number of edges in a strongly connected component for
+            which select_tear_scc uses the tear_refine_method.
+
+            `default=12`
+
+        num_workers: `int`
+            Number of units to compute at once. Units in the same stage of
+            the calculation order do not depend on each other, so the
+            function can be called on them concurrently.
+
+            `default=1`
+
+        parallel_method: `str`
+            How to compute units concurrently, either "process" (in forked
+            worker processes, after which the values and fixed flags of the
+            Vars on each unit are transferred back) or "thread" (in a pool
+            of threads, which is only faster if the function releases the
+            GIL, e.g. by calling an external solver).
+
+            `default="process"`
+
+    After a run, the `unit_timing` attribute is a ComponentMap from each
+    unit to a list of the wall-clock times (in seconds) of the calls to
+    the function on that unit, and the `tear_history` attribute is a list
+    with a tuple (tear arcs, history) for every strongly connected
+    component whose tears were converged, where history is the list of
+    arrays of differences across the tear streams at each iteration.
     """
 
     def __init__(self, **kwds):
         """Pass kwds to update the options attribute after setting defaults"""
         self.cache = {}
+        self.tear_cache = {}
+        self.unit_timing = ComponentMap()
+        self.tear_history = []
         options = self.options = Options()
         # defaults
         options["graph"] = None
@@ -164,9 +211,14 @@ class SequentialDecomposition(FOQUSGraph):
         options["report_diffs"] = False
         options["accel_min"] = -5
         options["accel_max"] = 0
+        options["anderson_depth"] = 5
         options["tear_solver"] = "cplex"
         options["tear_solver_io"] = None
         options["tear_solver_options"] = {}
+        options["tear_refine_method"] = "heuristic"
+        options["tear_refine_max_edges"] = 12
+        options["num_workers"] = 1
+        options["parallel_method"] = "process"
 
         options.update(kwds)
 
@@ -240,6 +292,8 @@ class SequentialDecomposition(FOQUSGraph):
         elif method == "heuristic":
             # tset is the first list in the first return value
             tset = self.select_tear_heuristic(G, **kwds)[0][0]
+        elif method == "scc":
+            tset = self.select_tear_scc(G, **kwds)
         else:
             raise ValueError("Invalid method '%s'" % (method,))
 
@@ -282,6 +336,8 @@ class SequentialDecomposition(FOQUSGraph):
             logger.setLevel(logging.INFO)
 
         self.cache.clear()
+        self.unit_timing = ComponentMap()
+        self.tear_history = []
 
         try:
             return self._run_impl(model, function)
@@ -313,6 +369,7 @@ class SequentialDecomposition(FOQUSGraph):
             end = time.time()
             logger.info("Finished Sequential Decomposition in %.2f seconds" %
                 (end - start))
+            self.log_unit_timing()
             return
 
         logger.info("Starting tear convergence procedure")
@@ -338,20 +395,38 @@ class SequentialDecomposition(FOQUSGraph):
                 tear_method = self.options["tear_method"]
 
                 if tear_method == "Direct":
-                    self.solve_tear_direct(**kwds)
+                    hist = self.solve_tear_direct(**kwds)
 
                 elif tear_method == "Wegstein":
                     kwds["accel_min"] = self.options["accel_min"]
                     kwds["accel_max"] = self.options["accel_max"]
-                    self.solve_tear_wegstein(**kwds)
+                    hist = self.solve_tear_wegstein(**kwds)
+
+                elif tear_method == "Broyden":
+                    hist = self.solve_tear_broyden(**kwds)
+
+                elif tear_method == "Anderson":
+                    kwds["depth"] = self.options["anderson_depth"]
+                    hist = self.solve_tear_anderson(**kwds)
 
                 else:
                     raise ValueError(
                         "Invalid tear_method '%s'" % (tear_method,))
 
+                if len(tears):
+                    self.tear_history.append(
+                        (self.indexes_to_arcs(G, tears), hist))
+
         end = time.time()
         logger.info("Finished Sequential Decomposition in %.2f seconds" %
             (end - start))
+        self.log_unit_timing()
+
+    def log_unit_timing(self):
+        """Log the total time spent computing each unit during the run"""
+        for unit, times in iteritems(self.unit_timing):
+            logger.info("Computed unit '%s' %s times in %.2f seconds" %
+                (unit.name, len(times), sum(times)))
 
     def run_order(self, G, order, function, ignore=None, use_guesses=False):
         """
@@ -374,9 +449,15 @@ class SequentialDecomposition(FOQUSGraph):
         fixed_inputs = self.fixed_inputs()
         fixed_outputs = ComponentSet()
         edge_map = self.edge_to_idx(G)
+        arc_map = self.arc_to_edge(G)
         guesses = self.options["guesses"]
         default = self.options["default_guess"]
+        num_workers = self.options["num_workers"]
+        if ignore is None:
+            ignore = ()
         for lev in order:
+            # The units of a stage do not depend on each other, so all of
+            # their inputs can be fixed before any of them are computed
             for unit in lev:
                 if unit not in fixed_inputs:
                     fixed_inputs[unit] = ComponentSet()
@@ -390,9 +471,15 @@ class SequentialDecomposition(FOQUSGraph):
                         self.load_guesses(guesses, port, fixed_ins)
                     self.load_values(port, default, fixed_ins, use_guesses)
 
-                function(unit)
+            if num_workers > 1 and len(lev) > 1:
+                self.run_units_parallel(lev, function, num_workers)
+            else:
+                for unit in lev:
+                    self.run_unit(unit, function)
 
+            for unit in lev:
                 # free the inputs that were not already fixed
+                fixed_ins = fixed_inputs[unit]
                 for var in fixed_ins:
                     var.free()
                 fixed_ins.clear()
@@ -406,13 +493,65 @@ class SequentialDecomposition(FOQUSGraph):
                         fixed_outputs.add(var)
                         var.fix()
                     for arc in dests:
-                        arc_map = self.arc_to_edge(G)
                         if edge_map[arc_map[arc]] not in ignore:
                             self.pass_values(arc, fixed_inputs)
                     for var in fixed_outputs:
                         var.free()
                     fixed_outputs.clear()
 
+    def run_unit(self, unit, function):
+        """Call the function on a unit, recording how long it took"""
+        start = time.time()
+        function(unit)
+        self._record_unit_time(unit, time.time() - start)
+
+    def run_units_parallel(self, units, function, num_workers):
+        """
+        Call the function on each of a list of units that do not depend
+        on each other, computing up to num_workers units at once (see
+        the parallel_method option)
+        """
+        method = self.options["parallel_method"]
+        if method == "thread":
+            def _run(unit):
+                start = time.time()
+                function(unit)
+                return time.time() - start
+            pool = ThreadPool(min(num_workers, len(units)))
+            try:
+                times = pool.map(_run, units)
+            finally:
+                pool.close()
+                pool.join()
+            for unit, elapsed in zip(units, times):
+                self._record_unit_time(unit, elapsed)
+        elif method == "process":
+            # Changes made in the workers are lost with them, so they
+            # return the values and fixed flags of the unit's Vars
+            def _run(unit):
+                start = time.time()
+                function(unit)
+                elapsed = time.time() - start
+                return elapsed, [
+                    (var.value, var.fixed) for var in
+                    unit.component_data_objects(Var, descend_into=True)]
+            results = parallel_map(_run, units, num_workers,
+                                   chunks_per_worker=1)
+            for unit, (elapsed, states) in zip(units, results):
+                for var, (val, fixed) in zip(
+                        unit.component_data_objects(Var, descend_into=True),
+                        states):
+                    var.set_value(val, valid=True)
+                    var.fixed = fixed
+                self._record_unit_time(unit, elapsed)
+        else:
+            raise ValueError("Invalid parallel_method '%s'" % (method,))
+
+    def _record_unit_time(self, unit, elapsed):
+        if unit not in self.unit_timing:
+            self.unit_timing[unit] = []
+        self.unit_timing[unit].append(elapsed)
+
     def pass_values(self, arc, fixed_inputs):
         """
         Pass the values from one unit to the next, recording only those that
@@ -796,6 +935,167 @@ class SequentialDecomposition(FOQUSGraph):
 
         return tset
 
+    def select_tear_scc(self, G, refine_method="heuristic",
+            refine_max_edges=12, solver=None, solver_io=None,
+            solver_options={}):
+        """
+        This finds a set of tear edges for large graphs, where the
+        methods that enumerate every cycle in the graph are impractical.
+
+        Every cycle is contained in a strongly connected component (SCC)
+        of the graph, so the SCCs are torn separately. Self loops are
+        always torn. An SCC with at
+        most refine_max_edges edges is torn with the exact
+        select_tear_heuristic or select_tear_mip methods (according to
+        refine_method). The edges of the larger SCCs are ordered with the
+        greedy feedback arc set heuristic of Eades, Lin and Smyth (1993)
+        and the edges pointing backwards in that order are torn, after
+        which tears whose removal from the tear set leaves the graph
+        acyclic are dropped. This minimizes the total number of tears
+        approximately, but does not consider the number of times any
+        single cycle is torn.
+
+        The result is cached in the tear_cache attribute, which is not
+        cleared between runs, keyed by the structure of the graph, so
+        a model is only torn once no matter how many times it is run.
+
+        Returns
+        -------
+            tset
+                A sorted list of edge indexes
+        """
+        n2i = self.node_to_idx(G)
+        structure = tuple((n2i[src], n2i[dest]) for src, dest in G.edges())
+        key = ("select_tear_scc", structure, refine_method,
+               refine_max_edges)
+        def fcn(G):
+            edge_map = self.edge_to_idx(G)
+            tset = []
+            for nodes in nx.strongly_connected_components(G):
+                if len(nodes) == 1:
+                    # the only cycles are self loops, which must be torn
+                    node, = nodes
+                    tset.extend(edge_map[edge] for edge in
+                                G.out_edges(node, keys=True)
+                                if edge[1] == node)
+                    continue
+                H = G.subgraph(nodes).copy()
+                loops = [edge for edge in H.edges(keys=True)
+                         if edge[0] == edge[1]]
+                tset.extend(edge_map[edge] for edge in loops)
+                H.remove_edges_from(loops)
+                num_edges = H.number_of_edges()
+                if refine_method is not None and \
+                        num_edges <= refine_max_edges:
+                    # The exact methods need their own cached indexes
+                    # for the edges of the subgraph
+                    sub = SequentialDecomposition()
+                    if refine_method == "heuristic":
+                        sub_tset = sub.select_tear_heuristic(H)[0][0]
+                    elif refine_method == "mip":
+                        sub_tset = sub.select_tear_mip(
+                            H, solver, solver_io, solver_options)
+                    else:
+                        raise ValueError("Invalid refine_method '%s'"
+                                         % (refine_method,))
+                    sub_edges = sub.idx_to_edge(H)
+                    tset.extend(edge_map[sub_edges[i]] for i in sub_tset)
+                else:
+                    tset.extend(edge_map[edge]
+                                for edge in self._greedy_tears(H))
+            return sorted(tset)
+        return self.cacher(key, fcn, G, cache=self.tear_cache)
+
+    def _greedy_tears(self, H):
+        """
+        Return a list of edges (as (src, dest, key) tuples) of the
+        strongly connected graph H (without self loops) that leave H
+        acyclic when torn
+        """
+        # Order the nodes following Eades, Lin and Smyth: sinks go to the
+        # end of the order, sources to the front, and otherwise the node
+        # with the largest difference between its numbers of out and in
+        # edges goes to the front. Parallel edges count separately.
+        succ = dict((n, dict()) for n in H)
+        pred = dict((n, dict()) for n in H)
+        for src, dest in H.edges():
+            succ[src][dest] = succ[src].get(dest, 0) + 1
+            pred[dest][src] = pred[dest].get(src, 0) + 1
+        out_deg = dict((n, sum(succ[n].values())) for n in H)
+        in_deg = dict((n, sum(pred[n].values())) for n in H)
+
+        def remove(n):
+            for m, k in iteritems(succ.pop(n)):
+                del pred[m][n]
+                in_deg[m] -= k
+            for m, k in iteritems(pred.pop(n)):
+                del succ[m][n]
+                out_deg[m] -= k
+
+        front = []
+        back = []
+        remaining = set(H)
+        while remaining:
+            sinks = [n for n in remaining if not out_deg[n]]
+            while sinks:
+                n = sinks.pop()
+                if n not in remaining:
+                    continue
+                remaining.discard(n)
+                back.append(n)
+                preds = list(pred[n])
+                remove(n)
+                sinks.extend(m for m in preds if not out_deg[m])
+            sources = [n for n in remaining if not in_deg[n]]
+            while sources:
+                n = sources.pop()
+                if n not in remaining:
+                    continue
+                remaining.discard(n)
+                front.append(n)
+                succs = list(succ[n])
+                remove(n)
+                sources.extend(m for m in succs if not in_deg[m])
+            if remaining:
+                n = max(remaining, key=lambda n: out_deg[n] - in_deg[n])
+                remaining.discard(n)
+                front.append(n)
+                remove(n)
+        back.reverse()
+        position = dict((n, i) for i, n in enumerate(front + back))
+
+        tears = []
+        kept = dict((n, []) for n in H)
+        for edge in H.edges(keys=True):
+            src, dest, _ = edge
+            if position[dest] <= position[src]:
+                tears.append(edge)
+            else:
+                kept[src].append(dest)
+
+        # Drop the tears that do not close a cycle with the kept edges
+        def reaches(start, target):
+            seen = set([start])
+            stack = [start]
+            while stack:
+                n = stack.pop()
+                if n == target:
+                    return True
+                for m in kept[n]:
+                    if m not in seen:
+                        seen.add(m)
+                        stack.append(m)
+            return False
+
+        tset = []
+        for edge in tears:
+            src, dest, _ = edge
+            if reaches(dest, src):
+                tset.append(edge)
+            else:
+                kept[src].append(dest)
+        return tset
+
     def compute_err(self, svals, dvals, tol_type):
         """Compute the diff between svals and dvals for the given tol_type"""
         if tol_type not in ("abs", "rel"):
@@ -824,23 +1124,31 @@ class SequentialDecomposition(FOQUSGraph):
         Returns numpy arrays of values for src and dest members
         for all edges in the tears list of edge indexes.
         """
-        svals = []
-        dvals = []
-        edge_list = self.idx_to_edge(G)
-        for tear in tears:
-            arc = G.edges[edge_list[tear]]["arc"]
-            src, dest = arc.src, arc.dest
-            sf = arc.expanded_block.component("splitfrac")
-            for name, index, mem in src.iter_vars(names=True):
-                if src.is_extensive(name) and sf is not None:
+        return self.generate_gofx(G, tears), self.generate_first_x(G, tears)
+
+    def tear_members(self, G, tears):
+        """
+        Returns a list with a tuple (member, splitfrac, dest, name, peer)
+        for every value carried by the edges in the tears list of edge
+        indexes, in the order of the numpy arrays of tear values. member
+        is the source port member, splitfrac the split fraction to
+        multiply it by (or None), and peer the object its value is
+        passed to on the destination port dest.
+        """
+        def fcn(G, tears):
+            res = []
+            edge_list = self.idx_to_edge(G)
+            for tear in tears:
+                arc = G.edges[edge_list[tear]]["arc"]
+                src, dest = arc.src, arc.dest
+                sf = arc.expanded_block.component("splitfrac")
+                for name, index, mem in src.iter_vars(names=True):
                     # TODO: same as above, what if there's no splitfrac
-                    svals.append(value(mem * sf))
-                else:
-                    svals.append(value(mem))
-                dvals.append(value(self.source_dest_peer(arc, name, index)))
-        svals = numpy.array(svals)
-        dvals = numpy.array(dvals)
-        return svals, dvals
+                    split = sf if src.is_extensive(name) else None
+                    peer = self.source_dest_peer(arc, name, index)
+                    res.append((mem, split, dest, name, peer))
+            return res
+        return self.cacher(("tear_members", tuple(tears)), fcn, G, tears)
 
     def pass_edges(self, G, edges):
         """Call pass values for a list of edge indexes"""
@@ -879,54 +1187,46 @@ class SequentialDecomposition(FOQUSGraph):
         the corresponding value in the numpy array x.
         """
         fixed_inputs = self.fixed_inputs()
-        edge_list = self.idx_to_edge(G)
-        i = 0
-        for tear in tears:
-            arc = G.edges[edge_list[tear]]["arc"]
-            src, dest = arc.src, arc.dest
+        for (_, _, dest, name, peer), val in zip(
+                self.tear_members(G, tears), x.tolist()):
             dest_unit = dest.parent_block()
-
             if dest_unit not in fixed_inputs:
                 fixed_inputs[dest_unit] = ComponentSet()
-
-            for name, index, mem in src.iter_vars(names=True):
-                peer = self.source_dest_peer(arc, name, index)
-                self.pass_single_value(dest, name, peer, x[i],
-                    fixed_inputs[dest_unit])
-                i += 1
+            self.pass_single_value(dest, name, peer, val,
+                fixed_inputs[dest_unit])
 
     def generate_gofx(self, G, tears):
-        edge_list = self.idx_to_edge(G)
-        gofx = []
-        for tear in tears:
-            arc = G.edges[edge_list[tear]]["arc"]
-            src = arc.src
-            sf = arc.expanded_block.component("splitfrac")
-            for name, index, mem in src.iter_vars(names=True):
-                if src.is_extensive(name) and sf is not None:
-                    # TODO: same as above, what if there's no splitfrac
-                    gofx.append(value(mem * sf))
-                else:
-                    gofx.append(value(mem))
-        gofx = numpy.array(gofx)
-        return gofx
+        """
+        Returns a numpy array of the values of the source members of all
+        edges in the tears list of edge indexes
+        """
+        return numpy.array(
+            [value(mem) if sf is None else value(mem) * value(sf)
+             for mem, sf, _, _, _ in self.tear_members(G, tears)],
+            dtype=float)
 
     def generate_first_x(self, G, tears):
-        edge_list = self.idx_to_edge(G)
-        x = []
-        for tear in tears:
-            arc = G.edges[edge_list[tear]]["arc"]
-            for name, index, mem in arc.src.iter_vars(names=True):
-                peer = self.source_dest_peer(arc, name, index)
-                x.append(value(peer))
-        x = numpy.array(x)
-        return x
-
-    def cacher(self, key, fcn, *args):
-        if key in self.cache:
-            return self.cache[key]
+        """
+        Returns a numpy array of the values of the destination members
+        of all edges in the tears list of edge indexes
+        """
+        return numpy.array(
+            [value(peer) for _, _, _, _, peer in self.tear_members(G, tears)],
+            dtype=float)
+
+    def cacher(self, key, fcn, *args, **kwds):
+        """
+        Return the cached result for key, or else call fcn(*args) and
+        cache its result. The cache keyword may be used to pass a dict to
+        use instead of self.cache (which is cleared on every run).
+        """
+        cache = kwds.pop("cache", None)
+        if cache is None:
+            cache = self.cache
+        if key in cache:
+            return cache[key]
         res = fcn(*args)
-        self.cache[key] = res
+        cache[key] = res
         return res
 
     def tear_set(self, G):
@@ -954,6 +1254,13 @@ class SequentialDecomposition(FOQUSGraph):
             elif method == "heuristic":
                 # tset is the first list in the first return value
                 return self.select_tear_heuristic(G)[0][0]
+            elif method == "scc":
+                return self.select_tear_scc(G,
+                    self.options["tear_refine_method"],
+                    self.options["tear_refine_max_edges"],
+                    self.options["tear_solver"],
+                    self.options["tear_solver_io"],
+                    self.options["tear_solver_options"])
             else:
                 raise ValueError("Invalid select_tear_method '%s'" % (method,))
         return self.cacher(key, fcn, G)
@@ -168,6 +168,156 @@ class FOQUSGraph(object):
                 Type of tolerance value, either "abs" (absolute) or
                 "rel" (relative to current value)
 
+        Returns
+        -------
+            list
+                List of lists of diff history, differences between input and
+                output values at each iteration
+        """
+        def wegstein(x, gofx):
+            if not prev:
+                # do one direct step first
+                prev.extend((x, gofx))
+                return gofx
+            x_prev, gofx_prev = prev
+            denom = x - x_prev
+            # this will divide by 0 at some points but we handle that below,
+            # so ignore division warnings
+            old_settings = numpy.seterr(divide='ignore', invalid='ignore')
+            slope = numpy.divide((gofx - gofx_prev), denom)
+            numpy.seterr(**old_settings)
+            # if isnan or isinf then x and x_prev were the same,
+            # so just do direct sub for those elements
+            slope[numpy.isnan(slope)] = 0
+            slope[numpy.isinf(slope)] = 0
+            accel = slope / (slope - 1)
+            accel[accel < accel_min] = accel_min
+            accel[accel > accel_max] = accel_max
+            prev[:] = [x, gofx]
+            return accel * x + (1 - accel) * gofx
+
+        prev = []
+        return self.solve_tear_accelerated(G, order, function, tears,
+            outEdges, iterLim, tol, tol_type, report_diffs, "Wegstein",
+            wegstein)
+
+    def solve_tear_broyden(self, G, order, function, tears, outEdges,
+        iterLim, tol, tol_type, report_diffs):
+        """
+        Use Broyden's method to solve tears. If multiple tears are given
+        they are solved simultaneously.
+
+        This finds a root of F(x) = g(x) - x, where x is the stacked
+        vector of tear stream values and g(x) the values computed for
+        them by running the units, using the "bad" Broyden update of an
+        approximation to the inverse of the Jacobian of F. Unlike
+        Wegstein, this accounts for the interactions between the tear
+        stream values, at the cost of a dense matrix of the size of
+        the tear vector.
+
+        Arguments
+        ---------
+            order
+                List of lists of order in which to calculate nodes
+            tears
+                List of tear edge indexes
+            iterLim
+                Limit on the number of iterations to run
+            tol
+                Tolerance at which iteration can be stopped
+            tol_type
+                Type of tolerance value, either "abs" (absolute) or
+                "rel" (relative to current value)
+
+        Returns
+        -------
+            list
+                List of lists of diff history, differences between input and
+                output values at each iteration
+        """
+        def broyden(x, gofx):
+            F = gofx - x
+            if not prev:
+                # -I makes the first step direct substitution
+                prev.extend((x, F, -numpy.eye(len(x))))
+                return gofx
+            x_prev, F_prev, H = prev
+            dx = x - x_prev
+            dF = F - F_prev
+            denom = dF.dot(dF)
+            if denom > 0:
+                H = H + numpy.outer(dx - H.dot(dF), dF) / denom
+            prev[:] = [x, F, H]
+            return x - H.dot(F)
+
+        prev = []
+        return self.solve_tear_accelerated(G, order, function, tears,
+            outEdges, iterLim, tol, tol_type, report_diffs, "Broyden",
+            broyden)
+
+    def solve_tear_anderson(self, G, order, function, tears, outEdges,
+        iterLim, tol, tol_type, report_diffs, depth):
+        """
+        Use Anderson acceleration to solve tears. If multiple tears are
+        given they are solved simultaneously.
+
+        Each iteration combines the last depth+1 values computed for the
+        tear streams with the weights that minimize the (least squares)
+        combination of their residuals g(x) - x.
+
+        Arguments
+        ---------
+            order
+                List of lists of order in which to calculate nodes
+            tears
+                List of tear edge indexes
+            iterLim
+                Limit on the number of iterations to run
+            tol
+                Tolerance at which iteration can be stopped
+            tol_type
+                Type of tolerance value, either "abs" (absolute) or
+                "rel" (relative to current value)
+            depth
+                Number of previous iterations to use
+
+        Returns
+        -------
+            list
+                List of lists of diff history, differences between input and
+                output values at each iteration
+        """
+        def anderson(x, gofx):
+            F = gofx - x
+            if prev:
+                F_prev, gofx_prev = prev
+                dF.append(F - F_prev)
+                dG.append(gofx - gofx_prev)
+                if len(dF) > depth:
+                    del dF[0], dG[0]
+            prev[:] = [F, gofx]
+            if not dF:
+                return gofx
+            dFmat = numpy.column_stack(dF)
+            gamma = numpy.linalg.lstsq(dFmat, F, rcond=-1)[0]
+            return gofx - numpy.column_stack(dG).dot(gamma)
+
+        prev = []
+        dF = []
+        dG = []
+        return self.solve_tear_accelerated(G, order, function, tears,
+            outEdges, iterLim, tol, tol_type, report_diffs, "Anderson",
+            anderson)
+
+    def solve_tear_accelerated(self, G, order, function, tears, outEdges,
+        iterLim, tol, tol_type, report_diffs, name, accelerate):
+        """
+        Solve tears by iterating x = accelerate(x, g(x)), where x is the
+        numpy array of the values of all the tear streams and g(x) the
+        values computed for them by running the units. This is the
+        iteration of the Wegstein, Broyden and Anderson methods; name is
+        used in log messages.
+
         Returns
         -------
             list
@@ -181,7 +331,7 @@ class FOQUSGraph(object):
             self.run_order(G, order, function, tears)
             return hist
 
-        logger.info("Starting Wegstein tear convergence")
+        logger.info("Starting %s tear convergence" % name)
 
         itercount = 0
         ignore = tears + outEdges
@@ -197,19 +347,16 @@ class FOQUSGraph(object):
 
         # check if it's already solved
         if numpy.max(numpy.abs(err)) < tol:
-            logger.info("Wegstein converged in %s iterations" % itercount)
+            logger.info("%s converged in %s iterations" % (name, itercount))
             return hist
 
-        # if not solved yet do one direct step
-        x_prev = x
-        gofx_prev = gofx
-        x = gofx
-        self.pass_tear_wegstein(G, tears, gofx)
+        x = accelerate(x, gofx)
+        self.pass_tear_wegstein(G, tears, x)
 
         while True:
             itercount += 1
 
-            logger.info("Running Wegstein iteration %s" % itercount)
+            logger.info("Running %s iteration %s" % (name, itercount))
             self.run_order(G, order, function, ignore)
 
             gofx = self.generate_gofx(G, tears)
@@ -224,31 +371,16 @@ class FOQUSGraph(object):
                 break
 
             if itercount > iterLim:
-                logger.warning("Wegstein failed to converge in %s iterations"
-                    % iterLim)
+                logger.warning("%s failed to converge in %s iterations"
+                    % (name, iterLim))
                 return hist
 
-            denom = x - x_prev
-            # this will divide by 0 at some points but we handle that below,
-            # so ignore division warnings
-            old_settings = numpy.seterr(divide='ignore', invalid='ignore')
-            slope = numpy.divide((gofx - gofx_prev), denom)
-            numpy.seterr(**old_settings)
-            # if isnan or isinf then x and x_prev were the same,
-            # so just do direct sub for those elements
-            slope[numpy.isnan(slope)] = 0
-            slope[numpy.isinf(slope)] = 0
-            accel = slope / (slope - 1)
-            accel[accel < accel_min] = accel_min
-            accel[accel > accel_max] = accel_max
-            x_prev = x
-            gofx_prev = gofx
-            x = accel * x_prev + (1 - accel) * gofx_prev
+            x = accelerate(x, gofx)
             self.pass_tear_wegstein(G, tears, x)
 
         self.pass_edges(G, outEdges)
 
-        logger.info("Wegstein converged in %s iterations" % itercount)
+        logger.info("%s converged in %s iterations" % (name, itercount))
 
         return hist
 
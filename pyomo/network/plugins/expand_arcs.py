@@ -13,14 +13,16 @@ logger = logging.getLogger('pyomo.network')
 
 from six import iteritems, itervalues
 
+from pyomo.common.config import ConfigBlock, ConfigValue
 from pyomo.common.log import is_debug_set
 from pyomo.common.modeling import unique_component_name
 
 from pyomo.common.collections import ComponentMap, ComponentSet
 from pyomo.core.base.indexed_component import UnindexedComponent_set
-from pyomo.core.base import Transformation, Block, SortComponents, TransformationFactory
+from pyomo.core.base import (Transformation, Block, Constraint, Set,
+    Reference, SortComponents, TransformationFactory)
 
-from pyomo.network import Arc
+from pyomo.network import Arc, Port
 from pyomo.network.util import replicate_var
 
 # keyword arguments for component_objects and component_data_objects
@@ -31,7 +33,29 @@ obj_iter_kwds = dict(ctype=Arc, active=True, sort=SortComponents.deterministic)
           doc="Expand all Arcs in the model to simple constraints")
 class ExpandArcs(Transformation):
 
+    CONFIG = ConfigBlock("network.expand_arcs")
+    CONFIG.declare('bulk', ConfigValue(
+        default=False,
+        domain=bool,
+        description="Expand arcs with only Equality members in bulk",
+        doc="""
+
+        If True, arcs whose ports only have members with the (default)
+        Port.Equality rule are not given an expanded block each. Instead,
+        they are grouped by the structure of their ports, and the
+        equality constraints of each member are written as a single
+        Constraint indexed by the arcs of the group (and the index of the
+        member), on a block added to the model. The expanded_block of
+        each of these arcs is a lightweight object giving access to its
+        rows of those constraints. Arcs of Arc components with any
+        members using other rules are expanded as usual.
+        """
+    ))
+
     def _apply_to(self, instance, **kwds):
+        config = self.CONFIG(kwds.pop('options', {}))
+        config.set_value(kwds)
+
         if is_debug_set(logger):
             logger.debug("Calling ArcExpander")
 
@@ -40,9 +64,17 @@ class ExpandArcs(Transformation):
         port_list, known_port_sets, matched_ports = \
             self._collect_ports(instance)
 
-        self._add_blocks(instance)
+        bulk_arcs = ComponentSet()
+        if config.bulk:
+            bulk_arcs = self._expand_bulk(
+                instance, known_port_sets, matched_ports)
+
+        self._add_blocks(instance, bulk_arcs)
 
         for port in port_list:
+            if bulk_arcs and all(
+                    arc in bulk_arcs for arc in port.arcs(active=True)):
+                continue
             # iterate over ref so that the index set is the same
             # for all occurences of this member in related ports
             # and so we iterate over members deterministically
@@ -182,7 +214,8 @@ class ExpandArcs(Transformation):
                         "mismatch (%s elements in reference port '%s', "
                         "but %s elements in port '%s')" %
                         (k, v[1], v[2].name, _len, p.name))
-                if v[1] >= 0 and len(v[0].index_set() ^ _v.index_set()):
+                if v[1] >= 0 and v[0].index_set() is not _v.index_set() \
+                        and len(v[0].index_set() ^ _v.index_set()):
                     raise ValueError(
                         "Port mismatch: Port variable '%s' has "
                         "mismatched indices on ports '%s' and '%s'" %
@@ -220,9 +253,95 @@ class ExpandArcs(Transformation):
 
         return ref
 
-    def _add_blocks(self, instance):
+    def _expand_bulk(self, instance, known_port_sets, matched_ports):
+        """
+        Expand the arcs whose ports only have Equality members, grouped
+        by parent block and port structure, and return the set of the
+        expanded arcs
+
+        The constraints of the groups of a block go on an indexed
+        "expanded_arcs" block on that block, so that (as with the
+        expanded block of each arc) they follow its activity.
+        """
+        # The structure of a port set is the names of its members and the
+        # index sets of the indexed ones; sets with only Equality members
+        # and the same structure can share constraints.
+        structures = {}
+        for ref in itervalues(known_port_sets):
+            if not ref or any(
+                    v[3] is not Port.Equality for v in itervalues(ref)):
+                continue
+            structures[id(ref)] = tuple(
+                (k, v[0].index_set() if v[1] >= 0 else None)
+                for k, v in sorted(iteritems(ref)))
+
+        # the blocks that contain bulk arcs and, for each, the list of its
+        # groups of (port structure, arcs)
+        parents = []
+        parent_groups = {}
+        group_map = {}
+        for arc in instance.component_objects(**obj_iter_kwds):
+            keys = []
+            for arc_data in arc.values():
+                if not arc_data.active:
+                    keys.append(None)
+                    continue
+                ref = known_port_sets[id(matched_ports[arc_data.ports[0]])]
+                keys.append(structures.get(id(ref), None))
+            if any(key is None for key in keys):
+                # the arcs of a component share an indexed expanded block,
+                # so all of them need to be expanded the same way
+                continue
+            parent = arc.parent_block()
+            if id(parent) not in parent_groups:
+                parents.append(parent)
+                parent_groups[id(parent)] = []
+            groups = parent_groups[id(parent)]
+            for arc_data, key in zip(arc.values(), keys):
+                # the Sets in the key are hashed by id
+                key_id = (id(parent), tuple((k, id(s)) for k, s in key))
+                if key_id not in group_map:
+                    group_map[key_id] = (key, [])
+                    groups.append(group_map[key_id])
+                group_map[key_id][1].append(arc_data)
+
+        bulk_arcs = ComponentSet()
+        for parent in parents:
+            self._add_bulk_groups(parent, parent_groups[id(parent)], bulk_arcs)
+
+        for arc in instance.component_objects(**obj_iter_kwds):
+            if arc.is_indexed() and all(a in bulk_arcs for a in arc.values()):
+                arc._expanded_block = dict(
+                    (i, arc[i].expanded_block) for i in arc)
+        return bulk_arcs
+
+    def _add_bulk_groups(self, parent, groups, bulk_arcs):
+        bname = unique_component_name(parent, "expanded_arcs")
+        blk = Block(range(len(groups)))
+        parent.add_component(bname, blk)
+        for g, (key, arcs) in enumerate(groups):
+            gblk = blk[g]
+            gblk.arc_index = Set(initialize=range(len(arcs)), ordered=True)
+            members = {}
+            for name, index_set in key:
+                cname = name + "_equality"
+                if index_set is not None:
+                    con = Constraint(gblk.arc_index, index_set,
+                                     rule=_bulk_equality_rule(arcs, name))
+                else:
+                    con = Constraint(gblk.arc_index,
+                                     rule=_bulk_equality_rule(arcs, name))
+                gblk.add_component(cname, con)
+                members[cname] = (con, index_set)
+            for i, arc in enumerate(arcs):
+                arc._expanded_block = _BulkExpandedBlock(gblk, i, members)
+                bulk_arcs.add(arc)
+
+    def _add_blocks(self, instance, bulk_arcs=()):
         # iterate over component_objects so we can make indexed blocks
         for arc in instance.component_objects(**obj_iter_kwds):
+            if bulk_arcs and all(a in bulk_arcs for a in arc.values()):
+                continue
             blk = Block(arc.index_set())
             bname = unique_component_name(
                 arc.parent_block(), "%s_expanded" % arc.local_name)
@@ -231,3 +350,72 @@ class ExpandArcs(Transformation):
             if arc.is_indexed():
                 for i in arc:
                     arc[i]._expanded_block = blk[i]
+
+
+def _bulk_equality_rule(arcs, name):
+    def rule(m, i, *args):
+        port1, port2 = arcs[i].ports
+        if args:
+            return port1.vars[name][args] == port2.vars[name][args]
+        return port1.vars[name] == port2.vars[name]
+    return rule
+
+
+class _BulkExpandedBlock(object):
+    """
+    The expanded_block of an arc expanded in bulk: the rows for the arc
+    (at position index in the arcs of its group) of the constraints on
+    the block of the group, accessed by the names they would have on the
+    expanded block of the arc
+    """
+
+    __slots__ = ('_block', '_index', '_members')
+
+    def __init__(self, block, index, members):
+        self._block = block
+        self._index = index
+        # shared by the arcs of the group: maps constraint names to
+        # (constraint, index set of the member or None)
+        self._members = members
+
+    @property
+    def name(self):
+        return "%s[%s]" % (self._block.name, self._index)
+
+    def parent_block(self):
+        return self._block
+
+    def component(self, name):
+        info = self._members.get(name, None)
+        if info is None:
+            return None
+        con, index_set = info
+        if index_set is None:
+            return con[self._index]
+        return Reference(con[self._index, ...])
+
+    def component_data_objects(self, ctype=None, active=None, **kwds):
+        if ctype not in (None, Constraint):
+            return
+        for name in sorted(self._members):
+            con, index_set = self._members[name]
+            if index_set is None:
+                data = [con[self._index]]
+            else:
+                data = (con[(self._index,) + (idx if type(idx) is tuple
+                                              else (idx,))]
+                        for idx in index_set)
+            for condata in data:
+                if active is None or condata.active == active:
+                    yield condata
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            # includes the slots before they are set (e.g., when copying)
+            raise AttributeError("'%s' object has no attribute '%s'"
+                                 % (self.__class__.__name__, name))
+        comp = self.component(name)
+        if comp is None:
+            raise AttributeError("'%s' object has no attribute '%s'"
+                                 % (self.__class__.__name__, name))
+        return comp
@@ -15,7 +15,7 @@ import pyutilib.th as unittest
 from six import StringIO
 import logging
 
-from pyomo.environ import ConcreteModel, AbstractModel, Var, Set, Constraint, RangeSet, NonNegativeReals, Reals, Binary, TransformationFactory, Block
+from pyomo.environ import ConcreteModel, AbstractModel, Var, Set, Constraint, RangeSet, NonNegativeReals, Reals, Binary, TransformationFactory, Block, Reference
 from pyomo.network import Arc, Port
 
 class TestArc(unittest.TestCase):
@@ -940,6 +940,159 @@ class TestArc(unittest.TestCase):
 """)
 
 
+    def test_expand_bulk(self):
+        m = ConcreteModel()
+        m.comps = Set(initialize=['a', 'b'])
+        m.n = Set(initialize=[1, 2, 3])
+        m.p = Var(m.n)
+        m.f = Var(m.n, m.comps)
+        m.prt = Port(m.n)
+        for i in m.n:
+            m.prt[i].add(m.p[i], name='p')
+            m.prt[i].add(Reference(m.f[i, :]), name='f')
+        m.x = Var()
+        m.y = Var()
+        m.e1 = Port()
+        m.e1.add(m.x, 'v', Port.Extensive)
+        m.e2 = Port()
+        m.e2.add(m.y, 'v', Port.Extensive)
+
+        m.a1 = Arc(source=m.prt[1], destination=m.prt[2])
+        m.a2 = Arc([2], rule=lambda m, i: (m.prt[i], m.prt[i + 1]))
+        m.ext = Arc(source=m.e1, destination=m.e2)
+
+        TransformationFactory('network.expand_arcs').apply_to(m, bulk=True)
+
+        self.assertFalse(m.a1.active)
+        self.assertFalse(m.a2[2].active)
+        self.assertFalse(m.ext.active)
+        # Arcs with only Equality members share the constraints of a group
+        self.assertIsNone(m.component('a1_expanded'))
+        self.assertIsNone(m.component('a2_expanded'))
+        self.assertIs(m.ext.expanded_block, m.ext_expanded)
+        self.assertEqual(len(m.expanded_arcs), 1)
+        blk = m.expanded_arcs[0]
+        self.assertEqual(list(blk.arc_index), [0, 1])
+        self.assertEqual(len(blk.p_equality), 2)
+        self.assertEqual(len(blk.f_equality), 4)
+
+        eb = m.a1.expanded_block
+        self.assertIs(eb.parent_block(), blk)
+        self.assertEqual(eb.name, 'expanded_arcs[0][0]')
+        self.assertIs(eb.p_equality, blk.p_equality[0])
+        self.assertIs(eb.component('p_equality'), blk.p_equality[0])
+        self.assertIsNone(eb.component('v_equality'))
+        with self.assertRaises(AttributeError):
+            eb.v_equality
+        self.assertIs(eb.f_equality['a'], blk.f_equality[0, 'a'])
+        self.assertEqual(str(eb.f_equality['b'].body), 'f[1,b] - f[2,b]')
+        self.assertEqual(
+            [c.name for c in eb.component_data_objects(Constraint)],
+            ['expanded_arcs[0].f_equality[0,a]',
+             'expanded_arcs[0].f_equality[0,b]',
+             'expanded_arcs[0].p_equality[0]'])
+
+        self.assertIs(m.a2.expanded_block[2], m.a2[2].expanded_block)
+        self.assertIs(m.a2[2].expanded_block.p_equality, blk.p_equality[1])
+        self.assertEqual(str(blk.p_equality[1].body), 'p[2] - p[3]')
+
+        m2 = m.clone()
+        self.assertIs(m2.a1.expanded_block.p_equality,
+                      m2.expanded_arcs[0].p_equality[0])
+
+    def test_expand_bulk_count(self):
+        def build(extensive=False):
+            m = ConcreteModel()
+            m.comps = Set(initialize=['a', 'b'])
+            def node(b, i):
+                b.p = Var()
+                b.f = Var(m.comps)
+                b.q = Var()
+                b.g = Var(m.comps)
+                b.outlet = Port(initialize={'p': b.p, 'f': b.f})
+                b.inlet = Port(initialize={'p': b.q, 'f': b.g})
+                b.x = Var()
+                b.e = Port()
+                b.e.add(b.x, 'v', Port.Extensive)
+            m.node = Block(range(5), rule=node)
+            m.feed = Arc(source=m.node[0].outlet, destination=m.node[1].inlet)
+            def stream(m, i):
+                if i == 3:
+                    return (m.node[3].e, m.node[4].e)
+                return (m.node[i].outlet, m.node[i + 1].inlet)
+            m.stream = Arc(range(1, 4 if extensive else 3), rule=stream)
+            return m
+
+        m1 = build()
+        TransformationFactory('network.expand_arcs').apply_to(m1)
+        m2 = build()
+        TransformationFactory('network.expand_arcs').apply_to(m2, bulk=True)
+
+        def rows(m):
+            return sorted(str(c.body) for c in
+                          m.component_data_objects(Constraint, active=True))
+        self.assertEqual(len(rows(m2)), 9)
+        self.assertEqual(rows(m1), rows(m2))
+        self.assertEqual(
+            [c.name for c in m2.stream[2].expanded_block.component_data_objects(
+                Constraint)],
+            ['expanded_arcs[0].f_equality[2,a]',
+             'expanded_arcs[0].f_equality[2,b]',
+             'expanded_arcs[0].p_equality[2]'])
+
+        # Arc components with an arc that cannot be expanded in bulk are
+        # expanded as usual
+        m3 = build(extensive=True)
+        TransformationFactory('network.expand_arcs').apply_to(m3, bulk=True)
+        self.assertIs(m3.stream[1].expanded_block, m3.stream_expanded[1])
+        self.assertIs(m3.stream[1].expanded_block.p_equality,
+                      m3.stream_expanded[1].p_equality)
+        self.assertEqual(len(m3.expanded_arcs), 1)
+        self.assertEqual(list(m3.expanded_arcs[0].arc_index), [0])
+        self.assertTrue(set(rows(m1)).issubset(rows(m3)))
+
+
+    def test_expand_bulk_sub_block(self):
+        def build():
+            m = ConcreteModel()
+            m.x = Var()
+            m.y = Var()
+            m.p1 = Port(initialize={'v': m.x})
+            m.p2 = Port(initialize={'v': m.y})
+            m.a = Arc(source=m.p1, destination=m.p2)
+            m.b = Block()
+            m.b.x = Var()
+            m.b.y = Var()
+            m.b.p1 = Port(initialize={'v': m.b.x})
+            m.b.p2 = Port(initialize={'v': m.b.y})
+            m.b.a = Arc(source=m.b.p1, destination=m.b.p2)
+            return m
+
+        def rows(m):
+            return sorted(str(c.body) for c in
+                          m.component_data_objects(Constraint, active=True))
+
+        m1 = build()
+        TransformationFactory('network.expand_arcs').apply_to(m1)
+        m2 = build()
+        TransformationFactory('network.expand_arcs').apply_to(m2, bulk=True)
+        self.assertEqual(rows(m1), rows(m2))
+
+        # The arcs of each block are grouped on an expanded_arcs block of
+        # their own block, even if their ports have the same structure
+        self.assertEqual(list(m2.expanded_arcs[0].arc_index), [0])
+        self.assertEqual(list(m2.b.expanded_arcs[0].arc_index), [0])
+        self.assertIs(m2.b.a.expanded_block.v_equality,
+                      m2.b.expanded_arcs[0].v_equality[0])
+        self.assertEqual(str(m2.b.a.expanded_block.v_equality.body),
+                         'b.x - b.y')
+
+        # ... so the constraints follow the activity of the block
+        m1.b.deactivate()
+        m2.b.deactivate()
+        self.assertEqual(rows(m2), ['x - y'])
+        self.assertEqual(rows(m1), rows(m2))
+
     def test_inactive(self):
         m = ConcreteModel()
         m.x = Var()
@@ -13,7 +13,8 @@
 
 import pyutilib.th as unittest
 
-from pyomo.common.dependencies import numpy_available, networkx_available
+from pyomo.common.dependencies import (
+    numpy_available, networkx_available, networkx as nx)
 from pyomo.environ import SolverFactory, value, ConcreteModel, Set, Block, Var, TransformationFactory, Reference
 from pyomo.network import Port, SequentialDecomposition, Arc
 from types import MethodType
@@ -695,18 +696,209 @@ class TestSequentialDecomposition(unittest.TestCase):
     def test_simple_recycle_wegstein_rel(self):
         self.simple_recycle_run(tear_method="Wegstein", tol_type="rel")
 
+    def test_simple_recycle_broyden_abs(self):
+        self.simple_recycle_run(tear_method="Broyden", tol_type="abs")
+
+    def test_simple_recycle_anderson_abs(self):
+        self.simple_recycle_run(tear_method="Anderson", tol_type="abs")
+
+    def test_simple_recycle_broyden_rel(self):
+        self.simple_recycle_run(tear_method="Broyden", tol_type="rel")
+
+    def test_simple_recycle_anderson_rel(self):
+        self.simple_recycle_run(tear_method="Anderson", tol_type="rel")
+
     def test_extensive_recycle_direct_abs(self):
         self.extensive_recycle_run(tear_method="Direct", tol_type="abs")
 
     def test_extensive_recycle_wegstein_abs(self):
         self.extensive_recycle_run(tear_method="Wegstein", tol_type="abs")
 
+    def test_extensive_recycle_broyden_abs(self):
+        self.extensive_recycle_run(tear_method="Broyden", tol_type="abs")
+
+    def test_extensive_recycle_anderson_abs(self):
+        self.extensive_recycle_run(tear_method="Anderson", tol_type="abs")
+
     def test_extensive_recycle_direct_rel(self):
         self.extensive_recycle_run(tear_method="Direct", tol_type="rel")
 
     def test_extensive_recycle_wegstein_rel(self):
         self.extensive_recycle_run(tear_method="Wegstein", tol_type="rel")
 
+    def parallel_units_model(self):
+        # Two independent trains feed -> unit -> prod, so the units of
+        # each stage of the calculation order can be computed at once
+        m = ConcreteModel()
+        for i in (1, 2):
+            feed = Block()
+            m.add_component("feed%s" % i, feed)
+            feed.flow = Var(initialize=10.0*i)
+            feed.flow.fix()
+            feed.outlet = Port(initialize={"flow": feed.flow})
+
+            unit = Block()
+            m.add_component("unit%s" % i, unit)
+            unit.flow_in = Var()
+            unit.flow_out = Var()
+            unit.duty = Var()
+            unit.inlet = Port(initialize={"flow": unit.flow_in})
+            unit.outlet = Port(initialize={"flow": unit.flow_out})
+
+            prod = Block()
+            m.add_component("prod%s" % i, prod)
+            prod.flow = Var()
+            prod.inlet = Port(initialize={"flow": prod.flow})
+
+            m.add_component("feed_to_unit%s" % i,
+                            Arc(source=feed.outlet, destination=unit.inlet))
+            m.add_component("unit_to_prod%s" % i,
+                            Arc(source=unit.outlet, destination=prod.inlet))
+        TransformationFactory("network.expand_arcs").apply_to(m)
+        return m
+
+    def parallel_units_run(self, parallel_method):
+        m = self.parallel_units_model()
+
+        def function(unit):
+            if unit.component("duty") is not None:
+                unit.flow_out.value = 2*unit.flow_in.value
+                unit.duty.value = unit.flow_in.value + 1
+                unit.duty.fix()
+
+        seq = SequentialDecomposition(num_workers=2,
+            parallel_method=parallel_method)
+        seq.set_tear_set([])
+        seq.run(m, function)
+
+        for i in (1, 2):
+            unit = m.component("unit%s" % i)
+            self.assertAlmostEqual(unit.flow_out.value, 20.0*i)
+            self.assertAlmostEqual(unit.duty.value, 10.0*i + 1)
+            self.assertTrue(unit.duty.fixed)
+            self.assertFalse(unit.flow_in.fixed)
+            self.assertAlmostEqual(
+                m.component("prod%s" % i).flow.value, 20.0*i)
+        self.assertEqual(len(seq.unit_timing), 6)
+        for unit, times in seq.unit_timing.items():
+            self.assertEqual(len(times), 1)
+
+    def test_parallel_units_process(self):
+        self.parallel_units_run("process")
+
+    def test_parallel_units_thread(self):
+        self.parallel_units_run("thread")
+
+    def test_parallel_units_invalid(self):
+        m = self.parallel_units_model()
+        seq = SequentialDecomposition(num_workers=2, parallel_method="mpi")
+        seq.set_tear_set([])
+        with self.assertRaisesRegexp(ValueError, "Invalid parallel_method"):
+            seq.run(m, lambda unit: None)
+
+    def test_tear_history(self):
+        guess = {
+            "flow": {"A": 0, "B": 0, "C": 0},
+            "temperature": 450,
+            "pressure": 128}
+
+        iterations = {}
+        for tear_method in ("Direct", "Wegstein", "Broyden", "Anderson"):
+            m = self.simple_recycle_model()
+            m.mixer.expr_var_idx_in_side_2["A"] = 0
+            m.mixer.expr_var_idx_in_side_2["B"] = 0
+            m.mixer.expr_var_idx_in_side_2["C"] = 0
+            m.mixer.expr_var_in_side_2 = 0
+            seq = SequentialDecomposition(tear_method=tear_method)
+            seq.set_tear_set([m.stream_splitter_to_mixer])
+            seq.set_guesses_for(m.mixer.inlet_side_2, guess)
+            seq.run(m, lambda unit: unit.initialize())
+
+            self.assertEqual(len(seq.tear_history), 1)
+            arcs, hist = seq.tear_history[0]
+            self.assertEqual(arcs, [m.stream_splitter_to_mixer])
+            self.assertLess(max(abs(hist[-1])), 1e-5)
+            self.assertEqual(len(hist[0]), len(hist[-1]))
+            iterations[tear_method] = len(hist)
+
+        # the accelerated methods should not need more iterations than
+        # direct substitution
+        for tear_method in ("Wegstein", "Broyden", "Anderson"):
+            self.assertLessEqual(iterations[tear_method],
+                                 iterations["Direct"])
+
+    def test_select_tear_scc(self):
+        m = self.simple_recycle_model()
+        seq = SequentialDecomposition()
+        G = seq.create_graph(m)
+        tset = seq.select_tear_scc(G)
+        self.assertEqual(len(tset), 1)
+        self.assertTrue(seq.check_tear_set(G, tset))
+        self.assertIs(seq.select_tear_scc(G), tset)
+
+        tset_greedy = seq.select_tear_scc(G, refine_method=None)
+        self.assertEqual(len(tset_greedy), 1)
+        self.assertTrue(seq.check_tear_set(G, tset_greedy))
+
+        tset_arcs = seq.tear_set_arcs(G, "scc")
+        self.assertIn(tset_arcs[0], (m.stream_mixer_to_unit,
+            m.stream_unit_to_splitter, m.stream_splitter_to_mixer))
+
+        with self.assertRaisesRegexp(ValueError, "Invalid refine_method"):
+            seq.select_tear_scc(G, refine_method="exhaustive")
+
+    def test_select_tear_scc_large(self):
+        # A chain of units with many recycles from later units to
+        # earlier ones, and some parallel edges and self loops
+        G = nx.MultiDiGraph()
+        n = 1000
+        for i in range(n - 1):
+            G.add_edge(i, i + 1)
+        for i in range(0, n, 7):
+            G.add_edge(i, (i*37) % (i + 1))
+        for i in range(0, n, 97):
+            G.add_edge(i, i)
+            G.add_edge(i + 1, i)
+
+        seq = SequentialDecomposition()
+        tset = seq.select_tear_scc(G)
+        edge_list = seq.idx_to_edge(G)
+        H = G.copy()
+        H.remove_edges_from([edge_list[i] for i in tset])
+        self.assertTrue(nx.is_directed_acyclic_graph(H))
+        # The tears found by the greedy heuristic are all necessary
+        for i in tset:
+            H.add_edge(*edge_list[i])
+            self.assertFalse(nx.is_directed_acyclic_graph(H))
+            H.remove_edge(*edge_list[i])
+
+    def test_select_tear_scc_in_run(self):
+        m = self.simple_recycle_model()
+
+        def function(unit):
+            unit.initialize()
+
+        seq = SequentialDecomposition()
+        tset = [m.stream_splitter_to_mixer]
+        seq.set_tear_set(tset)
+        splitter_to_mixer_guess = {
+            "flow": {"A": 0, "B": 0, "C": 0},
+            "temperature": 450,
+            "pressure": 128}
+        seq.set_guesses_for(m.mixer.inlet_side_2, splitter_to_mixer_guess)
+        m.mixer.expr_var_idx_in_side_2["A"] = 0
+        m.mixer.expr_var_idx_in_side_2["B"] = 0
+        m.mixer.expr_var_idx_in_side_2["C"] = 0
+        m.mixer.expr_var_in_side_2 = 0
+        seq.run(m, function)
+
+        # everything has values now, so whichever arc is torn does not
+        # need guesses
+        seq = SequentialDecomposition(select_tear_method="scc")
+        seq.run(m, function)
+        self.check_recycle_model(m)
+        self.assertEqual(len(seq.tear_cache), 1)
+
     @unittest.skipIf(not gams_available, "GAMS solver not available")
     def test_tear_selection(self):
         m = self.simple_recycle_model()
@@ -12,3 +12,4 @@ from pyomo.opt.parallel.async_solver import (Factory, AsynchronousActionManager,
 import pyomo.opt.parallel.manager
 import pyomo.opt.parallel.pyro
 import pyomo.opt.parallel.local
+import pyomo.opt.parallel.process_pool
@@ -0,0 +1,355 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+"""A solver manager backed by a pool of long-lived worker processes.
+
+Every call to ``SolverFactory('cbc').solve()`` pays for writing the
+problem file and spawning a new solver process, and every solve through
+a direct interface in a fresh process pays for importing the solver
+bindings and checking out a license.  For workloads that solve very many
+small problems (e.g., decomposition subproblems) these fixed costs can
+dominate.  The ``pool`` solver manager starts a number of worker
+processes once; each worker constructs every requested solver a single
+time and reuses it (together with its environment / license token) for
+all problems dispatched to it::
+
+    with SolverManagerFactory('pool', num_workers=4) as mngr:
+        handles = [mngr.queue(m, opt='gurobi_direct') for m in models]
+        mngr.wait_all(handles)
+        for ah in handles:
+            results = mngr.get_results(ah)
+
+Models are pickled and sent to the workers.  When the solve finishes,
+the variable values (and the values of any active import suffixes) are
+sent back and loaded into the original model.  The greatest benefit is
+obtained with the direct interfaces (``gurobi_direct``,
+``cplex_direct``, ...) that run the solver inside the worker process.
+
+If a worker process dies (e.g., the solver crashes or the process is
+killed), the solve it was running cannot be recovered: the manager
+notices while waiting, fails every outstanding action handle with an
+error, and shuts the pool down.  The next queued solve starts a new set
+of workers.
+"""
+
+__all__ = ()
+
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+
+from six.moves import cPickle as pickle
+from six.moves import queue
+
+from pyomo.opt.parallel.manager import (ActionManagerError,
+                                        ActionStatus,
+                                        ActionHandle)
+from pyomo.opt.parallel.async_solver import (AsynchronousSolverManager,
+                                             SolverManagerFactory)
+
+from six import string_types
+
+logger = logging.getLogger('pyomo.opt')
+
+
+def _collect_solution(model):
+    """Gather the values to send back to the parent process.
+
+    Variable values are returned as a list aligned with the
+    (deterministic) ordering of ``component_data_objects(Var)``, which
+    is identical for the original and the unpickled model.  Suffix
+    values are keyed by the position of the component in the ordering of
+    all component data on the model.
+    """
+    from pyomo.core.base.var import Var
+    from pyomo.core.base.suffix import active_import_suffix_generator
+
+    values = [v.value for v in model.component_data_objects(
+        Var, descend_into=True, sort=False)]
+    suffixes = {}
+    import_suffixes = list(active_import_suffix_generator(model))
+    if import_suffixes:
+        position = dict(
+            (id(c), i) for i, c in enumerate(model.component_data_objects(
+                descend_into=True, sort=False)))
+        for name, suffix in import_suffixes:
+            suffixes[name] = [
+                (position[id(c)], val) for c, val in suffix.items()
+                if id(c) in position]
+    return values, suffixes
+
+
+def _load_solution(model, values, suffixes):
+    """Load the values produced by :func:`_collect_solution`"""
+    from pyomo.core.base.var import Var
+
+    for var, val in zip(model.component_data_objects(
+            Var, descend_into=True, sort=False), values):
+        var.set_value(val, valid=True)
+    if suffixes:
+        components = list(model.component_data_objects(
+            descend_into=True, sort=False))
+        for name, data in suffixes.items():
+            suffix = model.component(name)
+            suffix.clear_all_values()
+            for i, val in data:
+                suffix[components[i]] = val
+
+
+def _pool_worker(task_queue, result_queue, modules):
+    """Main loop of a pool worker process.
+
+    Solvers are constructed on first use and cached for the lifetime of
+    the worker, so that solver environments and licenses are reused.
+    """
+    import pyomo.environ
+    from pyomo.opt import SolverFactory
+    for module in modules:
+        __import__(module)
+
+    solvers = {}
+    try:
+        while True:
+            task = task_queue.get()
+            if task is None:
+                break
+            ah_id, solver_name, solver_options, data, kwds = task
+            start = time.time()
+            try:
+                opt = solvers.get(solver_name)
+                if opt is None:
+                    opt = solvers[solver_name] = SolverFactory(solver_name)
+                model = pickle.loads(data)
+                opt.options.clear()
+                opt.options.update(solver_options)
+                results = opt.solve(model, **kwds)
+                values, suffixes = _collect_solution(model)
+                result_queue.put((ah_id, None, results, values, suffixes,
+                                  time.time() - start, os.getpid()))
+            except Exception:
+                result_queue.put((ah_id, traceback.format_exc(), None, None,
+                                  None, time.time() - start, os.getpid()))
+    finally:
+        for opt in solvers.values():
+            deactivate = getattr(opt, 'deactivate', None)
+            if deactivate is not None:
+                try:
+                    deactivate()
+                except Exception:
+                    pass
+
+
+@SolverManagerFactory.register(
+    "pool", doc="Execute solvers in a pool of persistent worker processes")
+class SolverManager_Pool(AsynchronousSolverManager):
+    """Solver manager that dispatches models to persistent workers
+
+    Keyword Arguments
+    -----------------
+    num_workers: int
+        Number of worker processes (defaults to the number of CPUs)
+    modules: list of str
+        Modules imported by every worker before solving (e.g., to
+        register additional solver plugins)
+    start_method: str
+        The multiprocessing start method ('fork', 'spawn', ...).
+        Defaults to the platform default.
+    poll_interval: float
+        Seconds to wait for a result before checking that the workers
+        are still alive (defaults to 1)
+    """
+
+    def __init__(self, **kwds):
+        self._num_workers = kwds.pop('num_workers', None) \
+            or multiprocessing.cpu_count()
+        self._modules = list(kwds.pop('modules', ()))
+        start_method = kwds.pop('start_method', None)
+        self._poll_interval = kwds.pop('poll_interval', 1)
+        if start_method is None:
+            self._context = multiprocessing
+        else:
+            self._context = multiprocessing.get_context(start_method)
+        self._workers = []
+        self._task_queue = None
+        self._result_queue = None
+        super(SolverManager_Pool, self).__init__(**kwds)
+
+    def clear(self):
+        """
+        Clear manager state
+        """
+        super(SolverManager_Pool, self).clear()
+        # map from action handle id to (model, load_solutions, queue time)
+        self._pending = {}
+        # handles that completed while checking for dead workers
+        self._completed = []
+
+    def _start_workers(self):
+        self._task_queue = self._context.Queue()
+        self._result_queue = self._context.Queue()
+        for i in range(self._num_workers):
+            p = self._context.Process(
+                target=_pool_worker,
+                args=(self._task_queue, self._result_queue, self._modules))
+            p.daemon = True
+            p.start()
+            self._workers.append(p)
+
+    def close(self):
+        """Shut down the worker processes"""
+        if not self._workers:
+            return
+        if self._pending:
+            logger.warning(
+                "%s is closing with %s solves still running."
+                % (type(self).__name__, len(self._pending)))
+        for p in self._workers:
+            self._task_queue.put(None)
+        for p in self._workers:
+            p.join(10)
+        self._stop_workers()
+        self._pending = {}
+
+    def _stop_workers(self):
+        # Tasks left in the queue will never be read; do not let them
+        # block the exit of this process
+        self._task_queue.cancel_join_thread()
+        for p in self._workers:
+            if p.is_alive():
+                p.terminate()
+            p.join()
+        self._workers = []
+        self._task_queue = None
+        self._result_queue = None
+
+    def __exit__(self, t, v, traceback):
+        self.close()
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    def _perform_queue(self, ah, *args, **kwds):
+        """
+        Perform the queue operation.  This method returns the ActionHandle,
+        and the ActionHandle status indicates whether the queue was successful.
+        """
+        opt = kwds.pop('solver', kwds.pop('opt', None))
+        if opt is None:
+            raise ActionManagerError(
+                "No solver passed to %s, use keyword option 'solver'"
+                % (type(self).__name__) )
+        if isinstance(opt, string_types):
+            solver_name = opt
+            solver_options = {}
+        else:
+            # Solver objects cannot be sent to the workers; recreate
+            # them there by name.
+            solver_name = opt.name
+            solver_options = dict(opt.options)
+        solver_options.update(kwds.pop('options', {}))
+        if len(args) != 1:
+            raise ActionManagerError(
+                "%s expects exactly one model per solve (received %s)"
+                % (type(self).__name__, len(args)))
+        model = args[0]
+        load_solutions = kwds.pop('load_solutions', True)
+
+        if not self._workers:
+            self._start_workers()
+        data = pickle.dumps(model, pickle.HIGHEST_PROTOCOL)
+        self._pending[ah.id] = (model, load_solutions, time.time())
+        self._task_queue.put(
+            (ah.id, solver_name, solver_options, data, kwds))
+        ah.status = ActionStatus.queued
+        return ah
+
+    def _perform_wait_any(self):
+        """
+        Perform the wait_any operation.  This method returns an
+        ActionHandle with the results of waiting.
+        """
+        if self._completed:
+            return self._completed.pop(0)
+        if not self._pending:
+            return ActionHandle(error=True,
+                                explanation=("No queued solves available in "
+                                             "the 'pool' solver manager"))
+
+        try:
+            result = self._result_queue.get(timeout=self._poll_interval)
+        except queue.Empty:
+            # Returning None makes wait_any() call us again
+            self._check_workers()
+            return None
+        return self._process_result(result)
+
+    def _process_result(self, result):
+        ah_id, error, results, values, suffixes, solve_time, pid = result
+        model, load_solutions, queue_time = self._pending.pop(ah_id)
+        ah = self.event_handle[ah_id]
+        if error is not None:
+            logger.error("Solve %s failed in pool worker %s:\n%s"
+                         % (ah_id, pid, error))
+            ah.status = ActionStatus.error
+            ah.explanation = error
+            self.results[ah_id] = None
+            return ah
+        if load_solutions:
+            _load_solution(model, values, suffixes)
+        results.pyomo_solve_time = solve_time
+        results.pyomo_wall_time = time.time() - queue_time
+        results.pool_worker = pid
+        self.results[ah_id] = results
+        ah.status = ActionStatus.done
+        return ah
+
+    def _check_workers(self):
+        """Fail the outstanding solves if a worker process has died
+
+        There is no way to tell which solve the dead worker was running,
+        so every pending solve is failed and the pool is shut down.
+        """
+        dead = [p for p in self._workers if not p.is_alive()]
+        if not dead:
+            return
+        explanation = (
+            "Pool worker process %s exited unexpectedly (exit code %s)"
+            % (', '.join(str(p.pid) for p in dead),
+               ', '.join(str(p.exitcode) for p in dead)))
+        logger.error("%s; failing %s outstanding solves and shutting down "
+                     "the pool" % (explanation, len(self._pending)))
+        self._stop_workers()
+        # A worker killed while writing to the result queue leaves it in
+        # an unknown state, so results that were not yet received are
+        # discarded with the queue.
+        for ah_id in sorted(self._pending):
+            ah = self.event_handle[ah_id]
+            ah.status = ActionStatus.error
+            ah.explanation = explanation
+            self.results[ah_id] = None
+            self._completed.append(ah)
+        self._pending = {}
+
+    def solve_all(self, solver, instances, **kwds):
+        """
+        Solve all instances in the worker pool, loading the solutions
+        into the instances.
+        """
+        kwds['opt'] = solver
+        kwds['load_solutions'] = True
+        action_handles = [self.queue(instance, **kwds)
+                          for instance in instances]
+        self.wait_all(action_handles)
+        for action_handle in action_handles:
+            self.get_results(action_handle)
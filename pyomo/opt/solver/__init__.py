@@ -11,3 +11,5 @@
 from pyomo.opt.solver.shellcmd import (ResultsFormat, OptSolver, SolverStatus,
                                        SolverResults, SystemCallSolver)
 from pyomo.opt.solver.ilmcmd import ILMLicensedSystemCallSolver
+from pyomo.opt.solver.progress import (ProgressEvent, LogParser,
+                                       ProgressLogStream)
@@ -0,0 +1,245 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+"""Incremental parsing of solver logs while the solver is running.
+
+Shell solver plugins normally only look at the solver output after the
+process has exited.  The classes in this module allow a
+:class:`SystemCallSolver` to parse the output line by line as it is
+produced and report structured :class:`ProgressEvent` objects to a user
+callback (or queue).  A callback that returns ``True`` requests that the
+solver be interrupted, which allows simple early-termination policies::
+
+    def stop_at_one_percent(event):
+        print(event)
+        return event.gap is not None and event.gap <= 0.01
+
+    SolverFactory('cbc').solve(model, progress_callback=stop_at_one_percent)
+"""
+
+__all__ = ['ProgressEvent', 'LogParser', 'ProgressLogStream']
+
+import logging
+import os
+import signal
+import sys
+import time
+
+from six import StringIO
+
+logger = logging.getLogger('pyomo.opt')
+
+
+def _to_float(val):
+    """Convert a token from a solver log to a float (None on failure)"""
+    try:
+        return float(val.rstrip('%,'))
+    except (ValueError, AttributeError):
+        return None
+
+
+def _to_int(val):
+    """Convert a token from a solver log to an int (None on failure)"""
+    try:
+        return int(val.rstrip('+,'))
+    except (ValueError, AttributeError):
+        return None
+
+
+class ProgressEvent(object):
+    """A single progress report parsed from a solver log
+
+    Attributes
+    ----------
+    solver: str
+        Name of the solver that produced the event
+    kind: str
+        The type of log line that produced the event (e.g., 'node',
+        'incumbent', 'iteration')
+    incumbent: float
+        Objective value of the best known (feasible) solution, or the
+        current objective value for continuous / NLP solvers
+    bound: float
+        Best known bound on the optimal objective
+    gap: float
+        Relative gap between incumbent and bound (as a fraction,
+        i.e., 0.01 is 1%)
+    iteration: int
+        Iteration count (simplex / interior point iterations)
+    nodes: int
+        Number of explored branch-and-bound nodes
+    elapsed: float
+        Elapsed time (in seconds).  Taken from the log when the solver
+        reports it, otherwise measured from the start of parsing.
+    line: str
+        The raw log line
+    """
+
+    __slots__ = ('solver', 'kind', 'incumbent', 'bound', 'gap',
+                 'iteration', 'nodes', 'elapsed', 'line')
+
+    def __init__(self, solver=None, kind=None, incumbent=None, bound=None,
+                 gap=None, iteration=None, nodes=None, elapsed=None,
+                 line=None):
+        self.solver = solver
+        self.kind = kind
+        self.incumbent = incumbent
+        self.bound = bound
+        self.gap = gap
+        self.iteration = iteration
+        self.nodes = nodes
+        self.elapsed = elapsed
+        self.line = line
+
+    def __repr__(self):
+        return "ProgressEvent(%s)" % (
+            ', '.join("%s=%r" % (k, getattr(self, k))
+                      for k in self.__slots__[:-1]
+                      if getattr(self, k) is not None),)
+
+    def compute_gap(self):
+        """Fill in the relative gap from the incumbent and bound (if both
+        are known and the solver did not report a gap)"""
+        if self.gap is None and self.incumbent is not None \
+           and self.bound is not None:
+            self.gap = abs(self.incumbent - self.bound) \
+                       / max(abs(self.incumbent), 1e-10)
+        return self.gap
+
+
+class LogParser(object):
+    """Base class for incremental (streaming) solver log parsers
+
+    Derived classes implement :meth:`parse_line`, which receives one
+    complete log line at a time and returns either a
+    :class:`ProgressEvent` or None.  Parsers are free to keep state
+    between lines (e.g., whether the node log table header has been
+    seen).
+
+    Parameters
+    ----------
+    callback: callable or queue
+        Receives every parsed event.  If the object has a ``put()``
+        method (e.g., :class:`queue.Queue`), events are put on the
+        queue; otherwise it is called with the event as its only
+        argument.  A callable returning ``True`` requests that the
+        solver be interrupted.
+    """
+
+    solver = None
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        """Reset the parser state before a new solve"""
+        self.terminate_requested = False
+        self.last_event = None
+        self.num_events = 0
+        self._partial = ''
+        self._start_time = time.time()
+
+    def feed(self, data):
+        """Process a chunk of solver output (need not end with a newline)"""
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._process_line(line.rstrip('\r'))
+
+    def close(self):
+        """Process any remaining (unterminated) output"""
+        if self._partial:
+            line, self._partial = self._partial, ''
+            self._process_line(line.rstrip('\r'))
+
+    def parse_line(self, line):
+        """Parse a single log line, returning a ProgressEvent or None"""
+        raise NotImplementedError
+
+    def _process_line(self, line):
+        try:
+            event = self.parse_line(line)
+        except Exception:
+            # A malformed / unexpected log line should never abort the
+            # solve; the final results come from the regular parsers.
+            logger.debug("Error parsing %s log line: %r", self.solver, line,
+                         exc_info=True)
+            return
+        if event is not None:
+            self.emit(event)
+
+    def emit(self, event):
+        """Report an event to the callback"""
+        if event.solver is None:
+            event.solver = self.solver
+        if event.elapsed is None:
+            event.elapsed = time.time() - self._start_time
+        event.compute_gap()
+        self.last_event = event
+        self.num_events += 1
+        if self.callback is None:
+            return
+        put = getattr(self.callback, 'put', None)
+        if put is not None:
+            put(event)
+        elif self.callback(event):
+            self.terminate_requested = True
+
+
+class ProgressLogStream(object):
+    """A write-only stream that feeds solver output to a LogParser
+
+    The stream accumulates all output (so that it can be written to the
+    solver log file after the solve), optionally echoes it to stdout,
+    and interrupts the running solver process the first time the parser
+    reports that termination was requested.
+    """
+
+    def __init__(self, parser, tee=False):
+        self.parser = parser
+        self.tee = tee
+        self.interrupted = False
+        self._buffer = StringIO()
+
+    def write(self, data):
+        self._buffer.write(data)
+        if self.tee:
+            sys.stdout.write(data)
+        self.parser.feed(data)
+        if self.parser.terminate_requested and not self.interrupted:
+            self.interrupted = True
+            self._interrupt_process()
+
+    def flush(self):
+        if self.tee:
+            sys.stdout.flush()
+
+    def getvalue(self):
+        self.parser.close()
+        return self._buffer.getvalue()
+
+    def _interrupt_process(self):
+        # pyutilib records the Popen object of the running command.
+        # Solvers treat SIGINT as a user interrupt: they stop the
+        # search and (in most cases) still report the incumbent.
+        from pyutilib.subprocess.processmngr import GlobalData
+        process = GlobalData.current_process
+        if process is None:
+            return
+        logger.info("Interrupting %s at the request of the progress "
+                    "callback", self.parser.solver)
+        try:
+            if os.name == 'nt':
+                process.terminate()
+            else:
+                process.send_signal(signal.SIGINT)
+        except OSError:
+            # The process already exited
+            pass
@@ -24,7 +24,8 @@ from pyutilib.subprocess import run
 import pyomo.common
 from pyomo.opt.base import ResultsFormat
 from pyomo.opt.base.solvers import OptSolver
-from pyomo.opt.results import SolverStatus, SolverResults
+from pyomo.opt.results import SolverStatus, SolverResults, TerminationCondition
+from pyomo.opt.solver.progress import ProgressLogStream
 
 logger = logging.getLogger('pyomo.opt')
 
@@ -32,6 +33,10 @@ logger = logging.getLogger('pyomo.opt')
 class SystemCallSolver(OptSolver):
     """ A generic command line solver """
 
+    # Derived classes that can parse their log while the solver is
+    # running set this to a pyomo.opt.solver.progress.LogParser subclass
+    _log_parser_class = None
+
     def __init__(self, **kwargs):
         """ Constructor """
 
@@ -47,6 +52,8 @@ class SystemCallSolver(OptSolver):
         # a solver plugin may not report execution time.
         self._last_solve_time = None
         self._define_signal_handlers = None
+        self._progress_callback = None
+        self._log_stream = None
 
         if executable is not None:
             self.set_executable(name=executable, validate=validate)
@@ -194,6 +201,13 @@ class SystemCallSolver(OptSolver):
 
         self._keepfiles = kwds.pop("keepfiles", False)
         self._define_signal_handlers = kwds.pop('use_signal_handling',None)
+        self._progress_callback = kwds.pop('progress_callback', None)
+        if self._progress_callback is not None \
+           and self._log_parser_class is None:
+            logger.warning(
+                "Solver %s does not support parsing its log while "
+                "running; the progress_callback will not be called."
+                % (self.name,))
 
         OptSolver._presolve(self, *args, **kwds)
 
@@ -287,6 +301,16 @@ class SystemCallSolver(OptSolver):
 
         return results
 
+    def _create_log_stream(self):
+        """
+        Create the stream that parses the solver output while the
+        solver is running (None if no progress callback was given).
+        """
+        if self._progress_callback is None or self._log_parser_class is None:
+            return None
+        return ProgressLogStream(
+            self._log_parser_class(self._progress_callback), tee=self._tee)
+
     def _execute_command(self,command):
         """
         Execute the command
@@ -294,6 +318,12 @@ class SystemCallSolver(OptSolver):
 
         start_time = time.time()
 
+        self._log_stream = self._create_log_stream()
+        if self._log_stream is None:
+            run_kwds = {'tee': self._tee}
+        else:
+            # The stream handles echoing the output (if requested)
+            run_kwds = {'tee': False, 'ostream': self._log_stream}
         try:
             if 'script' in command:
                 _input = command.script
@@ -304,14 +334,16 @@ class SystemCallSolver(OptSolver):
                 stdin = _input,
                 timelimit = self._timelimit if self._timelimit is None else self._timelimit + max(1, 0.01*self._timelimit),
                 env   = command.env,
-                tee   = self._tee,
-                define_signal_handlers = self._define_signal_handlers
+                define_signal_handlers = self._define_signal_handlers,
+                **run_kwds
              )
         except OSError:
             err = sys.exc_info()[1]
             msg = 'Could not execute the command: %s\tError message: %s'
             raise ApplicationError(msg % (command.cmd, err))
         sys.stdout.flush()
+        if self._log_stream is not None:
+            log = self._log_stream.getvalue()
 
         self._last_solve_time = time.time() - start_time
 
@@ -359,6 +391,13 @@ class SystemCallSolver(OptSolver):
         if self._last_solve_time != None:
             results.solver.time=self._last_solve_time
 
+        if self._log_stream is not None and self._log_stream.interrupted:
+            results.solver.termination_condition = \
+                TerminationCondition.userInterrupt
+            results.solver.status = SolverStatus.aborted
+            results.solver.message = \
+                "Solver interrupted by the progress callback"
+
         return results
 
     def _default_results_format(self, prob_format):
@@ -0,0 +1,197 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+#
+# Unit Tests for the 'pool' solver manager
+#
+
+import os
+import signal
+import time
+
+import pyutilib.th as unittest
+
+from pyomo.common.collections import Options
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           Suffix, SolverManagerFactory)
+from pyomo.opt import (SolverFactory, SolverResults, TerminationCondition,
+                       SolverStatus)
+from pyomo.opt.parallel.manager import ActionManagerError, ActionStatus
+
+
+_constructed = []
+
+@SolverFactory.register('_test_pool_solver', doc='Pool test solver')
+class PoolTestSolver(object):
+    """Sets every variable to its lower bound (scaled by the 'scale'
+    option) and reports the duals as the constraint indices"""
+
+    def __init__(self, **kwds):
+        self.name = '_test_pool_solver'
+        self.options = Options()
+        _constructed.append(os.getpid())
+
+    def solve(self, model, **kwds):
+        scale = self.options.get('scale', 1)
+        for v in model.component_data_objects(Var):
+            v.value = v.lb * scale
+        if hasattr(model, 'dual'):
+            for i, c in enumerate(model.component_data_objects(Constraint)):
+                model.dual[c] = i
+        results = SolverResults()
+        results.solver.status = SolverStatus.ok
+        results.solver.termination_condition = TerminationCondition.optimal
+        # Report how many solvers this worker has constructed
+        results.solver.message = str(len(_constructed))
+        return results
+
+
+@SolverFactory.register('_test_pool_failing_solver', doc='Pool test solver')
+class PoolTestFailingSolver(PoolTestSolver):
+
+    def solve(self, model, **kwds):
+        raise RuntimeError("solver exploded")
+
+
+@SolverFactory.register('_test_pool_dying_solver', doc='Pool test solver')
+class PoolTestDyingSolver(PoolTestSolver):
+
+    def solve(self, model, **kwds):
+        os._exit(3)
+
+
+@SolverFactory.register('_test_pool_slow_solver', doc='Pool test solver')
+class PoolTestSlowSolver(PoolTestSolver):
+
+    def solve(self, model, **kwds):
+        time.sleep(60)
+        return super(PoolTestSlowSolver, self).solve(model, **kwds)
+
+
+def _make_model(n, lb=1):
+    m = ConcreteModel()
+    m.x = Var(range(n), bounds=(lb, None))
+    m.y = Var(bounds=(2*lb, None))
+    m.c = Constraint(expr=sum(m.x.values()) >= m.y)
+    m.o = Objective(expr=m.y)
+    return m
+
+
+@unittest.skipIf(os.name == 'nt', "Pool tests rely on fork")
+class TestProcessPool(unittest.TestCase):
+
+    def setUp(self):
+        self.mngr = SolverManagerFactory(
+            'pool', num_workers=2, start_method='fork',
+            modules=[__name__], poll_interval=0.1)
+
+    def tearDown(self):
+        self.mngr.close()
+
+    def test_solve_loads_values(self):
+        m = _make_model(3)
+        results = self.mngr.solve(m, opt='_test_pool_solver')
+        self.assertEqual(results.solver.termination_condition,
+                         TerminationCondition.optimal)
+        self.assertEqual([m.x[i].value for i in range(3)], [1, 1, 1])
+        self.assertEqual(m.y.value, 2)
+        self.assertNotEqual(results.pool_worker, os.getpid())
+
+    def test_load_solutions_false(self):
+        m = _make_model(3)
+        self.mngr.solve(m, opt='_test_pool_solver', load_solutions=False)
+        self.assertIsNone(m.y.value)
+
+    def test_options(self):
+        m = _make_model(2)
+        self.mngr.solve(m, opt='_test_pool_solver', options={'scale': 3})
+        self.assertEqual(m.y.value, 6)
+        opt = SolverFactory('_test_pool_solver')
+        opt.options['scale'] = 5
+        self.mngr.solve(m, opt=opt)
+        self.assertEqual(m.y.value, 10)
+
+    def test_suffixes(self):
+        m = _make_model(2)
+        m.d = Constraint(expr=m.y <= 10)
+        m.dual = Suffix(direction=Suffix.IMPORT)
+        self.mngr.solve(m, opt='_test_pool_solver')
+        self.assertEqual(m.dual[m.c], 0)
+        self.assertEqual(m.dual[m.d], 1)
+
+    def test_many_solves_reuse_workers(self):
+        models = [_make_model(i+1, lb=i) for i in range(20)]
+        handles = [self.mngr.queue(m, opt='_test_pool_solver')
+                   for m in models]
+        self.mngr.wait_all(handles)
+        pids = set()
+        for i, (m, ah) in enumerate(zip(models, handles)):
+            self.assertEqual(ah.status, ActionStatus.done)
+            results = self.mngr.get_results(ah)
+            pids.add(results.pool_worker)
+            # each worker constructed the solver exactly once
+            self.assertEqual(results.solver.message, '1')
+            self.assertEqual(m.y.value, 2*i)
+        self.assertLessEqual(len(pids), 2)
+
+    def test_solve_all(self):
+        models = [_make_model(2, lb=i) for i in range(5)]
+        self.mngr.solve_all('_test_pool_solver', models)
+        self.assertEqual([m.y.value for m in models], [0, 2, 4, 6, 8])
+
+    def test_worker_error(self):
+        m = _make_model(2)
+        with self.assertRaisesRegexp(ActionManagerError,
+                                     'No results are available'):
+            self.mngr.solve(m, opt='_test_pool_failing_solver')
+        # The pool is still usable
+        self.mngr.solve(m, opt='_test_pool_solver')
+        self.assertEqual(m.y.value, 2)
+
+    def test_worker_exits(self):
+        m = _make_model(2)
+        ah = self.mngr.queue(m, opt='_test_pool_dying_solver')
+        self.mngr.wait_all(ah)
+        self.assertEqual(ah.status, ActionStatus.error)
+        self.assertIn('exited unexpectedly (exit code 3)', ah.explanation)
+        self.assertIsNone(self.mngr.get_results(ah))
+        self.assertEqual(self.mngr._workers, [])
+        # A new pool is started for the next solve
+        self.mngr.solve(m, opt='_test_pool_solver')
+        self.assertEqual(m.y.value, 2)
+
+    def test_worker_killed(self):
+        models = [_make_model(2) for i in range(4)]
+        handles = [self.mngr.queue(m, opt='_test_pool_slow_solver')
+                   for m in models]
+        workers = list(self.mngr._workers)
+        os.kill(workers[0].pid, signal.SIGKILL)
+        start = time.time()
+        self.mngr.wait_all(handles)
+        self.assertLess(time.time() - start, 30)
+        # The solves of the dead worker, the solves of the live worker,
+        # and the solves that were still queued all fail
+        for ah in handles:
+            self.assertEqual(ah.status, ActionStatus.error)
+            self.assertIn('Pool worker process %s exited unexpectedly'
+                          % workers[0].pid, ah.explanation)
+        self.assertFalse(any(p.is_alive() for p in workers))
+        self.assertEqual(self.mngr.num_queued(), 0)
+        m = _make_model(3)
+        self.mngr.solve(m, opt='_test_pool_solver')
+        self.assertEqual(m.y.value, 2)
+
+    def test_no_solver(self):
+        m = _make_model(2)
+        with self.assertRaisesRegexp(ActionManagerError, 'No solver passed'):
+            self.mngr.queue(m)
+
+
+if __name__ == "__main__":
+    unittest.main()
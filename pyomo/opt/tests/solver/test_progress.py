@@ -0,0 +1,147 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+#
+# Unit Tests for pyomo.opt.solver.progress
+#
+
+import os
+import sys
+import time
+
+import pyutilib.th as unittest
+from pyutilib.subprocess import run
+
+from six.moves.queue import Queue
+
+from pyomo.opt.solver.progress import (
+    ProgressEvent, LogParser, ProgressLogStream,
+)
+
+
+class _CountingParser(LogParser):
+    """Reports every line of the form 'iter <n> <obj>'"""
+
+    solver = 'counter'
+
+    def parse_line(self, line):
+        tokens = line.split()
+        if len(tokens) == 3 and tokens[0] == 'iter':
+            return ProgressEvent(kind='iteration', iteration=int(tokens[1]),
+                                 incumbent=float(tokens[2]), line=line)
+        if tokens and tokens[0] == 'bad':
+            raise ValueError("unparsable line")
+        return None
+
+
+class TestProgressEvent(unittest.TestCase):
+
+    def test_compute_gap(self):
+        e = ProgressEvent(incumbent=-2., bound=-3.)
+        self.assertAlmostEqual(e.compute_gap(), 0.5)
+        e = ProgressEvent(incumbent=-2., bound=-3., gap=0.1)
+        self.assertEqual(e.compute_gap(), 0.1)
+        e = ProgressEvent(incumbent=-2.)
+        self.assertIsNone(e.compute_gap())
+
+    def test_repr(self):
+        e = ProgressEvent(kind='node', nodes=5, line='ignored')
+        self.assertEqual(repr(e), "ProgressEvent(kind='node', nodes=5)")
+
+
+class TestLogParser(unittest.TestCase):
+
+    def test_feed_partial_lines(self):
+        events = []
+        p = _CountingParser(events.append)
+        p.feed("header\niter 1 ")
+        self.assertEqual(events, [])
+        p.feed("5.0\nit")
+        self.assertEqual(len(events), 1)
+        p.feed("er 2 4.0\r\niter 3 3.0")
+        self.assertEqual([e.iteration for e in events], [1, 2])
+        p.close()
+        self.assertEqual([e.iteration for e in events], [1, 2, 3])
+        self.assertEqual([e.incumbent for e in events], [5., 4., 3.])
+        self.assertEqual(events[1].line, 'iter 2 4.0')
+        self.assertEqual(events[0].solver, 'counter')
+        self.assertIsNotNone(events[0].elapsed)
+        self.assertIs(p.last_event, events[-1])
+        self.assertEqual(p.num_events, 3)
+        self.assertFalse(p.terminate_requested)
+
+    def test_parse_errors_are_ignored(self):
+        events = []
+        p = _CountingParser(events.append)
+        p.feed("bad line\niter 1 1.0\n")
+        self.assertEqual(len(events), 1)
+
+    def test_queue(self):
+        q = Queue()
+        p = _CountingParser(q)
+        p.feed("iter 1 1.0\niter 2 0.5\n")
+        self.assertEqual(q.qsize(), 2)
+        self.assertEqual(q.get().iteration, 1)
+        self.assertFalse(p.terminate_requested)
+
+    def test_terminate_request(self):
+        p = _CountingParser(lambda e: e.incumbent < 2)
+        p.feed("iter 1 3.0\n")
+        self.assertFalse(p.terminate_requested)
+        p.feed("iter 2 1.0\n")
+        self.assertTrue(p.terminate_requested)
+        p.reset()
+        self.assertFalse(p.terminate_requested)
+        self.assertIsNone(p.last_event)
+
+
+class TestProgressLogStream(unittest.TestCase):
+
+    def test_stream_collects_output(self):
+        events = []
+        stream = ProgressLogStream(_CountingParser(events.append))
+        rc, log = run(
+            [sys.executable, '-c',
+             'import sys\n'
+             'for i in range(5):\n'
+             '    print("iter %d %f" % (i, 10-i))\n'
+             'sys.stdout.write("iter 5 5")\n'],
+            tee=False, ostream=stream)
+        self.assertEqual(rc, 0)
+        log = stream.getvalue()
+        self.assertIn("iter 4 6.0", log)
+        self.assertEqual([e.iteration for e in events], list(range(6)))
+        self.assertFalse(stream.interrupted)
+
+    @unittest.skipIf(os.name == 'nt', "SIGINT handling is POSIX-specific")
+    def test_stream_interrupts_process(self):
+        seen = []
+        def callback(event):
+            seen.append(event.iteration)
+            return event.iteration >= 2
+        stream = ProgressLogStream(_CountingParser(callback))
+        start = time.time()
+        rc, log = run(
+            [sys.executable, '-u', '-c',
+             'import time\n'
+             'try:\n'
+             '    for i in range(1000):\n'
+             '        print("iter %d 1.0" % (i,))\n'
+             '        time.sleep(0.01)\n'
+             'except KeyboardInterrupt:\n'
+             '    print("interrupted")\n'],
+            tee=False, ostream=stream)
+        self.assertTrue(stream.interrupted)
+        self.assertLess(time.time() - start, 8)
+        self.assertIn("interrupted", stream.getvalue())
+        self.assertLess(len(seen), 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
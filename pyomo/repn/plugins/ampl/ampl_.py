@@ -29,11 +29,12 @@ from math import isclose
 from pyomo.common.gc_manager import PauseGC
 from pyomo.opt import ProblemFormat, AbstractProblemWriter, WriterFactory
 from pyomo.core.expr import current as EXPR
+from pyomo.core.expr.symbol_map import OrdinalSymbolMap
 from pyomo.core.expr.numvalue import (NumericConstant,
                                       native_numeric_types,
                                       value,
                                       is_fixed)
-from pyomo.core.base import SymbolMap, NameLabeler, _ExpressionData, SortComponents, var, param, Var, ExternalFunction, ComponentMap, Objective, Constraint, SOSConstraint, Suffix
+from pyomo.core.base import NameLabeler, _ExpressionData, SortComponents, var, param, Var, ExternalFunction, ComponentMap, Objective, Constraint, SOSConstraint, Suffix
 import pyomo.core.base.suffix
 from pyomo.repn.standard_repn import generate_standard_repn
 
@@ -688,8 +689,10 @@ class ProblemWriter_nl(AbstractProblemWriter):
         overall_timer = StopWatch()
         subsection_timer = StopWatch()
 
-        # create the symbol_map
-        symbol_map = SymbolMap()
+        # create the symbol_map.  All NL file symbols are ordinal
+        # ('o%d', 'c%d', 'v%d'), so the map only records the components
+        # in file order and formats labels on demand.
+        symbol_map = OrdinalSymbolMap()
 
         name_labeler = self._name_labeler
         # These will get updated when symbolic_solver_labels
@@ -881,7 +884,7 @@ class ProblemWriter_nl(AbstractProblemWriter):
                 obj_ID = trivial_labeler(active_objective)
                 Objectives_dict[obj_ID] = (active_objective, wrapped_repn)
                 self_ampl_obj_id[obj_ID] = n_objs
-                symbol_map.addSymbols([(active_objective, "o%d"%n_objs)])
+                symbol_map.addOrdinalSymbols('o', (active_objective,))
 
                 n_objs += 1
                 if repn.is_nonlinear():
@@ -1096,9 +1099,9 @@ class ProblemWriter_nl(AbstractProblemWriter):
             (con_ID,row_id) for row_id,con_ID in \
             enumerate(itertools.chain(nonlin_con_order_list,lin_con_order_list)))
         # populate the symbol_map
-        symbol_map.addSymbols(
-            [(Constraints_dict[con_ID][0],"c%d"%row_id) for row_id,con_ID in \
-             enumerate(itertools.chain(nonlin_con_order_list,lin_con_order_list))])
+        symbol_map.addOrdinalSymbols(
+            'c', [Constraints_dict[con_ID][0] for con_ID in \
+                  itertools.chain(nonlin_con_order_list,lin_con_order_list)])
 
         if show_section_timing:
             subsection_timer.report("Generate constraint representations")
@@ -1199,8 +1202,8 @@ class ProblemWriter_nl(AbstractProblemWriter):
         self_ampl_var_id.update((var_ID,column_id)
                                 for column_id,var_ID in enumerate(full_var_list))
         # populate the symbol_map
-        symbol_map.addSymbols([(Vars_dict[var_ID],"v%d"%column_id)
-                               for column_id,var_ID in enumerate(full_var_list)])
+        symbol_map.addOrdinalSymbols(
+            'v', [Vars_dict[var_ID] for var_ID in full_var_list])
 
         if show_section_timing:
             subsection_timer.report("Partition variable types")
@@ -16,6 +16,7 @@ import os
 import pyutilib.th as unittest
 
 from pyomo.common.getGSL import find_GSL
+from pyomo.core.expr.symbol_map import OrdinalSymbolMap
 from pyomo.environ import ConcreteModel, Var, Constraint, Objective, Param, Block, ExternalFunction, value
 
 thisdir = os.path.dirname(os.path.abspath(__file__))
@@ -91,6 +92,29 @@ class TestNLWriter(unittest.TestCase):
             model.write, test_fname, format='nl')
         self._cleanup(test_fname)
 
+    def test_ordinal_symbol_map(self):
+        model = ConcreteModel()
+        model.x = Var()
+        model.y = Var()
+        model.c = Constraint(expr=model.x + model.y**2 <= 0)
+        model.d = Constraint(expr=model.x >= 1)
+        model.obj = Objective(expr=model.x)
+
+        baseline_fname, test_fname = self._get_fnames()
+        self._cleanup(test_fname)
+        fname, smap_id = model.write(test_fname, format='nl')
+        self._cleanup(test_fname)
+        smap = model.solutions.symbol_map[smap_id]
+        self.assertIsInstance(smap, OrdinalSymbolMap)
+        self.assertIs(smap.bySymbol['o0'](), model.obj)
+        # nonlinear constraints are written first
+        self.assertIs(smap.bySymbol['c0'](), model.c)
+        self.assertIs(smap.bySymbol['c1'](), model.d)
+        self.assertEqual(
+            sorted(smap.getSymbol(v) for v in (model.x, model.y)),
+            ['v0', 'v1'])
+        self.assertNotIn('v2', smap.bySymbol)
+
     def _external_model(self):
         DLL = find_GSL()
         if not DLL:
@@ -29,6 +29,9 @@ from pyomo.opt.base import ProblemFormat, ResultsFormat, OptSolver
 from pyomo.opt.base.solvers import _extract_version, SolverFactory
 from pyomo.opt.results import SolverResults, SolverStatus, TerminationCondition, SolutionStatus, ProblemSense, Solution
 from pyomo.opt.solver import SystemCallSolver
+from pyomo.opt.solver.progress import (
+    LogParser, ProgressEvent, _to_float,
+)
 from pyomo.solvers.mockmip import MockMIP
 
 logger = logging.getLogger('pyomo.solvers')
@@ -124,11 +127,88 @@ class CBC(OptSolver):
 
 
 
+class CBCLogParser(LogParser):
+    """Streaming parser for the CBC log
+
+    See https://www.coin-or.org/Cbc/cbcuserguide.html#messages for the
+    message formats.  Objective values are reported in CBC's internal
+    (minimization) sense.
+    """
+
+    solver = 'cbc'
+
+    # Cbc0010I After 100 nodes, 5 on tree, 1.23 best solution,
+    #     best possible 1.0 (0.52 seconds)
+    _node_re = re.compile(
+        r'After (\d+) nodes, (\d+) on tree, (\S+) best solution, '
+        r'best possible (\S+) \((\S+) seconds\)')
+    # Cbc0004I Integer solution of -2 found after 12 iterations and
+    #     0 nodes (0.01 seconds)
+    # Cbc0012I Integer solution of -2 found by DiveCoefficient after 0
+    #     iterations and 0 nodes (0.02 seconds)
+    _incumbent_re = re.compile(
+        r'Integer solution of (\S+) found.* after (\d+) iterations '
+        r'and (\d+) nodes \((\S+) seconds\)')
+    # Cbc0013I At root node, 3 cuts changed objective from -3 to -2.5
+    #     in 10 passes
+    _root_re = re.compile(
+        r'At root node, .*changed objective from \S+ to (\S+)')
+    # Continuous objective value is -3 - 0.00 seconds
+    _relaxation_re = re.compile(
+        r'^Continuous objective value is (\S+) - (\S+) seconds')
+
+    def reset(self):
+        super(CBCLogParser, self).reset()
+        self._incumbent = None
+        self._bound = None
+
+    @staticmethod
+    def _objective(val):
+        # CBC reports 1e+50 when there is no incumbent
+        val = _to_float(val)
+        if val is not None and abs(val) >= 1e50:
+            return None
+        return val
+
+    def parse_line(self, line):
+        m = self._node_re.search(line)
+        if m is not None:
+            self._incumbent = self._objective(m.group(3))
+            self._bound = self._objective(m.group(4))
+            return ProgressEvent(
+                kind='node', nodes=int(m.group(1)),
+                incumbent=self._incumbent, bound=self._bound,
+                elapsed=_to_float(m.group(5)), line=line)
+        m = self._incumbent_re.search(line)
+        if m is not None:
+            self._incumbent = self._objective(m.group(1))
+            return ProgressEvent(
+                kind='incumbent', incumbent=self._incumbent,
+                bound=self._bound, iteration=int(m.group(2)),
+                nodes=int(m.group(3)), elapsed=_to_float(m.group(4)),
+                line=line)
+        m = self._root_re.search(line)
+        if m is not None:
+            self._bound = self._objective(m.group(1))
+            return ProgressEvent(
+                kind='bound', incumbent=self._incumbent, bound=self._bound,
+                nodes=0, line=line)
+        m = self._relaxation_re.search(line)
+        if m is not None:
+            self._bound = self._objective(m.group(1))
+            return ProgressEvent(
+                kind='relaxation', bound=self._bound,
+                elapsed=_to_float(m.group(2)), line=line)
+        return None
+
+
 @SolverFactory.register('_cbc_shell',  doc='Shell interface to the CBC LP/MIP solver')
 class CBCSHELL(SystemCallSolver):
     """Shell interface to the CBC LP/MIP solver
     """
 
+    _log_parser_class = CBCLogParser
+
     def __init__(self, **kwds):
         #
         # Call base constructor
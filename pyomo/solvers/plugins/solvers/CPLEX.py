@@ -30,6 +30,9 @@ from pyomo.opt.results import (
     ProblemSense, Solution,
 )
 from pyomo.opt.solver import ILMLicensedSystemCallSolver
+from pyomo.opt.solver.progress import (
+    LogParser, ProgressEvent, _to_float, _to_int,
+)
 from pyomo.solvers.mockmip import MockMIP
 from pyomo.core.base import Var, Suffix, active_export_suffix_generator
 from pyomo.core.kernel.suffix import export_suffix_generator
@@ -145,11 +148,107 @@ class ORDFileSchema(object):
             return ""
 
 
+class CPLEXLogParser(LogParser):
+    """Streaming parser for the CPLEX interactive optimizer log
+
+    The MIP node log is a fixed-width table whose columns are
+    right-aligned with the table header, e.g.::
+
+           Node  Left     Objective  IInf  Best Integer    Best Bound    ItCnt     Gap
+
+              0     0       -3.0000     2                     -3.0000        3
+        *     0+    0                           -2.0000       -3.0000             50.00%
+
+    Each token of a node line is assigned to the header column whose
+    right edge is closest to the right edge of the token.
+    """
+
+    solver = 'cplex'
+
+    _columns = ('Node', 'Left', 'Objective', 'IInf', 'Best Integer',
+                'Best Bound', 'ItCnt', 'Gap')
+    _token_re = re.compile(r'\S+')
+    _node_re = re.compile(r'^[*A-Za-z ]\s*\d+\+?\s+\d+\+?(\s|$)')
+    # Found incumbent of value -2.000000 after 0.01 sec. (0.10 ticks)
+    _incumbent_re = re.compile(
+        r'Found incumbent of value (\S+) after (\S+) sec')
+    # Iteration:     1   Dual objective     =             0.000000
+    # Iteration:    13   Objective     =            -3.000000
+    _iteration_re = re.compile(
+        r'^Iteration:\s+(\d+)\s+(.*?)\s*=\s*(\S+)')
+
+    def reset(self):
+        super(CPLEXLogParser, self).reset()
+        self._column_ends = None
+        self._incumbent = None
+        self._bound = None
+
+    def _parse_header(self, line):
+        ends = []
+        for name in self._columns:
+            idx = line.find(name)
+            if idx < 0:
+                return None
+            ends.append(idx + len(name))
+        return ends
+
+    def _parse_node_line(self, line):
+        cols = [[] for _ in self._columns]
+        ends = self._column_ends
+        for m in self._token_re.finditer(line):
+            if m.start() == 0 and not line[0].isdigit():
+                # The first column flags heuristic / integer solutions
+                continue
+            idx = min(range(len(ends)), key=lambda i: abs(ends[i]-m.end()))
+            cols[idx].append(m.group())
+        cols = [' '.join(c) for c in cols]
+        incumbent = _to_float(cols[4])
+        if incumbent is not None:
+            self._incumbent = incumbent
+        bound = _to_float(cols[5])
+        if bound is not None:
+            self._bound = bound
+        gap = _to_float(cols[7])
+        return ProgressEvent(
+            kind='node', nodes=_to_int(cols[0]),
+            incumbent=self._incumbent, bound=self._bound,
+            gap=None if gap is None else gap/100.,
+            iteration=_to_int(cols[6]), line=line)
+
+    def parse_line(self, line):
+        if self._column_ends is not None and self._node_re.match(line):
+            return self._parse_node_line(line)
+        if 'Node' in line and 'Best Bound' in line:
+            self._column_ends = self._parse_header(line)
+            return None
+        m = self._incumbent_re.search(line)
+        if m is not None:
+            self._incumbent = _to_float(m.group(1))
+            return ProgressEvent(
+                kind='incumbent', incumbent=self._incumbent,
+                bound=self._bound, elapsed=_to_float(m.group(2)),
+                line=line)
+        m = self._iteration_re.match(line)
+        if m is not None:
+            kind = m.group(2).lower()
+            value = _to_float(m.group(3))
+            event = ProgressEvent(
+                kind='iteration', iteration=int(m.group(1)), line=line)
+            if kind.endswith('dual objective'):
+                event.bound = value
+            elif kind.endswith('objective'):
+                event.incumbent = value
+            return event
+        return None
+
+
 @SolverFactory.register('_cplex_shell', doc='Shell interface to the CPLEX LP/MIP solver')
 class CPLEXSHELL(ILMLicensedSystemCallSolver):
     """Shell interface to the CPLEX LP/MIP solver
     """
 
+    _log_parser_class = CPLEXLogParser
+
     def __init__(self, **kwds):
         #
         # Call base class constructor
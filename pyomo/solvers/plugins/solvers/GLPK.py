@@ -21,6 +21,7 @@ from pyomo.common.collections import Bunch, Options
 from pyomo.opt import SolverFactory, OptSolver, ProblemFormat, ResultsFormat, SolverResults, TerminationCondition, SolutionStatus, ProblemSense
 from pyomo.opt.base.solvers import _extract_version
 from pyomo.opt.solver import SystemCallSolver
+from pyomo.opt.solver.progress import LogParser, ProgressEvent, _to_float
 
 from six import iteritems, string_types
 
@@ -105,12 +106,47 @@ class GLPK(OptSolver):
         return opt
 
 
+class GLPKLogParser(LogParser):
+    """Streaming parser for the glpsol terminal output"""
+
+    solver = 'glpk'
+
+    # +     5: mip =  -2.000000000e+00 >=  -3.000000000e+00  50.0% (2; 0)
+    # +     1: mip =     not found yet >=              -inf        (1; 0)
+    # +     9: mip =  -2.000000000e+00 >=     tree is empty   0.0% (0; 5)
+    _mip_re = re.compile(
+        r'^\+\s*(\d+):\s+mip\s+=\s+(.*?)\s+[<>]=\s+(.*?)\s+'
+        r'(?:(\S+)%\s+)?\((\d+);\s*(\d+)\)')
+    # *     3: obj =  -3.000000000e+00 inf =   0.000e+00 (0)
+    #       0: obj =   0.000000000e+00 infeas =  1.000e+00 (0)
+    _simplex_re = re.compile(r'^[ *]?\s*(\d+):\s+obj\s+=\s+(\S+)')
+
+    def parse_line(self, line):
+        m = self._mip_re.match(line)
+        if m is not None:
+            gap = _to_float(m.group(4))
+            return ProgressEvent(
+                kind='node', iteration=int(m.group(1)),
+                incumbent=_to_float(m.group(2)), bound=_to_float(m.group(3)),
+                gap=None if gap is None else gap/100.,
+                # (active; completed) subproblems
+                nodes=int(m.group(5)) + int(m.group(6)), line=line)
+        m = self._simplex_re.match(line)
+        if m is not None:
+            return ProgressEvent(
+                kind='iteration', iteration=int(m.group(1)),
+                incumbent=_to_float(m.group(2)), line=line)
+        return None
+
+
 @SolverFactory.register(
         '_glpk_shell',
         doc='Shell interface to the GNU Linear Programming Kit')
 class GLPKSHELL(SystemCallSolver):
     """Shell interface to the GLPK LP/MIP solver"""
 
+    _log_parser_class = GLPKLogParser
+
     def __init__ (self, **kwargs):
         configure_glpk()
         #
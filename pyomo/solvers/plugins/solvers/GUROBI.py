@@ -24,6 +24,9 @@ from pyomo.opt.base import ProblemFormat, ResultsFormat, OptSolver
 from pyomo.opt.base.solvers import _extract_version, SolverFactory
 from pyomo.opt.results import SolverStatus, TerminationCondition, SolutionStatus, ProblemSense, Solution
 from pyomo.opt.solver import ILMLicensedSystemCallSolver
+from pyomo.opt.solver.progress import (
+    LogParser, ProgressEvent, _to_float, _to_int,
+)
 from pyomo.core.kernel.block import IBlock
 
 logger = logging.getLogger('pyomo.solvers')
@@ -80,11 +83,85 @@ class GUROBI(OptSolver):
 
 
 
+class GurobiLogParser(LogParser):
+    """Streaming parser for the Gurobi log
+
+    Handles the simplex iteration log, the barrier iteration log and
+    the MIP node log.  The parser tracks which table is currently being
+    printed based on the most recent table header.
+    """
+
+    solver = 'gurobi'
+
+    def reset(self):
+        super(GurobiLogParser, self).reset()
+        self._table = None
+        self._incumbent = None
+        self._bound = None
+
+    def parse_line(self, line):
+        stripped = line.strip()
+        if not stripped:
+            return None
+        tokens = stripped.split()
+        if tokens[0] == 'Iteration' and 'Objective' in tokens:
+            self._table = 'simplex'
+            return None
+        if tokens[0] == 'Iter' and 'Primal' in tokens:
+            self._table = 'barrier'
+            return None
+        if tokens[0] == 'Expl' and 'Unexpl' in tokens:
+            self._table = 'node'
+            return None
+        if self._table is None or not tokens[-1].endswith('s'):
+            return None
+        elapsed = _to_float(tokens[-1][:-1])
+        if elapsed is None:
+            self._table = None
+            return None
+
+        if self._table == 'simplex':
+            #  Iteration    Objective       Primal Inf.    Dual Inf.      Time
+            #         0   -3.0000000e+00   2.000000e+00   0.000000e+00      0s
+            return ProgressEvent(
+                kind='iteration', iteration=_to_int(tokens[0]),
+                incumbent=_to_float(tokens[1]), elapsed=elapsed, line=line)
+        if self._table == 'barrier':
+            #  Iter       Primal          Dual         Primal    Dual     Compl     Time
+            #     0   1.20000000e+01 -3.40000000e+00  ...                            0s
+            return ProgressEvent(
+                kind='iteration', iteration=_to_int(tokens[0]),
+                incumbent=_to_float(tokens[1]), bound=_to_float(tokens[2]),
+                elapsed=elapsed, line=line)
+        # MIP node log; the right-most columns are always present:
+        #     0     0   -3.00000    0    2   -2.00000   -3.00000  50.0%     -    0s
+        # H    0     0                      -2.0000000   -3.00000  50.0%     -    0s
+        if len(tokens) < 7:
+            return None
+        if tokens[0] in ('H', '*'):
+            kind = 'incumbent'
+            tokens = tokens[1:]
+        else:
+            kind = 'node'
+        incumbent = _to_float(tokens[-5])
+        if incumbent is not None:
+            self._incumbent = incumbent
+        bound = _to_float(tokens[-4])
+        if bound is not None:
+            self._bound = bound
+        gap = _to_float(tokens[-3])
+        return ProgressEvent(
+            kind=kind, nodes=_to_int(tokens[0]), incumbent=self._incumbent,
+            bound=self._bound, gap=None if gap is None else gap/100.,
+            elapsed=elapsed, line=line)
+
+
 @SolverFactory.register('_gurobi_shell',  doc='Shell interface to the GUROBI LP/MIP solver')
 class GUROBISHELL(ILMLicensedSystemCallSolver):
     """Shell interface to the GUROBI LP/MIP solver
     """
     _solver_info_cache = {}
+    _log_parser_class = GurobiLogParser
 
     def __init__(self, **kwds):
         #
@@ -9,6 +9,7 @@
 #  ___________________________________________________________________________
 
 import os
+import re
 
 from pyomo.common import Executable
 from pyomo.common.collections import Options, Bunch
@@ -19,6 +20,9 @@ from pyomo.opt.base import ProblemFormat, ResultsFormat
 from pyomo.opt.base.solvers import _extract_version, SolverFactory
 from pyomo.opt.results import SolverStatus, SolverResults, TerminationCondition
 from pyomo.opt.solver import  SystemCallSolver
+from pyomo.opt.solver.progress import (
+    LogParser, ProgressEvent, _to_float, _to_int,
+)
 
 import logging
 logger = logging.getLogger('pyomo.solvers')
@@ -29,12 +33,51 @@ except:
     basestring = str
 
 
+class IpoptLogParser(LogParser):
+    """Streaming parser for the Ipopt iteration log
+
+    Iteration lines follow the (periodically repeated) header::
+
+        iter    objective    inf_pr   inf_du lg(mu)  ||d||  lg(rg) alpha_du alpha_pr  ls
+           0  1.0000000e+00 0.00e+00 1.00e+00  -1.0 0.00e+00    -  0.00e+00 0.00e+00   0
+          12r 2.0000000e+00 ...
+
+    An 'r' suffix on the iteration count marks restoration phase
+    iterations.
+    """
+
+    solver = 'ipopt'
+
+    _iter_re = re.compile(r'^\s*(\d+)r?\s+(\S+)\s+(\S+)\s+(\S+)\s')
+
+    def reset(self):
+        super(IpoptLogParser, self).reset()
+        self._in_table = False
+
+    def parse_line(self, line):
+        if line.startswith('iter') and 'objective' in line:
+            self._in_table = True
+            return None
+        if not self._in_table:
+            return None
+        m = self._iter_re.match(line)
+        if m is None:
+            if line.startswith('Number of Iterations'):
+                self._in_table = False
+            return None
+        return ProgressEvent(
+            kind='iteration', iteration=_to_int(m.group(1)),
+            incumbent=_to_float(m.group(2)), line=line)
+
+
 @SolverFactory.register('ipopt', doc='The Ipopt NLP solver')
 class IPOPT(SystemCallSolver):
     """
     An interface to the Ipopt optimizer that uses the AMPL Solver Library.
     """
 
+    _log_parser_class = IpoptLogParser
+
     def __init__(self, **kwds):
         #
         # Call base constructor
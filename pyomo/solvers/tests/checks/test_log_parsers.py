@@ -0,0 +1,193 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+#
+# Tests for the streaming log parsers of the shell solver plugins
+#
+
+import pyutilib.th as unittest
+
+from pyomo.solvers.plugins.solvers.CBCplugin import CBCLogParser, CBCSHELL
+from pyomo.solvers.plugins.solvers.CPLEX import CPLEXLogParser, CPLEXSHELL
+from pyomo.solvers.plugins.solvers.GUROBI import GurobiLogParser, GUROBISHELL
+from pyomo.solvers.plugins.solvers.GLPK import GLPKLogParser, GLPKSHELL
+from pyomo.solvers.plugins.solvers.IPOPT import IpoptLogParser, IPOPT
+
+cbc_log = """\
+Continuous objective value is -3 - 0.00 seconds
+Cgl0004I processed model has 2 rows, 3 columns (3 integer (3 of which binary)) and 6 elements
+Cbc0012I Integer solution of -1 found by DiveCoefficient after 0 iterations and 0 nodes (0.01 seconds)
+Cbc0031I 2 added rows had average density of 3
+Cbc0013I At root node, 2 cuts changed objective from -3 to -2.5 in 10 passes
+Cbc0010I After 0 nodes, 1 on tree, -1 best solution, best possible -2.5 (0.02 seconds)
+Cbc0004I Integer solution of -2 found after 12 iterations and 3 nodes (0.03 seconds)
+Cbc0010I After 100 nodes, 5 on tree, 1e+50 best solution, best possible -2.25 (0.52 seconds)
+Cbc0001I Search completed - best objective -2, took 14 iterations and 4 nodes (0.04 seconds)
+"""
+
+cplex_log = """\
+Iteration log . . .
+Iteration:     1   Dual objective     =            -4.000000
+Found incumbent of value -1.000000 after 0.00 sec. (0.00 ticks)
+
+        Nodes                                         Cuts/
+   Node  Left     Objective  IInf  Best Integer    Best Bound    ItCnt     Gap
+
+      0     0       -3.0000     2       -1.0000       -3.0000        3  200.00%
+*     0+    0                           -2.0000       -3.0000             50.00%
+      0     0       -2.5000     1       -2.0000      Cuts: 3        5   25.00%
+      0     0        cutoff             -2.0000       -2.0000        5    0.00%
+Elapsed time = 0.01 sec. (0.10 ticks, tree = 0.00 MB, solutions = 2)
+"""
+
+gurobi_log = """\
+Iteration    Objective       Primal Inf.    Dual Inf.      Time
+       0   -3.0000000e+00   2.000000e+00   0.000000e+00      0s
+       2   -2.5000000e+00   0.000000e+00   0.000000e+00      0s
+
+Solved in 2 iterations and 0.01 seconds
+Root relaxation: objective -2.500000e+00, 2 iterations, 0.00 seconds
+
+    Nodes    |    Current Node    |     Objective Bounds      |     Work
+ Expl Unexpl |  Obj  Depth IntInf | Incumbent    BestBd   Gap | It/Node Time
+
+     0     0   -2.50000    0    2          -   -2.50000      -     -    0s
+H    0     0                      -2.0000000   -2.50000  25.0%     -    0s
+     0     0   -2.25000    0    1   -2.00000   -2.25000  12.5%     -    1s
+
+Explored 1 nodes (3 simplex iterations) in 1.02 seconds
+"""
+
+glpk_log = """\
+GLPK Simplex Optimizer, v4.65
+*     0: obj =   0.000000000e+00 inf =   0.000e+00 (3)
+*     2: obj =  -3.000000000e+00 inf =   0.000e+00 (0)
+OPTIMAL LP SOLUTION FOUND
+GLPK Integer Optimizer, v4.65
++     2: mip =     not found yet >=              -inf        (1; 0)
++     4: mip =  -2.000000000e+00 >=  -3.000000000e+00  50.0% (2; 1)
++     5: mip =  -2.000000000e+00 >=     tree is empty   0.0% (0; 5)
+INTEGER OPTIMAL SOLUTION FOUND
+"""
+
+ipopt_log = """\
+This is Ipopt version 3.12.13, running with linear solver mumps.
+
+iter    objective    inf_pr   inf_du lg(mu)  ||d||  lg(rg) alpha_du alpha_pr  ls
+   0  1.0000000e+01 1.00e+00 1.00e+00  -1.0 0.00e+00    -  0.00e+00 0.00e+00   0
+   1  5.0000000e+00 5.00e-01 2.00e+00  -1.0 1.00e+00    -  1.00e+00 1.00e+00f  1
+Reallocating memory for MA57: lfact (10000)
+   2r 4.0000000e+00 1.00e-01 9.00e+02  -1.0 0.00e+00    -  0.00e+00 0.00e+00R  1
+
+Number of Iterations....: 2
+
+                                   (scaled)                 (unscaled)
+Objective...............:   4.0000000000000000e+00    4.0000000000000000e+00
+EXIT: Optimal Solution Found.
+"""
+
+
+def _parse(parser_class, log):
+    events = []
+    parser = parser_class(events.append)
+    # Feed the log in awkward chunks to exercise the line buffering
+    for i in range(0, len(log), 7):
+        parser.feed(log[i:i+7])
+    parser.close()
+    return events
+
+
+class TestLogParsers(unittest.TestCase):
+
+    def test_plugins_declare_parsers(self):
+        self.assertIs(CBCSHELL._log_parser_class, CBCLogParser)
+        self.assertIs(CPLEXSHELL._log_parser_class, CPLEXLogParser)
+        self.assertIs(GUROBISHELL._log_parser_class, GurobiLogParser)
+        self.assertIs(GLPKSHELL._log_parser_class, GLPKLogParser)
+        self.assertIs(IPOPT._log_parser_class, IpoptLogParser)
+
+    def test_cbc(self):
+        events = _parse(CBCLogParser, cbc_log)
+        self.assertEqual(
+            [e.kind for e in events],
+            ['relaxation', 'incumbent', 'bound', 'node', 'incumbent', 'node'])
+        self.assertEqual(events[0].bound, -3)
+        self.assertEqual(events[1].incumbent, -1)
+        self.assertEqual(events[1].elapsed, 0.01)
+        self.assertEqual(events[2].bound, -2.5)
+        self.assertEqual(events[2].incumbent, -1)
+        self.assertAlmostEqual(events[3].gap, 1.5)
+        self.assertEqual(events[4].incumbent, -2)
+        self.assertEqual(events[4].iteration, 12)
+        self.assertEqual(events[4].nodes, 3)
+        self.assertEqual(events[5].nodes, 100)
+        self.assertIsNone(events[5].incumbent)
+        self.assertEqual(events[5].bound, -2.25)
+        self.assertEqual(events[5].elapsed, 0.52)
+        self.assertTrue(all(e.solver == 'cbc' for e in events))
+
+    def test_cplex(self):
+        events = _parse(CPLEXLogParser, cplex_log)
+        self.assertEqual(
+            [e.kind for e in events],
+            ['iteration', 'incumbent', 'node', 'node', 'node', 'node'])
+        self.assertEqual(events[0].bound, -4)
+        self.assertIsNone(events[0].incumbent)
+        self.assertEqual(events[1].incumbent, -1)
+        self.assertEqual((events[2].incumbent, events[2].bound), (-1, -3))
+        self.assertEqual(events[2].iteration, 3)
+        self.assertAlmostEqual(events[2].gap, 2.)
+        self.assertEqual((events[3].incumbent, events[3].bound), (-2, -3))
+        self.assertAlmostEqual(events[3].gap, .5)
+        self.assertIsNone(events[3].iteration)
+        # "Cuts: 3" in the bound column keeps the previous bound
+        self.assertEqual((events[4].incumbent, events[4].bound), (-2, -3))
+        self.assertAlmostEqual(events[4].gap, .25)
+        self.assertEqual((events[5].incumbent, events[5].bound), (-2, -2))
+        self.assertEqual(events[5].gap, 0)
+        self.assertEqual(events[5].nodes, 0)
+
+    def test_gurobi(self):
+        events = _parse(GurobiLogParser, gurobi_log)
+        self.assertEqual(
+            [e.kind for e in events],
+            ['iteration', 'iteration', 'node', 'incumbent', 'node'])
+        self.assertEqual(events[1].iteration, 2)
+        self.assertEqual(events[1].incumbent, -2.5)
+        self.assertIsNone(events[2].incumbent)
+        self.assertEqual(events[2].bound, -2.5)
+        self.assertIsNone(events[2].gap)
+        self.assertEqual((events[3].incumbent, events[3].bound), (-2, -2.5))
+        self.assertAlmostEqual(events[3].gap, .25)
+        self.assertEqual(events[4].elapsed, 1)
+        self.assertAlmostEqual(events[4].gap, .125)
+
+    def test_glpk(self):
+        events = _parse(GLPKLogParser, glpk_log)
+        self.assertEqual(
+            [e.kind for e in events],
+            ['iteration', 'iteration', 'node', 'node', 'node'])
+        self.assertEqual(events[1].incumbent, -3)
+        self.assertIsNone(events[2].incumbent)
+        self.assertEqual(events[2].bound, float('-inf'))
+        self.assertEqual((events[3].incumbent, events[3].bound), (-2, -3))
+        self.assertAlmostEqual(events[3].gap, .5)
+        self.assertEqual(events[3].nodes, 3)
+        self.assertEqual(events[4].incumbent, -2)
+        self.assertIsNone(events[4].bound)
+        self.assertEqual(events[4].gap, 0)
+
+    def test_ipopt(self):
+        events = _parse(IpoptLogParser, ipopt_log)
+        self.assertEqual([e.iteration for e in events], [0, 1, 2])
+        self.assertEqual([e.incumbent for e in events], [10., 5., 4.])
+
+
+if __name__ == "__main__":
+    unittest.main()
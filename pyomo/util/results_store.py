@@ -0,0 +1,339 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""Compact, columnar storage for the solutions of many solves.
+
+:class:`SolverResults` and :meth:`ModelSolutions.store_to` keep
+solutions as nested dictionaries keyed by variable names, which is
+convenient for a single solve but expensive in memory and serialization
+time when keeping the results of thousands of (scenario) solves.  A
+:class:`SolutionStore` instead keeps one row per solve in a dense NumPy
+array whose columns are aligned with a shared variable index (stored as
+:class:`ComponentUID` strings)::
+
+    store = SolutionStore(model)
+    for scenario in scenarios:
+        update_model(model, scenario)
+        results = opt.solve(model)
+        store.append(model, results, label=scenario.name)
+    store.to_npz('scenarios.npz')
+
+    store = SolutionStore.from_npz('scenarios.npz')
+    store.load(3, model)   # push the fourth solution back into the model
+"""
+
+import json
+
+from pyomo.common.collections import ComponentMap
+from pyomo.common.dependencies import (
+    attempt_import, numpy as np, numpy_available, pandas as pd,
+)
+from pyomo.core.base.componentuid import ComponentUID
+from pyomo.core.base.objective import Objective
+from pyomo.core.base.var import Var
+from pyomo.core.expr.numvalue import value
+from pyomo.core.expr.visitor import identify_variables
+
+h5py, h5py_available = attempt_import('h5py')
+
+# Metadata column names used in table formats (Parquet, DataFrame)
+_OBJECTIVE_COL = '__objective__'
+_TERMINATION_COL = '__termination__'
+_LABEL_COL = '__label__'
+
+
+def _cuid_strings(model):
+    """Return a ComponentMap from the variables on `model` to the string
+    representation of their ComponentUIDs relative to `model`"""
+    cuid_map = ComponentUID.generate_cuid_string_map(
+        model, ctype=Var, descend_into=True)
+    if model is model.model():
+        return cuid_map
+    # generate_cuid_string_map always names components from the top
+    # level model; strip the path of the (sub-)block
+    prefix = len(cuid_map[model]) + 1
+    return ComponentMap((obj, cuid[prefix:])
+                        for obj, cuid in cuid_map.items() if obj is not model)
+
+
+class SolutionStore(object):
+    """Store the variable values of many solves as a dense array.
+
+    Parameters
+    ----------
+    model: Block
+        The model whose variables define the shared variable index.  If
+        None, ``cuids`` must be provided (this is how stores read from a
+        file are created).
+    variables: iterable of _VarData
+        The variables to record (defaults to all variables on the model)
+    cuids: list of str
+        The string representation of the ComponentUIDs (relative to the
+        model) of the recorded variables (alternative to ``model``)
+    """
+
+    def __init__(self, model=None, variables=None, cuids=None):
+        if not numpy_available:
+            raise RuntimeError(
+                "SolutionStore requires numpy, which is not available")
+        if model is not None:
+            if variables is None:
+                variables = list(model.component_data_objects(
+                    Var, descend_into=True))
+            else:
+                variables = list(variables)
+            cuid_map = _cuid_strings(model)
+            cuids = [cuid_map[v] if v in cuid_map
+                     else str(ComponentUID(v, context=model))
+                     for v in variables]
+            self._model_vars = (model, variables)
+        elif cuids is None:
+            raise ValueError(
+                "SolutionStore requires either a model or a list of cuids")
+        else:
+            cuids = [str(c) for c in cuids]
+            self._model_vars = (None, None)
+        self.cuids = cuids
+        self._column = dict((c, i) for i, c in enumerate(cuids))
+        self._var_column = None
+        self._values = np.empty((0, len(cuids)))
+        self._objective = np.empty(0)
+        self._n = 0
+        self.termination = []
+        self.labels = []
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def values(self):
+        """(number of solves) x (number of variables) array of values
+
+        Values of variables that were None are stored as NaN.
+        """
+        return self._values[:self._n]
+
+    @property
+    def objective(self):
+        """Array of objective values (NaN if not available)"""
+        return self._objective[:self._n]
+
+    def _variables(self, model):
+        """Return the recorded variables on `model` (in column order)"""
+        if model is None or model is self._model_vars[0]:
+            if self._model_vars[1] is None:
+                raise ValueError(
+                    "A model must be provided for a SolutionStore that "
+                    "was not created from a model")
+            return self._model_vars[1]
+        cuid_map = _cuid_strings(model)
+        found = dict((cuid, v) for v, cuid in cuid_map.items())
+        missing = [c for c in self.cuids if c not in found]
+        if missing:
+            raise ValueError(
+                "Model %s is missing %s of the variables in the "
+                "SolutionStore (e.g., %s)"
+                % (model.name, len(missing), missing[0]))
+        variables = [found[c] for c in self.cuids]
+        # Cache the mapping for subsequent calls with the same model
+        self._model_vars = (model, variables)
+        self._var_column = None
+        return variables
+
+    def _reserve(self, n):
+        capacity = self._values.shape[0]
+        if n <= capacity:
+            return
+        capacity = max(n, 2*capacity, 16)
+        values = np.empty((capacity, len(self.cuids)))
+        values[:self._n] = self._values[:self._n]
+        self._values = values
+        objective = np.empty(capacity)
+        objective[:self._n] = self._objective[:self._n]
+        self._objective = objective
+
+    def append_values(self, values, objective=None, termination=None,
+                      label=None):
+        """Append a solution given as a sequence of values aligned with
+        :attr:`cuids` (None entries are stored as NaN)"""
+        row = np.array([np.nan if v is None else v for v in values],
+                       dtype=float)
+        if row.shape != (len(self.cuids),):
+            raise ValueError(
+                "Expected %s values, received %s"
+                % (len(self.cuids), row.size))
+        self._reserve(self._n + 1)
+        self._values[self._n] = row
+        self._objective[self._n] = np.nan if objective is None else objective
+        self.termination.append(
+            None if termination is None else str(termination))
+        self.labels.append(label)
+        self._n += 1
+        return self._n - 1
+
+    def append(self, model=None, results=None, label=None):
+        """Record the current variable values of the model.
+
+        Parameters
+        ----------
+        model: Block
+            The model to read values from (defaults to the model most
+            recently used with this store)
+        results: SolverResults
+            If provided, the termination condition is recorded
+        label: str
+            Optional name for this solution
+
+        Returns the index of the new solution.
+        """
+        variables = self._variables(model)
+        if model is None:
+            model = self._model_vars[0]
+        objective = None
+        for obj in model.component_data_objects(
+                Objective, active=True, descend_into=True):
+            if all(v.value is not None for v in identify_variables(obj.expr)):
+                objective = value(obj)
+            break
+        termination = None
+        if results is not None:
+            termination = results.solver.termination_condition
+        return self.append_values(
+            [v.value for v in variables], objective=objective,
+            termination=termination, label=label)
+
+    def column(self, var):
+        """Return the values of one variable (a _VarData, ComponentUID
+        or cuid string) across all stored solutions
+
+        Variables that are not on the recorded model are looked up by
+        their ComponentUID relative to their own model.
+        """
+        if isinstance(var, (str, ComponentUID)):
+            col = self._column[str(var)]
+        else:
+            # Map the variable through the recorded variables: the cuids
+            # are relative to the recorded model, which need not be the
+            # top level model
+            variables = self._model_vars[1]
+            if self._var_column is None and variables is not None:
+                self._var_column = ComponentMap(
+                    (v, i) for i, v in enumerate(variables))
+            if self._var_column is not None and var in self._var_column:
+                col = self._var_column[var]
+            else:
+                col = self._column[str(ComponentUID(var))]
+        return self._values[:self._n, col]
+
+    def load(self, index, model=None):
+        """Load the stored solution `index` into the model"""
+        if not -self._n <= index < self._n:
+            raise IndexError("Solution index %s out of range (%s solutions)"
+                             % (index, self._n))
+        if index < 0:
+            index += self._n
+        variables = self._variables(model)
+        row = self._values[index].tolist()
+        for var, val in zip(variables, row):
+            var.set_value(None if val != val else val, valid=True)
+
+    #
+    # Serialization
+    #
+
+    def _metadata(self):
+        return {'termination': self.termination, 'labels': self.labels}
+
+    def _set_metadata(self, metadata):
+        self.termination = list(metadata['termination'])
+        self.labels = list(metadata['labels'])
+
+    @classmethod
+    def _from_arrays(cls, cuids, values, objective, metadata):
+        store = cls(cuids=cuids)
+        store._values = np.array(values, dtype=float).reshape(
+            (-1, len(store.cuids)))
+        store._objective = np.array(objective, dtype=float)
+        store._n = store._values.shape[0]
+        store._set_metadata(metadata)
+        return store
+
+    def to_npz(self, filename, compressed=True):
+        """Write the store to a NumPy .npz archive"""
+        save = np.savez_compressed if compressed else np.savez
+        save(filename,
+             cuids=np.array(self.cuids, dtype=str),
+             values=self.values,
+             objective=self.objective,
+             metadata=np.array(json.dumps(self._metadata())))
+
+    @classmethod
+    def from_npz(cls, filename):
+        """Read a store written by :meth:`to_npz`"""
+        with np.load(filename) as data:
+            return cls._from_arrays(
+                data['cuids'].tolist(), data['values'], data['objective'],
+                json.loads(str(data['metadata'])))
+
+    def to_hdf5(self, filename, group='solutions'):
+        """Write the store to a group in an HDF5 file (requires h5py)"""
+        with h5py.File(filename, 'a') as f:
+            if group in f:
+                del f[group]
+            g = f.create_group(group)
+            g.create_dataset('values', data=self.values, compression='gzip')
+            g.create_dataset('objective', data=self.objective)
+            g.create_dataset('cuids', data=self.cuids,
+                             dtype=h5py.string_dtype())
+            g.attrs['metadata'] = json.dumps(self._metadata())
+
+    @classmethod
+    def from_hdf5(cls, filename, group='solutions'):
+        """Read a store written by :meth:`to_hdf5`"""
+        with h5py.File(filename, 'r') as f:
+            g = f[group]
+            cuids = [c.decode('utf-8') if isinstance(c, bytes) else c
+                     for c in g['cuids'][()]]
+            return cls._from_arrays(
+                cuids, g['values'][()], g['objective'][()],
+                json.loads(g.attrs['metadata']))
+
+    def to_dataframe(self):
+        """Return a pandas DataFrame with one row per solution and one
+        column per variable (plus objective / termination / label
+        columns)"""
+        df = pd.DataFrame(self.values, columns=self.cuids)
+        df[_OBJECTIVE_COL] = self.objective
+        df[_TERMINATION_COL] = self.termination
+        df[_LABEL_COL] = self.labels
+        return df
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Create a store from a DataFrame produced by :meth:`to_dataframe`"""
+        meta = (_OBJECTIVE_COL, _TERMINATION_COL, _LABEL_COL)
+        cuids = [c for c in df.columns if c not in meta]
+        def _col(name):
+            return [None if v != v else v for v in df[name].tolist()]
+        return cls._from_arrays(
+            cuids, df[cuids].to_numpy(dtype=float),
+            df[_OBJECTIVE_COL].to_numpy(dtype=float),
+            {'termination': _col(_TERMINATION_COL),
+             'labels': _col(_LABEL_COL)})
+
+    def to_parquet(self, filename, **kwds):
+        """Write the store to a Parquet file (requires pandas and a
+        Parquet engine such as pyarrow)"""
+        self.to_dataframe().to_parquet(filename, **kwds)
+
+    @classmethod
+    def from_parquet(cls, filename, **kwds):
+        """Read a store written by :meth:`to_parquet`"""
+        return cls.from_dataframe(pd.read_parquet(filename, **kwds))
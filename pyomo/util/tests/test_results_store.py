@@ -0,0 +1,196 @@
+#  ___________________________________________________________________________
+#
+#  Pyomo: Python Optimization Modeling Objects
+#  Copyright 2017 National Technology and Engineering Solutions of Sandia, LLC
+#  Under the terms of Contract DE-NA0003525 with National Technology and
+#  Engineering Solutions of Sandia, LLC, the U.S. Government retains certain
+#  rights in this software.
+#  This software is distributed under the 3-clause BSD License.
+#  ___________________________________________________________________________
+
+"""Tests for the columnar SolutionStore."""
+import os
+
+import pyutilib.th as unittest
+from pyomo.common.dependencies import (
+    numpy as np, numpy_available, pandas_available, attempt_import,
+)
+from pyomo.common.tempfiles import TempfileManager
+from pyomo.core import Block, ConcreteModel, Objective, Var
+from pyomo.opt import SolverResults, TerminationCondition
+
+if numpy_available:
+    from pyomo.util.results_store import SolutionStore, h5py_available
+else:
+    h5py_available = False
+
+pyarrow, pyarrow_available = attempt_import('pyarrow')
+
+
+def _make_model():
+    m = ConcreteModel()
+    m.x = Var([1, 2, 'a'])
+    m.z = Var()
+    m.b = Block([1, 2])
+    for b in m.b.values():
+        b.y = Var()
+    m.o = Objective(expr=m.x[1] + m.z)
+    return m
+
+
+def _fill(m, k):
+    for i, v in enumerate(m.component_data_objects(Var)):
+        v.value = k * 10 + i
+    m.z.value = None
+
+
+@unittest.skipIf(not numpy_available, "numpy is not available")
+class TestSolutionStore(unittest.TestCase):
+
+    def setUp(self):
+        self.m = _make_model()
+        self.store = SolutionStore(self.m)
+        for k in range(3):
+            _fill(self.m, k)
+            results = SolverResults()
+            results.solver.termination_condition = \
+                TerminationCondition.optimal
+            self.store.append(results=results, label='s%s' % k)
+
+    def tearDown(self):
+        TempfileManager.clear_tempfiles()
+
+    def test_append(self):
+        s = self.store
+        self.assertEqual(len(s), 3)
+        self.assertEqual(s.cuids,
+                         ['x[1]', 'x[2]', 'x[a]', 'z', 'b[1].y', 'b[2].y'])
+        self.assertEqual(s.values.shape, (3, 6))
+        self.assertEqual(s.values[1, :3].tolist(), [10, 11, 12])
+        self.assertEqual(s.values[1, 4:].tolist(), [14, 15])
+        self.assertTrue(np.isnan(s.values[:, 3]).all())
+        self.assertTrue(np.isnan(s.objective).all())
+        self.assertEqual(s.termination, ['optimal']*3)
+        self.assertEqual(s.labels, ['s0', 's1', 's2'])
+        self.assertEqual(s.column(self.m.b[2].y).tolist(), [5, 15, 25])
+        self.assertEqual(s.column('x[a]').tolist(), [2, 12, 22])
+
+    def test_append_values(self):
+        s = self.store
+        idx = s.append_values([1, 2, 3, 4, 5, None], objective=7)
+        self.assertEqual(idx, 3)
+        self.assertEqual(s.objective[3], 7)
+        self.assertIsNone(s.termination[3])
+        with self.assertRaisesRegexp(ValueError, 'Expected 6 values'):
+            s.append_values([1, 2])
+
+    def test_many_appends(self):
+        s = SolutionStore(self.m)
+        for k in range(100):
+            s.append_values(range(k, k+6))
+        self.assertEqual(len(s), 100)
+        self.assertEqual(s.values[99].tolist(), list(range(99, 105)))
+
+    def test_load(self):
+        self.store.load(1)
+        self.assertEqual(self.m.x[1].value, 10)
+        self.assertEqual(self.m.b[2].y.value, 15)
+        self.assertIsNone(self.m.z.value)
+        self.store.load(-1)
+        self.assertEqual(self.m.x[1].value, 20)
+        with self.assertRaises(IndexError):
+            self.store.load(3)
+
+    def test_load_other_model(self):
+        m2 = _make_model()
+        self.store.load(2, m2)
+        self.assertEqual(m2.x['a'].value, 22)
+        self.assertEqual(m2.b[1].y.value, 24)
+        m3 = ConcreteModel()
+        m3.x = Var([1, 2, 'a'])
+        with self.assertRaisesRegexp(ValueError, 'missing 3 of the'):
+            self.store.load(0, m3)
+
+    def test_variable_subset(self):
+        s = SolutionStore(self.m, variables=[self.m.z, self.m.x[2]])
+        self.m.z.value = 5
+        s.append()
+        self.assertEqual(s.cuids, ['z', 'x[2]'])
+        self.assertEqual(s.values.tolist(), [[5, 21]])
+        self.assertEqual(s.objective.tolist(), [25])
+
+    def test_sub_block(self):
+        b = self.m.b[2]
+        b.c = Block()
+        b.c.w = Var([1, 2])
+        s = SolutionStore(b)
+        self.assertEqual(s.cuids, ['y', 'c.w[1]', 'c.w[2]'])
+        b.y.value = 7
+        b.c.w[1].value = 8
+        b.c.w[2].value = 9
+        s.append()
+        self.assertEqual(s.values.tolist(), [[7, 8, 9]])
+        self.assertEqual(s.column(b.y).tolist(), [7])
+        self.assertEqual(s.column(b.c.w[2]).tolist(), [9])
+        self.assertEqual(s.column('c.w[1]').tolist(), [8])
+        # The solution can be loaded into a model with the structure of
+        # the sub-block
+        b2 = ConcreteModel()
+        b2.y = Var()
+        b2.c = Block()
+        b2.c.w = Var([1, 2])
+        s.load(0, b2)
+        self.assertEqual(b2.c.w[2].value, 9)
+        self.assertEqual(s.column(b2.c.w[1]).tolist(), [8])
+        s = SolutionStore(self.m, variables=[self.m.b[2].y, self.m.z])
+        self.m.z.value = 3
+        s.append()
+        self.assertEqual(s.column(self.m.z).tolist(), [3])
+        self.assertEqual(s.column(self.m.b[2].y).tolist(), [7])
+        # Variables of another model are looked up by their cuid
+        m2 = _make_model()
+        self.assertEqual(s.column(m2.z).tolist(), [3])
+
+    def _check_roundtrip(self, s):
+        self.assertEqual(s.cuids, self.store.cuids)
+        np.testing.assert_array_equal(s.values, self.store.values)
+        np.testing.assert_array_equal(s.objective, self.store.objective)
+        self.assertEqual(s.termination, self.store.termination)
+        self.assertEqual(s.labels, self.store.labels)
+        with self.assertRaisesRegexp(ValueError, 'A model must be provided'):
+            s.load(1)
+        m2 = _make_model()
+        s.load(1, m2)
+        self.assertEqual(m2.b[2].y.value, 15)
+
+    def test_npz(self):
+        fname = TempfileManager.create_tempfile(suffix='.npz')
+        self.store.to_npz(fname)
+        self._check_roundtrip(SolutionStore.from_npz(fname))
+
+    @unittest.skipIf(not h5py_available, "h5py is not available")
+    def test_hdf5(self):
+        fname = TempfileManager.create_tempfile(suffix='.h5')
+        os.remove(fname)
+        self.store.to_hdf5(fname)
+        self.store.to_hdf5(fname, group='copy')
+        self._check_roundtrip(SolutionStore.from_hdf5(fname))
+        self._check_roundtrip(SolutionStore.from_hdf5(fname, group='copy'))
+
+    @unittest.skipIf(not pandas_available, "pandas is not available")
+    def test_dataframe(self):
+        df = self.store.to_dataframe()
+        self.assertEqual(df.shape, (3, 9))
+        self.assertEqual(df['b[1].y'].tolist(), [4, 14, 24])
+        self._check_roundtrip(SolutionStore.from_dataframe(df))
+
+    @unittest.skipIf(not pandas_available or not pyarrow_available,
+                     "pandas or pyarrow is not available")
+    def test_parquet(self):
+        fname = TempfileManager.create_tempfile(suffix='.parquet')
+        self.store.to_parquet(fname)
+        self._check_roundtrip(SolutionStore.from_parquet(fname))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#
+# This script measures the time to discretize a model with a large number
+# of points in a ContinuousSet using each of the discretization schemes
+# in pyomo.dae.
+#
+#   python dae_discretization_perf.py --nfe 100000 --ncp 3
+#   python dae_discretization_perf.py --nfe 1000 --states 20
+#
+# The discretization equations are generated as linear rows from stencils
+# that are computed once for each ContinuousSet, so the time should grow
+# linearly with the number of points and of states.
+#
+
+import argparse
+import time
+
+from pyomo.environ import (ConcreteModel, Var, Constraint, Set,
+                           TransformationFactory)
+from pyomo.dae import ContinuousSet, DerivativeVar
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--nfe", help="Number of finite elements",
+                    action="store", type=int, default=100000)
+parser.add_argument("--ncp", help="Number of collocation points",
+                    action="store", type=int, default=3)
+parser.add_argument("--states", help="Number of states indexed by the "
+                    "ContinuousSet", action="store", type=int, default=1)
+args = parser.parse_args()
+
+
+def make_model(nstates):
+    m = ConcreteModel()
+    m.t = ContinuousSet(bounds=(0, 1))
+    m.s = Set(initialize=range(nstates))
+    m.x = Var(m.t, m.s)
+    m.dx = DerivativeVar(m.x, wrt=m.t)
+    m.dx2 = DerivativeVar(m.x, wrt=(m.t, m.t))
+    def _ode(m, t, s):
+        return m.dx2[t, s] + m.dx[t, s] == -m.x[t, s]
+    m.ode = Constraint(m.t, m.s, rule=_ode)
+    return m
+
+
+print("%-40s %10s %12s" % ("", "Points", "Time [s]"))
+for name, options in (
+        ('finite_difference BACKWARD',
+         ('dae.finite_difference', dict(scheme='BACKWARD'))),
+        ('finite_difference CENTRAL',
+         ('dae.finite_difference', dict(scheme='CENTRAL'))),
+        ('collocation LAGRANGE-RADAU',
+         ('dae.collocation', dict(scheme='LAGRANGE-RADAU', ncp=args.ncp))),
+        ('collocation LAGRANGE-LEGENDRE',
+         ('dae.collocation', dict(scheme='LAGRANGE-LEGENDRE',
+                                  ncp=args.ncp)))):
+    xfrm, kwds = options
+    m = make_model(args.states)
+    start = time.time()
+    TransformationFactory(xfrm).apply_to(m, nfe=args.nfe, **kwds)
+    print("%-40s %10d %12.3f" % (name, len(m.t), time.time() - start))
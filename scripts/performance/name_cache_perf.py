@@ -0,0 +1,88 @@
+#
+# This script measures the effect of the per-model name cache
+# (Block.enable_name_cache()) on repeatedly writing LP files with
+# symbolic solver labels, on looking up component names, and on
+# naming variables while components are being added to the model (as a
+# transformation that names the constraints it creates after variables
+# would do).
+#
+#   python name_cache_perf.py --size 200 --nwrites 5
+#
+
+import argparse
+import os
+import tempfile
+import time
+
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           Block, RangeSet, NonNegativeReals)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--size", help="Number of variables per sub-block",
+                    action="store", type=int, default=200)
+parser.add_argument("--blocks", help="Number of sub-blocks",
+                    action="store", type=int, default=20)
+parser.add_argument("--nwrites", help="Number of times to write the model",
+                    action="store", type=int, default=5)
+args = parser.parse_args()
+
+
+def make_model(nblocks, n):
+    m = ConcreteModel()
+    m.I = RangeSet(n)
+    m.B = RangeSet(nblocks)
+    def _block(b, k):
+        b.x = Var(m.I, within=NonNegativeReals)
+        b.y = Var(m.I, [0, 1])
+        b.c = Constraint(m.I, rule=lambda b, i: b.x[i] + b.y[i,0] >= i)
+        b.d = Constraint(m.I, rule=lambda b, i: b.x[i] - b.y[i,1] <= k)
+    m.b = Block(m.B, rule=_block)
+    m.o = Objective(expr=sum(m.b[k].x[i] for k in m.B for i in m.I))
+    return m
+
+
+def time_writes(m, fname):
+    start = time.time()
+    for i in range(args.nwrites):
+        m.write(fname, io_options={'symbolic_solver_labels': True})
+    return (time.time() - start) / args.nwrites
+
+
+def time_names(m):
+    variables = list(m.component_data_objects(Var, descend_into=True))
+    start = time.time()
+    for i in range(args.nwrites):
+        for v in variables:
+            v.name
+    return (time.time() - start) / args.nwrites
+
+
+def time_build(m):
+    variables = list(m.component_data_objects(Var, descend_into=True))
+    start = time.time()
+    for i, v in enumerate(variables):
+        m.add_component('new_%d' % i, Var())
+        v.name
+    for i in range(len(variables)):
+        m.del_component('new_%d' % i)
+    return time.time() - start
+
+
+m = make_model(args.blocks, args.size)
+nvars = len(list(m.component_data_objects(Var, descend_into=True)))
+print("Model with %d variables in %d blocks" % (nvars, args.blocks))
+fd, fname = tempfile.mkstemp(suffix='.lp')
+os.close(fd)
+try:
+    print("%-24s %16s %16s %16s" % ("", "LP write [s]", "all names [s]",
+                                     "add + name [s]"))
+    print("%-24s %16.4f %16.4f %16.4f" % (
+        "no name cache", time_writes(m, fname), time_names(m),
+        time_build(m)))
+    m.enable_name_cache()
+    print("%-24s %16.4f %16.4f %16.4f" % (
+        "name cache", time_writes(m, fname), time_names(m), time_build(m)))
+    m.disable_name_cache()
+finally:
+    os.remove(fname)
@@ -0,0 +1,44 @@
+#
+# This script measures the time to presolve models with a chain of
+# equalities x[i+1] == x[i] of increasing length with the contrib.presolve
+# transformation, and compares it with contrib.aggregate_vars.
+#
+#   python presolve_perf.py --links 1000 4000 16000 64000
+#
+# Every variable of the chain is aggregated into a single one, so the time
+# of both transformations should grow linearly with the number of links.
+#
+
+import argparse
+import time
+
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           TransformationFactory, RangeSet)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--links", help="Numbers of equality links",
+                    action="store", type=int, nargs='+',
+                    default=[1000, 4000, 16000, 64000])
+args = parser.parse_args()
+
+
+def make_model(nlinks):
+    m = ConcreteModel()
+    m.I = RangeSet(0, nlinks)
+    m.x = Var(m.I, bounds=(0, 100), initialize=1)
+    m.link = Constraint(RangeSet(nlinks),
+                        rule=lambda m, i: m.x[i] == m.x[i - 1])
+    m.o = Objective(expr=m.x[0] * m.x[nlinks])
+    return m
+
+
+print("%-10s %20s %20s" % ("Links", "presolve [s]", "aggregate_vars [s]"))
+for nlinks in args.links:
+    times = []
+    for name in ('contrib.presolve', 'contrib.aggregate_vars'):
+        m = make_model(nlinks)
+        start = time.time()
+        TransformationFactory(name).apply_to(m)
+        times.append(time.time() - start)
+    print("%-10d %20.3f %20.3f" % (nlinks, times[0], times[1]))
@@ -0,0 +1,80 @@
+#
+# This script compares the per-solve latency of repeatedly solving
+# small LPs serially with SolverFactory versus dispatching them to the
+# 'pool' solver manager (persistent worker processes).
+#
+#   python solver_pool_perf.py --nsolves 500 --size 20 --workers 4
+#
+
+import argparse
+import random
+import sys
+import time
+
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           NonNegativeReals, SolverFactory,
+                           SolverManagerFactory, RangeSet)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--nsolves", help="The number of subproblems to solve",
+                    action="store", type=int, default=200)
+parser.add_argument("--size", help="Number of variables per subproblem",
+                    action="store", type=int, default=20)
+parser.add_argument("--workers", help="Number of pool workers",
+                    action="store", type=int, default=4)
+parser.add_argument("--solvers", help="Comma-separated solver names",
+                    action="store", default="cbc,glpk,gurobi_direct,cplex_direct")
+args = parser.parse_args()
+
+
+def make_subproblem(n, seed):
+    """A small random transportation-like LP"""
+    rnd = random.Random(seed)
+    m = ConcreteModel()
+    m.I = RangeSet(n)
+    m.x = Var(m.I, within=NonNegativeReals, bounds=(0, 10))
+    m.c = Constraint(range(n // 2), rule=lambda m, j: sum(
+        rnd.randint(1, 5) * m.x[i] for i in m.I) >= rnd.randint(n, 5*n))
+    m.o = Objective(expr=sum(rnd.random() * m.x[i] for i in m.I))
+    return m
+
+
+def run_serial(solver, models):
+    opt = SolverFactory(solver)
+    start = time.time()
+    for m in models:
+        opt.solve(m)
+    return time.time() - start
+
+
+def run_pool(solver, models, workers):
+    with SolverManagerFactory('pool', num_workers=workers) as mngr:
+        # Start the workers (and construct the solver in every worker)
+        # outside of the timed region
+        mngr.wait_all([mngr.queue(models[0], opt=solver)
+                       for i in range(workers)])
+        start = time.time()
+        handles = [mngr.queue(m, opt=solver) for m in models]
+        mngr.wait_all(handles)
+        for ah in handles:
+            mngr.get_results(ah)
+        return time.time() - start
+
+
+models = [make_subproblem(args.size, i) for i in range(args.nsolves)]
+print("Solving %d LPs with %d variables" % (args.nsolves, args.size))
+print("%-16s %-22s %12s %14s" % ("solver", "mode", "total [s]",
+                                  "per solve [ms]"))
+for solver in args.solvers.split(','):
+    if not SolverFactory(solver).available(exception_flag=False):
+        print("%-16s (not available)" % (solver,))
+        continue
+    for mode, f in (('serial', lambda: run_serial(solver, models)),
+                    ('pool (1 worker)', lambda: run_pool(solver, models, 1)),
+                    ('pool (%d workers)' % args.workers,
+                     lambda: run_pool(solver, models, args.workers))):
+        total = f()
+        print("%-16s %-22s %12.3f %14.3f"
+              % (solver, mode, total, 1000. * total / len(models)))
+    sys.stdout.flush()
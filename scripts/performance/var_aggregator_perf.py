@@ -0,0 +1,86 @@
+#
+# This script measures the time to aggregate the variables of models with
+# long chains of equalities x[i+1] == x[i] (as in network flow and DAE
+# models) with the contrib.aggregate_vars transformation.
+#
+#   python var_aggregator_perf.py --links 1000000 --chain 1000
+#
+# For comparison, the equality sets are also built by merging ComponentSets
+# (as contrib.aggregate_vars used to), which takes time quadratic in the
+# chain length; this is only done for the smaller --legacy-links model.
+#
+
+import argparse
+import time
+
+from pyomo.common.collections import ComponentMap, ComponentSet
+from pyomo.contrib.preprocessing.plugins.var_aggregator import (
+    _build_equality_set, _get_equality_linked_variables)
+from pyomo.environ import (ConcreteModel, Var, Constraint, Objective,
+                           TransformationFactory, RangeSet)
+
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--links", help="Number of equality links",
+                    action="store", type=int, default=10**6)
+parser.add_argument("--chain", help="Number of links in each chain",
+                    action="store", type=int, default=1000)
+parser.add_argument("--legacy-links", help="Number of equality links in the "
+                    "model used to compare with merging ComponentSets",
+                    action="store", type=int, default=20000)
+args = parser.parse_args()
+
+
+def make_model(nlinks, chain):
+    m = ConcreteModel()
+    m.I = RangeSet(0, nlinks)
+    m.x = Var(m.I, bounds=(0, 100), initialize=1)
+    def _link(m, i):
+        if i % (chain + 1) == 0:
+            return Constraint.Skip
+        return m.x[i] == m.x[i - 1]
+    m.link = Constraint(m.I, rule=_link)
+    m.c = Constraint(expr=sum(m.x[i] for i in m.I if i % 97 == 0) >= 1)
+    m.o = Objective(expr=m.x[nlinks])
+    return m
+
+
+def legacy_build_equality_set(model):
+    eq_var_map = ComponentMap()
+    for constraint in model.component_data_objects(
+            ctype=Constraint, active=True, descend_into=True):
+        eq_linked_vars = _get_equality_linked_variables(constraint)
+        if not eq_linked_vars:
+            continue
+        v1, v2 = eq_linked_vars
+        set1 = eq_var_map.get(v1, ComponentSet((v1, v2)))
+        set2 = eq_var_map.get(v2, (v2,))
+        if set1 is set2:
+            continue
+        set1.update(set2)
+        for v in set1:
+            eq_var_map[v] = set1
+    return eq_var_map
+
+
+def timed(func, *args):
+    start = time.time()
+    ans = func(*args)
+    return ans, time.time() - start
+
+
+print("%-40s %12s" % ("", "Time [s]"))
+m = make_model(args.legacy_links, args.chain)
+_, t = timed(legacy_build_equality_set, m)
+print("%-40s %12.3f" % ("%d links: merging ComponentSets"
+                        % args.legacy_links, t))
+_, t = timed(_build_equality_set, m)
+print("%-40s %12.3f" % ("%d links: union-find" % args.legacy_links, t))
+
+m, t = timed(make_model, args.links, args.chain)
+print("%-40s %12.3f" % ("%d links: build model" % args.links, t))
+_, t = timed(_build_equality_set, m)
+print("%-40s %12.3f" % ("%d links: union-find" % args.links, t))
+_, t = timed(TransformationFactory('contrib.aggregate_vars').apply_to, m)
+print("%-40s %12.3f" % ("%d links: aggregate_vars" % args.links, t))
+print("%d aggregate variables" % len(m._var_aggregator_info.z))